@@ -30,7 +30,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 
-from .routers import crawler_router, data_router, websocket_router
+from .routers import crawler_router, data_router, proxy_router, websocket_router
 
 app = FastAPI(
     title="MediaCrawler WebUI API",
@@ -58,6 +58,7 @@ app.add_middleware(
 # Register routers
 app.include_router(crawler_router, prefix="/api")
 app.include_router(data_router, prefix="/api")
+app.include_router(proxy_router, prefix="/api")
 app.include_router(websocket_router, prefix="/api")
 
 
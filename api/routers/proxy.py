@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/api/routers/proxy.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException
+
+import config
+from cache.cache_factory import CacheFactory
+from proxy.proxy_reputation import load_reputation_summaries
+
+router = APIRouter(prefix="/proxy", tags=["proxy"])
+
+
+@router.get("/reputation")
+async def get_proxy_reputation(provider: Optional[str] = None, limit: int = 20):
+    """Get the reputation the crawler runs persisted for each proxy provider, its IP ranges and proxies"""
+    try:
+        cache = CacheFactory.create_cache(config.IP_PROXY_REPUTATION_CACHE_TYPE)
+        providers = await asyncio.to_thread(load_reputation_summaries, cache, provider, limit)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Proxy reputation store unavailable: {e}")
+    return {"providers": providers}
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/benchmarks/bench_douyin_sign.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# @Desc    : Throughput of Douyin a_bogus signing, PyExecJS (one node process per call) against the node worker pool
+#
+#    python -m benchmarks.bench_douyin_sign
+#    python -m benchmarks.bench_douyin_sign --count 500 --workers 1 2 4
+
+import argparse
+import asyncio
+import time
+from typing import List
+
+from media_platform.douyin.help import DOUYIN_SIGN_JS, get_a_bogus_from_js
+from tools.js_worker_pool import JsCallStats, JsWorkerPool, find_node_binary
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36"
+SEARCH_URI = "/aweme/v1/web/general/search/single/"
+
+
+def build_query(i: int) -> str:
+    return (
+        "device_platform=webapp&aid=6383&channel=channel_pc_web&version_code=190600&version_name=19.6.0"
+        f"&keyword=%E7%BC%96%E7%A8%8B&offset={i * 10}&count=10&search_id=&webid=7{i:018d}"
+        "&msToken=&publish_time=0&sort_type=0&search_channel=aweme_general"
+    )
+
+
+def bench_execjs(count: int) -> float:
+    get_a_bogus_from_js(SEARCH_URI, build_query(0), USER_AGENT)  # compile outside the timing
+    start = time.perf_counter()
+    for i in range(count):
+        get_a_bogus_from_js(SEARCH_URI, build_query(i), USER_AGENT)
+    return count / (time.perf_counter() - start)
+
+
+async def bench_pool(count: int, workers: int) -> float:
+    pool = JsWorkerPool(DOUYIN_SIGN_JS, size=workers, timeout=30, name=f"bench-{workers}")
+    # start and JIT-warm every worker outside the timing
+    await pool.sign_many([("sign_datail", (build_query(i), USER_AGENT)) for i in range(workers * 20)])
+    pool.stats = JsCallStats()
+    start = time.perf_counter()
+    await pool.sign_many([("sign_datail", (build_query(i), USER_AGENT)) for i in range(count)])
+    elapsed = time.perf_counter() - start
+    stats = pool.stats.snapshot()
+    await pool.close()
+    print(f"  pool x{workers}: p50 {stats['p50_ms']}ms  p95 {stats['p95_ms']}ms  (latency includes queueing)")
+    return count / elapsed
+
+
+async def main(count: int, workers: List[int], execjs_count: int) -> None:
+    if not find_node_binary():
+        print("node is not installed, the pool would fall back to PyExecJS")
+        return
+    results = [("PyExecJS", bench_execjs(execjs_count))]
+    for size in workers:
+        results.append((f"node pool x{size}", await bench_pool(count, size)))
+    print(f"{'signer':<16}{'signatures/s':>14}{'speedup':>10}")
+    for name, rate in results:
+        print(f"{name:<16}{rate:>14.1f}{rate / results[0][1]:>9.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=1000, help="signatures per pool run")
+    parser.add_argument("--execjs-count", type=int, default=20, help="signatures for the PyExecJS baseline")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+    asyncio.run(main(args.count, args.workers, args.execjs_count))
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/benchmarks/bench_json_codec.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# @Desc    : Micro-benchmarks of tools.json_codec against the standard library on crawler-sized payloads
+#
+#    python -m benchmarks.bench_json_codec
+#    python -m benchmarks.bench_json_codec --cassette data/cassettes/xhs.jsonl.gz   # use recorded responses
+
+import argparse
+import json
+import random
+import string
+import timeit
+from typing import Any, Callable, Dict, List, Tuple
+
+from tools import json_codec
+from tools.http_replay import Cassette
+
+CHINESE_CHARS = "的一是不了人我在有他这中大来上个国到说们为子和你地出道也时年得就那要下以生会自之着去"
+
+
+def _text(rnd: random.Random, length: int) -> str:
+    return "".join(rnd.choice(CHINESE_CHARS + string.ascii_letters) for _ in range(length))
+
+
+def build_search_response(rnd: random.Random, count: int = 20) -> Dict:
+    """Shape and size of an XHS search/notes page (~20 notes)"""
+    items = []
+    for i in range(count):
+        items.append({
+            "id": "".join(rnd.choice("0123456789abcdef") for _ in range(24)),
+            "model_type": "note",
+            "xsec_token": "AB" + "".join(rnd.choice(string.ascii_letters) for _ in range(40)),
+            "note_card": {
+                "type": "normal",
+                "display_title": _text(rnd, 30),
+                "user": {"user_id": str(rnd.randint(10 ** 15, 10 ** 16)), "nickname": _text(rnd, 8), "avatar": "https://sns-avatar-qc.xhscdn.com/avatar/" + _text(rnd, 20)},
+                "interact_info": {"liked": False, "liked_count": str(rnd.randint(0, 100000)), "collected_count": str(rnd.randint(0, 5000))},
+                "cover": {"height": 1440, "width": 1080, "url_default": "http://sns-webpic-qc.xhscdn.com/" + _text(rnd, 60)},
+                "image_list": [{"height": 1440, "width": 1080, "info_list": [{"image_scene": "WB_DFT", "url": "http://sns-webpic-qc.xhscdn.com/" + _text(rnd, 60)}]} for _ in range(4)],
+                "tag_list": [{"id": str(rnd.randint(1, 10 ** 9)), "name": _text(rnd, 4), "type": "topic"} for _ in range(5)],
+                "desc": _text(rnd, 300),
+            },
+        })
+    return {"code": 0, "success": True, "msg": "成功", "data": {"has_more": True, "items": items}}
+
+
+def build_comment_response(rnd: random.Random, count: int = 10) -> Dict:
+    comments = [{
+        "id": "".join(rnd.choice("0123456789abcdef") for _ in range(24)),
+        "content": _text(rnd, 80),
+        "like_count": str(rnd.randint(0, 1000)),
+        "create_time": 1700000000000 + i,
+        "ip_location": "上海",
+        "user_info": {"user_id": "".join(rnd.choice("0123456789abcdef") for _ in range(24)), "nickname": _text(rnd, 8), "image": "https://sns-avatar-qc.xhscdn.com/avatar/" + _text(rnd, 20)},
+        "sub_comments": [],
+        "pictures": [],
+    } for i in range(count)]
+    return {"code": 0, "success": True, "msg": "成功", "data": {"cursor": "abc", "has_more": True, "comments": comments}}
+
+
+def build_sign_payload(rnd: random.Random) -> Dict:
+    """XHS search POST body, signed with its compact json form"""
+    return {
+        "keyword": _text(rnd, 6),
+        "page": 1,
+        "page_size": 20,
+        "search_id": "".join(rnd.choice(string.ascii_letters + string.digits) for _ in range(21)),
+        "sort": "general",
+        "note_type": 0,
+        "ext_flags": [],
+        "image_formats": ["jpg", "webp", "avif"],
+    }
+
+
+def load_cassette_bodies(path: str) -> List[bytes]:
+    cassette = Cassette(path).load()
+    bodies = [Cassette.build_response(interaction).content for interaction in cassette]
+    return [body for body in bodies if body[:1] in (b"{", b"[")]
+
+
+def bench(name: str, baseline: Callable[[], Any], candidate: Callable[[], Any], number: int) -> Tuple[float, float]:
+    base = min(timeit.repeat(baseline, number=number, repeat=5)) / number * 1e6
+    cand = min(timeit.repeat(candidate, number=number, repeat=5)) / number * 1e6
+    print(f"{name:<32} stdlib {base:9.1f}us   {json_codec.BACKEND:<7} {cand:9.1f}us   x{base / cand:5.2f}")
+    return base, cand
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON codec micro-benchmarks")
+    parser.add_argument("--cassette", default="", help="Recorded cassette, its JSON bodies are used as decode payloads")
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    rnd = random.Random(42)
+    search = build_search_response(rnd)
+    comments = build_comment_response(rnd)
+    sign_payload = build_sign_payload(rnd)
+    stored_items = [comments["data"]["comments"][i % 10] for i in range(500)]
+    search_bytes = json.dumps(search, ensure_ascii=False).encode("utf-8")
+    comments_bytes = json.dumps(comments, ensure_ascii=False).encode("utf-8")
+    assert json_codec.dumps_compact(sign_payload) == json.dumps(sign_payload, separators=(",", ":"), ensure_ascii=False)
+
+    print(f"backend: {json_codec.BACKEND}, search page {len(search_bytes) / 1024:.1f}KB, comment page {len(comments_bytes) / 1024:.1f}KB")
+    n = args.number
+    bench("loads search page", lambda: json.loads(search_bytes), lambda: json_codec.loads(search_bytes), n)
+    bench("loads comment page", lambda: json.loads(comments_bytes), lambda: json_codec.loads(comments_bytes), n)
+    # dumps_compact() is always the standard library, this shows what a fast encoder would gain on signed payloads
+    bench("dumps sign payload",
+          lambda: json.dumps(sign_payload, separators=(",", ":"), ensure_ascii=False),
+          lambda: json_codec.dumps(sign_payload), n * 50)
+    bench("dumps search page",
+          lambda: json.dumps(search, separators=(",", ":"), ensure_ascii=False),
+          lambda: json_codec.dumps(search), n)
+    bench("dumps indent=4 json file (500)",
+          lambda: json.dumps(stored_items, ensure_ascii=False, indent=4),
+          lambda: json_codec.dumps(stored_items, indent=4), max(n // 10, 1))
+
+    if args.cassette:
+        bodies = load_cassette_bodies(args.cassette)
+        print(f"cassette: {len(bodies)} json bodies, {sum(map(len, bodies)) / 1024:.1f}KB")
+        bench("loads cassette bodies",
+              lambda: [json.loads(b) for b in bodies],
+              lambda: [json_codec.loads(b) for b in bodies], max(n // 20, 1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/benchmarks/bench_local_cache.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# @Desc    : Micro-benchmark of cache.local_cache.ExpiringLocalCache at 1M keys
+#
+#    python -m benchmarks.bench_local_cache
+#    python -m benchmarks.bench_local_cache --keys 200000
+
+import argparse
+import fnmatch
+import time
+from typing import Callable
+
+from cache.local_cache import ExpiringLocalCache
+
+
+def timed(name: str, ops: int, func: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{name:<40} {elapsed * 1000:10.1f}ms   {elapsed / max(ops, 1) * 1e9:8.0f}ns/op")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ExpiringLocalCache micro-benchmark")
+    parser.add_argument("--keys", type=int, default=1_000_000)
+    args = parser.parse_args()
+    n = args.keys
+    keys = [f"{('xhs', 'dy', 'bili', 'ks')[i % 4]}_note:{i}" for i in range(n)]
+
+    cache = ExpiringLocalCache(max_entries=0, max_bytes=0)
+    # a quarter of the keys expire after a minute, the rest live an hour
+    timed(f"set {n} keys", n, lambda: [cache.set(key, i, 60 if i % 4 == 0 else 3600) for i, key in enumerate(keys)])
+    timed(f"get {n} hits", n, lambda: [cache.get(key) for key in keys])
+    timed(f"get {n} misses", n, lambda: [cache.get(f"missing:{i}") for i in range(n)])
+    timed("keys('bili_note:1234*') builds index", 1, lambda: cache.keys("bili_note:1234*"))
+    timed("keys('bili_note:1234*') prefix index", 1, lambda: cache.keys("bili_note:1234*"))
+    timed("same glob, full fnmatch scan", 1, lambda: fnmatch.filter(cache._cache_container.keys(), "bili_note:1234*"))
+    timed("keys('*:99999?') without prefix", 1, lambda: cache.keys("*:99999?"))
+    # pretend two minutes passed, only the expired quarter is touched
+    timed(f"purge {n // 4} expired keys", n // 4, lambda: cache._purge_expired(time.monotonic() + 120))
+    print(f"stats: {cache.stats()}")
+
+    bounded = ExpiringLocalCache(max_entries=n // 10, max_bytes=0)
+    timed(f"set {n} keys, max_entries={n // 10}", n, lambda: [bounded.set(key, i, 3600) for i, key in enumerate(keys)])
+    print(f"stats: {bounded.stats()}")
+
+
+if __name__ == "__main__":
+    main()
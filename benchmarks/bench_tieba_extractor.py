@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/benchmarks/bench_tieba_extractor.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# @Desc    : Benchmark suite of TieBaExtractor over the saved pages in media_platform/tieba/test_data
+#
+#    python -m benchmarks.bench_tieba_extractor
+#    python -m benchmarks.bench_tieba_extractor --pool-size 4 --pages 32   # process pool throughput
+
+import argparse
+import asyncio
+import os
+import time
+import timeit
+from typing import Callable, List, Tuple
+
+import config
+from media_platform.tieba import help as tieba_help
+from media_platform.tieba.help import TieBaExtractor
+from model.m_baidu_tieba import TiebaComment
+
+TEST_DATA_DIR = os.path.join(os.path.dirname(tieba_help.__file__), "test_data")
+
+PARENT_COMMENT = TiebaComment(comment_id="150726491368", content="", user_link="", user_nickname="", user_avatar="",
+                              publish_time="", parent_comment_id="", note_id="9117905169",
+                              note_url="https://tieba.baidu.com/p/9117905169", tieba_id="4513750",
+                              tieba_name="网球风云吧", tieba_link="https://tieba.baidu.com/f?kw=网球风云吧")
+
+
+def read_page(name: str) -> str:
+    with open(os.path.join(TEST_DATA_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def build_cases(extractor: TieBaExtractor) -> List[Tuple[str, Callable, str, tuple]]:
+    return [
+        ("search_keyword_notes.html", extractor.extract_search_note_list, read_page("search_keyword_notes.html"), ()),
+        ("tieba_note_list.html", extractor.extract_tieba_note_list, read_page("tieba_note_list.html"), ()),
+        ("note_detail.html", extractor.extract_note_detail, read_page("note_detail.html"), ()),
+        ("note_comments.html", extractor.extract_tieba_note_parment_comments, read_page("note_comments.html"), ("9117905169",)),
+        ("note_sub_comments.html", extractor.extract_tieba_note_sub_comments, read_page("note_sub_comments.html"), (PARENT_COMMENT,)),
+    ]
+
+
+def bench_inline(cases, number: int) -> None:
+    print(f"{'page':<26}{'size':>8}{'items':>7}{'ms/page':>10}")
+    for name, func, page, args in cases:
+        res = func(page, *args)
+        items = len(res) if isinstance(res, list) else 1
+        cost = min(timeit.repeat(lambda: func(page, *args), number=number, repeat=3)) / number * 1000
+        print(f"{name:<26}{len(page) / 1024:>7.0f}K{items:>7}{cost:>10.2f}")
+
+
+async def bench_pool(cases, pages: int, pool_size: int) -> None:
+    """
+    Parse `pages` large pages concurrently and measure wall time and how long the event loop was blocked
+    """
+    name, func, page, args = cases[3]
+    config.TIEBA_EXTRACT_PROCESS_MIN_CHARS = 0
+    for size in (0, pool_size):
+        config.TIEBA_EXTRACT_PROCESS_POOL_SIZE = size
+        tieba_help.shutdown_process_pool()
+        if size:
+            # warm the workers up, spawning them is not part of the steady state
+            await asyncio.gather(*[tieba_help.extract_in_process_pool(func, page, *args) for _ in range(size)])
+
+        max_block = 0.0
+        stop = False
+
+        async def heartbeat():
+            nonlocal max_block
+            while not stop:
+                tick = time.perf_counter()
+                await asyncio.sleep(0.005)
+                max_block = max(max_block, time.perf_counter() - tick - 0.005)
+
+        beat = asyncio.create_task(heartbeat())
+        start = time.perf_counter()
+        await asyncio.gather(*[tieba_help.extract_in_process_pool(func, page, *args) for _ in range(pages)])
+        elapsed = time.perf_counter() - start
+        stop = True
+        await beat
+        label = f"process pool x{size}" if size else "inline"
+        print(f"{label:<18} {pages} x {name}: {elapsed * 1000:8.1f}ms total, event loop blocked up to {max_block * 1000:6.1f}ms")
+    tieba_help.shutdown_process_pool()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TieBaExtractor benchmark over media_platform/tieba/test_data")
+    parser.add_argument("--number", type=int, default=5)
+    parser.add_argument("--pages", type=int, default=16, help="Pages parsed concurrently in the pool benchmark")
+    parser.add_argument("--pool-size", type=int, default=max(config.TIEBA_EXTRACT_PROCESS_POOL_SIZE, 2))
+    args = parser.parse_args()
+
+    cases = build_cases(TieBaExtractor())
+    bench_inline(cases, args.number)
+    asyncio.run(bench_pool(cases, args.pages, args.pool_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/benchmarks/bench_xhs_extractor.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# @Desc    : Benchmark of XiaoHongShuExtractor note detail extraction, targeted subtree vs full-state decamelize
+#
+#    python -m benchmarks.bench_xhs_extractor                                  # synthetic note pages
+#    python -m benchmarks.bench_xhs_extractor --pages "data/xhs/pages/*.html"   # saved note pages, file name is the note id
+
+import argparse
+import glob
+import json
+import os
+import random
+import re
+import string
+import timeit
+from typing import Dict, List, Tuple
+
+import humps
+
+from media_platform.xhs.extractor import XiaoHongShuExtractor
+
+CHINESE_CHARS = "的一是不了人我在有他这中大来上个国到说们为子和你地出道也时年得就那要下以生会自之着去"
+
+
+def _text(rnd: random.Random, length: int) -> str:
+    return "".join(rnd.choice(CHINESE_CHARS + string.ascii_letters) for _ in range(length))
+
+
+def _hex_id(rnd: random.Random) -> str:
+    return "".join(rnd.choice("0123456789abcdef") for _ in range(24))
+
+
+def _js(value) -> str:
+    """JSON text with `undefined` values, as the page serializes its store"""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).replace('"__undefined__"', "undefined")
+
+
+def _note(rnd: random.Random, note_id: str) -> Dict:
+    return {
+        "noteId": note_id,
+        "type": "normal",
+        "title": _text(rnd, 20),
+        "desc": _text(rnd, 600),
+        "time": 1700000000000,
+        "lastUpdateTime": 1700000000000,
+        "ipLocation": "上海",
+        "xsecToken": "AB" + _text(rnd, 40),
+        "user": {"userId": _hex_id(rnd), "nickname": _text(rnd, 8), "avatar": "https://sns-avatar-qc.xhscdn.com/avatar/" + _text(rnd, 30), "xsecToken": "__undefined__"},
+        "interactInfo": {"liked": False, "likedCount": "1024", "collected": False, "collectedCount": "233", "commentCount": "56", "shareCount": "12", "followed": False, "relation": "none"},
+        "imageList": [{"width": 1080, "height": 1440, "urlDefault": "http://sns-webpic-qc.xhscdn.com/" + _text(rnd, 60), "infoList": [{"imageScene": "WB_DFT", "url": "http://sns-webpic-qc.xhscdn.com/" + _text(rnd, 60)}], "livePhoto": False, "stream": {}} for _ in range(9)],
+        "tagList": [{"id": _hex_id(rnd), "name": _text(rnd, 4), "type": "topic"} for _ in range(6)],
+        "atUserList": [],
+        "shareInfo": {"unShare": False},
+        "video": "__undefined__",
+    }
+
+
+def build_note_page(rnd: random.Random, note_id: str, feed_size: int = 200) -> str:
+    """
+    A note page with the same layout as www.xiaohongshu.com/explore/{note_id}:
+    a large __INITIAL_STATE__ where the note is a small part next to the feed, search and user stores
+    """
+    feeds = [{"id": _hex_id(rnd), "modelType": "note", "xsecToken": "AB" + _text(rnd, 40), "noteCard": _note(rnd, _hex_id(rnd))} for _ in range(feed_size)]
+    state = {
+        "global": {"appSettings": {"notificationInterval": 30, "prefetchTimeout": 3001}, "serverTime": 1700000000000, "fullscreen": "__undefined__"},
+        "user": {"loggedIn": True, "userInfo": {"userId": _hex_id(rnd), "nickname": _text(rnd, 8)}, "userPageData": {}},
+        "feed": {"query": {"cursorScore": "", "num": 35, "refreshType": 1}, "feeds": feeds},
+        "search": {"searchContext": {"keyword": _text(rnd, 4), "page": 1}, "feeds": feeds[: feed_size // 4]},
+        "note": {
+            "currentNoteId": note_id,
+            "firstNoteId": note_id,
+            "noteDetailMap": {
+                note_id: {"comments": {"list": [], "cursor": "", "hasMore": True, "loading": False}, "currentTime": 1700000000000, "note": _note(rnd, note_id)},
+                _hex_id(rnd): {"comments": {"list": []}, "note": {}},
+            },
+            "serverRequestInfo": {"state": "success", "errorCode": 0},
+        },
+        "nioStore": {"collectionListDataSource": [], "isLoading": False},
+    }
+    return (
+        "<!doctype html><html><head><meta charset=\"utf-8\"><title>小红书</title></head><body>"
+        + "<div id=\"app\">" + "<div class=\"feeds-container\"></div>" * 200 + "</div>"
+        + "<script>window.__INITIAL_STATE__=" + _js(state) + "</script>"
+        + "<script src=\"//fe-static.xhscdn.com/formula-static/xhs-pc-web/public/resource/js/index.js\"></script>"
+        + "</body></html>"
+    )
+
+
+def legacy_extract_note_detail(note_id: str, html: str) -> Dict:
+    """The former implementation: greedy regex over the page and decamelize of the whole state"""
+    state = re.findall(r"window.__INITIAL_STATE__=({.*})</script>", html)[0].replace("undefined", '""')
+    note_dict = humps.decamelize(json.loads(state))
+    return note_dict["note"]["note_detail_map"][note_id]["note"]
+
+
+def load_pages(pattern: str) -> List[Tuple[str, str]]:
+    pages = []
+    for path in sorted(glob.glob(pattern)):
+        with open(path, encoding="utf-8") as f:
+            pages.append((os.path.splitext(os.path.basename(path))[0], f.read()))
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="XiaoHongShuExtractor benchmark")
+    parser.add_argument("--pages", default="", help="Glob of saved note pages named {note_id}.html")
+    parser.add_argument("--count", type=int, default=5, help="Synthetic pages to generate when --pages is not given")
+    parser.add_argument("--number", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.pages:
+        pages = load_pages(args.pages)
+    else:
+        rnd = random.Random(42)
+        pages = []
+        for _ in range(args.count):
+            note_id = _hex_id(rnd)
+            pages.append((note_id, build_note_page(rnd, note_id)))
+    if not pages:
+        print("no pages found")
+        return
+
+    extractor = XiaoHongShuExtractor()
+    for note_id, html in pages:
+        assert extractor.extract_note_detail_from_html(note_id, html) is not None, note_id
+
+    def run_legacy():
+        for note_id, html in pages:
+            legacy_extract_note_detail(note_id, html)
+
+    def run_targeted():
+        for note_id, html in pages:
+            extractor.extract_note_detail_from_html(note_id, html)
+
+    total_kb = sum(len(html) for _, html in pages) / 1024
+    legacy = min(timeit.repeat(run_legacy, number=args.number, repeat=3)) / args.number / len(pages) * 1000
+    targeted = min(timeit.repeat(run_targeted, number=args.number, repeat=3)) / args.number / len(pages) * 1000
+    print(f"pages: {len(pages)}, avg size {total_kb / len(pages):.0f}KB")
+    print(f"full state decamelize  {legacy:8.2f}ms/page")
+    print(f"targeted subtree       {targeted:8.2f}ms/page   x{legacy / targeted:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/benchmarks/bench_xhs_signer_pool.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# @Desc    : Signing throughput of XhsSignerPool with 1, 2, 4 and 8 pages
+#
+# Needs a Playwright chromium (playwright install chromium).
+# By default the pages run a synthetic window.mnsv2 that burns about the same CPU as the real one,
+# --live loads www.xiaohongshu.com and signs with the real function.
+#
+#    python -m benchmarks.bench_xhs_signer_pool
+#    python -m benchmarks.bench_xhs_signer_pool --live --count 400 --pages 1 2 4 8
+
+import argparse
+import asyncio
+import time
+from typing import List
+from urllib.parse import quote
+
+from playwright.async_api import async_playwright
+
+from media_platform.xhs.sign_pool import XhsSignerPool
+
+SYNTHETIC_PAGE = "data:text/html," + quote("""<script>
+window.localStorage || 0;
+window.mnsv2 = function (signStr, md5Str) {
+    let h = 0;
+    for (let round = 0; round < 4000; round++) {
+        for (let i = 0; i < md5Str.length; i++) {
+            h = (Math.imul(h, 31) + md5Str.charCodeAt(i) + round) | 0;
+        }
+    }
+    return "mns0101_" + (h >>> 0).toString(16) + signStr.length;
+};
+</script>""")
+LIVE_PAGE = "https://www.xiaohongshu.com"
+
+
+async def bench(context, url: str, pages: int, count: int) -> float:
+    pool = XhsSignerPool(context, size=pages, index_url=url)
+    await pool.start()
+    requests = [("/api/sns/web/v2/comment/page", {"note_id": "65b1a2c3000000002c03a1b2", "cursor": str(i), "top_comment_id": "", "image_formats": "jpg,webp,avif"}) for i in range(count)]
+    # warm up every page outside the timing
+    await asyncio.gather(*[pool.sign(uri, data, "a1", "GET") for uri, data in requests[:pages * 8]])
+    start = time.perf_counter()
+    await asyncio.gather(*[pool.sign(uri, data, "a1", "GET") for uri, data in requests])
+    elapsed = time.perf_counter() - start
+    print(f"  {pages} page(s): {pool.stats()}")
+    await pool.close()
+    return count / elapsed
+
+
+async def main(page_counts: List[int], count: int, live: bool) -> None:
+    url = LIVE_PAGE if live else SYNTHETIC_PAGE
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch(headless=True)
+        context = await browser.new_context()
+        results = [(pages, await bench(context, url, pages, count)) for pages in page_counts]
+        await browser.close()
+    print(f"{'pages':<8}{'signatures/s':>14}{'speedup':>10}")
+    for pages, rate in results:
+        print(f"{pages:<8}{rate:>14.1f}{rate / results[0][1]:>9.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--live", action="store_true", help="sign with the real window.mnsv2 of xiaohongshu.com")
+    args = parser.parse_args()
+    asyncio.run(main(args.pages, args.count, args.live))
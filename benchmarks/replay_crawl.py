@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/benchmarks/replay_crawl.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# @Desc    : Profile a full crawler run offline against a recorded HTTP cassette
+#
+# 1. Record once with network access: set HTTP_REPLAY_MODE = "record" in config/base_config.py and run main.py
+# 2. Replay on any machine:
+#    python -m benchmarks.replay_crawl --platform xhs --type search --latency-ms 80 --jitter-ms 40
+#    python -m cProfile -o xhs.prof -m benchmarks.replay_crawl --platform xhs --type search
+
+import argparse
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import config
+from main import CrawlerFactory
+from tools import http_replay, utils
+from var import crawler_type_var
+
+OFFLINE_USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36"
+
+
+class OfflinePage:
+    """Stands in for the playwright Page, there is no browser on an offline box"""
+
+    def __init__(self, context: "OfflineBrowserContext"):
+        self.context = context
+
+    async def evaluate(self, expression: str, arg: Any = None) -> Any:
+        if "navigator.userAgent" in expression:
+            return OFFLINE_USER_AGENT
+        # window.localStorage and in-page signing functions are not available offline
+        return {}
+
+    async def goto(self, url: str, **kwargs) -> None:
+        pass
+
+
+class OfflineBrowserContext:
+    """Stands in for the playwright BrowserContext, cookies come from config.COOKIES"""
+
+    def __init__(self):
+        self.page = OfflinePage(self)
+
+    async def cookies(self, urls: Optional[List[str]] = None) -> List[Dict]:
+        cookie_dict = utils.convert_str_cookie_to_dict(config.COOKIES)
+        return [{"name": k, "value": v} for k, v in cookie_dict.items()]
+
+
+# platform -> (client attribute, client factory, crawler type -> crawler entry)
+PLATFORM_ENTRIES: Dict[str, tuple] = {
+    "xhs": ("xhs_client", "create_xhs_client", {
+        "search": lambda c: c.search(),
+        "detail": lambda c: c.get_specified_notes(),
+        "creator": lambda c: c.get_creators_and_notes(),
+    }),
+    "dy": ("dy_client", "create_douyin_client", {
+        "search": lambda c: c.search(),
+        "detail": lambda c: c.get_specified_awemes(),
+        "creator": lambda c: c.get_creators_and_videos(),
+    }),
+    "bili": ("bili_client", "create_bilibili_client", {
+        "search": lambda c: c.search(),
+        "detail": lambda c: c.get_specified_videos(config.BILI_SPECIFIED_ID_LIST),
+    }),
+    "ks": ("ks_client", "create_ks_client", {
+        "search": lambda c: c.search(),
+        "detail": lambda c: c.get_specified_videos(),
+        "creator": lambda c: c.get_creators_and_videos(),
+    }),
+    "wb": ("wb_client", "create_weibo_client", {
+        "search": lambda c: c.search(),
+        "detail": lambda c: c.get_specified_notes(),
+        "creator": lambda c: c.get_creators_and_notes(),
+    }),
+    "zhihu": ("zhihu_client", "create_zhihu_client", {
+        "search": lambda c: c.search(),
+        "detail": lambda c: c.get_specified_notes(),
+        "creator": lambda c: c.get_creators_and_notes(),
+    }),
+}
+
+
+async def replay_crawl(platform: str, crawler_type: str) -> float:
+    """
+    Run one crawler entry against the cassette, return wall-clock seconds
+    :param platform: Platform name
+    :param crawler_type: search | detail | creator
+    :return:
+    """
+    client_attr, client_factory, entries = PLATFORM_ENTRIES[platform]
+    entry: Optional[Callable] = entries.get(crawler_type)
+    if entry is None:
+        raise ValueError(f"{platform} does not support crawler type {crawler_type} in replay")
+
+    config.PLATFORM = platform
+    config.CRAWLER_TYPE = crawler_type
+    config.ENABLE_IP_PROXY = False
+    crawler_type_var.set(crawler_type)
+
+    crawler = CrawlerFactory.create_crawler(platform)
+    crawler.browser_context = OfflineBrowserContext()
+    crawler.context_page = crawler.browser_context.page
+    setattr(crawler, client_attr, await getattr(crawler, client_factory)(None))
+
+    start = time.perf_counter()
+    await entry(crawler)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded cassette through a crawler")
+    parser.add_argument("--platform", default=config.PLATFORM, choices=sorted(PLATFORM_ENTRIES))
+    parser.add_argument("--type", dest="crawler_type", default="search", choices=["search", "detail", "creator"])
+    parser.add_argument("--latency-ms", type=float, default=config.HTTP_REPLAY_LATENCY_MS)
+    parser.add_argument("--jitter-ms", type=float, default=config.HTTP_REPLAY_LATENCY_JITTER_MS)
+    parser.add_argument("--error-rate", type=float, default=config.HTTP_REPLAY_ERROR_RATE)
+    parser.add_argument("--sleep-sec", type=float, default=0, help="Override CRAWLER_MAX_SLEEP_SEC, 0 measures pure crawler cost")
+    args = parser.parse_args()
+
+    config.HTTP_REPLAY_MODE = "replay"
+    config.HTTP_REPLAY_LATENCY_MS = args.latency_ms
+    config.HTTP_REPLAY_LATENCY_JITTER_MS = args.jitter_ms
+    config.HTTP_REPLAY_ERROR_RATE = args.error_rate
+    config.CRAWLER_MAX_SLEEP_SEC = args.sleep_sec
+
+    cassette = http_replay.get_cassette(args.platform)
+    elapsed = asyncio.run(replay_crawl(args.platform, args.crawler_type))
+    print(f"[replay_crawl] platform={args.platform} type={args.crawler_type} "
+          f"interactions={len(cassette)} elapsed={elapsed:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -25,7 +25,7 @@
 # @Desc    : Abstract class
 
 from abc import ABC, abstractmethod
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional
 
 
 class AbstractCache(ABC):
@@ -60,3 +60,68 @@ class AbstractCache(ABC):
         :return:
         """
         raise NotImplementedError
+
+
+class AbstractAsyncCache(ABC):
+    """
+    Async version of AbstractCache for backends that do network round trips, with batch operations
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        """
+        Get the value of a key from the cache.
+        :param key: The key
+        :return:
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, expire_time: int) -> None:
+        """
+        Set the value of a key in the cache.
+        :param key: The key
+        :param value: The value
+        :param expire_time: Expiration time
+        :return:
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def keys(self, pattern: str) -> List[str]:
+        """
+        Get all keys matching the pattern
+        :param pattern: Matching pattern
+        :return:
+        """
+        raise NotImplementedError
+
+    async def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """
+        Get the values of several keys, None for the missing ones
+        :param keys:
+        :return:
+        """
+        return [await self.get(key) for key in keys]
+
+    async def mset(self, mapping: Dict[str, Any], expire_time: int) -> None:
+        """
+        Set several keys with the same expiration time
+        :param mapping: key -> value
+        :param expire_time: Expiration time
+        :return:
+        """
+        for key, value in mapping.items():
+            await self.set(key, value, expire_time)
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> None:
+        """
+        Delete keys, missing keys are ignored
+        :param keys:
+        :return:
+        """
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/cache/async_redis_cache.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# @Desc    : Async redis cache on a connection pool shared by the whole process
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from redis.asyncio import ConnectionPool, Redis
+from redis.asyncio.client import Pipeline
+
+from cache.abs_cache import AbstractAsyncCache
+from cache.redis_cache import SCAN_COUNT, decode_value, encode_value
+from config import db_config
+
+# connections belong to the event loop they were opened on, so there is one pool per loop
+_pools: Dict[asyncio.AbstractEventLoop, ConnectionPool] = {}
+
+
+def get_connection_pool() -> ConnectionPool:
+    """
+    Connection pool of the running event loop, shared by every AsyncRedisCache and IpCache
+    :return:
+    """
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        # pools of loops that are gone would keep their sockets
+        for closed_loop in [known for known in _pools if known.is_closed()]:
+            del _pools[closed_loop]
+        pool = _pools[loop] = ConnectionPool(
+            host=db_config.REDIS_DB_HOST,
+            port=db_config.REDIS_DB_PORT,
+            db=db_config.REDIS_DB_NUM,
+            password=db_config.REDIS_DB_PWD,
+            max_connections=db_config.REDIS_MAX_CONNECTIONS,
+        )
+    return pool
+
+
+class AsyncRedisCache(AbstractAsyncCache):
+    """
+    Values are serialized like RedisCache, so both can read what the other wrote
+
+    Usage:
+        cache = AsyncRedisCache()
+        await cache.mset({"a": 1, "b": [2]}, expire_time=60)
+        await cache.mget(["a", "b"])
+    """
+
+    def __init__(self, client: Optional[Redis] = None) -> None:
+        """
+        :param client: Redis client to use, such as a fakeredis one in tests, defaults to one on the shared pool
+        """
+        self._client = client
+        self._owns_client = client is None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_client(self) -> Redis:
+        if not self._owns_client:
+            return self._client
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = Redis(connection_pool=get_connection_pool())
+            self._loop = loop
+        return self._client
+
+    @property
+    def client(self) -> Redis:
+        """Underlying redis client, for commands the cache does not wrap such as pub/sub"""
+        return self._get_client()
+
+    async def get(self, key: str) -> Optional[Any]:
+        """
+        Get the value of a key from the cache and deserialize it
+        :param key:
+        :return:
+        """
+        return decode_value(await self._get_client().get(key))
+
+    async def set(self, key: str, value: Any, expire_time: int) -> None:
+        """
+        Set the value of a key in the cache and serialize it
+        :param key:
+        :param value:
+        :param expire_time:
+        :return:
+        """
+        await self._get_client().set(key, encode_value(value), ex=expire_time)
+
+    async def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """
+        Get several keys in one round trip
+        :param keys:
+        :return:
+        """
+        if not keys:
+            return []
+        return [decode_value(payload) for payload in await self._get_client().mget(keys)]
+
+    async def mset(self, mapping: Dict[str, Any], expire_time: int) -> None:
+        """
+        Set several keys with their expiration in one pipelined round trip,
+        MSET itself cannot set an expiration
+        :param mapping:
+        :param expire_time:
+        :return:
+        """
+        if not mapping:
+            return
+        async with self.pipeline() as pipe:
+            for key, value in mapping.items():
+                pipe.set(key, encode_value(value), ex=expire_time)
+            await pipe.execute()
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self._get_client().delete(*keys)
+
+    def pipeline(self, transaction: bool = False) -> Pipeline:
+        """
+        Pipeline for batching other commands, values have to be encoded with encode_value
+        :param transaction: Wrap the commands in MULTI/EXEC
+        :return:
+        """
+        return self._get_client().pipeline(transaction=transaction)
+
+    async def iter_keys(self, pattern: str, count: int = SCAN_COUNT) -> AsyncIterator[str]:
+        """
+        Iterate the keys matching the pattern with SCAN, redis stays responsive on a large keyspace
+        :param pattern:
+        :param count: Keys looked at per round trip
+        :return:
+        """
+        async for key in self._get_client().scan_iter(match=pattern, count=count):
+            yield key.decode()
+
+    async def keys(self, pattern: str) -> List[str]:
+        """
+        Get all keys matching the pattern
+        :param pattern:
+        :return:
+        """
+        return [key async for key in self.iter_keys(pattern)]
+
+    async def close(self) -> None:
+        """
+        Release the client, the shared pool stays open for the other caches
+        :return:
+        """
+        if self._client is not None:
+            await self._client.close()
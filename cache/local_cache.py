@@ -23,24 +23,71 @@
 # @Name    : Programmer AJiang-Relakkes
 # @Time    : 2024/6/2 11:05
 # @Desc    : Local cache
+#
+# Entries live in an OrderedDict in least-recently-used order. Expiry times are kept in a min-heap,
+# so purging expired keys only touches the expired ones. When max_entries or max_bytes is exceeded
+# the least recently used keys are evicted. keys() matches globs against a sorted key index: a pattern
+# with a literal prefix such as "xhs_login_phone:*" only looks at the keys within that prefix range.
+# The index is brought up to date by keys() itself, so set/get do not pay for it.
 
 import asyncio
+import bisect
+import fnmatch
+import heapq
+import re
+import sys
 import time
-from typing import Any, Dict, List, Optional, Tuple
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
 
 from cache.abs_cache import AbstractCache
+from config import db_config
+
+# glob metacharacters, the literal prefix of a pattern ends at the first one
+_GLOB_META = re.compile(r"[*?\[\\]")
+
+# entry tuple fields: (value, expire_at, size)
+_VALUE, _EXPIRE_AT, _SIZE = 0, 1, 2
+
+
+def _default_sizeof(key: str, value: Any) -> int:
+    """Shallow size of a cache entry, containers count their own header only"""
+    return sys.getsizeof(key) + sys.getsizeof(value)
 
 
 class ExpiringLocalCache(AbstractCache):
 
-    def __init__(self, cron_interval: int = 10):
+    def __init__(
+        self,
+        cron_interval: int = 10,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        sizeof: Optional[Callable[[str, Any], int]] = None,
+    ):
         """
         Initialize local cache
         :param cron_interval: Time interval for scheduled cache cleanup
+        :param max_entries: Maximum number of keys, defaults to db_config.LOCAL_CACHE_MAX_ENTRIES, 0 means unbounded
+        :param max_bytes: Maximum estimated size of the entries, defaults to db_config.LOCAL_CACHE_MAX_BYTES, 0 means unbounded
+        :param sizeof: Estimates the bytes of one entry from its key and value, defaults to their shallow sys.getsizeof
         :return:
         """
         self._cron_interval = cron_interval
-        self._cache_container: Dict[str, Tuple[Any, float]] = {}
+        self.max_entries = db_config.LOCAL_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.max_bytes = db_config.LOCAL_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self._sizeof = sizeof or _default_sizeof
+        self._cache_container: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+        # (expire_at, key), items of overwritten or evicted entries are skipped when popped
+        self._expire_heap: List[Tuple[float, str]] = []
+        self._bytes = 0
+        # sorted keys for glob prefix lookups, plus the keys added and removed since it was last sorted
+        self._sorted_keys: List[str] = []
+        self._index_added: Set[str] = set()
+        self._index_removed: Set[str] = set()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
         self._cron_task: Optional[asyncio.Task] = None
         # Start scheduled cleanup task
         self._schedule_clear()
@@ -50,8 +97,19 @@ class ExpiringLocalCache(AbstractCache):
         Destructor function, cleanup scheduled task
         :return:
         """
+        self.close()
+
+    def close(self) -> None:
+        """
+        Stop the scheduled cleanup task, the cached keys stay readable
+        :return:
+        """
         if self._cron_task is not None:
             self._cron_task.cancel()
+            self._cron_task = None
+
+    def __len__(self) -> int:
+        return len(self._cache_container)
 
     def get(self, key: str) -> Optional[Any]:
         """
@@ -59,41 +117,150 @@ class ExpiringLocalCache(AbstractCache):
         :param key:
         :return:
         """
-        value, expire_time = self._cache_container.get(key, (None, 0))
-        if value is None:
+        entry = self._cache_container.get(key)
+        if entry is None:
+            self.misses += 1
             return None
 
         # If the key has expired, delete it and return None
-        if expire_time < time.time():
-            del self._cache_container[key]
+        if entry[_EXPIRE_AT] <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
             return None
 
-        return value
+        self._cache_container.move_to_end(key)
+        self.hits += 1
+        return entry[_VALUE]
 
     def set(self, key: str, value: Any, expire_time: int) -> None:
         """
-        Set the value of a key in the cache
+        Set the value of a key in the cache, least recently used keys are evicted when the cache is full
         :param key:
         :param value:
-        :param expire_time:
+        :param expire_time: Seconds the key lives
         :return:
         """
-        self._cache_container[key] = (value, time.time() + expire_time)
+        now = time.monotonic()
+        heap = self._expire_heap
+        if heap and heap[0][0] <= now:
+            self._purge_expired(now)
+        container = self._cache_container
+        old = container.get(key)
+        if old is None:
+            if key in self._index_removed:
+                self._index_removed.discard(key)
+            else:
+                self._index_added.add(key)
+        else:
+            self._bytes -= old[_SIZE]
+            container.move_to_end(key)
+        expire_at = now + expire_time
+        size = self._sizeof(key, value)
+        container[key] = (value, expire_at, size)
+        self._bytes += size
+        heapq.heappush(heap, (expire_at, key))
+        if (
+            (self.max_entries and len(container) > self.max_entries)
+            or (self.max_bytes and self._bytes > self.max_bytes)
+            or len(heap) > 2 * len(container) + 1024
+        ):
+            self._evict()
+
+    def delete(self, key: str) -> None:
+        if key in self._cache_container:
+            self._remove(key)
+
+    def clear(self) -> None:
+        """
+        Drop every key, the hit and eviction counters are kept
+        :return:
+        """
+        self._cache_container.clear()
+        self._expire_heap = []
+        self._bytes = 0
+        self._sorted_keys = []
+        self._index_added = set()
+        self._index_removed = set()
 
     def keys(self, pattern: str) -> List[str]:
         """
-        Get all keys matching the pattern
+        Get all keys matching the glob pattern (fnmatch syntax: *, ?, [abc])
         :param pattern: Matching pattern
         :return:
         """
+        self._purge_expired(time.monotonic())
         if pattern == '*':
             return list(self._cache_container.keys())
 
-        # For local cache wildcard, temporarily replace * with empty string
-        if '*' in pattern:
-            pattern = pattern.replace('*', '')
+        meta = _GLOB_META.search(pattern)
+        if meta is None:
+            return [pattern] if pattern in self._cache_container else []
+        prefix = pattern[:meta.start()]
+        candidates: Iterable[str] = self._cache_container.keys()
+        if prefix:
+            sorted_keys = self._sorted_index()
+            start = bisect.bisect_left(sorted_keys, prefix)
+            # every key starting with prefix sorts below prefix + the highest code point
+            end = bisect.bisect_left(sorted_keys, prefix + "\U0010ffff", start)
+            candidates = sorted_keys[start:end]
+        match = re.compile(fnmatch.translate(pattern)).match
+        return [key for key in candidates if match(key)]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._cache_container),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def _sorted_index(self) -> List[str]:
+        if self._index_removed:
+            removed = self._index_removed
+            self._sorted_keys = [key for key in self._sorted_keys if key not in removed]
+            self._index_removed = set()
+        if self._index_added:
+            # two sorted runs, merged by timsort in linear time
+            self._sorted_keys.extend(sorted(self._index_added))
+            self._sorted_keys.sort()
+            self._index_added = set()
+        return self._sorted_keys
+
+    def _remove(self, key: str) -> None:
+        entry = self._cache_container.pop(key)
+        self._bytes -= entry[_SIZE]
+        if key in self._index_added:
+            self._index_added.discard(key)
+        else:
+            self._index_removed.add(key)
+
+    def _evict(self) -> None:
+        container = self._cache_container
+        while container and (
+            (self.max_entries and len(container) > self.max_entries)
+            or (self.max_bytes and self._bytes > self.max_bytes)
+        ):
+            self._remove(next(iter(container)))
+            self.evictions += 1
+        # overwritten and evicted keys leave stale heap items behind, rebuild once they dominate
+        if len(self._expire_heap) > 2 * len(container) + 1024:
+            self._expire_heap = [(entry[_EXPIRE_AT], key) for key, entry in container.items()]
+            heapq.heapify(self._expire_heap)
 
-        return [key for key in self._cache_container.keys() if pattern in key]
+    def _purge_expired(self, now: float) -> None:
+        heap = self._expire_heap
+        container = self._cache_container
+        while heap and heap[0][0] <= now:
+            expire_at, key = heapq.heappop(heap)
+            entry = container.get(key)
+            if entry is not None and entry[_EXPIRE_AT] == expire_at:
+                self._remove(key)
+                self.expirations += 1
 
     def _schedule_clear(self):
         """
@@ -114,9 +281,7 @@ class ExpiringLocalCache(AbstractCache):
         Clean up cache based on expiration time
         :return:
         """
-        for key, (value, expire_time) in self._cache_container.items():
-            if expire_time < time.time():
-                del self._cache_container[key]
+        self._purge_expired(time.monotonic())
 
     async def _start_clear_cron(self):
         """
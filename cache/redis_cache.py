@@ -23,14 +23,56 @@
 # @Name    : Programmer AJiang-Relakkes
 # @Time    : 2024/5/29 22:57
 # @Desc    : RedisCache implementation
+import math
 import pickle
 import time
-from typing import Any, List
+from typing import Any, List, Optional
 
-from redis import Redis
+from redis import ConnectionPool, Redis
 
 from cache.abs_cache import AbstractCache
 from config import db_config
+from tools import json_codec
+
+# pickle payloads always start with the PROTO opcode, JSON documents never do
+_PICKLE_PREFIX = b"\x80"
+
+# keys returned by one SCAN round trip
+SCAN_COUNT = 1000
+
+_connection_pool: Optional[ConnectionPool] = None
+
+
+def _is_plain_json(value: Any) -> bool:
+    """
+    Whether value survives a JSON round trip with the same types, other values are pickled
+    """
+    if value is None or type(value) in (str, int, bool):
+        return True
+    if type(value) is float:
+        return math.isfinite(value)
+    if type(value) is list:
+        return all(_is_plain_json(v) for v in value)
+    if type(value) is dict:
+        return all(type(k) is str and _is_plain_json(v) for k, v in value.items())
+    return False
+
+
+def encode_value(value: Any) -> bytes:
+    """
+    Plain JSON values are stored as JSON, everything else is pickled
+    """
+    if _is_plain_json(value):
+        return json_codec.dumps_bytes(value)
+    return pickle.dumps(value)
+
+
+def decode_value(payload: Optional[bytes]) -> Any:
+    if payload is None:
+        return None
+    if payload[:1] == _PICKLE_PREFIX:
+        return pickle.loads(payload)
+    return json_codec.loads(payload)
 
 
 class RedisCache(AbstractCache):
@@ -45,12 +87,17 @@ class RedisCache(AbstractCache):
         Connect to redis, return redis client, configure redis connection information as needed
         :return:
         """
-        return Redis(
-            host=db_config.REDIS_DB_HOST,
-            port=db_config.REDIS_DB_PORT,
-            db=db_config.REDIS_DB_NUM,
-            password=db_config.REDIS_DB_PWD,
-        )
+        global _connection_pool
+        if _connection_pool is None:
+            # every RedisCache of the process shares one pool instead of opening its own connections
+            _connection_pool = ConnectionPool(
+                host=db_config.REDIS_DB_HOST,
+                port=db_config.REDIS_DB_PORT,
+                db=db_config.REDIS_DB_NUM,
+                password=db_config.REDIS_DB_PWD,
+                max_connections=db_config.REDIS_MAX_CONNECTIONS,
+            )
+        return Redis(connection_pool=_connection_pool)
 
     def get(self, key: str) -> Any:
         """
@@ -58,26 +105,24 @@ class RedisCache(AbstractCache):
         :param key:
         :return:
         """
-        value = self._redis_client.get(key)
-        if value is None:
-            return None
-        return pickle.loads(value)
+        return decode_value(self._redis_client.get(key))
 
     def set(self, key: str, value: Any, expire_time: int) -> None:
         """
-        Set the value of a key in the cache and serialize it
+        Set the value of a key in the cache and serialize it,
+        plain JSON values are stored as JSON, everything else is pickled
         :param key:
         :param value:
         :param expire_time:
         :return:
         """
-        self._redis_client.set(key, pickle.dumps(value), ex=expire_time)
+        self._redis_client.set(key, encode_value(value), ex=expire_time)
 
     def keys(self, pattern: str) -> List[str]:
         """
-        Get all keys matching the pattern
+        Get all keys matching the pattern, iterated with SCAN so that redis is not blocked on a large keyspace
         """
-        return [key.decode() for key in self._redis_client.keys(pattern)]
+        return [key.decode() for key in self._redis_client.scan_iter(match=pattern, count=SCAN_COUNT)]
 
 
 if __name__ == '__main__':
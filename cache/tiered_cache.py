@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/cache/tiered_cache.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# @Desc    : Two tier cache, a bounded in-process L1 in front of redis
+#
+# Reads try the L1 first and fill it from redis on a miss. Writes go to redis first and then to the L1
+# (write-through). An L1 entry lives at most l1_ttl seconds, which bounds how stale a value another
+# process wrote can be. With invalidation on, every write and delete publishes its keys on a redis
+# channel and the other processes drop them from their L1 right away. A redis read that was in flight
+# while its key was invalidated does not fill the L1. L1 values are the cached objects themselves,
+# callers must not mutate what get() returns.
+
+import asyncio
+import uuid
+from typing import Any, Dict, Iterable, List, Optional
+
+from cache.abs_cache import AbstractAsyncCache
+from cache.async_redis_cache import AsyncRedisCache
+from cache.local_cache import ExpiringLocalCache
+from config import db_config
+from tools import json_codec, utils
+
+# seconds to wait before subscribing again after the invalidation channel failed
+RESUBSCRIBE_DELAY_SEC = 1
+
+
+class TieredCache(AbstractAsyncCache):
+    """
+    Usage:
+        cache = TieredCache()
+        await cache.set("proxy:1", {...}, expire_time=60)
+        await cache.get("proxy:1")  # served from the L1 until it expires or another process writes the key
+        cache.stats()
+    """
+
+    def __init__(
+        self,
+        l2: Optional[AsyncRedisCache] = None,
+        l1_ttl: Optional[int] = None,
+        l1_max_entries: Optional[int] = None,
+        invalidation: Optional[bool] = None,
+        channel: Optional[str] = None,
+    ) -> None:
+        """
+        :param l2: Redis cache behind the L1, defaults to one on the shared connection pool
+        :param l1_ttl: Maximum seconds a key stays in the L1, defaults to db_config.TIERED_CACHE_L1_TTL_SEC
+        :param l1_max_entries: L1 size, defaults to db_config.TIERED_CACHE_L1_MAX_ENTRIES
+        :param invalidation: Publish and listen to invalidations, defaults to db_config.TIERED_CACHE_INVALIDATION
+        :param channel: Invalidation channel, defaults to db_config.TIERED_CACHE_INVALIDATION_CHANNEL
+        """
+        self.l2 = l2 or AsyncRedisCache()
+        self.l1_ttl = db_config.TIERED_CACHE_L1_TTL_SEC if l1_ttl is None else l1_ttl
+        max_entries = db_config.TIERED_CACHE_L1_MAX_ENTRIES if l1_max_entries is None else l1_max_entries
+        self.l1 = ExpiringLocalCache(cron_interval=max(self.l1_ttl, 1), max_entries=max_entries)
+        self.invalidation = db_config.TIERED_CACHE_INVALIDATION if invalidation is None else invalidation
+        self.channel = channel or db_config.TIERED_CACHE_INVALIDATION_CHANNEL
+        # messages published by this instance are ignored by its own listener
+        self._origin = uuid.uuid4().hex
+        self._listener: Optional[asyncio.Task] = None
+        self._subscribed = asyncio.Event()
+        # bumped by every invalidation, a redis read only fills the L1 when its keys were not invalidated
+        # after it started. Only needed while reads are in flight, the per key record is dropped after them
+        self._generation = 0
+        self._invalidated_at: Dict[str, int] = {}
+        self._cleared_at = 0
+        self._reads_in_flight = 0
+        self.l1_hits = 0
+        self.l2_hits = 0
+        self.misses = 0
+        self.invalidations_received = 0
+
+    async def get(self, key: str) -> Optional[Any]:
+        """
+        Get the value of a key, from the L1 when it has it
+        :param key:
+        :return:
+        """
+        self._ensure_listener()
+        value = self.l1.get(key)
+        if value is not None:
+            self.l1_hits += 1
+            return value
+        generation = self._begin_l2_read()
+        try:
+            value = await self.l2.get(key)
+            self._fill_l1(key, value, generation)
+        finally:
+            self._end_l2_read()
+        return value
+
+    async def set(self, key: str, value: Any, expire_time: int) -> None:
+        """
+        Write the key to redis, then to the L1, and tell the other processes
+        :param key:
+        :param value:
+        :param expire_time:
+        :return:
+        """
+        self._ensure_listener()
+        await self.l2.set(key, value, expire_time)
+        self._invalidate_l1([key])
+        self.l1.set(key, value, min(expire_time, self.l1_ttl))
+        await self._publish([key])
+
+    async def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """
+        Get several keys, the ones missing from the L1 are read from redis in one round trip
+        :param keys:
+        :return:
+        """
+        self._ensure_listener()
+        values = [self.l1.get(key) for key in keys]
+        missing = [index for index, value in enumerate(values) if value is None]
+        self.l1_hits += len(keys) - len(missing)
+        if missing:
+            generation = self._begin_l2_read()
+            try:
+                fetched = await self.l2.mget([keys[index] for index in missing])
+                for index, value in zip(missing, fetched):
+                    values[index] = value
+                    self._fill_l1(keys[index], value, generation)
+            finally:
+                self._end_l2_read()
+        return values
+
+    async def mset(self, mapping: Dict[str, Any], expire_time: int) -> None:
+        """
+        Write several keys through both tiers with one invalidation message
+        :param mapping:
+        :param expire_time:
+        :return:
+        """
+        if not mapping:
+            return
+        self._ensure_listener()
+        await self.l2.mset(mapping, expire_time)
+        self._invalidate_l1(list(mapping))
+        for key, value in mapping.items():
+            self.l1.set(key, value, min(expire_time, self.l1_ttl))
+        await self._publish(list(mapping))
+
+    async def delete(self, *keys: str) -> None:
+        if not keys:
+            return
+        self._ensure_listener()
+        await self.l2.delete(*keys)
+        self._invalidate_l1(keys)
+        await self._publish(list(keys))
+
+    async def keys(self, pattern: str) -> List[str]:
+        """
+        Get all keys matching the pattern, redis is the only complete tier
+        :param pattern:
+        :return:
+        """
+        return await self.l2.keys(pattern)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Hit ratio of each tier: l1 over all lookups, l2 over the lookups the L1 missed
+        :return:
+        """
+        lookups = self.l1_hits + self.l2_hits + self.misses
+        l2_lookups = self.l2_hits + self.misses
+        return {
+            "lookups": lookups,
+            "l1_hits": self.l1_hits,
+            "l2_hits": self.l2_hits,
+            "misses": self.misses,
+            "l1_hit_ratio": round(self.l1_hits / lookups, 4) if lookups else 0.0,
+            "l2_hit_ratio": round(self.l2_hits / l2_lookups, 4) if l2_lookups else 0.0,
+            "hit_ratio": round((self.l1_hits + self.l2_hits) / lookups, 4) if lookups else 0.0,
+            "invalidations_received": self.invalidations_received,
+            "l1": self.l1.stats(),
+        }
+
+    async def wait_subscribed(self) -> None:
+        """Wait until the listener receives the invalidations of the other processes"""
+        self._ensure_listener()
+        await self._subscribed.wait()
+
+    async def close(self) -> None:
+        """
+        Stop the invalidation listener and release the redis client
+        :return:
+        """
+        if self._listener is not None:
+            listener, self._listener = self._listener, None
+            listener.cancel()
+            try:
+                await listener
+            except asyncio.CancelledError:
+                pass
+        self.l1.close()
+        await self.l2.close()
+
+    def _begin_l2_read(self) -> int:
+        self._reads_in_flight += 1
+        return self._generation
+
+    def _end_l2_read(self) -> None:
+        self._reads_in_flight -= 1
+        if not self._reads_in_flight:
+            self._invalidated_at.clear()
+
+    def _invalidate_l1(self, keys: Iterable[str]) -> None:
+        self._generation += 1
+        for key in keys:
+            self.l1.delete(key)
+            if self._reads_in_flight:
+                self._invalidated_at[key] = self._generation
+
+    def _clear_l1(self) -> None:
+        self._generation += 1
+        self._cleared_at = self._generation
+        self.l1.clear()
+
+    def _fill_l1(self, key: str, value: Optional[Any], generation: int) -> None:
+        if value is None:
+            self.misses += 1
+            return
+        self.l2_hits += 1
+        if self._cleared_at > generation or self._invalidated_at.get(key, 0) > generation:
+            # invalidated while redis was read, the value may be older than the invalidating write
+            return
+        # the remaining redis ttl is unknown here, l1_ttl alone bounds the entry
+        self.l1.set(key, value, self.l1_ttl)
+
+    def _ensure_listener(self) -> None:
+        if self.invalidation and self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def _publish(self, keys: List[str]) -> None:
+        if not self.invalidation:
+            return
+        message = json_codec.dumps_bytes({"origin": self._origin, "keys": keys})
+        try:
+            await self.l2.client.publish(self.channel, message)
+        except Exception as e:
+            # the other processes still drop the key when their L1 entry expires
+            utils.logger.warning(f"[TieredCache._publish] publish invalidation of {len(keys)} keys err: {e!r}")
+
+    async def _listen(self) -> None:
+        """
+        Drop the keys other processes wrote from the L1, subscribe again when the connection is lost
+        :return:
+        """
+        while True:
+            pubsub = self.l2.client.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                self._subscribed.set()
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    payload = json_codec.loads(message["data"])
+                    if payload.get("origin") == self._origin:
+                        continue
+                    self._invalidate_l1(payload.get("keys", []))
+                    self.invalidations_received += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                utils.logger.warning(f"[TieredCache._listen] invalidation channel {self.channel} err: {e!r}")
+            finally:
+                try:
+                    await pubsub.close()
+                except Exception:
+                    pass
+            # invalidations may have been missed while disconnected
+            self._subscribed.clear()
+            self._clear_l1()
+            await asyncio.sleep(RESUBSCRIBE_DELAY_SEC)
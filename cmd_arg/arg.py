@@ -258,6 +258,14 @@ async def parse_cmd(argv: Optional[Sequence[str]] = None):
                 rich_help_panel="Comment Configuration",
             ),
         ] = config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
+        keyword_workers: Annotated[
+            int,
+            typer.Option(
+                "--keyword_workers",
+                help="Number of keywords crawled at the same time in search mode",
+                rich_help_panel="Basic Configuration",
+            ),
+        ] = config.KEYWORD_WORKERS,
     ) -> SimpleNamespace:
         """MediaCrawler 命令行入口"""
 
@@ -283,6 +291,7 @@ async def parse_cmd(argv: Optional[Sequence[str]] = None):
         config.SAVE_DATA_OPTION = save_data_option.value
         config.COOKIES = cookies
         config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES = max_comments_count_singlenotes
+        config.KEYWORD_WORKERS = keyword_workers
 
         # Set platform-specific ID lists for detail/creator mode
         if specified_id_list:
@@ -20,3 +20,10 @@
 
 from .base_config import *
 from .db_config import *
+
+import sys as _sys
+
+from .settings import SettingsAwareConfig as _SettingsAwareConfig
+
+# config.XXX returns the value of the crawler settings active in the current task, see config/settings.py
+_sys.modules[__name__].__class__ = _SettingsAwareConfig
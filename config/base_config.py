@@ -34,6 +34,37 @@ IP_PROXY_POOL_COUNT = 2
 # 代理IP提供商名称
 IP_PROXY_PROVIDER_NAME = "kuaidaili"  # kuaidaili | wandouhttp
 
+# 代理IP校验地址，通过每个代理请求该地址，按成功率和延迟给代理打分，测试时可以指向本地服务
+IP_PROXY_VALIDATE_URL = "https://echo.apifox.cn/"
+
+# 代理IP校验超时时间（秒）
+IP_PROXY_VALIDATE_TIMEOUT_SEC = 5
+
+# 后台重新校验代理池中空闲代理的间隔（秒），0 表示不做后台校验
+IP_PROXY_HEALTH_CHECK_INTERVAL_SEC = 60
+
+# 代理池中可用代理少于该数量时，后台提前向代理商补充IP，避免请求等待提取代理，0 表示不提前补充
+IP_PROXY_LOW_WATERMARK = 1
+
+# 剩余有效期少于该秒数的代理不计入可用数量，以便在代理过期前完成补充
+IP_PROXY_REFILL_TTL_SEC = 60
+
+# 每个客户端同时租用的代理数量，大于 1 时并发请求分散到多个代理IP上，每个代理各自复用连接，1 表示只使用一个代理
+IP_PROXY_SHARD_NUM = 1
+
+# 多代理时请求分配策略：round_robin 轮询 | least_loaded 选在途请求最少的代理 | sticky 同一内容ID固定走同一代理
+IP_PROXY_SHARD_STRATEGY = "round_robin"
+
+# 同一代理两次请求之间的最小间隔（秒），各代理单独限速，0 表示不限速
+IP_PROXY_SHARD_MIN_INTERVAL_SEC = 0
+
+# 代理信誉数据（每个代理、每个IP段、每个代理商的请求数、成功数、验证码、IP封禁和延迟分布）的保存位置：redis | memory，
+# 选择 memory 时只在本次运行内生效。保存时整体读取-合并-写回，不支持多个进程同时写同一代理商的信誉数据
+IP_PROXY_REPUTATION_CACHE_TYPE = "redis"
+
+# 代理信誉数据在最后一次保存后的保留时间（秒）
+IP_PROXY_REPUTATION_TTL_SEC = 30 * 24 * 3600
+
 # 设置为True不会打开浏览器（无头浏览器）
 # 设置False会打开一个浏览器
 # 小红书如果一直扫码登录不通过，打开浏览器手动过一下滑动验证码
@@ -85,6 +116,15 @@ CRAWLER_MAX_NOTES_COUNT = 15
 # 并发爬虫数量控制
 MAX_CONCURRENCY_NUM = 1
 
+# 搜索模式的流水线：搜索翻页、详情、存储、评论各阶段同时进行，阶段之间用有界队列连接
+# 阶段之间队列的最大长度，下游处理不过来时上游会等待（背压）
+PIPELINE_QUEUE_SIZE = 20
+# 详情阶段和评论阶段的并发 worker 数，0 表示使用 MAX_CONCURRENCY_NUM
+PIPELINE_DETAIL_WORKERS = 0
+PIPELINE_COMMENT_WORKERS = 0
+# 同时搜索的关键词数量，每个关键词有自己的 search_id 和分页状态，详情/评论阶段的并发仍按上面的 worker 数共享
+KEYWORD_WORKERS = 1
+
 # 是否开启爬媒体模式（包含图片或视频资源），默认不开启爬媒体
 ENABLE_GET_MEIDAS = False
 
@@ -117,6 +157,63 @@ FONT_PATH = "./docs/STZHONGS.TTF"
 # 爬取间隔时间
 CRAWLER_MAX_SLEEP_SEC = 2
 
+# ==================== HTTP 录制/回放配置 ====================
+# 用于离线压测/性能分析，不影响正常爬取
+# "" 关闭; "record" 正常请求并把请求/响应录制到 cassette 文件; "replay" 不访问网络，直接从 cassette 回放响应
+HTTP_REPLAY_MODE = ""
+
+# cassette 文件目录，每个平台一个文件：{HTTP_CASSETTE_DIR}/{PLATFORM}.jsonl.gz
+HTTP_CASSETTE_DIR = "data/cassettes"
+
+# 回放时每个请求附加的固定延迟与随机抖动（毫秒），用于模拟真实网络
+HTTP_REPLAY_LATENCY_MS = 0
+HTTP_REPLAY_LATENCY_JITTER_MS = 0
+
+# 回放时注入网络错误的概率（0~1）
+HTTP_REPLAY_ERROR_RATE = 0.0
+
+# 回放随机种子，保证延迟与错误注入可复现
+HTTP_REPLAY_SEED = 42
+
+# ==================== JSON 编解码配置 ====================
+# JSON 编解码后端: "auto" 自动选择已安装的 orjson / msgspec，都未安装时使用标准库; 也可指定 "orjson" | "msgspec" | "stdlib"
+JSON_CODEC_BACKEND = "auto"
+
+# ==================== 重试与熔断配置 ====================
+# 单次运行内每个平台允许的最大重试次数（所有请求共享），0 表示不限制
+RETRY_BUDGET_PER_RUN = 200
+
+# 同一接口连续失败多少次后熔断，0 表示不熔断
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = 10
+
+# 熔断后多少秒放行一次试探请求
+CIRCUIT_BREAKER_RECOVERY_SEC = 60
+
+# ==================== JS 签名进程池配置 ====================
+# 常驻 Node 签名进程数量（抖音 a_bogus 等），未安装 Node 时自动回退到 PyExecJS
+JS_SIGN_WORKER_NUM = 2
+
+# 单次签名超时时间（秒），超时后重启对应的签名进程
+JS_SIGN_TIMEOUT_SEC = 5
+
+# ==================== 本地签名服务配置 ====================
+# 本地签名服务地址（python sign_server_main.py 启动），多个爬虫进程共享同一个签名浏览器和 JS 进程
+# 为空表示不使用签名服务，服务不可用时自动回退到进程内签名
+SIGN_SERVICE_URL = ""
+
+# 签名服务的 Unix socket 路径，设置后优先于 SIGN_SERVICE_URL（仅 Linux/macOS）
+SIGN_SERVICE_UDS = ""
+
+# 请求签名服务的超时时间（秒）
+SIGN_SERVICE_TIMEOUT_SEC = 5
+
+# 签名服务不可用后，多少秒内直接使用进程内签名，不再尝试连接
+SIGN_SERVICE_RETRY_INTERVAL_SEC = 30
+
+# ==================== API 服务任务队列配置 ====================
+# 同时执行的任务数（worker 槽位），爬取相同平台的任务不会同时执行（共用浏览器登录态）
+SERVER_JOB_WORKERS = 1
+
 from .bilibili_config import *
 from .xhs_config import *
 from .dy_config import *
@@ -65,3 +65,6 @@ CRAWLER_MAX_CONTACTS_COUNT_SINGLENOTES = 100
 
 # 单个视频/帖子最大爬取动态数
 CRAWLER_MAX_DYNAMICS_COUNT_SINGLENOTES = 50
+
+# WBI 签名密钥（img_key/sub_key）缓存时间（秒），过期前在后台刷新，B站大约每天更换一次
+BILI_WBI_KEY_TTL_SEC = 86400
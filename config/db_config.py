@@ -41,10 +41,24 @@ REDIS_DB_HOST = os.getenv("REDIS_DB_HOST", "127.0.0.1")  # your redis host
 REDIS_DB_PWD = os.getenv("REDIS_DB_PWD", "123456")  # your redis password
 REDIS_DB_PORT = os.getenv("REDIS_DB_PORT", 6379)  # your redis port
 REDIS_DB_NUM = os.getenv("REDIS_DB_NUM", 0)  # your redis db num
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", 50))  # connections of the shared redis pool of one process
 
 # cache type
 CACHE_TYPE_REDIS = "redis"
 CACHE_TYPE_MEMORY = "memory"
+CACHE_TYPE_REDIS_ASYNC = "redis_async"
+CACHE_TYPE_TIERED = "tiered"
+
+# tiered cache: a local L1 in front of redis, writes go to both, L1 keeps a key at most L1_TTL seconds
+TIERED_CACHE_L1_TTL_SEC = 5
+TIERED_CACHE_L1_MAX_ENTRIES = 10000
+# publish written keys so that the other processes drop them from their L1
+TIERED_CACHE_INVALIDATION = True
+TIERED_CACHE_INVALIDATION_CHANNEL = "mediacrawler:cache:invalidate"
+
+# local (memory) cache bounds, least recently used keys are evicted beyond them, 0 means unbounded
+LOCAL_CACHE_MAX_ENTRIES = 100000
+LOCAL_CACHE_MAX_BYTES = 256 * 1024 * 1024
 
 # sqlite config
 SQLITE_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "database", "sqlite_tables.db")
@@ -53,6 +67,9 @@ sqlite_db_config = {
     "db_path": SQLITE_DB_PATH
 }
 
+# sqlite file of the API server task queue, task status and history survive restarts
+SERVER_JOB_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "database", "server_jobs.db")
+
 # mongodb config
 MONGODB_HOST = os.getenv("MONGODB_HOST", "localhost")
 MONGODB_PORT = os.getenv("MONGODB_PORT", 27018)
@@ -44,3 +44,6 @@ DY_CREATOR_ID_LIST = [
     "MS4wLjABAAAATJPY7LAlaa5X-c8uNdWkvz0jUGgpw4eeXIwu_8BhvqE"
     # ........................
 ]
+
+# msToken 缓存时间（秒），到期后从 localStorage 重新读取，请求被拒绝时也会立即重新读取
+DY_MS_TOKEN_REFRESH_SEC = 600
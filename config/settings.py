@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/config/settings.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# @Desc    : Immutable per-crawler settings
+#
+# A CrawlerSettings is a frozen snapshot of the config module plus the overrides of one crawl job
+# (CLI arguments, an API request). Running a crawler inside `with use_settings(settings):` makes every
+# `config.XXX` read of that task, and of the tasks it creates, return the job's value. Crawlers, clients
+# and stores keep reading `config.XXX`, while several jobs with different settings run in one process.
+# Inside a settings block the config module is read-only, changes go through settings.replace().
+#
+# Usage:
+#     settings = CrawlerSettings.from_config(PLATFORM="xhs", KEYWORDS="a,b")
+#     with use_settings(settings):
+#         await CrawlerFactory.create_crawler(settings.PLATFORM).start()
+
+import contextvars
+import copy
+import types
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+# settings of the crawl job the current task belongs to
+crawler_settings_var: contextvars.ContextVar[Optional["CrawlerSettings"]] = contextvars.ContextVar(
+    "crawler_settings", default=None
+)
+
+
+def _is_setting(name: str) -> bool:
+    return name.isupper() and not name.startswith("_")
+
+
+class CrawlerSettings:
+    """Read-only view of the upper-case config names, values are deep copies taken when it was built"""
+
+    __slots__ = ("_values",)
+
+    def __init__(self, values: Dict[str, Any]):
+        object.__setattr__(self, "_values", types.MappingProxyType(dict(values)))
+
+    @classmethod
+    def from_config(cls, **overrides: Any) -> "CrawlerSettings":
+        """
+        Snapshot of the config module with overrides applied
+        :param overrides: Upper-case config names, such as KEYWORDS="a,b"
+        :return:
+        """
+        import config
+
+        # read the module itself, not the settings that may be active in this task
+        values = {name: value for name, value in vars(config).items() if _is_setting(name) and not isinstance(value, types.ModuleType)}
+        return cls(copy.deepcopy(values)).replace(**overrides)
+
+    def replace(self, **overrides: Any) -> "CrawlerSettings":
+        """
+        New settings with some values changed, self is left as it is
+        :param overrides:
+        :return:
+        """
+        unknown = [name for name in overrides if name not in self._values]
+        if unknown:
+            raise ValueError(f"[CrawlerSettings.replace] unknown config names: {unknown}")
+        values = dict(self._values)
+        values.update(copy.deepcopy(overrides))
+        return CrawlerSettings(values)
+
+    def get(self, name: str, default: Any = None) -> Any:
+        return self._values.get(name, default)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self._values)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._values
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self._values[name]
+        except KeyError:
+            raise AttributeError(f"CrawlerSettings has no setting {name}") from None
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"CrawlerSettings is immutable, use replace({name}=...)")
+
+    def __repr__(self) -> str:
+        return f"CrawlerSettings(PLATFORM={self.get('PLATFORM')!r}, CRAWLER_TYPE={self.get('CRAWLER_TYPE')!r}, KEYWORDS={self.get('KEYWORDS')!r})"
+
+
+@contextmanager
+def use_settings(settings: CrawlerSettings) -> Iterator[CrawlerSettings]:
+    """
+    Make the config reads of the current task and the tasks it creates return settings
+    :param settings:
+    :return:
+    """
+    token = crawler_settings_var.set(settings)
+    try:
+        yield settings
+    finally:
+        crawler_settings_var.reset(token)
+
+
+def current_settings() -> CrawlerSettings:
+    """Settings active in the current task, or a snapshot of the config module outside of a crawl job"""
+    return crawler_settings_var.get() or CrawlerSettings.from_config()
+
+
+class SettingsAwareConfig(types.ModuleType):
+    """Module type of the config package, upper-case names are looked up in the active settings first"""
+
+    def __getattribute__(self, name: str) -> Any:
+        if _is_setting(name):
+            settings = crawler_settings_var.get()
+            if settings is not None and name in settings:
+                return settings.get(name)
+        return super().__getattribute__(name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if _is_setting(name) and crawler_settings_var.get() is not None:
+            raise AttributeError(
+                f"[config] {name} can not be changed while crawler settings are active, use CrawlerSettings.replace"
+            )
+        super().__setattr__(name, value)
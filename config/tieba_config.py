@@ -32,3 +32,9 @@ TIEBA_CREATOR_URL_LIST = [
     "https://tieba.baidu.com/home/main/?id=tb.1.7f139e2e.6CyEwxu3VJruH_-QqpCi6g&fr=frs",
     # ........................
 ]
+
+# 贴吧页面解析进程池大小，0 表示不使用进程池，直接在事件循环中解析
+TIEBA_EXTRACT_PROCESS_POOL_SIZE = 2
+
+# 页面 HTML 超过该字符数才交给进程池解析，小页面跨进程传输的开销大于解析本身
+TIEBA_EXTRACT_PROCESS_MIN_CHARS = 200000
@@ -35,3 +35,6 @@ XHS_CREATOR_ID_LIST = [
     "https://www.xiaohongshu.com/user/profile/5f58bd990000000001003753?xsec_token=ABYVg1evluJZZzpMX-VWzchxQ1qSNVW3r-jOEnKqMcgZw=&xsec_source=pc_search"
     # ........................
 ]
+
+# 签名页面数量，在同一个浏览器上下文中打开多个页面并行计算 x-s 签名，提高并发时的签名吞吐
+XHS_SIGN_PAGE_NUM = 1
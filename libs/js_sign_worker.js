@@ -0,0 +1,33 @@
+// Long-lived signing worker used by tools/js_worker_pool.py
+// usage: node js_sign_worker.js <sign script>
+// Loads the sign script once, then answers newline-delimited JSON requests on stdin:
+//   request:  {"id": 1, "fn": "sign_datail", "args": ["a=1&b=2", "Mozilla/5.0 ..."]}
+//   response: {"id": 1, "result": "..."}  or  {"id": 1, "error": "..."}
+
+const fs = require('fs');
+const readline = require('readline');
+const vm = require('vm');
+
+// sign scripts are written for PyExecJS, they expect `require` as a global
+globalThis.require = require;
+vm.runInThisContext(fs.readFileSync(process.argv[2], 'utf8').replace(/^\uFEFF/, ''), {filename: process.argv[2]});
+
+const rl = readline.createInterface({input: process.stdin, terminal: false});
+rl.on('line', (line) => {
+    if (!line) {
+        return;
+    }
+    let request;
+    try {
+        request = JSON.parse(line);
+        const fn = globalThis[request.fn];
+        if (typeof fn !== 'function') {
+            throw new Error(`function ${request.fn} not found`);
+        }
+        const result = fn.apply(null, request.args || []);
+        process.stdout.write(JSON.stringify({id: request.id, result: result === undefined ? null : result}) + '\n');
+    } catch (e) {
+        process.stdout.write(JSON.stringify({id: request ? request.id : null, error: String(e)}) + '\n');
+    }
+});
+rl.on('close', () => process.exit(0));
@@ -34,6 +34,7 @@ from typing import Optional, Type
 
 import cmd_arg
 import config
+from config.settings import CrawlerSettings, use_settings
 from database import db
 from base.base_crawler import AbstractCrawler
 from media_platform.bilibili import BilibiliCrawler
@@ -43,7 +44,10 @@ from media_platform.tieba import TieBaCrawler
 from media_platform.weibo import WeiboCrawler
 from media_platform.xhs import XiaoHongShuCrawler
 from media_platform.zhihu import ZhihuCrawler
+from tools import utils
 from tools.async_file_writer import AsyncFileWriter
+from tools.resilience import log_resilience_summary, resilience_run
+from tools.sign_service import sign_service
 from var import crawler_type_var
 
 
@@ -106,8 +110,17 @@ async def main() -> None:
         print(f"Database {args.init_db} initialized successfully.")
         return
 
-    crawler = CrawlerFactory.create_crawler(platform=config.PLATFORM)
-    await crawler.start()
+    # the settings are frozen once the command line is parsed, the crawler reads them through config
+    with use_settings(CrawlerSettings.from_config()), resilience_run():
+        crawler = CrawlerFactory.create_crawler(platform=config.PLATFORM)
+        try:
+            await crawler.start()
+        finally:
+            # stops the health check and refills, and saves the proxy reputation of this run
+            if getattr(crawler, "ip_proxy_pool", None):
+                utils.logger.info(f"[Main] proxy pool stats: {crawler.ip_proxy_pool.stats()}")
+                await crawler.ip_proxy_pool.close()
+        log_resilience_summary()
 
     _flush_excel_if_needed()
 
@@ -135,6 +148,8 @@ async def async_cleanup() -> None:
                 if "closed" not in error_msg and "disconnected" not in error_msg:
                     print(f"[Main] Error closing browser context: {e}")
 
+    await sign_service.close()
+
     if config.SAVE_DATA_OPTION in ("db", "sqlite"):
         await db.close()
 
@@ -23,24 +23,29 @@
 # @Desc    : bilibili request client
 import asyncio
 import json
-import random
 from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple, Union
 from urllib.parse import urlencode
 
 import httpx
 from playwright.async_api import BrowserContext, Page
+from tenacity import RetryError
 
 import config
 from base.base_crawler import AbstractApiClient
-from proxy.proxy_mixin import ProxyRefreshMixin
-from tools import utils
+from proxy.proxy_mixin import ProxyRefreshMixin, track_proxy_outcome
+from tools import json_codec, utils
+from tools.resilience import CircuitOpenError, ResiliencePolicy
+from tools.sign_service import sign_service
 
 if TYPE_CHECKING:
     from proxy.proxy_ip_pool import ProxyIpPool
 
 from .exception import DataFetchError
 from .field import CommentOrderType, SearchOrderType
-from .help import BilibiliSign
+from .help import WbiKeyManager
+
+# Comment API is throttled aggressively, back off longer and only retry on data fetch errors
+bilibili_comments_resilience_policy = ResiliencePolicy("bilibili_comments", base_delay=5, max_delay=30, retryable_errors=(DataFetchError,))
 
 
 class BilibiliClient(AbstractApiClient, ProxyRefreshMixin):
@@ -61,17 +66,19 @@ class BilibiliClient(AbstractApiClient, ProxyRefreshMixin):
         self._host = "https://api.bilibili.com"
         self.playwright_page = playwright_page
         self.cookie_dict = cookie_dict
+        self.wbi_key_manager = WbiKeyManager(self.get_wbi_keys, ttl=config.BILI_WBI_KEY_TTL_SEC)
         # Initialize proxy pool (from ProxyRefreshMixin)
         self.init_proxy_pool(proxy_ip_pool)
 
+    @track_proxy_outcome
     async def request(self, method, url, **kwargs) -> Any:
         # Check if proxy has expired before each request
         await self._refresh_proxy_if_expired()
 
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
+        async with self._proxy_http_client() as client:
             response = await client.request(method, url, timeout=self.timeout, **kwargs)
         try:
-            data: Dict = response.json()
+            data: Dict = json_codec.loads(response.content)
         except json.JSONDecodeError:
             utils.logger.error(f"[BilibiliClient.request] Failed to decode JSON from response. status_code: {response.status_code}, response_text: {response.text}")
             raise DataFetchError(f"Failed to decode JSON, content: {response.text}")
@@ -83,21 +90,23 @@ class BilibiliClient(AbstractApiClient, ProxyRefreshMixin):
     async def pre_request_data(self, req_data: Dict) -> Dict:
         """
         Send request to sign request parameters
-        Need to get wbi_img_urls parameter from localStorage, value as follows:
+        The WBI keys are cached by wbi_key_manager, they come from wbi_img_urls in localStorage, value as follows:
         https://i0.hdslb.com/bfs/wbi/7cd084941338484aae1ad9425b84077c.png-https://i0.hdslb.com/bfs/wbi/4932caff0ff746eab6f01bf08b70ac45.png
         :param req_data:
         :return:
         """
         if not req_data:
             return {}
-        img_key, sub_key = await self.get_wbi_keys()
-        return BilibiliSign(img_key, sub_key).sign(req_data)
+        return await self.wbi_key_manager.sign(req_data)
 
     async def get_wbi_keys(self) -> Tuple[str, str]:
         """
-        Get the latest img_key and sub_key
+        Get the latest img_key and sub_key, from the local signing service when it is running
         :return:
         """
+        wbi_keys = await sign_service.get_bilibili_wbi_keys()
+        if wbi_keys is not None:
+            return wbi_keys
         local_storage = await self.playwright_page.evaluate("() => window.localStorage")
         wbi_img_urls = local_storage.get("wbi_img_urls", "")
         if not wbi_img_urls:
@@ -126,7 +135,7 @@ class BilibiliClient(AbstractApiClient, ProxyRefreshMixin):
 
     async def post(self, uri: str, data: dict) -> Dict:
         data = await self.pre_request_data(data)
-        json_str = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+        json_str = json_codec.dumps(data)
         return await self.request(method="POST", url=f"{self._host}{uri}", data=json_str, headers=self.headers)
 
     async def pong(self) -> bool:
@@ -148,6 +157,7 @@ class BilibiliClient(AbstractApiClient, ProxyRefreshMixin):
         cookie_str, cookie_dict = utils.convert_cookies(await browser_context.cookies())
         self.headers["Cookie"] = cookie_str
         self.cookie_dict = cookie_dict
+        self.wbi_key_manager.invalidate()
 
     async def search_video_by_keyword(
         self,
@@ -222,9 +232,9 @@ class BilibiliClient(AbstractApiClient, ProxyRefreshMixin):
 
     async def get_video_media(self, url: str) -> Union[bytes, None]:
         # Follow CDN 302 redirects and treat any 2xx as success (some endpoints return 206)
-        async with httpx.AsyncClient(proxy=self.proxy, follow_redirects=True) as client:
+        async with self._proxy_http_client() as client:
             try:
-                response = await client.request("GET", url, timeout=self.timeout, headers=self.headers)
+                response = await client.request("GET", url, timeout=self.timeout, headers=self.headers, follow_redirects=True)
                 response.raise_for_status()
                 if 200 <= response.status_code < 300:
                     return response.content
@@ -273,22 +283,18 @@ class BilibiliClient(AbstractApiClient, ProxyRefreshMixin):
         result = []
         is_end = False
         next_page = 0
-        max_retries = 3
         while not is_end and len(result) < max_count:
-            comments_res = None
-            for attempt in range(max_retries):
-                try:
-                    comments_res = await self.get_video_comments(video_id, CommentOrderType.DEFAULT, next_page)
-                    break  # Success
-                except DataFetchError as e:
-                    if attempt < max_retries - 1:
-                        delay = 5 * (2**attempt) + random.uniform(0, 1)
-                        utils.logger.warning(f"[BilibiliClient.get_video_all_comments] Retrying video_id {video_id} in {delay:.2f}s... (Attempt {attempt + 1}/{max_retries})")
-                        await asyncio.sleep(delay)
-                    else:
-                        utils.logger.error(f"[BilibiliClient.get_video_all_comments] Max retries reached for video_id: {video_id}. Skipping comments. Error: {e}")
-                        is_end = True
-                        break
+            try:
+                comments_res = await bilibili_comments_resilience_policy.call(
+                    self.get_video_comments, video_id, CommentOrderType.DEFAULT, next_page,
+                    endpoint="get_video_comments", owner=self,
+                )
+            except RetryError as e:
+                utils.logger.error(f"[BilibiliClient.get_video_all_comments] Max retries reached for video_id: {video_id}. Skipping comments. Error: {e.last_attempt.exception()}")
+                break
+            except CircuitOpenError as e:
+                utils.logger.error(f"[BilibiliClient.get_video_all_comments] Comments of video_id: {video_id} rejected. Skipping comments. Error: {e}")
+                break
             if not comments_res:
                 break
 
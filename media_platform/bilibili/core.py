@@ -23,6 +23,7 @@
 # @Desc    : Bilibili Crawler
 
 import asyncio
+import functools
 import os
 # import random  # Removed as we now use fixed config.CRAWLER_MAX_SLEEP_SEC intervals
 from asyncio import Task
@@ -45,10 +46,11 @@ from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import bilibili as bilibili_store
 from tools import utils
 from tools.cdp_browser import CDPBrowserManager
+from tools.pipeline import CrawlPipeline, Emit, keyword_workers, run_keyword_workers, search_fatal_errors, stage_workers
 from var import crawler_type_var, source_keyword_var
 
 from .client import BilibiliClient
-from .exception import DataFetchError
+from .exception import DataFetchError, IPBlockError
 from .field import SearchOrderType
 from .help import parse_video_info_from_url, parse_creator_info_from_url
 from .login import BilibiliLogin
@@ -178,60 +180,108 @@ class BilibiliCrawler(AbstractCrawler):
 
     async def search_by_keywords(self):
         """
-        search bilibili video with keywords in normal mode
+        search bilibili video with keywords in normal mode,
+        search pages, video details, storage and comments run as pipeline stages
         :return:
         """
         utils.logger.info("[BilibiliCrawler.search_by_keywords] Begin search bilibli keywords")
+        detail_workers = stage_workers(config.PIPELINE_DETAIL_WORKERS)
+        # video details and play urls share one limit, as they did when fetched page by page
+        detail_semaphore = asyncio.Semaphore(detail_workers)
+        pipeline = CrawlPipeline("bili_search", fatal_errors=search_fatal_errors(IPBlockError))
+        pipeline.add_stage("search", self.search_keyword_videos, workers=keyword_workers())
+        pipeline.add_stage(
+            "detail",
+            functools.partial(self.fetch_search_video_detail, semaphore=detail_semaphore),
+            workers=detail_workers,
+        )
+        pipeline.add_stage("store", functools.partial(self.store_search_video, semaphore=detail_semaphore))
+        if config.ENABLE_GET_COMMENTS:
+            comment_workers = stage_workers(config.PIPELINE_COMMENT_WORKERS)
+            pipeline.add_stage(
+                "comments",
+                functools.partial(self.fetch_search_video_comments, semaphore=asyncio.Semaphore(comment_workers)),
+                workers=comment_workers,
+            )
+        await pipeline.run(config.KEYWORDS.split(","))
+
+    async def search_keyword_videos(self, keyword: str, emit: Emit) -> None:
+        """
+        Pipeline stage: page through the search results of a keyword and emit the video items
+        :param keyword:
+        :param emit:
+        :return:
+        """
+        source_keyword_var.set(keyword)
+        utils.logger.info(f"[BilibiliCrawler.search_by_keywords] Current search keyword: {keyword}")
         bili_limit_count = 20  # bilibili limit page fixed value
-        if config.CRAWLER_MAX_NOTES_COUNT < bili_limit_count:
-            config.CRAWLER_MAX_NOTES_COUNT = bili_limit_count
+        # the limit is raised to one page for this crawler only, config stays as it is
+        max_notes_count = max(config.CRAWLER_MAX_NOTES_COUNT, bili_limit_count)
         start_page = config.START_PAGE  # start page number
-        for keyword in config.KEYWORDS.split(","):
-            source_keyword_var.set(keyword)
-            utils.logger.info(f"[BilibiliCrawler.search_by_keywords] Current search keyword: {keyword}")
-            page = 1
-            while (page - start_page + 1) * bili_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
-                if page < start_page:
-                    utils.logger.info(f"[BilibiliCrawler.search_by_keywords] Skip page: {page}")
-                    page += 1
-                    continue
-
-                utils.logger.info(f"[BilibiliCrawler.search_by_keywords] search bilibili keyword: {keyword}, page: {page}")
-                video_id_list: List[str] = []
-                videos_res = await self.bili_client.search_video_by_keyword(
-                    keyword=keyword,
-                    page=page,
-                    page_size=bili_limit_count,
-                    order=SearchOrderType.DEFAULT,
-                    pubtime_begin_s=0,  # Publish date start timestamp
-                    pubtime_end_s=0,  # Publish date end timestamp
-                )
-                video_list: List[Dict] = videos_res.get("result")
+        page = 1
+        while (page - start_page + 1) * bili_limit_count <= max_notes_count:
+            if page < start_page:
+                utils.logger.info(f"[BilibiliCrawler.search_by_keywords] Skip page: {page}")
+                page += 1
+                continue
 
-                if not video_list:
-                    utils.logger.info(f"[BilibiliCrawler.search_by_keywords] No more videos for '{keyword}', moving to next keyword.")
-                    break
+            utils.logger.info(f"[BilibiliCrawler.search_by_keywords] search bilibili keyword: {keyword}, page: {page}")
+            videos_res = await self.bili_client.search_video_by_keyword(
+                keyword=keyword,
+                page=page,
+                page_size=bili_limit_count,
+                order=SearchOrderType.DEFAULT,
+                pubtime_begin_s=0,  # Publish date start timestamp
+                pubtime_end_s=0,  # Publish date end timestamp
+            )
+            video_list: List[Dict] = videos_res.get("result")
 
-                semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-                task_list = []
-                try:
-                    task_list = [self.get_video_info_task(aid=video_item.get("aid"), bvid="", semaphore=semaphore) for video_item in video_list]
-                except Exception as e:
-                    utils.logger.warning(f"[BilibiliCrawler.search_by_keywords] error in the task list. The video for this page will not be included. {e}")
-                video_items = await asyncio.gather(*task_list)
-                for video_item in video_items:
-                    if video_item:
-                        video_id_list.append(video_item.get("View").get("aid"))
-                        await bilibili_store.update_bilibili_video(video_item)
-                        await bilibili_store.update_up_info(video_item)
-                        await self.get_bilibili_video(video_item, semaphore)
-                page += 1
+            if not video_list:
+                utils.logger.info(f"[BilibiliCrawler.search_by_keywords] No more videos for '{keyword}', moving to next keyword.")
+                break
 
-                # Sleep after page navigation
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[BilibiliCrawler.search_by_keywords] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
+            for video_item in video_list:
+                await emit(video_item)
+            page += 1
+
+            # Sleep after page navigation
+            await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
+            utils.logger.info(f"[BilibiliCrawler.search_by_keywords] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
 
-                await self.batch_get_video_comments(video_id_list)
+    async def fetch_search_video_detail(self, video_item: Dict, emit: Emit, semaphore: asyncio.Semaphore) -> None:
+        """
+        Pipeline stage: fetch the detail of a searched video
+        :param video_item:
+        :param emit:
+        :param semaphore:
+        :return:
+        """
+        video_detail = await self.get_video_info_task(aid=video_item.get("aid"), bvid="", semaphore=semaphore)
+        if video_detail:
+            await emit(video_detail)
+
+    async def store_search_video(self, video_detail: Dict, emit: Emit, semaphore: asyncio.Semaphore) -> None:
+        """
+        Pipeline stage: save a video with its up info and media, then hand its aid on to the comment stage
+        :param video_detail:
+        :param emit:
+        :param semaphore:
+        :return:
+        """
+        await bilibili_store.update_bilibili_video(video_detail)
+        await bilibili_store.update_up_info(video_detail)
+        await self.get_bilibili_video(video_detail, semaphore)
+        await emit(video_detail.get("View").get("aid"))
+
+    async def fetch_search_video_comments(self, video_id: str, emit: Emit, semaphore: asyncio.Semaphore) -> None:
+        """
+        Pipeline stage: fetch the comments of a stored video
+        :param video_id:
+        :param emit:
+        :param semaphore:
+        :return:
+        """
+        await self.get_comments(video_id, semaphore)
 
     async def search_by_keywords_in_time_range(self, daily_limit: bool):
         """
@@ -239,84 +289,90 @@ class BilibiliCrawler(AbstractCrawler):
         :param daily_limit: if True, strictly limit the number of notes per day and total.
         """
         utils.logger.info(f"[BilibiliCrawler.search_by_keywords_in_time_range] Begin search with daily_limit={daily_limit}")
+        await run_keyword_workers("bili_search_in_time_range", config.KEYWORDS.split(","), functools.partial(self.search_keyword_in_time_range, daily_limit=daily_limit), fatal_errors=search_fatal_errors(IPBlockError))
+
+    async def search_keyword_in_time_range(self, keyword: str, daily_limit: bool):
+        """
+        Search bilibili video with one keyword in the given time range, day by day.
+        :param keyword:
+        :param daily_limit: if True, strictly limit the number of notes per day and total.
+        """
         bili_limit_count = 20
         start_page = config.START_PAGE
+        source_keyword_var.set(keyword)
+        utils.logger.info(f"[BilibiliCrawler.search_by_keywords_in_time_range] Current search keyword: {keyword}")
+        total_notes_crawled_for_keyword = 0
+
+        for day in pd.date_range(start=config.START_DAY, end=config.END_DAY, freq="D"):
+            if (daily_limit and total_notes_crawled_for_keyword >= config.CRAWLER_MAX_NOTES_COUNT):
+                utils.logger.info(f"[BilibiliCrawler.search] Reached CRAWLER_MAX_NOTES_COUNT limit for keyword '{keyword}', skipping remaining days.")
+                break
 
-        for keyword in config.KEYWORDS.split(","):
-            source_keyword_var.set(keyword)
-            utils.logger.info(f"[BilibiliCrawler.search_by_keywords_in_time_range] Current search keyword: {keyword}")
-            total_notes_crawled_for_keyword = 0
+            if (not daily_limit and total_notes_crawled_for_keyword >= config.CRAWLER_MAX_NOTES_COUNT):
+                utils.logger.info(f"[BilibiliCrawler.search] Reached CRAWLER_MAX_NOTES_COUNT limit for keyword '{keyword}', skipping remaining days.")
+                break
+
+            pubtime_begin_s, pubtime_end_s = await self.get_pubtime_datetime(start=day.strftime("%Y-%m-%d"), end=day.strftime("%Y-%m-%d"))
+            page = 1
+            notes_count_this_day = 0
 
-            for day in pd.date_range(start=config.START_DAY, end=config.END_DAY, freq="D"):
+            while True:
+                if notes_count_this_day >= config.MAX_NOTES_PER_DAY:
+                    utils.logger.info(f"[BilibiliCrawler.search] Reached MAX_NOTES_PER_DAY limit for {day.ctime()}.")
+                    break
                 if (daily_limit and total_notes_crawled_for_keyword >= config.CRAWLER_MAX_NOTES_COUNT):
-                    utils.logger.info(f"[BilibiliCrawler.search] Reached CRAWLER_MAX_NOTES_COUNT limit for keyword '{keyword}', skipping remaining days.")
+                    utils.logger.info(f"[BilibiliCrawler.search] Reached CRAWLER_MAX_NOTES_COUNT limit for keyword '{keyword}'.")
                     break
-
                 if (not daily_limit and total_notes_crawled_for_keyword >= config.CRAWLER_MAX_NOTES_COUNT):
-                    utils.logger.info(f"[BilibiliCrawler.search] Reached CRAWLER_MAX_NOTES_COUNT limit for keyword '{keyword}', skipping remaining days.")
                     break
 
-                pubtime_begin_s, pubtime_end_s = await self.get_pubtime_datetime(start=day.strftime("%Y-%m-%d"), end=day.strftime("%Y-%m-%d"))
-                page = 1
-                notes_count_this_day = 0
-
-                while True:
-                    if notes_count_this_day >= config.MAX_NOTES_PER_DAY:
-                        utils.logger.info(f"[BilibiliCrawler.search] Reached MAX_NOTES_PER_DAY limit for {day.ctime()}.")
-                        break
-                    if (daily_limit and total_notes_crawled_for_keyword >= config.CRAWLER_MAX_NOTES_COUNT):
-                        utils.logger.info(f"[BilibiliCrawler.search] Reached CRAWLER_MAX_NOTES_COUNT limit for keyword '{keyword}'.")
-                        break
-                    if (not daily_limit and total_notes_crawled_for_keyword >= config.CRAWLER_MAX_NOTES_COUNT):
+                try:
+                    utils.logger.info(f"[BilibiliCrawler.search] search bilibili keyword: {keyword}, date: {day.ctime()}, page: {page}")
+                    video_id_list: List[str] = []
+                    videos_res = await self.bili_client.search_video_by_keyword(
+                        keyword=keyword,
+                        page=page,
+                        page_size=bili_limit_count,
+                        order=SearchOrderType.DEFAULT,
+                        pubtime_begin_s=pubtime_begin_s,
+                        pubtime_end_s=pubtime_end_s,
+                    )
+                    video_list: List[Dict] = videos_res.get("result")
+
+                    if not video_list:
+                        utils.logger.info(f"[BilibiliCrawler.search] No more videos for '{keyword}' on {day.ctime()}, moving to next day.")
                         break
 
-                    try:
-                        utils.logger.info(f"[BilibiliCrawler.search] search bilibili keyword: {keyword}, date: {day.ctime()}, page: {page}")
-                        video_id_list: List[str] = []
-                        videos_res = await self.bili_client.search_video_by_keyword(
-                            keyword=keyword,
-                            page=page,
-                            page_size=bili_limit_count,
-                            order=SearchOrderType.DEFAULT,
-                            pubtime_begin_s=pubtime_begin_s,
-                            pubtime_end_s=pubtime_end_s,
-                        )
-                        video_list: List[Dict] = videos_res.get("result")
-
-                        if not video_list:
-                            utils.logger.info(f"[BilibiliCrawler.search] No more videos for '{keyword}' on {day.ctime()}, moving to next day.")
-                            break
-
-                        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-                        task_list = [self.get_video_info_task(aid=video_item.get("aid"), bvid="", semaphore=semaphore) for video_item in video_list]
-                        video_items = await asyncio.gather(*task_list)
-
-                        for video_item in video_items:
-                            if video_item:
-                                if (daily_limit and total_notes_crawled_for_keyword >= config.CRAWLER_MAX_NOTES_COUNT):
-                                    break
-                                if (not daily_limit and total_notes_crawled_for_keyword >= config.CRAWLER_MAX_NOTES_COUNT):
-                                    break
-                                if notes_count_this_day >= config.MAX_NOTES_PER_DAY:
-                                    break
-                                notes_count_this_day += 1
-                                total_notes_crawled_for_keyword += 1
-                                video_id_list.append(video_item.get("View").get("aid"))
-                                await bilibili_store.update_bilibili_video(video_item)
-                                await bilibili_store.update_up_info(video_item)
-                                await self.get_bilibili_video(video_item, semaphore)
-
-                        page += 1
-
-                        # Sleep after page navigation
-                        await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                        utils.logger.info(f"[BilibiliCrawler.search_by_keywords_in_time_range] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
-
-                        await self.batch_get_video_comments(video_id_list)
-
-                    except Exception as e:
-                        utils.logger.error(f"[BilibiliCrawler.search] Error searching on {day.ctime()}: {e}")
-                        break
+                    semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+                    task_list = [self.get_video_info_task(aid=video_item.get("aid"), bvid="", semaphore=semaphore) for video_item in video_list]
+                    video_items = await asyncio.gather(*task_list)
+
+                    for video_item in video_items:
+                        if video_item:
+                            if (daily_limit and total_notes_crawled_for_keyword >= config.CRAWLER_MAX_NOTES_COUNT):
+                                break
+                            if (not daily_limit and total_notes_crawled_for_keyword >= config.CRAWLER_MAX_NOTES_COUNT):
+                                break
+                            if notes_count_this_day >= config.MAX_NOTES_PER_DAY:
+                                break
+                            notes_count_this_day += 1
+                            total_notes_crawled_for_keyword += 1
+                            video_id_list.append(video_item.get("View").get("aid"))
+                            await bilibili_store.update_bilibili_video(video_item)
+                            await bilibili_store.update_up_info(video_item)
+                            await self.get_bilibili_video(video_item, semaphore)
+
+                    page += 1
+
+                    # Sleep after page navigation
+                    await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
+                    utils.logger.info(f"[BilibiliCrawler.search_by_keywords_in_time_range] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
+
+                    await self.batch_get_video_comments(video_id_list)
+
+                except Exception as e:
+                    utils.logger.error(f"[BilibiliCrawler.search] Error searching on {day.ctime()}: {e}")
+                    break
 
     async def batch_get_video_comments(self, video_id_list: List[str]):
         """
@@ -550,6 +606,8 @@ class BilibiliCrawler(AbstractCrawler):
 
     async def close(self):
         """Close browser context"""
+        if getattr(self, "bili_client", None):
+            await self.bili_client.close_proxy_shards()
         try:
             # If using CDP mode, special handling is required
             if self.cdp_manager:
@@ -562,6 +620,8 @@ class BilibiliCrawler(AbstractCrawler):
             utils.logger.warning("[BilibiliCrawler.close] Browser context was already closed.")
         except Exception as e:
             utils.logger.error(f"[BilibiliCrawler.close] An error occurred during close: {e}")
+        if self.ip_proxy_pool:
+            await self.ip_proxy_pool.close()
 
     async def get_bilibili_video(self, video_item: Dict, semaphore: asyncio.Semaphore):
         """
@@ -23,36 +23,49 @@
 # @Time    : 2023/12/2 23:26
 # @Desc    : bilibili request parameter signing
 # Reverse engineering implementation reference: https://socialsisteryi.github.io/bilibili-API-collect/docs/misc/sign/wbi.html#wbi%E7%AD%BE%E5%90%8D%E7%AE%97%E6%B3%95
+import asyncio
 import re
+import time
 import urllib.parse
+from functools import lru_cache
 from hashlib import md5
-from typing import Dict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
 
 from model.m_bilibili import VideoUrlInfo, CreatorUrlInfo
 from tools import utils
 
+MIXIN_KEY_ENC_TAB = [
+    46, 47, 18, 2, 53, 8, 23, 32, 15, 50, 10, 31, 58, 3, 45, 35, 27, 43, 5, 49,
+    33, 9, 42, 19, 29, 28, 14, 39, 12, 38, 41, 13, 37, 48, 7, 16, 24, 55, 40,
+    61, 26, 17, 0, 1, 60, 51, 30, 4, 22, 25, 54, 21, 56, 59, 6, 63, 57, 62, 11,
+    36, 20, 34, 44, 52
+]
+
+# characters removed from parameter values before signing
+_WBI_VALUE_FILTER = str.maketrans("", "", "!'()*")
+
+
+@lru_cache(maxsize=16)
+def get_mixin_key(img_key: str, sub_key: str) -> str:
+    """
+    Salt of the w_rid hash, it only changes when the WBI keys change
+    """
+    mixin_key = img_key + sub_key
+    return "".join(mixin_key[mt] for mt in MIXIN_KEY_ENC_TAB)[:32]
+
 
 class BilibiliSign:
     def __init__(self, img_key: str, sub_key: str):
         self.img_key = img_key
         self.sub_key = sub_key
-        self.map_table = [
-            46, 47, 18, 2, 53, 8, 23, 32, 15, 50, 10, 31, 58, 3, 45, 35, 27, 43, 5, 49,
-            33, 9, 42, 19, 29, 28, 14, 39, 12, 38, 41, 13, 37, 48, 7, 16, 24, 55, 40,
-            61, 26, 17, 0, 1, 60, 51, 30, 4, 22, 25, 54, 21, 56, 59, 6, 63, 57, 62, 11,
-            36, 20, 34, 44, 52
-        ]
+        self.map_table = MIXIN_KEY_ENC_TAB
 
     def get_salt(self) -> str:
         """
         Get the salted key
         :return:
         """
-        salt = ""
-        mixin_key = self.img_key + self.sub_key
-        for mt in self.map_table:
-            salt += mixin_key[mt]
-        return salt[:32]
+        return get_mixin_key(self.img_key, self.sub_key)
 
     def sign(self, req_data: Dict) -> Dict:
         """
@@ -63,12 +76,11 @@ class BilibiliSign:
         """
         current_ts = utils.get_unix_timestamp()
         req_data.update({"wts": current_ts})
-        req_data = dict(sorted(req_data.items()))
         req_data = {
             # Filter "!'()*" characters from values
-            k: ''.join(filter(lambda ch: ch not in "!'()*", str(v)))
+            k: str(v).translate(_WBI_VALUE_FILTER)
             for k, v
-            in req_data.items()
+            in sorted(req_data.items())
         }
         query = urllib.parse.urlencode(req_data)
         salt = self.get_salt()
@@ -77,6 +89,82 @@ class BilibiliSign:
         return req_data
 
 
+class WbiKeyManager:
+    """
+    Caches img_key / sub_key and the signer built on them, so signing a request is a local md5.
+
+    Keys older than ttl - refresh_ahead are refreshed in the background while the cached ones keep
+    being used, only keys older than ttl (or never fetched) make the caller wait for the fetch.
+    A failed background refresh keeps the old keys and is retried on a later request.
+
+    Usage:
+        wbi_keys = WbiKeyManager(bili_client.get_wbi_keys)
+        signed_params = await wbi_keys.sign(params)
+    """
+
+    def __init__(
+        self,
+        fetch_keys: Callable[[], Awaitable[Tuple[str, str]]],
+        ttl: float = 86400,
+        refresh_ahead: float = 600,
+    ):
+        """
+        :param fetch_keys: Coroutine function returning (img_key, sub_key)
+        :param ttl: Seconds the keys are used for
+        :param refresh_ahead: Seconds before expiry the background refresh starts
+        """
+        self.fetch_keys = fetch_keys
+        self.ttl = ttl
+        self.refresh_ahead = min(refresh_ahead, ttl)
+        self.fetch_count = 0
+        self._signer: Optional[BilibiliSign] = None
+        # None until the keys are fetched and after invalidate(), the next request then waits for the fetch
+        self._fetched_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    async def get_signer(self) -> BilibiliSign:
+        fetched_at = self._fetched_at
+        if self._signer is None or fetched_at is None:
+            return await self._refresh(fetched_at)
+        age = time.monotonic() - fetched_at
+        if age >= self.ttl:
+            return await self._refresh(fetched_at)
+        if age >= self.ttl - self.refresh_ahead and self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._background_refresh(fetched_at))
+        return self._signer
+
+    async def sign(self, req_data: Dict) -> Dict:
+        return (await self.get_signer()).sign(req_data)
+
+    def invalidate(self) -> None:
+        """
+        Fetch the keys again on the next request, e.g. after login
+        """
+        self._fetched_at = None
+
+    async def _refresh(self, fetched_at: Optional[float]) -> BilibiliSign:
+        """
+        :param fetched_at: Fetch time of the keys the caller saw as stale
+        """
+        async with self._lock:
+            # another caller refreshed the keys while this one was waiting for the lock
+            if self._signer is None or self._fetched_at is None or self._fetched_at == fetched_at:
+                img_key, sub_key = await self.fetch_keys()
+                self.fetch_count += 1
+                self._signer = BilibiliSign(img_key, sub_key)
+                self._fetched_at = time.monotonic()
+            return self._signer
+
+    async def _background_refresh(self, fetched_at: float) -> None:
+        try:
+            await self._refresh(fetched_at)
+        except Exception as e:
+            utils.logger.warning(f"[WbiKeyManager._background_refresh] refresh wbi keys failed, keep using the old ones: {e!r}")
+        finally:
+            self._refresh_task = None
+
+
 def parse_video_info_from_url(url: str) -> VideoUrlInfo:
     """
     Parse video ID from Bilibili video URL
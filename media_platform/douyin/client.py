@@ -26,9 +26,11 @@ from typing import TYPE_CHECKING, Any, Callable, Dict, Union, Optional
 import httpx
 from playwright.async_api import BrowserContext
 
+import config
 from base.base_crawler import AbstractApiClient
-from proxy.proxy_mixin import ProxyRefreshMixin
-from tools import utils
+from proxy.proxy_mixin import ProxyRefreshMixin, track_proxy_outcome
+from tools import json_codec, utils
+from tools.resilience import ResiliencePolicy
 from var import request_keyword_var
 
 if TYPE_CHECKING:
@@ -38,6 +40,9 @@ from .exception import *
 from .field import *
 from .help import *
 
+# Business errors are raised to the crawler as before, only transport failures are retried
+douyin_resilience_policy = ResiliencePolicy("douyin", retryable_errors=(httpx.TransportError,))
+
 
 class DouYinClient(AbstractApiClient, ProxyRefreshMixin):
 
@@ -57,6 +62,8 @@ class DouYinClient(AbstractApiClient, ProxyRefreshMixin):
         self._host = "https://www.douyin.com"
         self.playwright_page = playwright_page
         self.cookie_dict = cookie_dict
+        # 公共参数、webid 和 msToken 只生成一次，msToken 定时或失效时重新读取
+        self.request_context = DouyinRequestContext(playwright_page, ms_token_ttl=config.DY_MS_TOKEN_REFRESH_SEC)
         # 初始化代理池（来自 ProxyRefreshMixin）
         self.init_proxy_pool(proxy_ip_pool)
 
@@ -71,36 +78,7 @@ class DouYinClient(AbstractApiClient, ProxyRefreshMixin):
         if not params:
             return
         headers = headers or self.headers
-        local_storage: Dict = await self.playwright_page.evaluate("() => window.localStorage")  # type: ignore
-        common_params = {
-            "device_platform": "webapp",
-            "aid": "6383",
-            "channel": "channel_pc_web",
-            "version_code": "190600",
-            "version_name": "19.6.0",
-            "update_version_code": "170400",
-            "pc_client_type": "1",
-            "cookie_enabled": "true",
-            "browser_language": "zh-CN",
-            "browser_platform": "MacIntel",
-            "browser_name": "Chrome",
-            "browser_version": "125.0.0.0",
-            "browser_online": "true",
-            "engine_name": "Blink",
-            "os_name": "Mac OS",
-            "os_version": "10.15.7",
-            "cpu_core_num": "8",
-            "device_memory": "8",
-            "engine_version": "109.0",
-            "platform": "PC",
-            "screen_width": "2560",
-            "screen_height": "1440",
-            'effective_type': '4g',
-            "round_trip_time": "50",
-            "webid": get_web_id(),
-            "msToken": local_storage.get("xmst"),
-        }
-        params.update(common_params)
+        params.update(await self.request_context.get_common_params())
         query_string = urllib.parse.urlencode(params)
 
         # 20240927 a-bogus更新（JS版本）
@@ -112,17 +90,21 @@ class DouYinClient(AbstractApiClient, ProxyRefreshMixin):
             a_bogus = await get_a_bogus(uri, query_string, post_data, headers["User-Agent"], self.playwright_page)
             params["a_bogus"] = a_bogus
 
+    @douyin_resilience_policy.retry
+    @track_proxy_outcome
     async def request(self, method, url, **kwargs):
         # 每次请求前检测代理是否过期
         await self._refresh_proxy_if_expired()
 
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
+        async with self._proxy_http_client() as client:
             response = await client.request(method, url, timeout=self.timeout, **kwargs)
         try:
             if response.text == "" or response.text == "blocked":
                 utils.logger.error(f"request params incrr, response.text: {response.text}")
+                # msToken 可能已失效，下次请求重新读取
+                self.request_context.invalidate_ms_token()
                 raise Exception("account blocked")
-            return response.json()
+            return json_codec.loads(response.content)
         except Exception as e:
             raise DataFetchError(f"{e}, {response.text}")
 
@@ -151,6 +133,7 @@ class DouYinClient(AbstractApiClient, ProxyRefreshMixin):
         cookie_str, cookie_dict = utils.convert_cookies(await browser_context.cookies())
         self.headers["Cookie"] = cookie_str
         self.cookie_dict = cookie_dict
+        self.request_context.invalidate_ms_token()
 
     async def search_info_by_keyword(
         self,
@@ -333,7 +316,7 @@ class DouYinClient(AbstractApiClient, ProxyRefreshMixin):
         return result
 
     async def get_aweme_media(self, url: str) -> Union[bytes, None]:
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
+        async with self._proxy_http_client() as client:
             try:
                 response = await client.request("GET", url, timeout=self.timeout, follow_redirects=True)
                 response.raise_for_status()
@@ -354,10 +337,10 @@ class DouYinClient(AbstractApiClient, ProxyRefreshMixin):
         Returns:
             重定向后的完整URL
         """
-        async with httpx.AsyncClient(proxy=self.proxy, follow_redirects=False) as client:
+        async with self._proxy_http_client() as client:
             try:
                 utils.logger.info(f"[DouYinClient.resolve_short_url] Resolving short URL: {short_url}")
-                response = await client.get(short_url, timeout=10)
+                response = await client.get(short_url, timeout=10, follow_redirects=False)
 
                 # 短链接通常返回302重定向
                 if response.status_code in [301, 302, 303, 307, 308]:
@@ -18,6 +18,7 @@
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
 
 import asyncio
+import functools
 import os
 import random
 from asyncio import Task
@@ -37,12 +38,13 @@ from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import douyin as douyin_store
 from tools import utils
 from tools.cdp_browser import CDPBrowserManager
+from tools.pipeline import CrawlPipeline, Emit, keyword_workers, search_fatal_errors, stage_workers
 from var import crawler_type_var, source_keyword_var
 
 from .client import DouYinClient
-from .exception import DataFetchError
+from .exception import DataFetchError, IPBlockError
 from .field import PublishTimeType
-from .help import parse_video_info_from_url, parse_creator_info_from_url
+from .help import douyin_sign_pool, parse_video_info_from_url, parse_creator_info_from_url
 from .login import DouYinLogin
 
 
@@ -115,60 +117,80 @@ class DouYinCrawler(AbstractCrawler):
             utils.logger.info("[DouYinCrawler.start] Douyin Crawler finished ...")
 
     async def search(self) -> None:
+        """
+        Search pages, storage and comments run as pipeline stages, the search results already carry the aweme info
+        """
         utils.logger.info("[DouYinCrawler.search] Begin search douyin keywords")
+        pipeline = CrawlPipeline("dy_search", fatal_errors=search_fatal_errors(IPBlockError))
+        pipeline.add_stage("search", self.search_keyword_awemes, workers=keyword_workers())
+        pipeline.add_stage("store", self.store_search_aweme)
+        if config.ENABLE_GET_COMMENTS:
+            comment_workers = stage_workers(config.PIPELINE_COMMENT_WORKERS)
+            pipeline.add_stage(
+                "comments",
+                functools.partial(self.fetch_search_aweme_comments, semaphore=asyncio.Semaphore(comment_workers)),
+                workers=comment_workers,
+            )
+        await pipeline.run(config.KEYWORDS.split(","))
+
+    async def search_keyword_awemes(self, keyword: str, emit: Emit) -> None:
+        """Pipeline stage: page through the search results of a keyword and emit the aweme infos"""
+        source_keyword_var.set(keyword)
+        utils.logger.info(f"[DouYinCrawler.search] Current keyword: {keyword}")
         dy_limit_count = 10  # douyin limit page fixed value
-        if config.CRAWLER_MAX_NOTES_COUNT < dy_limit_count:
-            config.CRAWLER_MAX_NOTES_COUNT = dy_limit_count
+        # the limit is raised to one page for this crawler only, config stays as it is
+        max_notes_count = max(config.CRAWLER_MAX_NOTES_COUNT, dy_limit_count)
         start_page = config.START_PAGE  # start page number
-        for keyword in config.KEYWORDS.split(","):
-            source_keyword_var.set(keyword)
-            utils.logger.info(f"[DouYinCrawler.search] Current keyword: {keyword}")
-            aweme_list: List[str] = []
-            page = 0
-            dy_search_id = ""
-            while (page - start_page + 1) * dy_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
-                if page < start_page:
-                    utils.logger.info(f"[DouYinCrawler.search] Skip {page}")
-                    page += 1
-                    continue
-                try:
-                    utils.logger.info(f"[DouYinCrawler.search] search douyin keyword: {keyword}, page: {page}")
-                    posts_res = await self.dy_client.search_info_by_keyword(
-                        keyword=keyword,
-                        offset=page * dy_limit_count - dy_limit_count,
-                        publish_time=PublishTimeType(config.PUBLISH_TIME_TYPE),
-                        search_id=dy_search_id,
-                    )
-                    if posts_res.get("data") is None or posts_res.get("data") == []:
-                        utils.logger.info(f"[DouYinCrawler.search] search douyin keyword: {keyword}, page: {page} is empty,{posts_res.get('data')}`")
-                        break
-                except DataFetchError:
-                    utils.logger.error(f"[DouYinCrawler.search] search douyin keyword: {keyword} failed")
-                    break
-
+        aweme_list: List[str] = []
+        page = 0
+        dy_search_id = ""
+        while (page - start_page + 1) * dy_limit_count <= max_notes_count:
+            if page < start_page:
+                utils.logger.info(f"[DouYinCrawler.search] Skip {page}")
                 page += 1
-                if "data" not in posts_res:
-                    utils.logger.error(f"[DouYinCrawler.search] search douyin keyword: {keyword} failed，账号也许被风控了。")
+                continue
+            try:
+                utils.logger.info(f"[DouYinCrawler.search] search douyin keyword: {keyword}, page: {page}")
+                posts_res = await self.dy_client.search_info_by_keyword(
+                    keyword=keyword,
+                    offset=page * dy_limit_count - dy_limit_count,
+                    publish_time=PublishTimeType(config.PUBLISH_TIME_TYPE),
+                    search_id=dy_search_id,
+                )
+                if posts_res.get("data") is None or posts_res.get("data") == []:
+                    utils.logger.info(f"[DouYinCrawler.search] search douyin keyword: {keyword}, page: {page} is empty,{posts_res.get('data')}`")
                     break
-                dy_search_id = posts_res.get("extra", {}).get("logid", "")
-                page_aweme_list = []
-                for post_item in posts_res.get("data"):
-                    try:
-                        aweme_info: Dict = (post_item.get("aweme_info") or post_item.get("aweme_mix_info", {}).get("mix_items")[0])
-                    except TypeError:
-                        continue
-                    aweme_list.append(aweme_info.get("aweme_id", ""))
-                    page_aweme_list.append(aweme_info.get("aweme_id", ""))
-                    await douyin_store.update_douyin_aweme(aweme_item=aweme_info)
-                    await self.get_aweme_media(aweme_item=aweme_info)
-                
-                # Batch get note comments for the current page
-                await self.batch_get_note_comments(page_aweme_list)
-
-                # Sleep after each page navigation
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[DouYinCrawler.search] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
-            utils.logger.info(f"[DouYinCrawler.search] keyword:{keyword}, aweme_list:{aweme_list}")
+            except DataFetchError:
+                utils.logger.error(f"[DouYinCrawler.search] search douyin keyword: {keyword} failed")
+                break
+
+            page += 1
+            if "data" not in posts_res:
+                utils.logger.error(f"[DouYinCrawler.search] search douyin keyword: {keyword} failed，账号也许被风控了。")
+                break
+            dy_search_id = posts_res.get("extra", {}).get("logid", "")
+            for post_item in posts_res.get("data"):
+                try:
+                    aweme_info: Dict = (post_item.get("aweme_info") or post_item.get("aweme_mix_info", {}).get("mix_items")[0])
+                except TypeError:
+                    continue
+                aweme_list.append(aweme_info.get("aweme_id", ""))
+                await emit(aweme_info)
+
+            # Sleep after each page navigation
+            await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
+            utils.logger.info(f"[DouYinCrawler.search] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
+        utils.logger.info(f"[DouYinCrawler.search] keyword:{keyword}, aweme_list:{aweme_list}")
+
+    async def store_search_aweme(self, aweme_info: Dict, emit: Emit) -> None:
+        """Pipeline stage: save an aweme with its media, then hand its id on to the comment stage"""
+        await douyin_store.update_douyin_aweme(aweme_item=aweme_info)
+        await self.get_aweme_media(aweme_item=aweme_info)
+        await emit(aweme_info.get("aweme_id", ""))
+
+    async def fetch_search_aweme_comments(self, aweme_id: str, emit: Emit, semaphore: asyncio.Semaphore) -> None:
+        """Pipeline stage: fetch the comments of a stored aweme"""
+        await self.get_comments(aweme_id, semaphore)
 
     async def get_specified_awemes(self):
         """Get the information and comments of the specified post from URLs or IDs"""
@@ -378,12 +400,18 @@ class DouYinCrawler(AbstractCrawler):
 
     async def close(self) -> None:
         """Close browser context"""
+        if getattr(self, "dy_client", None):
+            await self.dy_client.close_proxy_shards()
         # 如果使用CDP模式，需要特殊处理
         if self.cdp_manager:
             await self.cdp_manager.cleanup()
             self.cdp_manager = None
         else:
             await self.browser_context.close()
+        utils.logger.info(f"[DouYinCrawler.close] a_bogus signing stats: {douyin_sign_pool.stats.snapshot()}")
+        await douyin_sign_pool.close()
+        if self.ip_proxy_pool:
+            await self.ip_proxy_pool.close()
         utils.logger.info("[DouYinCrawler.close] Browser context closed ...")
 
     async def get_aweme_media(self, aweme_item: Dict):
@@ -24,17 +24,39 @@
 # @Time    : 2024/6/10 02:24
 # @Desc    : Get a_bogus parameter, for learning and communication only, do not use for commercial purposes, contact author to delete if infringement
 
+import asyncio
 import random
 import re
-from typing import Optional
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
 
 import execjs
 from playwright.async_api import Page
 
+import config
 from model.m_douyin import VideoUrlInfo, CreatorUrlInfo
 from tools.crawler_util import extract_url_params_to_dict
+from tools.js_worker_pool import JsWorkerPool
+from tools.sign_service import sign_service
+
+DOUYIN_SIGN_JS = 'libs/douyin.js'
+
+# long-lived node workers, started on the first signature
+douyin_sign_pool = JsWorkerPool(DOUYIN_SIGN_JS, size=config.JS_SIGN_WORKER_NUM, timeout=config.JS_SIGN_TIMEOUT_SEC, name="douyin")
+
+_douyin_sign_obj = None
+
+
+def get_douyin_sign_obj():
+    """
+    PyExecJS context, compiled on first use by the synchronous signing path only
+    """
+    global _douyin_sign_obj
+    if _douyin_sign_obj is None:
+        with open(DOUYIN_SIGN_JS, encoding='utf-8-sig') as f:
+            _douyin_sign_obj = execjs.compile(f.read())
+    return _douyin_sign_obj
 
-douyin_sign_obj = execjs.compile(open('libs/douyin.js', encoding='utf-8-sig').read())
 
 def get_web_id():
     """
@@ -58,15 +80,112 @@ def get_web_id():
 
 
 
+# query params every Douyin web request carries, they describe the browser and never change
+DOUYIN_COMMON_PARAMS = {
+    "device_platform": "webapp",
+    "aid": "6383",
+    "channel": "channel_pc_web",
+    "version_code": "190600",
+    "version_name": "19.6.0",
+    "update_version_code": "170400",
+    "pc_client_type": "1",
+    "cookie_enabled": "true",
+    "browser_language": "zh-CN",
+    "browser_platform": "MacIntel",
+    "browser_name": "Chrome",
+    "browser_version": "125.0.0.0",
+    "browser_online": "true",
+    "engine_name": "Blink",
+    "os_name": "Mac OS",
+    "os_version": "10.15.7",
+    "cpu_core_num": "8",
+    "device_memory": "8",
+    "engine_version": "109.0",
+    "platform": "PC",
+    "screen_width": "2560",
+    "screen_height": "1440",
+    "effective_type": "4g",
+    "round_trip_time": "50",
+}
+
+GET_MS_TOKEN_JS = "() => window.localStorage.getItem('xmst')"
+
+
+class DouyinRequestContext:
+    """
+    Common params of one client's requests: the static params, a webid generated once and
+    the msToken read from localStorage (xmst).
+
+    msToken is read again after ms_token_ttl seconds, or on the next request after
+    invalidate_ms_token() (the server rejected a request, or cookies changed).
+    """
+
+    def __init__(self, page: Optional[Page], ms_token_ttl: float = 600):
+        self.page = page
+        self.ms_token_ttl = ms_token_ttl
+        self.ms_token_reads = 0
+        self.common_params: Dict[str, Optional[str]] = {**DOUYIN_COMMON_PARAMS, "webid": get_web_id(), "msToken": None}
+        self._ms_token_read_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    async def get_common_params(self) -> Dict[str, Optional[str]]:
+        read_at = self._ms_token_read_at
+        if read_at is None or time.monotonic() - read_at >= self.ms_token_ttl:
+            await self._refresh_ms_token(read_at)
+        return self.common_params
+
+    def invalidate_ms_token(self) -> None:
+        self._ms_token_read_at = None
+
+    async def _refresh_ms_token(self, read_at: Optional[float]) -> None:
+        """
+        :param read_at: Read time of the msToken the caller saw as stale
+        """
+        async with self._lock:
+            # another request refreshed it while this one was waiting for the lock
+            if self._ms_token_read_at is not None and self._ms_token_read_at != read_at:
+                return
+            if self.page is not None:
+                self.common_params["msToken"] = await self.page.evaluate(GET_MS_TOKEN_JS)
+                self.ms_token_reads += 1
+            self._ms_token_read_at = time.monotonic()
+
+
 async def get_a_bogus(url: str, params: str, post_data: dict, user_agent: str, page: Page = None):
     """
     Get a_bogus parameter, currently does not support POST request type signature
+    Signed on the local signing service when it is running, otherwise on the in-process worker pool
     """
-    return get_a_bogus_from_js(url, params, user_agent)
+    a_bogus = await sign_service.sign_douyin(url, params, user_agent)
+    if a_bogus is not None:
+        return a_bogus
+    return await douyin_sign_pool.call(get_sign_js_name(url), params, user_agent)
+
+
+async def get_a_bogus_many(requests: Sequence[Tuple[str, str]], user_agent: str) -> List[str]:
+    """
+    Sign many requests concurrently on the worker pool
+    Args:
+        requests: (url, params) pairs
+        user_agent:
+
+    Returns:
+        a_bogus values in the same order
+    """
+    return await douyin_sign_pool.sign_many(
+        [(get_sign_js_name(url), (params, user_agent)) for url, params in requests]
+    )
+
+
+def get_sign_js_name(url: str) -> str:
+    if "/reply" in url:
+        return "sign_reply"
+    return "sign_datail"
+
 
 def get_a_bogus_from_js(url: str, params: str, user_agent: str):
     """
-    Get a_bogus parameter through js
+    Get a_bogus parameter through js, synchronous, one node process per call
     Args:
         url:
         params:
@@ -75,10 +194,7 @@ def get_a_bogus_from_js(url: str, params: str, user_agent: str):
     Returns:
 
     """
-    sign_js_name = "sign_datail"
-    if "/reply" in url:
-        sign_js_name = "sign_reply"
-    return douyin_sign_obj.call(sign_js_name, params, user_agent)
+    return get_douyin_sign_obj().call(get_sign_js_name(url), params, user_agent)
 
 
 
@@ -20,7 +20,6 @@
 
 # -*- coding: utf-8 -*-
 import asyncio
-import json
 from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
 from urllib.parse import urlencode
 
@@ -29,8 +28,9 @@ from playwright.async_api import BrowserContext, Page
 
 import config
 from base.base_crawler import AbstractApiClient
-from proxy.proxy_mixin import ProxyRefreshMixin
-from tools import utils
+from proxy.proxy_mixin import ProxyRefreshMixin, track_proxy_outcome
+from tools import json_codec, utils
+from tools.resilience import ResiliencePolicy
 
 if TYPE_CHECKING:
     from proxy.proxy_ip_pool import ProxyIpPool
@@ -38,6 +38,9 @@ if TYPE_CHECKING:
 from .exception import DataFetchError
 from .graphql import KuaiShouGraphQL
 
+# Business errors are raised to the crawler as before, only transport failures are retried
+kuaishou_resilience_policy = ResiliencePolicy("kuaishou", retryable_errors=(httpx.TransportError,))
+
 
 class KuaiShouClient(AbstractApiClient, ProxyRefreshMixin):
     def __init__(
@@ -61,13 +64,15 @@ class KuaiShouClient(AbstractApiClient, ProxyRefreshMixin):
         # Initialize proxy pool (from ProxyRefreshMixin)
         self.init_proxy_pool(proxy_ip_pool)
 
+    @kuaishou_resilience_policy.retry
+    @track_proxy_outcome
     async def request(self, method, url, **kwargs) -> Any:
         # Check if proxy is expired before each request
         await self._refresh_proxy_if_expired()
 
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
+        async with self._proxy_http_client() as client:
             response = await client.request(method, url, timeout=self.timeout, **kwargs)
-        data: Dict = response.json()
+        data: Dict = json_codec.loads(response.content)
         if data.get("errors"):
             raise DataFetchError(data.get("errors", "unkonw error"))
         else:
@@ -82,11 +87,12 @@ class KuaiShouClient(AbstractApiClient, ProxyRefreshMixin):
         )
 
     async def post(self, uri: str, data: dict) -> Dict:
-        json_str = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+        json_str = json_codec.dumps(data)
         return await self.request(
             method="POST", url=f"{self._host}{uri}", data=json_str, headers=self.headers
         )
 
+    @track_proxy_outcome
     async def request_rest_v2(self, uri: str, data: dict) -> Dict:
         """
         Make REST API V2 request (for comment endpoints)
@@ -96,8 +102,8 @@ class KuaiShouClient(AbstractApiClient, ProxyRefreshMixin):
         """
         await self._refresh_proxy_if_expired()
 
-        json_str = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
+        json_str = json_codec.dumps(data)
+        async with self._proxy_http_client() as client:
             response = await client.request(
                 method="POST",
                 url=f"{self._rest_host}{uri}",
@@ -105,7 +111,7 @@ class KuaiShouClient(AbstractApiClient, ProxyRefreshMixin):
                 timeout=self.timeout,
                 headers=self.headers,
             )
-        result: Dict = response.json()
+        result: Dict = json_codec.loads(response.content)
         if result.get("result") != 1:
             raise DataFetchError(f"REST API V2 error: {result}")
         return result
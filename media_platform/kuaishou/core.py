@@ -19,6 +19,7 @@
 
 
 import asyncio
+import functools
 import os
 # import random  # Removed as we now use fixed config.CRAWLER_MAX_SLEEP_SEC intervals
 import time
@@ -40,10 +41,11 @@ from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import kuaishou as kuaishou_store
 from tools import utils
 from tools.cdp_browser import CDPBrowserManager
+from tools.pipeline import CrawlPipeline, Emit, keyword_workers, search_fatal_errors, stage_workers
 from var import comment_tasks_var, crawler_type_var, source_keyword_var
 
 from .client import KuaiShouClient
-from .exception import DataFetchError
+from .exception import DataFetchError, IPBlockError
 from .help import parse_video_info_from_url, parse_creator_info_from_url
 from .login import KuaishouLogin
 
@@ -126,59 +128,77 @@ class KuaishouCrawler(AbstractCrawler):
             utils.logger.info("[KuaishouCrawler.start] Kuaishou Crawler finished ...")
 
     async def search(self):
+        """Search pages, storage and comments run as pipeline stages, the search feeds already carry the video info"""
         utils.logger.info("[KuaishouCrawler.search] Begin search kuaishou keywords")
+        pipeline = CrawlPipeline("ks_search", fatal_errors=search_fatal_errors(IPBlockError))
+        pipeline.add_stage("search", self.search_keyword_videos, workers=keyword_workers())
+        pipeline.add_stage("store", self.store_search_video)
+        if config.ENABLE_GET_COMMENTS:
+            comment_workers = stage_workers(config.PIPELINE_COMMENT_WORKERS)
+            pipeline.add_stage(
+                "comments",
+                functools.partial(self.fetch_search_video_comments, semaphore=asyncio.Semaphore(comment_workers)),
+                workers=comment_workers,
+            )
+        await pipeline.run(config.KEYWORDS.split(","))
+
+    async def search_keyword_videos(self, keyword: str, emit: Emit) -> None:
+        """Pipeline stage: page through the search results of a keyword and emit the video feeds"""
+        search_session_id = ""
+        source_keyword_var.set(keyword)
+        utils.logger.info(
+            f"[KuaishouCrawler.search] Current search keyword: {keyword}"
+        )
         ks_limit_count = 20  # kuaishou limit page fixed value
-        if config.CRAWLER_MAX_NOTES_COUNT < ks_limit_count:
-            config.CRAWLER_MAX_NOTES_COUNT = ks_limit_count
+        # the limit is raised to one page for this crawler only, config stays as it is
+        max_notes_count = max(config.CRAWLER_MAX_NOTES_COUNT, ks_limit_count)
         start_page = config.START_PAGE
-        for keyword in config.KEYWORDS.split(","):
-            search_session_id = ""
-            source_keyword_var.set(keyword)
+        page = 1
+        while (
+            page - start_page + 1
+        ) * ks_limit_count <= max_notes_count:
+            if page < start_page:
+                utils.logger.info(f"[KuaishouCrawler.search] Skip page: {page}")
+                page += 1
+                continue
             utils.logger.info(
-                f"[KuaishouCrawler.search] Current search keyword: {keyword}"
+                f"[KuaishouCrawler.search] search kuaishou keyword: {keyword}, page: {page}"
             )
-            page = 1
-            while (
-                page - start_page + 1
-            ) * ks_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
-                if page < start_page:
-                    utils.logger.info(f"[KuaishouCrawler.search] Skip page: {page}")
-                    page += 1
-                    continue
-                utils.logger.info(
-                    f"[KuaishouCrawler.search] search kuaishou keyword: {keyword}, page: {page}"
+            videos_res = await self.ks_client.search_info_by_keyword(
+                keyword=keyword,
+                pcursor=str(page),
+                search_session_id=search_session_id,
+            )
+            if not videos_res:
+                utils.logger.error(
+                    f"[KuaishouCrawler.search] search info by keyword:{keyword} not found data"
                 )
-                video_id_list: List[str] = []
-                videos_res = await self.ks_client.search_info_by_keyword(
-                    keyword=keyword,
-                    pcursor=str(page),
-                    search_session_id=search_session_id,
+                continue
+
+            vision_search_photo: Dict = videos_res.get("visionSearchPhoto")
+            if vision_search_photo.get("result") != 1:
+                utils.logger.error(
+                    f"[KuaishouCrawler.search] search info by keyword:{keyword} not found data "
                 )
-                if not videos_res:
-                    utils.logger.error(
-                        f"[KuaishouCrawler.search] search info by keyword:{keyword} not found data"
-                    )
-                    continue
-
-                vision_search_photo: Dict = videos_res.get("visionSearchPhoto")
-                if vision_search_photo.get("result") != 1:
-                    utils.logger.error(
-                        f"[KuaishouCrawler.search] search info by keyword:{keyword} not found data "
-                    )
-                    continue
-                search_session_id = vision_search_photo.get("searchSessionId", "")
-                for video_detail in vision_search_photo.get("feeds"):
-                    video_id_list.append(video_detail.get("photo", {}).get("id"))
-                    await kuaishou_store.update_kuaishou_video(video_item=video_detail)
-
-                # batch fetch video comments
-                page += 1
+                continue
+            search_session_id = vision_search_photo.get("searchSessionId", "")
+            for video_detail in vision_search_photo.get("feeds"):
+                await emit(video_detail)
 
-                # Sleep after page navigation
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[KuaishouCrawler.search] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
+            page += 1
+
+            # Sleep after page navigation
+            await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
+            utils.logger.info(f"[KuaishouCrawler.search] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
+
+    async def store_search_video(self, video_detail: Dict, emit: Emit) -> None:
+        """Pipeline stage: save a video, then hand its id on to the comment stage"""
+        await kuaishou_store.update_kuaishou_video(video_item=video_detail)
+        await emit(video_detail.get("photo", {}).get("id"))
 
-                await self.batch_get_video_comments(video_id_list)
+    async def fetch_search_video_comments(self, video_id: str, emit: Emit, semaphore: asyncio.Semaphore) -> None:
+        """Pipeline stage: fetch the comments of a stored video"""
+        await self.get_comments(video_id, semaphore)
 
     async def get_specified_videos(self):
         """Get the information and comments of the specified post"""
@@ -438,10 +458,14 @@ class KuaishouCrawler(AbstractCrawler):
 
     async def close(self):
         """Close browser context"""
+        if getattr(self, "ks_client", None):
+            await self.ks_client.close_proxy_shards()
         # If using CDP mode, need special handling
         if self.cdp_manager:
             await self.cdp_manager.cleanup()
             self.cdp_manager = None
         else:
             await self.browser_context.close()
+        if self.ip_proxy_pool:
+            await self.ip_proxy_pool.close()
         utils.logger.info("[KuaishouCrawler.close] Browser context closed ...")
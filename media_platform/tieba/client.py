@@ -19,21 +19,29 @@
 
 import asyncio
 import json
-from typing import Any, Callable, Dict, List, Optional, Union
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
 from urllib.parse import urlencode, quote
 
 import requests
 from playwright.async_api import BrowserContext, Page
-from tenacity import RetryError, retry, stop_after_attempt, wait_fixed
+from tenacity import RetryError
 
 import config
 from base.base_crawler import AbstractApiClient
 from model.m_baidu_tieba import TiebaComment, TiebaCreator, TiebaNote
 from proxy.proxy_ip_pool import ProxyIpPool
-from tools import utils
+from tools import http_replay, json_codec, utils
+from tools.resilience import CircuitOpenError, ResiliencePolicy
 
 from .field import SearchNoteType, SearchSortType
-from .help import TieBaExtractor
+from .help import TieBaExtractor, extract_in_process_pool
+
+tieba_resilience_policy = ResiliencePolicy("tieba")
+
+# page of the keyword worker running in the current task, see BaiduTieBaClient.use_page
+_worker_page_var: ContextVar[Optional[Page]] = ContextVar("tieba_worker_page", default=None)
 
 
 class BaiduTieBaClient(AbstractApiClient):
@@ -56,7 +64,32 @@ class BaiduTieBaClient(AbstractApiClient):
         self._host = "https://tieba.baidu.com"
         self._page_extractor = TieBaExtractor()
         self.default_ip_proxy = default_ip_proxy
-        self.playwright_page = playwright_page  # Playwright page object
+        self._playwright_page = playwright_page  # Playwright page object
+
+    @property
+    def playwright_page(self) -> Optional[Page]:
+        """Page of the current keyword worker, otherwise the page the client was created with"""
+        return _worker_page_var.get() or self._playwright_page
+
+    @playwright_page.setter
+    def playwright_page(self, page: Optional[Page]) -> None:
+        self._playwright_page = page
+
+    @contextmanager
+    def use_page(self, page: Page) -> Iterator[None]:
+        """
+        Navigate on page in the current task, so concurrent keyword workers do not interleave their navigations
+        Args:
+            page: Page of the keyword worker
+
+        Returns:
+
+        """
+        token = _worker_page_var.set(page)
+        try:
+            yield
+        finally:
+            _worker_page_var.reset(token)
 
     def _sync_request(self, method, url, proxy=None, **kwargs):
         """
@@ -70,6 +103,11 @@ class BaiduTieBaClient(AbstractApiClient):
         Returns:
             Response object
         """
+        if http_replay.is_enabled():
+            # Record/replay harness is built on httpx transports
+            with http_replay.create_client(proxy=proxy) as client:
+                return client.request(method, url, headers=self.headers, timeout=self.timeout, **kwargs)
+
         # Construct proxy dictionary
         proxies = None
         if proxy:
@@ -107,7 +145,7 @@ class BaiduTieBaClient(AbstractApiClient):
                 f"[BaiduTieBaClient._refresh_proxy_if_expired] New proxy: {new_proxy.ip}:{new_proxy.port}"
             )
 
-    @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
+    @tieba_resilience_policy.retry
     async def request(self, method, url, return_ori_content=False, proxy=None, **kwargs) -> Union[str, Any]:
         """
         Common request method wrapper for requests, handles request responses
@@ -147,7 +185,7 @@ class BaiduTieBaClient(AbstractApiClient):
         if return_ori_content:
             return response.text
 
-        return response.json()
+        return json_codec.loads(response.content)
 
     async def get(self, uri: str, params=None, return_ori_content=False, **kwargs) -> Any:
         """
@@ -167,12 +205,13 @@ class BaiduTieBaClient(AbstractApiClient):
         try:
             res = await self.request(method="GET", url=f"{self._host}{final_uri}", return_ori_content=return_ori_content, **kwargs)
             return res
-        except RetryError as e:
+        except (RetryError, CircuitOpenError) as e:
             if self.ip_pool:
                 proxie_model = await self.ip_pool.get_proxy()
                 _, proxy = utils.format_proxy_info(proxie_model)
-                res = await self.request(method="GET", url=f"{self._host}{final_uri}", return_ori_content=return_ori_content, proxy=proxy, **kwargs)
+                # switch first, the later requests use the new proxy even if this one is rejected by the breaker
                 self.default_ip_proxy = proxy
+                res = await self.request(method="GET", url=f"{self._host}{final_uri}", return_ori_content=return_ori_content, proxy=proxy, **kwargs)
                 return res
 
             utils.logger.error(f"[BaiduTieBaClient.get] Reached maximum retry attempts, IP is blocked, please try a new IP proxy: {e}")
@@ -188,7 +227,7 @@ class BaiduTieBaClient(AbstractApiClient):
         Returns:
 
         """
-        json_str = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+        json_str = json_codec.dumps(data)
         return await self.request(method="POST", url=f"{self._host}{uri}", data=json_str, **kwargs)
 
     async def pong(self, browser_context: BrowserContext = None) -> bool:
@@ -291,7 +330,7 @@ class BaiduTieBaClient(AbstractApiClient):
             utils.logger.info(f"[BaiduTieBaClient.get_notes_by_keyword] Successfully retrieved search page HTML, length: {len(page_content)}")
 
             # Extract search results
-            notes = self._page_extractor.extract_search_note_list(page_content)
+            notes = await extract_in_process_pool(self._page_extractor.extract_search_note_list, page_content)
             utils.logger.info(f"[BaiduTieBaClient.get_notes_by_keyword] Extracted {len(notes)} posts")
             return notes
 
@@ -328,7 +367,7 @@ class BaiduTieBaClient(AbstractApiClient):
             utils.logger.info(f"[BaiduTieBaClient.get_note_by_id] Successfully retrieved post detail HTML, length: {len(page_content)}")
 
             # Extract post details
-            note_detail = self._page_extractor.extract_note_detail(page_content)
+            note_detail = await extract_in_process_pool(self._page_extractor.extract_note_detail, page_content)
             return note_detail
 
         except Exception as e:
@@ -375,8 +414,8 @@ class BaiduTieBaClient(AbstractApiClient):
                 page_content = await self.playwright_page.content()
 
                 # Extract comments
-                comments = self._page_extractor.extract_tieba_note_parment_comments(
-                    page_content, note_id=note_detail.note_id
+                comments = await extract_in_process_pool(
+                    self._page_extractor.extract_tieba_note_parment_comments, page_content, note_id=note_detail.note_id
                 )
 
                 if not comments:
@@ -461,8 +500,8 @@ class BaiduTieBaClient(AbstractApiClient):
                     page_content = await self.playwright_page.content()
 
                     # Extract sub-comments
-                    sub_comments = self._page_extractor.extract_tieba_note_sub_comments(
-                        page_content, parent_comment=parment_comment
+                    sub_comments = await extract_in_process_pool(
+                        self._page_extractor.extract_tieba_note_sub_comments, page_content, parent_comment=parment_comment
                     )
 
                     if not sub_comments:
@@ -519,7 +558,7 @@ class BaiduTieBaClient(AbstractApiClient):
             utils.logger.info(f"[BaiduTieBaClient.get_notes_by_tieba_name] Successfully retrieved Tieba page HTML, length: {len(page_content)}")
 
             # Extract post list
-            notes = self._page_extractor.extract_tieba_note_list(page_content)
+            notes = await extract_in_process_pool(self._page_extractor.extract_tieba_note_list, page_content)
             utils.logger.info(f"[BaiduTieBaClient.get_notes_by_tieba_name] Extracted {len(notes)} posts")
             return notes
 
@@ -38,11 +38,12 @@ from proxy.proxy_ip_pool import IpInfoModel, ProxyIpPool, create_ip_pool
 from store import tieba as tieba_store
 from tools import utils
 from tools.cdp_browser import CDPBrowserManager
+from tools.pipeline import keyword_workers, run_keyword_workers
 from var import crawler_type_var, source_keyword_var
 
 from .client import BaiduTieBaClient
 from .field import SearchNoteType, SearchSortType
-from .help import TieBaExtractor
+from .help import TieBaExtractor, extract_in_process_pool, shutdown_process_pool
 from .login import BaiduTieBaLogin
 
 
@@ -57,6 +58,7 @@ class TieBaCrawler(AbstractCrawler):
         self.user_agent = utils.get_user_agent()
         self._page_extractor = TieBaExtractor()
         self.cdp_manager = None
+        self.ip_proxy_pool = None  # Proxy IP pool for automatic proxy refresh
 
     async def start(self) -> None:
         """
@@ -69,10 +71,10 @@ class TieBaCrawler(AbstractCrawler):
             utils.logger.info(
                 "[BaiduTieBaCrawler.start] Begin create ip proxy pool ..."
             )
-            ip_proxy_pool = await create_ip_pool(
+            self.ip_proxy_pool = await create_ip_pool(
                 config.IP_PROXY_POOL_COUNT, enable_validate_ip=True
             )
-            ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy()
+            ip_proxy_info: IpInfoModel = await self.ip_proxy_pool.get_proxy()
             playwright_proxy_format, httpx_proxy_format = utils.format_proxy_info(ip_proxy_info)
             utils.logger.info(
                 f"[BaiduTieBaCrawler.start] Init default ip proxy, value: {httpx_proxy_format}"
@@ -110,7 +112,7 @@ class TieBaCrawler(AbstractCrawler):
             # Create a client to interact with the baidutieba website.
             self.tieba_client = await self.create_tieba_client(
                 httpx_proxy_format,
-                ip_proxy_pool if config.ENABLE_IP_PROXY else None
+                self.ip_proxy_pool
             )
 
             # Check login status and perform login if necessary
@@ -150,58 +152,86 @@ class TieBaCrawler(AbstractCrawler):
         utils.logger.info(
             "[BaiduTieBaCrawler.search] Begin search baidu tieba keywords"
         )
+        # the client navigates a page for every request, concurrent keywords each get a page of their own
+        crawl_keyword = self.search_keyword_on_own_page if keyword_workers() > 1 else self.search_keyword
+        await run_keyword_workers("tieba_search", config.KEYWORDS.split(","), crawl_keyword)
+
+    async def search_keyword_on_own_page(self, keyword: str) -> None:
+        """
+        Search one keyword on a new page of the browser context, which shares the login cookies
+        Args:
+            keyword:
+
+        Returns:
+
+        """
+        page = await self.browser_context.new_page()
+        try:
+            with self.tieba_client.use_page(page):
+                await self.search_keyword(keyword)
+        finally:
+            await page.close()
+
+    async def search_keyword(self, keyword: str) -> None:
+        """
+        Search one keyword page by page and retrieve the comments of its notes.
+        Args:
+            keyword:
+
+        Returns:
+
+        """
         tieba_limit_count = 10  # tieba limit page fixed value
-        if config.CRAWLER_MAX_NOTES_COUNT < tieba_limit_count:
-            config.CRAWLER_MAX_NOTES_COUNT = tieba_limit_count
+        # the limit is raised to one page for this crawler only, config stays as it is
+        max_notes_count = max(config.CRAWLER_MAX_NOTES_COUNT, tieba_limit_count)
         start_page = config.START_PAGE
-        for keyword in config.KEYWORDS.split(","):
-            source_keyword_var.set(keyword)
-            utils.logger.info(
-                f"[BaiduTieBaCrawler.search] Current search keyword: {keyword}"
-            )
-            page = 1
-            while (
-                page - start_page + 1
-            ) * tieba_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
-                if page < start_page:
-                    utils.logger.info(f"[BaiduTieBaCrawler.search] Skip page {page}")
-                    page += 1
-                    continue
-                try:
-                    utils.logger.info(
-                        f"[BaiduTieBaCrawler.search] search tieba keyword: {keyword}, page: {page}"
-                    )
-                    notes_list: List[TiebaNote] = (
-                        await self.tieba_client.get_notes_by_keyword(
-                            keyword=keyword,
-                            page=page,
-                            page_size=tieba_limit_count,
-                            sort=SearchSortType.TIME_DESC,
-                            note_type=SearchNoteType.FIXED_THREAD,
-                        )
+        source_keyword_var.set(keyword)
+        utils.logger.info(
+            f"[BaiduTieBaCrawler.search] Current search keyword: {keyword}"
+        )
+        page = 1
+        while (
+            page - start_page + 1
+        ) * tieba_limit_count <= max_notes_count:
+            if page < start_page:
+                utils.logger.info(f"[BaiduTieBaCrawler.search] Skip page {page}")
+                page += 1
+                continue
+            try:
+                utils.logger.info(
+                    f"[BaiduTieBaCrawler.search] search tieba keyword: {keyword}, page: {page}"
+                )
+                notes_list: List[TiebaNote] = (
+                    await self.tieba_client.get_notes_by_keyword(
+                        keyword=keyword,
+                        page=page,
+                        page_size=tieba_limit_count,
+                        sort=SearchSortType.TIME_DESC,
+                        note_type=SearchNoteType.FIXED_THREAD,
                     )
-                    if not notes_list:
-                        utils.logger.info(
-                            f"[BaiduTieBaCrawler.search] Search note list is empty"
-                        )
-                        break
+                )
+                if not notes_list:
                     utils.logger.info(
-                        f"[BaiduTieBaCrawler.search] Note list len: {len(notes_list)}"
-                    )
-                    await self.get_specified_notes(
-                        note_id_list=[note_detail.note_id for note_detail in notes_list]
+                        f"[BaiduTieBaCrawler.search] Search note list is empty"
                     )
+                    break
+                utils.logger.info(
+                    f"[BaiduTieBaCrawler.search] Note list len: {len(notes_list)}"
+                )
+                await self.get_specified_notes(
+                    note_id_list=[note_detail.note_id for note_detail in notes_list]
+                )
 
-                    # Sleep after page navigation
-                    await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                    utils.logger.info(f"[TieBaCrawler.search] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page}")
+                # Sleep after page navigation
+                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
+                utils.logger.info(f"[TieBaCrawler.search] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page}")
 
-                    page += 1
-                except Exception as ex:
-                    utils.logger.error(
-                        f"[BaiduTieBaCrawler.search] Search keywords error, current page: {page}, current keyword: {keyword}, err: {ex}"
-                    )
-                    break
+                page += 1
+            except Exception as ex:
+                utils.logger.error(
+                    f"[BaiduTieBaCrawler.search] Search keywords error, current page: {page}, current keyword: {keyword}, err: {ex}"
+                )
+                break
 
     async def get_specified_tieba_notes(self):
         """
@@ -210,14 +240,13 @@ class TieBaCrawler(AbstractCrawler):
 
         """
         tieba_limit_count = 50
-        if config.CRAWLER_MAX_NOTES_COUNT < tieba_limit_count:
-            config.CRAWLER_MAX_NOTES_COUNT = tieba_limit_count
+        max_notes_count = max(config.CRAWLER_MAX_NOTES_COUNT, tieba_limit_count)
         for tieba_name in config.TIEBA_NAME_LIST:
             utils.logger.info(
                 f"[BaiduTieBaCrawler.get_specified_tieba_notes] Begin get tieba name: {tieba_name}"
             )
             page_number = 0
-            while page_number <= config.CRAWLER_MAX_NOTES_COUNT:
+            while page_number <= max_notes_count:
                 note_list: List[TiebaNote] = (
                     await self.tieba_client.get_notes_by_tieba_name(
                         tieba_name=tieba_name, page_num=page_number
@@ -367,8 +396,8 @@ class TieBaCrawler(AbstractCrawler):
             creator_page_html_content = await self.tieba_client.get_creator_info_by_url(
                 creator_url=creator_url
             )
-            creator_info: TiebaCreator = self._page_extractor.extract_creator_info(
-                creator_page_html_content
+            creator_info: TiebaCreator = await extract_in_process_pool(
+                self._page_extractor.extract_creator_info, creator_page_html_content
             )
             if creator_info:
                 utils.logger.info(
@@ -678,4 +707,7 @@ class TieBaCrawler(AbstractCrawler):
             self.cdp_manager = None
         else:
             await self.browser_context.close()
+        shutdown_process_pool()
+        if self.ip_proxy_pool:
+            await self.ip_proxy_pool.close()
         utils.logger.info("[BaiduTieBaCrawler.close] Browser context closed ...")
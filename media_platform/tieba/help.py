@@ -19,14 +19,22 @@
 
 
 # -*- coding: utf-8 -*-
+# Every page is parsed once with lxml (same parser settings as parsel.Selector), all XPath expressions
+# are compiled once at import time and page-level fields are read once per page instead of once per item.
+import asyncio
+import functools
 import html
 import json
+import multiprocessing
 import re
-from typing import Dict, List, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from urllib.parse import parse_qs, unquote
 
-from parsel import Selector
+from lxml import etree
+from lxml import html as lxml_html
 
+import config
 from constant import baidu_tieba as const
 from model.m_baidu_tieba import TiebaComment, TiebaCreator, TiebaNote
 from tools import utils
@@ -34,6 +42,94 @@ from tools import utils
 GENDER_MALE = "sex_male"
 GENDER_FEMALE = "sex_female"
 
+# page level
+XPATH_TIEBA_NAME = etree.XPath("//a[@class='card_title_fname']/text()")
+XPATH_TIEBA_LINK = etree.XPath("//a[@class='card_title_fname']/@href")
+XPATH_POST_TAIL_WRAP = etree.XPath(".//div[@class='post-tail-wrap']")
+
+# search result page
+XPATH_SEARCH_POSTS = etree.XPath("//div[@class='s_post']")
+XPATH_SEARCH_TID = etree.XPath(".//span[@class='p_title']/a/@data-tid")
+XPATH_SEARCH_TITLE = etree.XPath(".//span[@class='p_title']/a/text()")
+XPATH_SEARCH_DESC = etree.XPath(".//div[@class='p_content']/text()")
+XPATH_SEARCH_HREF = etree.XPath(".//span[@class='p_title']/a/@href")
+XPATH_SEARCH_USER_NAME = etree.XPath(".//a[starts-with(@href, '/home/main')]/font/text()")
+XPATH_SEARCH_USER_HREF = etree.XPath(".//a[starts-with(@href, '/home/main')]/@href")
+XPATH_SEARCH_FORUM_NAME = etree.XPath(".//a[@class='p_forum']/font/text()")
+XPATH_SEARCH_FORUM_HREF = etree.XPath(".//a[@class='p_forum']/@href")
+XPATH_SEARCH_DATE = etree.XPath(".//font[@class='p_green p_date']/text()")
+
+# tieba thread list page
+XPATH_THREAD_LIST = etree.XPath("//ul[@id='thread_list']/li")
+XPATH_THREAD_TITLE = etree.XPath(".//a[@class='j_th_tit ']/text()")
+XPATH_THREAD_ABS = etree.XPath(".//div[@class='threadlist_abs threadlist_abs_onlyline ']/text()")
+XPATH_THREAD_AUTHOR_HREF = etree.XPath(".//a[@class='frs-author-name j_user_card ']/@href")
+
+# note detail and comment pages
+XPATH_FIRST_FLOOR = etree.XPath("//div[@class='p_postlist'][1]")
+XPATH_ONLY_AUTHOR_HREF = etree.XPath("//*[@id='lzonly_cntn']/@href")
+XPATH_REPLY_NUM_INFOS = etree.XPath("//div[@id='thread_theme_5']//li[@class='l_reply_num']//span[@class='red']")
+XPATH_TITLE = etree.XPath("//title/text()")
+XPATH_META_DESCRIPTION = etree.XPath("//meta[@name='description']/@content")
+XPATH_TEXT = etree.XPath("./text()")
+XPATH_AUTHOR_FACE_HREF = etree.XPath(".//a[@class='p_author_face ']/@href")
+XPATH_AUTHOR_FACE_IMG = etree.XPath(".//a[@class='p_author_face ']/img/@src")
+XPATH_AUTHOR_NAME = etree.XPath(".//a[@class='p_author_name j_user_card']/text()")
+XPATH_COMMENTS = etree.XPath("//div[@class='l_post l_post_bright j_l_post clearfix  ']")
+
+# sub comment page
+XPATH_SUB_COMMENTS_FIRST = etree.XPath("//li[@class='lzl_single_post j_lzl_s_p first_no_border']")
+XPATH_SUB_COMMENTS = etree.XPath("//li[@class='lzl_single_post j_lzl_s_p ']")
+XPATH_SUB_COMMENT_USER = etree.XPath("./a[@class='j_user_card lzl_p_p']")
+XPATH_SUB_COMMENT_CONTENT = etree.XPath(".//span[@class='lzl_content_main']")
+XPATH_SUB_COMMENT_TIME = etree.XPath(".//span[@class='lzl_time']/text()")
+XPATH_HREF = etree.XPath("./@href")
+XPATH_IMG_SRC = etree.XPath("./img/@src")
+
+# creator page
+XPATH_CREATOR_SPACE_LINK = etree.XPath("//p[@class='space']/a/@href")
+XPATH_CREATOR_USERDATA = etree.XPath("//div[@class='userinfo_userdata']")
+XPATH_CREATOR_CONCERN_NUM = etree.XPath("//span[@class='concern_num']")
+XPATH_CREATOR_NICKNAME = etree.XPath(".//span[@class='userinfo_username ']/text()")
+XPATH_CREATOR_AVATAR = etree.XPath(".//div[@class='userinfo_left_head']//img/@src")
+XPATH_CREATOR_THREAD_HREFS = etree.XPath("//ul[@class='new_list clearfix']//div[@class='thread_name']/a[1]/@href")
+
+PATTERN_PUB_TIME = re.compile(r'<span class="tail-info">(\d{4}-\d{2}-\d{2} \d{2}:\d{2})</span>')
+PATTERN_IP = re.compile(r'IP属地:(\S+)</span>')
+PATTERN_CONCERN_NUM = re.compile(r'<span class="concern_num">\(<a[^>]*>(\d+)</a>\)</span>')
+PATTERN_REGISTRATION_DURATION = re.compile(r'<span>吧龄:(\S+)</span>')
+
+
+def parse_html(page_content: str) -> etree._Element:
+    """
+    Parse a page into an lxml tree, same parser settings as parsel.Selector(text=page_content)
+    Args:
+        page_content: HTML string of page content
+
+    Returns:
+        Root element
+    """
+    body = page_content.strip().replace("\x00", "").encode("utf8") or b"<html/>"
+    parser = lxml_html.HTMLParser(recover=True, encoding="utf8", huge_tree=True)
+    root = etree.fromstring(body, parser=parser)
+    if root is None:
+        root = etree.fromstring(b"<html/>", parser=parser)
+    return root
+
+
+def first(values: List[Any], default: str = "") -> str:
+    """
+    First result of a compiled XPath as a plain str, lxml string results keep their tree alive
+    and cannot be sent to another process
+    """
+    return str(values[0]) if values else default
+
+
+def outer_html(element: Optional[etree._Element]) -> str:
+    if element is None:
+        return ""
+    return etree.tostring(element, method="html", encoding="unicode", with_tail=False)
+
 
 class TieBaExtractor:
     def __init__(self):
@@ -49,23 +145,18 @@ class TieBaExtractor:
         Returns:
             List of Tieba post objects
         """
-        xpath_selector = "//div[@class='s_post']"
-        post_list = Selector(text=page_content).xpath(xpath_selector)
+        post_list = XPATH_SEARCH_POSTS(parse_html(page_content))
         result: List[TiebaNote] = []
         for post in post_list:
-            tieba_note = TiebaNote(note_id=post.xpath(".//span[@class='p_title']/a/@data-tid").get(default='').strip(),
-                                   title=post.xpath(".//span[@class='p_title']/a/text()").get(default='').strip(),
-                                   desc=post.xpath(".//div[@class='p_content']/text()").get(default='').strip(),
-                                   note_url=const.TIEBA_URL + post.xpath(".//span[@class='p_title']/a/@href").get(
-                                       default=''),
-                                   user_nickname=post.xpath(".//a[starts-with(@href, '/home/main')]/font/text()").get(
-                                       default='').strip(), user_link=const.TIEBA_URL + post.xpath(
-                    ".//a[starts-with(@href, '/home/main')]/@href").get(default=''),
-                                   tieba_name=post.xpath(".//a[@class='p_forum']/font/text()").get(default='').strip(),
-                                   tieba_link=const.TIEBA_URL + post.xpath(".//a[@class='p_forum']/@href").get(
-                                       default=''),
-                                   publish_time=post.xpath(".//font[@class='p_green p_date']/text()").get(
-                                       default='').strip(), )
+            tieba_note = TiebaNote(note_id=first(XPATH_SEARCH_TID(post)).strip(),
+                                   title=first(XPATH_SEARCH_TITLE(post)).strip(),
+                                   desc=first(XPATH_SEARCH_DESC(post)).strip(),
+                                   note_url=const.TIEBA_URL + first(XPATH_SEARCH_HREF(post)),
+                                   user_nickname=first(XPATH_SEARCH_USER_NAME(post)).strip(),
+                                   user_link=const.TIEBA_URL + first(XPATH_SEARCH_USER_HREF(post)),
+                                   tieba_name=first(XPATH_SEARCH_FORUM_NAME(post)).strip(),
+                                   tieba_link=const.TIEBA_URL + first(XPATH_SEARCH_FORUM_HREF(post)),
+                                   publish_time=first(XPATH_SEARCH_DATE(post)).strip(), )
             result.append(tieba_note)
         return result
 
@@ -79,27 +170,23 @@ class TieBaExtractor:
             List of Tieba post objects
         """
         page_content = page_content.replace('<!--', "")
-        content_selector = Selector(text=page_content)
-        xpath_selector = "//ul[@id='thread_list']/li"
-        post_list = content_selector.xpath(xpath_selector)
+        root = parse_html(page_content)
+        tieba_name = first(XPATH_TIEBA_NAME(root)).strip()
+        tieba_link = const.TIEBA_URL + first(XPATH_TIEBA_LINK(root))
         result: List[TiebaNote] = []
-        for post_selector in post_list:
-            post_field_value: Dict = self.extract_data_field_value(post_selector)
+        for post in XPATH_THREAD_LIST(root):
+            post_field_value: Dict = self.extract_data_field_value(post)
             if not post_field_value:
                 continue
             note_id = str(post_field_value.get("id"))
             tieba_note = TiebaNote(note_id=note_id,
-                                   title=post_selector.xpath(".//a[@class='j_th_tit ']/text()").get(default='').strip(),
-                                   desc=post_selector.xpath(
-                                       ".//div[@class='threadlist_abs threadlist_abs_onlyline ']/text()").get(
-                                       default='').strip(), note_url=const.TIEBA_URL + f"/p/{note_id}",
-                                   user_link=const.TIEBA_URL + post_selector.xpath(
-                                       ".//a[@class='frs-author-name j_user_card ']/@href").get(default='').strip(),
+                                   title=first(XPATH_THREAD_TITLE(post)).strip(),
+                                   desc=first(XPATH_THREAD_ABS(post)).strip(),
+                                   note_url=const.TIEBA_URL + f"/p/{note_id}",
+                                   user_link=const.TIEBA_URL + first(XPATH_THREAD_AUTHOR_HREF(post)).strip(),
                                    user_nickname=post_field_value.get("authoer_nickname") or post_field_value.get(
                                        "author_name"),
-                                   tieba_name=content_selector.xpath("//a[@class='card_title_fname']/text()").get(
-                                       default='').strip(), tieba_link=const.TIEBA_URL + content_selector.xpath(
-                    "//a[@class='card_title_fname']/@href").get(default=''),
+                                   tieba_name=tieba_name, tieba_link=tieba_link,
                                    total_replay_num=post_field_value.get("reply_num", 0))
             result.append(tieba_note)
         return result
@@ -113,31 +200,29 @@ class TieBaExtractor:
         Returns:
             Tieba post detail object
         """
-        content_selector = Selector(text=page_content)
-        first_floor_selector = content_selector.xpath("//div[@class='p_postlist'][1]")
-        only_view_author_link = content_selector.xpath("//*[@id='lzonly_cntn']/@href").get(default='').strip()
+        root = parse_html(page_content)
+        first_floor = XPATH_FIRST_FLOOR(root)
+        first_floor = first_floor[0] if first_floor else etree.Element("div")
+        only_view_author_link = first(XPATH_ONLY_AUTHOR_HREF(root)).strip()
         note_id = only_view_author_link.split("?")[0].split("/")[-1]
         # Post reply count and reply page count
-        thread_num_infos = content_selector.xpath(
-            "//div[@id='thread_theme_5']//li[@class='l_reply_num']//span[@class='red']")
+        thread_num_infos = XPATH_REPLY_NUM_INFOS(root)
         # IP location and publish time
-        other_info_content = content_selector.xpath(".//div[@class='post-tail-wrap']").get(default="").strip()
+        tail_wraps = XPATH_POST_TAIL_WRAP(root)
+        other_info_content = outer_html(tail_wraps[0] if tail_wraps else None).strip()
         ip_location, publish_time = self.extract_ip_and_pub_time(other_info_content)
-        note = TiebaNote(note_id=note_id, title=content_selector.xpath("//title/text()").get(default='').strip(),
-                         desc=content_selector.xpath("//meta[@name='description']/@content").get(default='').strip(),
+        note = TiebaNote(note_id=note_id, title=first(XPATH_TITLE(root)).strip(),
+                         desc=first(XPATH_META_DESCRIPTION(root)).strip(),
                          note_url=const.TIEBA_URL + f"/p/{note_id}",
-                         user_link=const.TIEBA_URL + first_floor_selector.xpath(
-                             ".//a[@class='p_author_face ']/@href").get(default='').strip(),
-                         user_nickname=first_floor_selector.xpath(
-                             ".//a[@class='p_author_name j_user_card']/text()").get(default='').strip(),
-                         user_avatar=first_floor_selector.xpath(".//a[@class='p_author_face ']/img/@src").get(
-                             default='').strip(),
-                         tieba_name=content_selector.xpath("//a[@class='card_title_fname']/text()").get(
-                             default='').strip(), tieba_link=const.TIEBA_URL + content_selector.xpath(
-                "//a[@class='card_title_fname']/@href").get(default=''), ip_location=ip_location,
+                         user_link=const.TIEBA_URL + first(XPATH_AUTHOR_FACE_HREF(first_floor)).strip(),
+                         user_nickname=first(XPATH_AUTHOR_NAME(first_floor)).strip(),
+                         user_avatar=first(XPATH_AUTHOR_FACE_IMG(first_floor)).strip(),
+                         tieba_name=first(XPATH_TIEBA_NAME(root)).strip(),
+                         tieba_link=const.TIEBA_URL + first(XPATH_TIEBA_LINK(root)),
+                         ip_location=ip_location,
                          publish_time=publish_time,
-                         total_replay_num=thread_num_infos[0].xpath("./text()").get(default='').strip(),
-                         total_replay_page=thread_num_infos[1].xpath("./text()").get(default='').strip(), )
+                         total_replay_num=first(XPATH_TEXT(thread_num_infos[0])).strip(),
+                         total_replay_page=first(XPATH_TEXT(thread_num_infos[1])).strip(), )
         note.title = note.title.replace(f"【{note.tieba_name}】_Baidu Tieba", "")
         return note
 
@@ -151,29 +236,28 @@ class TieBaExtractor:
         Returns:
             List of first-level comment objects
         """
-        xpath_selector = "//div[@class='l_post l_post_bright j_l_post clearfix  ']"
-        comment_list = Selector(text=page_content).xpath(xpath_selector)
+        root = parse_html(page_content)
+        tieba_name = first(XPATH_TIEBA_NAME(root)).strip()
+        tieba_link = f"https://tieba.baidu.com/f?kw={tieba_name}"
+        note_url = const.TIEBA_URL + f"/p/{note_id}"
         result: List[TiebaComment] = []
-        for comment_selector in comment_list:
-            comment_field_value: Dict = self.extract_data_field_value(comment_selector)
+        for comment in XPATH_COMMENTS(root):
+            comment_field_value: Dict = self.extract_data_field_value(comment)
             if not comment_field_value:
                 continue
-            tieba_name = comment_selector.xpath("//a[@class='card_title_fname']/text()").get(default='').strip()
-            other_info_content = comment_selector.xpath(".//div[@class='post-tail-wrap']").get(default="").strip()
+            tail_wraps = XPATH_POST_TAIL_WRAP(comment)
+            other_info_content = outer_html(tail_wraps[0] if tail_wraps else None).strip()
             ip_location, publish_time = self.extract_ip_and_pub_time(other_info_content)
-            tieba_comment = TiebaComment(comment_id=str(comment_field_value.get("content").get("post_id")),
-                                         sub_comment_count=comment_field_value.get("content").get("comment_num"),
-                                         content=utils.extract_text_from_html(
-                                             comment_field_value.get("content").get("content")),
-                                         note_url=const.TIEBA_URL + f"/p/{note_id}",
-                                         user_link=const.TIEBA_URL + comment_selector.xpath(
-                                             ".//a[@class='p_author_face ']/@href").get(default='').strip(),
-                                         user_nickname=comment_selector.xpath(
-                                             ".//a[@class='p_author_name j_user_card']/text()").get(default='').strip(),
-                                         user_avatar=comment_selector.xpath(
-                                             ".//a[@class='p_author_face ']/img/@src").get(default='').strip(),
-                                         tieba_id=str(comment_field_value.get("content").get("forum_id", "")),
-                                         tieba_name=tieba_name, tieba_link=f"https://tieba.baidu.com/f?kw={tieba_name}",
+            content_value: Dict = comment_field_value.get("content")
+            tieba_comment = TiebaComment(comment_id=str(content_value.get("post_id")),
+                                         sub_comment_count=content_value.get("comment_num"),
+                                         content=utils.extract_text_from_html(content_value.get("content")),
+                                         note_url=note_url,
+                                         user_link=const.TIEBA_URL + first(XPATH_AUTHOR_FACE_HREF(comment)).strip(),
+                                         user_nickname=first(XPATH_AUTHOR_NAME(comment)).strip(),
+                                         user_avatar=first(XPATH_AUTHOR_FACE_IMG(comment)).strip(),
+                                         tieba_id=str(content_value.get("forum_id", "")),
+                                         tieba_name=tieba_name, tieba_link=tieba_link,
                                          ip_location=ip_location, publish_time=publish_time, note_id=note_id, )
             result.append(tieba_comment)
         return result
@@ -188,23 +272,22 @@ class TieBaExtractor:
         Returns:
             List of second-level comment objects
         """
-        selector = Selector(page_content)
+        root = parse_html(page_content)
         comments = []
-        comment_ele_list = selector.xpath("//li[@class='lzl_single_post j_lzl_s_p first_no_border']")
-        comment_ele_list.extend(selector.xpath("//li[@class='lzl_single_post j_lzl_s_p ']"))
+        comment_ele_list = XPATH_SUB_COMMENTS_FIRST(root) + XPATH_SUB_COMMENTS(root)
         for comment_ele in comment_ele_list:
             comment_value = self.extract_data_field_value(comment_ele)
             if not comment_value:
                 continue
-            comment_user_a_selector = comment_ele.xpath("./a[@class='j_user_card lzl_p_p']")[0]
-            content = utils.extract_text_from_html(
-                comment_ele.xpath(".//span[@class='lzl_content_main']").get(default=""))
+            comment_user_a = XPATH_SUB_COMMENT_USER(comment_ele)[0]
+            content_elements = XPATH_SUB_COMMENT_CONTENT(comment_ele)
+            content = utils.extract_text_from_html(outer_html(content_elements[0] if content_elements else None))
             comment = TiebaComment(
                 comment_id=str(comment_value.get("spid")), content=content,
-                user_link=comment_user_a_selector.xpath("./@href").get(default=""),
+                user_link=first(XPATH_HREF(comment_user_a)),
                 user_nickname=comment_value.get("showname"),
-                user_avatar=comment_user_a_selector.xpath("./img/@src").get(default=""),
-                publish_time=comment_ele.xpath(".//span[@class='lzl_time']/text()").get(default="").strip(),
+                user_avatar=first(XPATH_IMG_SRC(comment_user_a)),
+                publish_time=first(XPATH_SUB_COMMENT_TIME(comment_ele)).strip(),
                 parent_comment_id=parent_comment.comment_id,
                 note_id=parent_comment.note_id, note_url=parent_comment.note_url,
                 tieba_id=parent_comment.tieba_id, tieba_name=parent_comment.tieba_name,
@@ -222,23 +305,20 @@ class TieBaExtractor:
         Returns:
             Tieba creator object
         """
-        selector = Selector(text=html_content)
-        user_link_selector = selector.xpath("//p[@class='space']/a")
-        user_link: str = user_link_selector.xpath("./@href").get(default='')
+        root = parse_html(html_content)
+        user_link: str = first(XPATH_CREATOR_SPACE_LINK(root))
         user_link_params: Dict = parse_qs(unquote(user_link.split("?")[-1]))
         user_name = user_link_params.get("un")[0] if user_link_params.get("un") else ""
         user_id = user_link_params.get("id")[0] if user_link_params.get("id") else ""
-        userinfo_userdata_selector = selector.xpath("//div[@class='userinfo_userdata']")
-        follow_fans_selector = selector.xpath("//span[@class='concern_num']")
+        userdata_elements = XPATH_CREATOR_USERDATA(root)
+        follow_fans_elements = XPATH_CREATOR_CONCERN_NUM(root)
         follows, fans = 0, 0
-        if len(follow_fans_selector) == 2:
-            follows, fans = self.extract_follow_and_fans(follow_fans_selector)
-        user_content = userinfo_userdata_selector.get(default='')
+        if len(follow_fans_elements) == 2:
+            follows, fans = self.extract_follow_and_fans(follow_fans_elements)
+        user_content = outer_html(userdata_elements[0] if userdata_elements else None)
         return TiebaCreator(user_id=user_id, user_name=user_name,
-                            nickname=selector.xpath(".//span[@class='userinfo_username ']/text()").get(
-                                default='').strip(),
-                            avatar=selector.xpath(".//div[@class='userinfo_left_head']//img/@src").get(
-                                default='').strip(),
+                            nickname=first(XPATH_CREATOR_NICKNAME(root)).strip(),
+                            avatar=first(XPATH_CREATOR_AVATAR(root)).strip(),
                             gender=self.extract_gender(user_content),
                             ip_location=self.extract_ip(user_content),
                             follows=follows,
@@ -258,14 +338,9 @@ class TieBaExtractor:
         Returns:
             List of post IDs
         """
-        selector = Selector(text=html_content)
         thread_id_list = []
-        xpath_selector = (
-            "//ul[@class='new_list clearfix']//div[@class='thread_name']/a[1]/@href"
-        )
-        thread_url_list = selector.xpath(xpath_selector).getall()
-        for thread_url in thread_url_list:
-            thread_id = thread_url.split("?")[0].split("/")[-1]
+        for thread_url in XPATH_CREATOR_THREAD_HREFS(parse_html(html_content)):
+            thread_id = str(thread_url).split("?")[0].split("/")[-1]
             thread_id_list.append(thread_id)
         return thread_id_list
 
@@ -278,8 +353,7 @@ class TieBaExtractor:
         Returns:
             Tuple of (IP location, publish time)
         """
-        pattern_pub_time = re.compile(r'<span class="tail-info">(\d{4}-\d{2}-\d{2} \d{2}:\d{2})</span>')
-        time_match = pattern_pub_time.search(html_content)
+        time_match = PATTERN_PUB_TIME.search(html_content)
         pub_time = time_match.group(1) if time_match else ""
         return self.extract_ip(html_content), pub_time
 
@@ -293,8 +367,7 @@ class TieBaExtractor:
         Returns:
             IP location string
         """
-        pattern_ip = re.compile(r'IP属地:(\S+)</span>')
-        ip_match = pattern_ip.search(html_content)
+        ip_match = PATTERN_IP.search(html_content)
         ip = ip_match.group(1) if ip_match else ""
         return ip
 
@@ -315,18 +388,17 @@ class TieBaExtractor:
         return 'Unknown'
 
     @staticmethod
-    def extract_follow_and_fans(selectors: List[Selector]) -> Tuple[str, str]:
+    def extract_follow_and_fans(elements: List[etree._Element]) -> Tuple[str, str]:
         """
-        Extract follow count and fan count from selectors
+        Extract follow count and fan count from concern_num elements
         Args:
-            selectors: List of selector objects
+            elements: List of element objects
 
         Returns:
             Tuple of (follow count, fan count)
         """
-        pattern = re.compile(r'<span class="concern_num">\(<a[^>]*>(\d+)</a>\)</span>')
-        follow_match = pattern.findall(selectors[0].get())
-        fans_match = pattern.findall(selectors[1].get())
+        follow_match = PATTERN_CONCERN_NUM.findall(outer_html(elements[0]))
+        fans_match = PATTERN_CONCERN_NUM.findall(outer_html(elements[1]))
         follows = follow_match[0] if follow_match else 0
         fans = fans_match[0] if fans_match else 0
         return follows, fans
@@ -344,21 +416,20 @@ class TieBaExtractor:
         Returns:
             Tieba age string
         """
-        pattern = re.compile(r'<span>吧龄:(\S+)</span>')
-        match = pattern.search(html_content)
+        match = PATTERN_REGISTRATION_DURATION.search(html_content)
         return match.group(1) if match else ""
 
     @staticmethod
-    def extract_data_field_value(selector: Selector) -> Dict:
+    def extract_data_field_value(element: etree._Element) -> Dict:
         """
-        Extract data-field value from selector
+        Extract data-field value from element
         Args:
-            selector: Selector object
+            element: Element object
 
         Returns:
             Dictionary containing data-field value
         """
-        data_field_value = selector.xpath("./@data-field").get(default='').strip()
+        data_field_value = (element.get("data-field") or "").strip()
         if not data_field_value or data_field_value == "{}":
             return {}
         try:
@@ -371,6 +442,41 @@ class TieBaExtractor:
         return data_field_dict_value
 
 
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        # spawn: forking a process that runs an event loop and a browser driver is not safe
+        _process_pool = ProcessPoolExecutor(max_workers=config.TIEBA_EXTRACT_PROCESS_POOL_SIZE,
+                                            mp_context=multiprocessing.get_context("spawn"))
+    return _process_pool
+
+
+async def extract_in_process_pool(extract_func: Callable, page_content: str, *args, **kwargs) -> Any:
+    """
+    Run an extractor method, large pages are parsed in the process pool so the event loop is not blocked
+    Args:
+        extract_func: TieBaExtractor method, its first argument is the page content
+        page_content: HTML string of page content
+
+    Returns:
+        Result of extract_func
+    """
+    if config.TIEBA_EXTRACT_PROCESS_POOL_SIZE <= 0 or len(page_content) < config.TIEBA_EXTRACT_PROCESS_MIN_CHARS:
+        return extract_func(page_content, *args, **kwargs)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_process_pool(), functools.partial(extract_func, page_content, *args, **kwargs))
+
+
+def shutdown_process_pool() -> None:
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+
 def test_extract_search_note_list():
     with open("test_data/search_keyword_notes.html", "r", encoding="utf-8") as f:
         content = f.read()
@@ -32,11 +32,11 @@ from urllib.parse import parse_qs, unquote, urlencode
 import httpx
 from httpx import Response
 from playwright.async_api import BrowserContext, Page
-from tenacity import retry, stop_after_attempt, wait_fixed
 
 import config
-from proxy.proxy_mixin import ProxyRefreshMixin
-from tools import utils
+from proxy.proxy_mixin import ProxyRefreshMixin, track_proxy_outcome
+from tools import json_codec, utils
+from tools.resilience import ResiliencePolicy
 
 if TYPE_CHECKING:
     from proxy.proxy_ip_pool import ProxyIpPool
@@ -44,6 +44,8 @@ if TYPE_CHECKING:
 from .exception import DataFetchError
 from .field import SearchType
 
+weibo_resilience_policy = ResiliencePolicy("weibo", max_attempts=5, base_delay=3, max_delay=30)
+
 
 class WeiboClient(ProxyRefreshMixin):
 
@@ -67,20 +69,21 @@ class WeiboClient(ProxyRefreshMixin):
         # Initialize proxy pool (from ProxyRefreshMixin)
         self.init_proxy_pool(proxy_ip_pool)
 
-    @retry(stop=stop_after_attempt(5), wait=wait_fixed(3))
+    @weibo_resilience_policy.retry
+    @track_proxy_outcome
     async def request(self, method, url, **kwargs) -> Union[Response, Dict]:
         # Check if proxy is expired before each request
         await self._refresh_proxy_if_expired()
 
         enable_return_response = kwargs.pop("return_response", False)
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
+        async with self._proxy_http_client() as client:
             response = await client.request(method, url, timeout=self.timeout, **kwargs)
 
         if enable_return_response:
             return response
 
         try:
-            data: Dict = response.json()
+            data: Dict = json_codec.loads(response.content)
         except json.decoder.JSONDecodeError:
             # issue: #771 Search API returns error 432, retry multiple times + update h5 cookies
             utils.logger.error(f"[WeiboClient.request] request {method}:{url} err code: {response.status_code} res:{response.text}")
@@ -110,7 +113,7 @@ class WeiboClient(ProxyRefreshMixin):
         return await self.request(method="GET", url=f"{self._host}{final_uri}", headers=headers, **kwargs)
 
     async def post(self, uri: str, data: dict) -> Dict:
-        json_str = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+        json_str = json_codec.dumps(data)
         return await self.request(method="POST", url=f"{self._host}{uri}", data=json_str, headers=self.headers)
 
     async def pong(self) -> bool:
@@ -254,6 +257,7 @@ class WeiboClient(ProxyRefreshMixin):
                 res_sub_comments.extend(sub_comments)
         return res_sub_comments
 
+    @track_proxy_outcome
     async def get_note_info_by_id(self, note_id: str) -> Dict:
         """
         Get note details by note ID
@@ -261,7 +265,7 @@ class WeiboClient(ProxyRefreshMixin):
         :return:
         """
         url = f"{self._host}/detail/{note_id}"
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
+        async with self._proxy_http_client() as client:
             response = await client.request("GET", url, timeout=self.timeout, headers=self.headers)
             if response.status_code != 200:
                 raise DataFetchError(f"get weibo detail err: {response.text}")
@@ -291,7 +295,7 @@ class WeiboClient(ProxyRefreshMixin):
         # Since Weibo images are accessed through i1.wp.com, we need to concatenate the URL
         final_uri = (f"{self._image_agent_host}"
                      f"{image_url}")
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
+        async with self._proxy_http_client() as client:
             try:
                 response = await client.request("GET", final_uri, timeout=self.timeout)
                 response.raise_for_status()
@@ -23,6 +23,7 @@
 # @Desc    : Weibo crawler main workflow code
 
 import asyncio
+import functools
 import os
 # import random  # Removed as we now use fixed config.CRAWLER_MAX_SLEEP_SEC intervals
 from asyncio import Task
@@ -42,10 +43,11 @@ from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import weibo as weibo_store
 from tools import utils
 from tools.cdp_browser import CDPBrowserManager
+from tools.pipeline import run_keyword_workers, search_fatal_errors
 from var import crawler_type_var, source_keyword_var
 
 from .client import WeiboClient
-from .exception import DataFetchError
+from .exception import DataFetchError, IPBlockError
 from .field import SearchType
 from .help import filter_search_result_card
 from .login import WeiboLogin
@@ -139,10 +141,6 @@ class WeiboCrawler(AbstractCrawler):
         :return:
         """
         utils.logger.info("[WeiboCrawler.search] Begin search weibo keywords")
-        weibo_limit_count = 10  # weibo limit page fixed value
-        if config.CRAWLER_MAX_NOTES_COUNT < weibo_limit_count:
-            config.CRAWLER_MAX_NOTES_COUNT = weibo_limit_count
-        start_page = config.START_PAGE
 
         # Set the search type based on the configuration for weibo
         if config.WEIBO_SEARCH_TYPE == "default":
@@ -157,36 +155,48 @@ class WeiboCrawler(AbstractCrawler):
             utils.logger.error(f"[WeiboCrawler.search] Invalid WEIBO_SEARCH_TYPE: {config.WEIBO_SEARCH_TYPE}")
             return
 
-        for keyword in config.KEYWORDS.split(","):
-            source_keyword_var.set(keyword)
-            utils.logger.info(f"[WeiboCrawler.search] Current search keyword: {keyword}")
-            page = 1
-            while (page - start_page + 1) * weibo_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
-                if page < start_page:
-                    utils.logger.info(f"[WeiboCrawler.search] Skip page: {page}")
-                    page += 1
-                    continue
-                utils.logger.info(f"[WeiboCrawler.search] search weibo keyword: {keyword}, page: {page}")
-                search_res = await self.wb_client.get_note_by_keyword(keyword=keyword, page=page, search_type=search_type)
-                note_id_list: List[str] = []
-                note_list = filter_search_result_card(search_res.get("cards"))
-                # If full text fetching is enabled, batch get full text of posts
-                note_list = await self.batch_get_notes_full_text(note_list)
-                for note_item in note_list:
-                    if note_item:
-                        mblog: Dict = note_item.get("mblog")
-                        if mblog:
-                            note_id_list.append(mblog.get("id"))
-                            await weibo_store.update_weibo_note(note_item)
-                            await self.get_note_images(mblog)
+        await run_keyword_workers("weibo_search", config.KEYWORDS.split(","), functools.partial(self.search_keyword, search_type=search_type), fatal_errors=search_fatal_errors(IPBlockError))
 
+    async def search_keyword(self, keyword: str, search_type: SearchType):
+        """
+        search weibo note with one keyword, page by page
+        :param keyword:
+        :param search_type:
+        :return:
+        """
+        weibo_limit_count = 10  # weibo limit page fixed value
+        # the limit is raised to one page for this crawler only, config stays as it is
+        max_notes_count = max(config.CRAWLER_MAX_NOTES_COUNT, weibo_limit_count)
+        start_page = config.START_PAGE
+        source_keyword_var.set(keyword)
+        utils.logger.info(f"[WeiboCrawler.search] Current search keyword: {keyword}")
+        page = 1
+        while (page - start_page + 1) * weibo_limit_count <= max_notes_count:
+            if page < start_page:
+                utils.logger.info(f"[WeiboCrawler.search] Skip page: {page}")
                 page += 1
+                continue
+            utils.logger.info(f"[WeiboCrawler.search] search weibo keyword: {keyword}, page: {page}")
+            search_res = await self.wb_client.get_note_by_keyword(keyword=keyword, page=page, search_type=search_type)
+            note_id_list: List[str] = []
+            note_list = filter_search_result_card(search_res.get("cards"))
+            # If full text fetching is enabled, batch get full text of posts
+            note_list = await self.batch_get_notes_full_text(note_list)
+            for note_item in note_list:
+                if note_item:
+                    mblog: Dict = note_item.get("mblog")
+                    if mblog:
+                        note_id_list.append(mblog.get("id"))
+                        await weibo_store.update_weibo_note(note_item)
+                        await self.get_note_images(mblog)
+
+            page += 1
+
+            # Sleep after page navigation
+            await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
+            utils.logger.info(f"[WeiboCrawler.search] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
 
-                # Sleep after page navigation
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[WeiboCrawler.search] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
-
-                await self.batch_get_notes_comments(note_id_list)
+            await self.batch_get_notes_comments(note_id_list)
 
     async def get_specified_notes(self):
         """
@@ -471,10 +481,14 @@ class WeiboCrawler(AbstractCrawler):
 
     async def close(self):
         """Close browser context"""
+        if getattr(self, "wb_client", None):
+            await self.wb_client.close_proxy_shards()
         # Special handling if using CDP mode
         if self.cdp_manager:
             await self.cdp_manager.cleanup()
             self.cdp_manager = None
         else:
             await self.browser_context.close()
+        if self.ip_proxy_pool:
+            await self.ip_proxy_pool.close()
         utils.logger.info("[WeiboCrawler.close] Browser context closed ...")
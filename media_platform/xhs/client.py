@@ -18,27 +18,30 @@
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
 
 import asyncio
-import json
 from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Union
 from urllib.parse import urlencode
 
 import httpx
 from playwright.async_api import BrowserContext, Page
-from tenacity import retry, stop_after_attempt, wait_fixed
 
 import config
 from base.base_crawler import AbstractApiClient
-from proxy.proxy_mixin import ProxyRefreshMixin
-from tools import utils
+from proxy.proxy_mixin import ProxyRefreshMixin, track_proxy_outcome
+from tools import json_codec, utils
+from tools.resilience import ResiliencePolicy
+from tools.sign_service import sign_service
 
 if TYPE_CHECKING:
     from proxy.proxy_ip_pool import ProxyIpPool
+    from .sign_pool import XhsSignerPool
 
 from .exception import DataFetchError, IPBlockError
 from .field import SearchNoteType, SearchSortType
 from .help import get_search_id
 from .extractor import XiaoHongShuExtractor
-from .playwright_sign import sign_with_playwright
+from .playwright_sign import XhsPageSigner
+
+xhs_resilience_policy = ResiliencePolicy("xhs", rotate_proxy_errors=(IPBlockError,))
 
 
 class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
@@ -52,6 +55,7 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
         playwright_page: Page,
         cookie_dict: Dict[str, str],
         proxy_ip_pool: Optional["ProxyIpPool"] = None,
+        signer: Optional[Union[XhsPageSigner, "XhsSignerPool"]] = None,
     ):
         self.proxy = proxy
         self.timeout = timeout
@@ -63,6 +67,7 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
         self.NOTE_ABNORMAL_STR = "Note status abnormal, please check later"
         self.NOTE_ABNORMAL_CODE = -510001
         self.playwright_page = playwright_page
+        self.signer = signer or XhsPageSigner(playwright_page)
         self.cookie_dict = cookie_dict
         self._extractor = XiaoHongShuExtractor()
         # Initialize proxy pool (from ProxyRefreshMixin)
@@ -91,14 +96,19 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
         else:
             raise ValueError("params or payload is required")
 
-        # Generate signature using playwright injection method
-        signs = await sign_with_playwright(
-            page=self.playwright_page,
-            uri=url,
-            data=data,
-            a1=a1_value,
-            method=method,
-        )
+        # Generate signature on the local signing service, or with playwright injection when it is not running
+        signs = None
+        if sign_service.available:
+            # the service signs on its own browser, x-s-common must carry this browser's b1
+            b1_value = await self.signer.get_b1()
+            signs = await sign_service.sign_xhs(uri=url, data=data, a1=a1_value, method=method, b1=b1_value)
+        if signs is None:
+            signs = await self.signer.sign(
+                uri=url,
+                data=data,
+                a1=a1_value,
+                method=method,
+            )
 
         headers = {
             "X-S": signs["x-s"],
@@ -106,10 +116,11 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
             "x-S-Common": signs["x-s-common"],
             "X-B3-Traceid": signs["x-b3-traceid"],
         }
-        self.headers.update(headers)
-        return self.headers
+        # a copy per request, concurrent requests must not overwrite each other's signature
+        return {**self.headers, **headers}
 
-    @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
+    @xhs_resilience_policy.retry
+    @track_proxy_outcome
     async def request(self, method, url, **kwargs) -> Union[str, Any]:
         """
         Wrapper for httpx common request method, processes request response
@@ -126,7 +137,7 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
 
         # return response.text
         return_response = kwargs.pop("return_response", False)
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
+        async with self._proxy_http_client() as client:
             response = await client.request(method, url, timeout=self.timeout, **kwargs)
 
         if response.status_code == 471 or response.status_code == 461:
@@ -135,11 +146,12 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
             verify_uuid = response.headers["Verifyuuid"]
             msg = f"CAPTCHA appeared, request failed, Verifytype: {verify_type}, Verifyuuid: {verify_uuid}, Response: {response}"
             utils.logger.error(msg)
+            self._record_proxy_captcha()
             raise Exception(msg)
 
         if return_response:
             return response.text
-        data: Dict = response.json()
+        data: Dict = json_codec.loads(response.content)
         if data["success"]:
             return data.get("data", data.get("success", {}))
         elif data["code"] == self.IP_ERROR_CODE:
@@ -176,7 +188,7 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
 
         """
         headers = await self._pre_headers(uri, payload=data)
-        json_str = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+        json_str = json_codec.dumps_compact(data)
         return await self.request(
             method="POST",
             url=f"{self._host}{uri}",
@@ -189,7 +201,7 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
         # Check if proxy is expired before request
         await self._refresh_proxy_if_expired()
 
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
+        async with self._proxy_http_client() as client:
             try:
                 response = await client.request("GET", url, timeout=self.timeout)
                 response.raise_for_status()
@@ -240,6 +252,8 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
         cookie_str, cookie_dict = utils.convert_cookies(await browser_context.cookies())
         self.headers["Cookie"] = cookie_str
         self.cookie_dict = cookie_dict
+        # b1 is rewritten by the page after login
+        self.signer.invalidate_b1()
 
     async def get_note_by_keyword(
         self,
@@ -613,7 +627,7 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
         data = {"original_url": f"{self._domain}/discovery/item/{note_id}"}
         return await self.post(uri, data=data, return_response=True)
 
-    @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
+    @xhs_resilience_policy.retry
     async def get_note_by_id_from_html(
         self,
         note_id: str,
@@ -647,4 +661,4 @@ class XiaoHongShuClient(AbstractApiClient, ProxyRefreshMixin):
             method="GET", url=url, return_response=True, headers=copy_headers
         )
 
-        return self._extractor.extract_note_detail_from_html(note_id, html)
+        return await self._extractor.extract_note_detail_from_html_async(note_id, html)
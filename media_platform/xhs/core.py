@@ -18,6 +18,7 @@
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
 
 import asyncio
+import functools
 import os
 import random
 from asyncio import Task
@@ -36,16 +37,21 @@ import config
 from base.base_crawler import AbstractCrawler
 from model.m_xiaohongshu import NoteUrlInfo, CreatorUrlInfo
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
+from proxy.proxy_shards import proxy_shard_key
 from store import xhs as xhs_store
 from tools import utils
 from tools.cdp_browser import CDPBrowserManager
+from tools.pipeline import CrawlPipeline, Emit, keyword_workers, search_fatal_errors, stage_workers
+from tools.resilience import CircuitOpenError
+from tools.sign_service import sign_service
 from var import crawler_type_var, source_keyword_var
 
 from .client import XiaoHongShuClient
-from .exception import DataFetchError
+from .exception import DataFetchError, IPBlockError
 from .field import SearchSortType
 from .help import parse_note_info_from_note_url, parse_creator_info_from_url, get_search_id
 from .login import XiaoHongShuLogin
+from .sign_pool import XhsSignerPool
 
 
 class XiaoHongShuCrawler(AbstractCrawler):
@@ -60,6 +66,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
         self.user_agent = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36"
         self.cdp_manager = None
         self.ip_proxy_pool = None  # Proxy IP pool for automatic proxy refresh
+        self.sign_pool: Optional[XhsSignerPool] = None
 
     async def start(self) -> None:
         playwright_proxy_format, httpx_proxy_format = None, None
@@ -123,63 +130,94 @@ class XiaoHongShuCrawler(AbstractCrawler):
             utils.logger.info("[XiaoHongShuCrawler.start] Xhs Crawler finished ...")
 
     async def search(self) -> None:
-        """Search for notes and retrieve their comment information."""
+        """Search for notes and retrieve their comment information.
+
+        Search pages, note details, storage and comments run as pipeline stages, so the comments of
+        one page are fetched while the next page is searched.
+        """
         utils.logger.info("[XiaoHongShuCrawler.search] Begin search Xiaohongshu keywords")
+        detail_workers = stage_workers(config.PIPELINE_DETAIL_WORKERS)
+        pipeline = CrawlPipeline("xhs_search", fatal_errors=search_fatal_errors(IPBlockError))
+        pipeline.add_stage("search", self.search_keyword_notes, workers=keyword_workers())
+        pipeline.add_stage(
+            "detail",
+            functools.partial(self.fetch_search_note_detail, semaphore=asyncio.Semaphore(detail_workers)),
+            workers=detail_workers,
+        )
+        pipeline.add_stage("store", self.store_search_note)
+        if config.ENABLE_GET_COMMENTS:
+            comment_workers = stage_workers(config.PIPELINE_COMMENT_WORKERS)
+            pipeline.add_stage(
+                "comments",
+                functools.partial(self.fetch_search_note_comments, semaphore=asyncio.Semaphore(comment_workers)),
+                workers=comment_workers,
+            )
+        await pipeline.run(config.KEYWORDS.split(","))
+
+    async def search_keyword_notes(self, keyword: str, emit: Emit) -> None:
+        """Pipeline stage: page through the search results of a keyword and emit the post items"""
+        source_keyword_var.set(keyword)
+        utils.logger.info(f"[XiaoHongShuCrawler.search] Current search keyword: {keyword}")
         xhs_limit_count = 20  # Xiaohongshu limit page fixed value
-        if config.CRAWLER_MAX_NOTES_COUNT < xhs_limit_count:
-            config.CRAWLER_MAX_NOTES_COUNT = xhs_limit_count
+        # the limit is raised to one page for this crawler only, config stays as it is
+        max_notes_count = max(config.CRAWLER_MAX_NOTES_COUNT, xhs_limit_count)
         start_page = config.START_PAGE
-        for keyword in config.KEYWORDS.split(","):
-            source_keyword_var.set(keyword)
-            utils.logger.info(f"[XiaoHongShuCrawler.search] Current search keyword: {keyword}")
-            page = 1
-            search_id = get_search_id()
-            while (page - start_page + 1) * xhs_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
-                if page < start_page:
-                    utils.logger.info(f"[XiaoHongShuCrawler.search] Skip page {page}")
-                    page += 1
-                    continue
+        page = 1
+        search_id = get_search_id()
+        while (page - start_page + 1) * xhs_limit_count <= max_notes_count:
+            if page < start_page:
+                utils.logger.info(f"[XiaoHongShuCrawler.search] Skip page {page}")
+                page += 1
+                continue
 
-                try:
-                    utils.logger.info(f"[XiaoHongShuCrawler.search] search Xiaohongshu keyword: {keyword}, page: {page}")
-                    note_ids: List[str] = []
-                    xsec_tokens: List[str] = []
-                    notes_res = await self.xhs_client.get_note_by_keyword(
-                        keyword=keyword,
-                        search_id=search_id,
-                        page=page,
-                        sort=(SearchSortType(config.SORT_TYPE) if config.SORT_TYPE != "" else SearchSortType.GENERAL),
-                    )
-                    utils.logger.info(f"[XiaoHongShuCrawler.search] Search notes response: {notes_res}")
-                    if not notes_res or not notes_res.get("has_more", False):
-                        utils.logger.info("[XiaoHongShuCrawler.search] No more content!")
-                        break
-                    semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-                    task_list = [
-                        self.get_note_detail_async_task(
-                            note_id=post_item.get("id"),
-                            xsec_source=post_item.get("xsec_source"),
-                            xsec_token=post_item.get("xsec_token"),
-                            semaphore=semaphore,
-                        ) for post_item in notes_res.get("items", {}) if post_item.get("model_type") not in ("rec_query", "hot_query")
-                    ]
-                    note_details = await asyncio.gather(*task_list)
-                    for note_detail in note_details:
-                        if note_detail:
-                            await xhs_store.update_xhs_note(note_detail)
-                            await self.get_notice_media(note_detail)
-                            note_ids.append(note_detail.get("note_id"))
-                            xsec_tokens.append(note_detail.get("xsec_token"))
-                    page += 1
-                    utils.logger.info(f"[XiaoHongShuCrawler.search] Note details: {note_details}")
-                    await self.batch_get_note_comments(note_ids, xsec_tokens)
-
-                    # Sleep after each page navigation
-                    await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                    utils.logger.info(f"[XiaoHongShuCrawler.search] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
-                except DataFetchError:
-                    utils.logger.error("[XiaoHongShuCrawler.search] Get note detail error")
+            try:
+                utils.logger.info(f"[XiaoHongShuCrawler.search] search Xiaohongshu keyword: {keyword}, page: {page}")
+                notes_res = await self.xhs_client.get_note_by_keyword(
+                    keyword=keyword,
+                    search_id=search_id,
+                    page=page,
+                    sort=(SearchSortType(config.SORT_TYPE) if config.SORT_TYPE != "" else SearchSortType.GENERAL),
+                )
+                utils.logger.info(f"[XiaoHongShuCrawler.search] Search notes response: {notes_res}")
+                if not notes_res or not notes_res.get("has_more", False):
+                    utils.logger.info("[XiaoHongShuCrawler.search] No more content!")
                     break
+                for post_item in notes_res.get("items", {}):
+                    if post_item.get("model_type") not in ("rec_query", "hot_query"):
+                        await emit(post_item)
+                page += 1
+
+                # Sleep after each page navigation
+                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
+                utils.logger.info(f"[XiaoHongShuCrawler.search] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
+            except DataFetchError:
+                utils.logger.error("[XiaoHongShuCrawler.search] Get note detail error")
+                break
+
+    async def fetch_search_note_detail(self, post_item: Dict, emit: Emit, semaphore: asyncio.Semaphore) -> None:
+        """Pipeline stage: fetch the detail of a searched note"""
+        note_detail = await self.get_note_detail_async_task(
+            note_id=post_item.get("id"),
+            xsec_source=post_item.get("xsec_source"),
+            xsec_token=post_item.get("xsec_token"),
+            semaphore=semaphore,
+        )
+        if note_detail:
+            await emit(note_detail)
+
+    async def store_search_note(self, note_detail: Dict, emit: Emit) -> None:
+        """Pipeline stage: save a note with its media, then hand it on to the comment stage"""
+        await xhs_store.update_xhs_note(note_detail)
+        await self.get_notice_media(note_detail)
+        await emit(note_detail)
+
+    async def fetch_search_note_comments(self, note_detail: Dict, emit: Emit, semaphore: asyncio.Semaphore) -> None:
+        """Pipeline stage: fetch the comments of a stored note"""
+        await self.get_comments(
+            note_id=note_detail.get("note_id"),
+            xsec_token=note_detail.get("xsec_token"),
+            semaphore=semaphore,
+        )
 
     async def get_creators_and_notes(self) -> None:
         """Get creator's notes and retrieve their comment information."""
@@ -287,33 +325,39 @@ class XiaoHongShuCrawler(AbstractCrawler):
         """
         note_detail = None
         utils.logger.info(f"[get_note_detail_async_task] Begin get note detail, note_id: {note_id}")
-        async with semaphore:
-            try:
+        # detail and comments of one note go out through the same proxy with the sticky shard strategy
+        with proxy_shard_key(note_id):
+            async with semaphore:
                 try:
-                    note_detail = await self.xhs_client.get_note_by_id(note_id, xsec_source, xsec_token)
-                except RetryError:
-                    pass
+                    try:
+                        note_detail = await self.xhs_client.get_note_by_id(note_id, xsec_source, xsec_token)
+                    except (RetryError, CircuitOpenError):
+                        # the api gave up or its breaker is open, the html page is another endpoint
+                        pass
 
-                if not note_detail:
-                    note_detail = await self.xhs_client.get_note_by_id_from_html(note_id, xsec_source, xsec_token,
-                                                                                 enable_cookie=True)
                     if not note_detail:
-                        raise Exception(f"[get_note_detail_async_task] Failed to get note detail, Id: {note_id}")
+                        note_detail = await self.xhs_client.get_note_by_id_from_html(note_id, xsec_source, xsec_token,
+                                                                                     enable_cookie=True)
+                        if not note_detail:
+                            raise Exception(f"[get_note_detail_async_task] Failed to get note detail, Id: {note_id}")
 
-                note_detail.update({"xsec_token": xsec_token, "xsec_source": xsec_source})
+                    note_detail.update({"xsec_token": xsec_token, "xsec_source": xsec_source})
 
-                # Sleep after fetching note detail
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[get_note_detail_async_task] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching note {note_id}")
+                    # Sleep after fetching note detail
+                    await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
+                    utils.logger.info(f"[get_note_detail_async_task] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching note {note_id}")
 
-                return note_detail
+                    return note_detail
 
-            except DataFetchError as ex:
-                utils.logger.error(f"[XiaoHongShuCrawler.get_note_detail_async_task] Get note detail error: {ex}")
-                return None
-            except KeyError as ex:
-                utils.logger.error(f"[XiaoHongShuCrawler.get_note_detail_async_task] have not fund note detail note_id:{note_id}, err: {ex}")
-                return None
+                except DataFetchError as ex:
+                    utils.logger.error(f"[XiaoHongShuCrawler.get_note_detail_async_task] Get note detail error: {ex}")
+                    return None
+                except KeyError as ex:
+                    utils.logger.error(f"[XiaoHongShuCrawler.get_note_detail_async_task] have not fund note detail note_id:{note_id}, err: {ex}")
+                    return None
+                except CircuitOpenError as ex:
+                    utils.logger.error(f"[XiaoHongShuCrawler.get_note_detail_async_task] Get note detail rejected, note_id: {note_id}, err: {ex}")
+                    return None
 
     async def batch_get_note_comments(self, note_list: List[str], xsec_tokens: List[str]):
         """Batch get note comments"""
@@ -334,26 +378,31 @@ class XiaoHongShuCrawler(AbstractCrawler):
 
     async def get_comments(self, note_id: str, xsec_token: str, semaphore: asyncio.Semaphore):
         """Get note comments with keyword filtering and quantity limitation"""
-        async with semaphore:
-            utils.logger.info(f"[XiaoHongShuCrawler.get_comments] Begin get note id comments {note_id}")
-            # Use fixed crawling interval
-            crawl_interval = config.CRAWLER_MAX_SLEEP_SEC
-            await self.xhs_client.get_note_all_comments(
-                note_id=note_id,
-                xsec_token=xsec_token,
-                crawl_interval=crawl_interval,
-                callback=xhs_store.batch_update_xhs_note_comments,
-                max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
-            )
+        with proxy_shard_key(note_id):
+            async with semaphore:
+                utils.logger.info(f"[XiaoHongShuCrawler.get_comments] Begin get note id comments {note_id}")
+                # Use fixed crawling interval
+                crawl_interval = config.CRAWLER_MAX_SLEEP_SEC
+                await self.xhs_client.get_note_all_comments(
+                    note_id=note_id,
+                    xsec_token=xsec_token,
+                    crawl_interval=crawl_interval,
+                    callback=xhs_store.batch_update_xhs_note_comments,
+                    max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
+                )
 
-            # Sleep after fetching comments
-            await asyncio.sleep(crawl_interval)
-            utils.logger.info(f"[XiaoHongShuCrawler.get_comments] Sleeping for {crawl_interval} seconds after fetching comments for note {note_id}")
+                # Sleep after fetching comments
+                await asyncio.sleep(crawl_interval)
+                utils.logger.info(f"[XiaoHongShuCrawler.get_comments] Sleeping for {crawl_interval} seconds after fetching comments for note {note_id}")
 
     async def create_xhs_client(self, httpx_proxy: Optional[str]) -> XiaoHongShuClient:
         """Create Xiaohongshu client"""
         utils.logger.info("[XiaoHongShuCrawler.create_xhs_client] Begin create Xiaohongshu API client ...")
         cookie_str, cookie_dict = utils.convert_cookies(await self.browser_context.cookies())
+        # the local signing service has its own signing pages, only the context page is kept as fallback signer
+        sign_page_num = 1 if await sign_service.ping() else config.XHS_SIGN_PAGE_NUM
+        self.sign_pool = XhsSignerPool(self.browser_context, size=sign_page_num, index_url=self.index_url)
+        await self.sign_pool.start(self.context_page)
         xhs_client_obj = XiaoHongShuClient(
             proxy=httpx_proxy,
             headers={
@@ -377,6 +426,7 @@ class XiaoHongShuCrawler(AbstractCrawler):
             playwright_page=self.context_page,
             cookie_dict=cookie_dict,
             proxy_ip_pool=self.ip_proxy_pool,  # Pass proxy pool for automatic refresh
+            signer=self.sign_pool,
         )
         return xhs_client_obj
 
@@ -441,12 +491,19 @@ class XiaoHongShuCrawler(AbstractCrawler):
 
     async def close(self):
         """Close browser context"""
+        if getattr(self, "xhs_client", None):
+            await self.xhs_client.close_proxy_shards()
+        if self.sign_pool:
+            utils.logger.info(f"[XiaoHongShuCrawler.close] signer pool stats: {self.sign_pool.stats()}")
+            await self.sign_pool.close()
         # Special handling if using CDP mode
         if self.cdp_manager:
             await self.cdp_manager.cleanup()
             self.cdp_manager = None
         else:
             await self.browser_context.close()
+        if self.ip_proxy_pool:
+            await self.ip_proxy_pool.close()
         utils.logger.info("[XiaoHongShuCrawler.close] Browser context closed ...")
 
     async def get_notice_media(self, note_detail: Dict):
@@ -17,21 +17,74 @@
 # 详细许可条款请参阅项目根目录下的LICENSE文件。
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
 
+import asyncio
 import json
-import re
-from typing import Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 import humps
 
+_INITIAL_STATE_PREFIX = "window.__INITIAL_STATE__="
+_SCRIPT_END = "</script>"
+# javascript `undefined` in value position, the word inside text is left alone.
+# Plain str.replace is several times faster than a regex with lookarounds on megabyte pages
+_UNDEFINED_VALUE_PREFIXES = (":", ",", "[")
+_NOTE_DETAIL_MAP_KEY = '"noteDetailMap":'
+_USER_PAGE_DATA_KEY = '"userPageData":'
+_json_decoder = json.JSONDecoder(strict=False)
+
+
+def _replace_undefined(text: str, repl: str) -> str:
+    for prefix in _UNDEFINED_VALUE_PREFIXES:
+        text = text.replace(prefix + "undefined", prefix + repl)
+    return text
+
 
 class XiaoHongShuExtractor:
+    # pages larger than this are parsed in a worker thread so the event loop keeps serving other requests
+    THREAD_OFFLOAD_MIN_CHARS = 256 * 1024
+
     def __init__(self):
         pass
 
+    @staticmethod
+    def _find_initial_state(html: str) -> Optional[Tuple[int, int]]:
+        """
+        Locate the __INITIAL_STATE__ object literal without copying it
+        :param html: Page html
+        :return: (start, end) offsets of the object literal in html
+        """
+        start = html.find(_INITIAL_STATE_PREFIX)
+        if start == -1:
+            return None
+        start += len(_INITIAL_STATE_PREFIX)
+        end = html.find(_SCRIPT_END, start)
+        if end == -1:
+            return None
+        return start, end
+
+    @staticmethod
+    def _decode_value_at(html: str, key_end: int, end: int, undefined_repl: str) -> Any:
+        """
+        Decode the single JSON value that starts at key_end, only the text up to the end of the state is touched
+        :param html: Page html
+        :param key_end: Offset right after the `"key":` of the wanted value
+        :param end: End offset of the state object literal
+        :param undefined_repl: JSON text that replaces javascript `undefined` values
+        :return:
+        """
+        # keep the preceding colon so that a leading `undefined` value still has one of the _UNDEFINED_VALUE_PREFIXES
+        text = _replace_undefined(html[key_end - 1:end], undefined_repl)
+        value, _ = _json_decoder.raw_decode(text, 1)
+        return value
+
     def extract_note_detail_from_html(self, note_id: str, html: str) -> Optional[Dict]:
         """Extract note details from HTML
 
+        Only the note_detail_map[note_id] subtree of __INITIAL_STATE__ is decoded and decamelized,
+        the rest of the state (feeds, user, layout ...) is never parsed
+
         Args:
+            note_id (str): Note ID
             html (str): HTML string
 
         Returns:
@@ -41,13 +94,46 @@ class XiaoHongShuExtractor:
             # Either a CAPTCHA appeared or the note doesn't exist
             return None
 
-        state = re.findall(r"window.__INITIAL_STATE__=({.*})</script>", html)[
-            0
-        ].replace("undefined", '""')
-        if state != "{}":
-            note_dict = humps.decamelize(json.loads(state))
-            return note_dict["note"]["note_detail_map"][note_id]["note"]
-        return None
+        bounds = self._find_initial_state(html)
+        if bounds is None:
+            return None
+        start, end = bounds
+
+        map_pos = html.find(_NOTE_DETAIL_MAP_KEY, start, end)
+        note_key = f'"{note_id}":'
+        key_pos = html.find(note_key, map_pos, end) if map_pos != -1 else -1
+        if key_pos == -1:
+            return self._extract_note_detail_from_full_state(note_id, html[start:end])
+
+        try:
+            note_detail = self._decode_value_at(html, key_pos + len(note_key), end, '""')
+        except ValueError:
+            return self._extract_note_detail_from_full_state(note_id, html[start:end])
+        if not isinstance(note_detail, dict) or not isinstance(note_detail.get("note"), dict):
+            return None
+        return humps.decamelize(note_detail["note"])
+
+    @staticmethod
+    def _extract_note_detail_from_full_state(note_id: str, state: str) -> Optional[Dict]:
+        """
+        Fallback for pages whose layout the targeted lookup does not recognise: decode the whole state
+        """
+        state = _replace_undefined(state, '""')
+        if state == "{}":
+            return None
+        note_detail_map = json.loads(state, strict=False).get("note", {}).get("noteDetailMap", {})
+        note_detail = note_detail_map.get(note_id)
+        if not note_detail:
+            return None
+        return humps.decamelize(note_detail.get("note"))
+
+    async def extract_note_detail_from_html_async(self, note_id: str, html: str) -> Optional[Dict]:
+        """
+        Same as extract_note_detail_from_html, large pages are parsed in a worker thread
+        """
+        if len(html) < self.THREAD_OFFLOAD_MIN_CHARS:
+            return self.extract_note_detail_from_html(note_id, html)
+        return await asyncio.to_thread(self.extract_note_detail_from_html, note_id, html)
 
     def extract_creator_info_from_html(self, html: str) -> Optional[Dict]:
         """Extract user information from HTML
@@ -58,12 +144,19 @@ class XiaoHongShuExtractor:
         Returns:
             Dict: User information dictionary
         """
-        match = re.search(
-            r"<script>window.__INITIAL_STATE__=(.+)<\/script>", html, re.M
-        )
-        if match is None:
+        bounds = self._find_initial_state(html)
+        if bounds is None:
             return None
-        info = json.loads(match.group(1).replace(":undefined", ":null"), strict=False)
+        start, end = bounds
+
+        key_pos = html.find(_USER_PAGE_DATA_KEY, start, end)
+        if key_pos != -1:
+            try:
+                return self._decode_value_at(html, key_pos + len(_USER_PAGE_DATA_KEY), end, "null")
+            except ValueError:
+                pass
+
+        info = json.loads(_replace_undefined(html[start:end], "null"), strict=False)
         if info is None:
             return None
         return info.get("user").get("userPageData")
@@ -18,14 +18,17 @@
 
 # Generate Xiaohongshu signature by calling window.mnsv2 via Playwright injection
 
+import asyncio
 import hashlib
 import json
 import time
-from typing import Any, Dict, Optional, Union
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 from urllib.parse import urlparse, quote
 
 from playwright.async_api import Page
 
+from tools import json_codec, utils
+
 from .xhs_sign import b64_encode, encode_utf8, get_trace_id, mrc
 
 
@@ -45,7 +48,7 @@ def _build_sign_string(uri: str, data: Optional[Union[Dict, str]] = None, method
         c = uri
         if data is not None:
             if isinstance(data, dict):
-                c += json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+                c += json_codec.dumps_compact(data)
             elif isinstance(data, str):
                 c += data
         return c
@@ -112,11 +115,25 @@ def _build_xs_common(a1: str, b1: str, x_s: str, x_t: str) -> str:
     return b64_encode(encode_utf8(json.dumps(payload, separators=(",", ":"))))
 
 
+GET_B1_JS = "() => window.localStorage.getItem('b1')"
+
+# sign a batch of [sign_str, md5_str] pairs in one round trip, optionally reading b1 as well
+SIGN_BATCH_JS = """([items, needB1]) => ({
+    b1: needB1 ? (window.localStorage.getItem('b1') || '') : null,
+    signs: items.map(([signStr, md5Str]) => {
+        try {
+            return window.mnsv2(signStr, md5Str) || '';
+        } catch (e) {
+            return '';
+        }
+    }),
+})"""
+
+
 async def get_b1_from_localstorage(page: Page) -> str:
     """Get b1 value from localStorage"""
     try:
-        local_storage = await page.evaluate("() => window.localStorage")
-        return local_storage.get("b1", "")
+        return await page.evaluate(GET_B1_JS) or ""
     except Exception:
         return ""
 
@@ -133,11 +150,8 @@ async def call_mnsv2(page: Page, sign_str: str, md5_str: str) -> str:
     Returns:
         Signature string returned by mnsv2
     """
-    sign_str_escaped = sign_str.replace("\\", "\\\\").replace("'", "\\'").replace("\n", "\\n")
-    md5_str_escaped = md5_str.replace("\\", "\\\\").replace("'", "\\'")
-
     try:
-        result = await page.evaluate(f"window.mnsv2('{sign_str_escaped}', '{md5_str_escaped}')")
+        result = await page.evaluate("([signStr, md5Str]) => window.mnsv2(signStr, md5Str)", [sign_str, md5_str])
         return result if result else ""
     except Exception:
         return ""
@@ -189,9 +203,15 @@ async def sign_with_playwright(
         Dictionary containing x-s, x-t, x-s-common, x-b3-traceid
     """
     b1 = await get_b1_from_localstorage(page)
-    x_s = await sign_xs_with_playwright(page, uri, data, method)
-    x_t = str(int(time.time() * 1000))
+    sign_str = _build_sign_string(uri, data, method)
+    x3_value = await call_mnsv2(page, sign_str, _md5_hex(sign_str))
+    return _build_sign_headers(x3_value, data, a1, b1)
+
 
+def _build_sign_headers(x3_value: str, data: Optional[Union[Dict, str]], a1: str, b1: str) -> Dict[str, Any]:
+    data_type = "object" if isinstance(data, (dict, list)) else "string"
+    x_s = _build_xs_payload(x3_value, data_type)
+    x_t = str(int(time.time() * 1000))
     return {
         "x-s": x_s,
         "x-t": x_t,
@@ -200,6 +220,117 @@ async def sign_with_playwright(
     }
 
 
+class XhsPageSigner:
+    """
+    Signs requests on one Xiaohongshu page with as few Playwright round trips as possible:
+
+    - b1 is read from localStorage once and cached until invalidate_b1() (called on cookie updates)
+    - sign requests issued while a round trip is in flight are queued and signed together
+      in the next page.evaluate call, arguments are passed as evaluate parameters
+    """
+
+    def __init__(self, page: Page, max_batch_size: int = 32, timeout: float = 10):
+        self.page = page
+        self.max_batch_size = max_batch_size
+        self.timeout = timeout
+        self.evaluate_calls = 0
+        self.signed = 0
+        self.in_flight = 0
+        # cleared when the page hangs or fails, the signer pool then replaces the page
+        self.healthy = True
+        self._b1: Optional[str] = None
+        self._queue: List[Tuple[str, str, asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    @property
+    def load(self) -> int:
+        return len(self._queue) + self.in_flight
+
+    def invalidate_b1(self) -> None:
+        self._b1 = None
+
+    async def get_b1(self) -> str:
+        if self._b1 is not None:
+            return self._b1
+        b1 = await get_b1_from_localstorage(self.page)
+        # an empty b1 is read again next time, the page may not have written it yet
+        if b1:
+            self._b1 = b1
+        return b1
+
+    async def sign(
+        self,
+        uri: str,
+        data: Optional[Union[Dict, str]] = None,
+        a1: str = "",
+        method: str = "POST",
+        b1: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Same result as sign_with_playwright
+
+        :param b1: b1 of the browser that owns a1, the page's own b1 is used when None.
+                   A signing page in another browser (sign_server_main.py) only computes x3 and must not mix
+                   its device fingerprint into x-s-common
+        """
+        sign_str = _build_sign_string(uri, data, method)
+        x3_value = await self._call_mnsv2(sign_str, _md5_hex(sign_str))
+        if b1 is None:
+            b1 = await self.get_b1()
+        return _build_sign_headers(x3_value, data, a1, b1)
+
+    async def sign_many(
+        self,
+        requests: Sequence[Tuple[str, Optional[Union[Dict, str]], str]],
+        a1: str = "",
+    ) -> List[Dict[str, Any]]:
+        """
+        Sign (uri, data, method) requests, all in one evaluate call when the queue is idle
+        """
+        return list(await asyncio.gather(*[self.sign(uri, data, a1, method) for uri, data, method in requests]))
+
+    def _call_mnsv2(self, sign_str: str, md5_str: str) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._queue.append((sign_str, md5_str, future))
+        if self._flush_task is None:
+            # started on the next loop iteration, so requests issued together land in one batch
+            self._flush_task = asyncio.create_task(self._flush())
+        return future
+
+    async def _flush(self) -> None:
+        try:
+            while self._queue:
+                batch = self._queue[:self.max_batch_size]
+                del self._queue[:self.max_batch_size]
+                x3_values = await self._evaluate_batch([(sign_str, md5_str) for sign_str, md5_str, _ in batch])
+                for (_, _, future), x3_value in zip(batch, x3_values):
+                    if not future.done():
+                        future.set_result(x3_value)
+        finally:
+            self._flush_task = None
+
+    async def _evaluate_batch(self, items: List[Tuple[str, str]]) -> List[str]:
+        need_b1 = self._b1 is None
+        self.evaluate_calls += 1
+        self.in_flight = len(items)
+        try:
+            result = await asyncio.wait_for(self.page.evaluate(SIGN_BATCH_JS, [items, need_b1]), self.timeout)
+        except Exception as e:
+            self.healthy = False
+            utils.logger.warning(f"[XhsPageSigner._evaluate_batch] sign {len(items)} requests failed: {e!r}")
+            return [""] * len(items)
+        finally:
+            self.in_flight = 0
+        if need_b1 and self._b1 is None and result.get("b1"):
+            self._b1 = result["b1"]
+        self.signed += len(items)
+        return result.get("signs") or [""] * len(items)
+
+
 async def pre_headers_with_playwright(
     page: Page,
     url: str,
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/media_platform/xhs/sign_pool.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# @Desc    : Pool of Xiaohongshu signing pages in one BrowserContext
+#
+# window.mnsv2 runs on the page's JS thread, so a single page serializes every signature of the crawler.
+# The pool opens extra pages in the same context (they share cookies and localStorage), routes each
+# sign request to the least busy page and replaces pages that hang or crash.
+
+import asyncio
+from typing import Any, Dict, List, Optional, Union
+
+from playwright.async_api import BrowserContext, Page
+
+from tools import utils
+
+from .playwright_sign import XhsPageSigner
+
+
+class XhsSignerPool:
+    """
+    Usage:
+        pool = XhsSignerPool(browser_context, size=4)
+        await pool.start(context_page)
+        signs = await pool.sign(uri, data, a1, method)
+    """
+
+    def __init__(
+        self,
+        browser_context: BrowserContext,
+        size: int = 1,
+        index_url: str = "https://www.xiaohongshu.com",
+        sign_timeout: float = 10,
+    ):
+        """
+        :param browser_context: Context the signing pages are opened in
+        :param size: Number of signing pages, including the page passed to start()
+        :param index_url: Page loaded in new signing pages, it provides window.mnsv2
+        :param sign_timeout: Seconds before a page is considered hung and replaced
+        """
+        self.browser_context = browser_context
+        self.size = max(size, 1)
+        self.index_url = index_url
+        self.sign_timeout = sign_timeout
+        self.signers: List[XhsPageSigner] = []
+        self.recycled_pages = 0
+        # pages opened by the pool, the crawler's own page is never closed here
+        self._owned_pages: List[Page] = []
+        self._recycling: Dict[int, asyncio.Task] = {}
+
+    async def start(self, page: Optional[Page] = None) -> None:
+        """
+        :param page: An already loaded page to reuse as the first signer
+        """
+        if page is not None:
+            self.signers.append(self._create_signer(page))
+        new_pages = await asyncio.gather(*[self._open_page() for _ in range(self.size - len(self.signers))])
+        self.signers.extend(self._create_signer(new_page) for new_page in new_pages)
+        utils.logger.info(f"[XhsSignerPool.start] {len(self.signers)} signing pages ready")
+
+    @property
+    def queue_depth(self) -> int:
+        """Sign requests waiting for or running on a page"""
+        return sum(signer.load for signer in self.signers)
+
+    def invalidate_b1(self) -> None:
+        for signer in self.signers:
+            signer.invalidate_b1()
+
+    async def get_b1(self) -> str:
+        # the pages share one localStorage, any of them has the context's b1
+        return await self._pick_signer().get_b1()
+
+    async def sign(
+        self,
+        uri: str,
+        data: Optional[Union[Dict, str]] = None,
+        a1: str = "",
+        method: str = "POST",
+        b1: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        :param b1: b1 of the browser that owns a1, see XhsPageSigner.sign
+        """
+        signer = self._pick_signer()
+        signs = await signer.sign(uri, data, a1, method, b1)
+        if not signer.healthy:
+            self._schedule_recycle(signer)
+        return signs
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pages": len(self.signers),
+            "queue_depth": self.queue_depth,
+            "recycled_pages": self.recycled_pages,
+            "signed": [signer.signed for signer in self.signers],
+            "evaluate_calls": sum(signer.evaluate_calls for signer in self.signers),
+        }
+
+    async def close(self) -> None:
+        for task in self._recycling.values():
+            task.cancel()
+        for page in self._owned_pages:
+            try:
+                await page.close()
+            except Exception:
+                pass
+        self._owned_pages.clear()
+
+    def _pick_signer(self) -> XhsPageSigner:
+        healthy = [signer for signer in self.signers if signer.healthy] or self.signers
+        return min(healthy, key=lambda signer: signer.load)
+
+    def _create_signer(self, page: Page) -> XhsPageSigner:
+        signer = XhsPageSigner(page, timeout=self.sign_timeout)
+
+        def on_crash(_):
+            signer.healthy = False
+            self._schedule_recycle(signer)
+
+        page.on("crash", on_crash)
+        return signer
+
+    async def _open_page(self) -> Page:
+        page = await self.browser_context.new_page()
+        self._owned_pages.append(page)
+        await page.goto(self.index_url)
+        return page
+
+    def _schedule_recycle(self, signer: XhsPageSigner) -> None:
+        if id(signer) not in self._recycling:
+            self._recycling[id(signer)] = asyncio.create_task(self._recycle(signer))
+
+    async def _recycle(self, signer: XhsPageSigner) -> None:
+        """
+        Replace a hung or crashed signing page with a fresh one
+        """
+        try:
+            new_page = await self._open_page()
+        except Exception as e:
+            utils.logger.error(f"[XhsSignerPool._recycle] open signing page failed: {e!r}")
+            self._recycling.pop(id(signer), None)
+            return
+        index = self.signers.index(signer)
+        self.signers[index] = self._create_signer(new_page)
+        self.recycled_pages += 1
+        self._recycling.pop(id(signer), None)
+        utils.logger.warning(f"[XhsSignerPool._recycle] signing page {index} replaced")
+        if signer.page in self._owned_pages:
+            self._owned_pages.remove(signer.page)
+            try:
+                await signer.page.close()
+            except Exception:
+                pass
@@ -26,21 +26,23 @@ from urllib.parse import urlencode
 import httpx
 from httpx import Response
 from playwright.async_api import BrowserContext, Page
-from tenacity import retry, stop_after_attempt, wait_fixed
 
 import config
 from base.base_crawler import AbstractApiClient
 from constant import zhihu as zhihu_constant
 from model.m_zhihu import ZhihuComment, ZhihuContent, ZhihuCreator
-from proxy.proxy_mixin import ProxyRefreshMixin
-from tools import utils
+from proxy.proxy_mixin import ProxyRefreshMixin, track_proxy_outcome
+from tools import json_codec, utils
+from tools.resilience import ResiliencePolicy
 
 if TYPE_CHECKING:
     from proxy.proxy_ip_pool import ProxyIpPool
 
 from .exception import DataFetchError, ForbiddenError
 from .field import SearchSort, SearchTime, SearchType
-from .help import ZhihuExtractor, sign
+from .help import ZhihuExtractor, zhihu_signer
+
+zhihu_resilience_policy = ResiliencePolicy("zhihu", relogin_errors=(ForbiddenError,))
 
 
 class ZhiHuClient(AbstractApiClient, ProxyRefreshMixin):
@@ -59,6 +61,7 @@ class ZhiHuClient(AbstractApiClient, ProxyRefreshMixin):
         self.timeout = timeout
         self.default_headers = headers
         self.cookie_dict = cookie_dict
+        self.playwright_page = playwright_page
         self._extractor = ZhihuExtractor()
         # Initialize proxy pool (from ProxyRefreshMixin)
         self.init_proxy_pool(proxy_ip_pool)
@@ -74,13 +77,14 @@ class ZhiHuClient(AbstractApiClient, ProxyRefreshMixin):
         d_c0 = self.cookie_dict.get("d_c0")
         if not d_c0:
             raise Exception("d_c0 not found in cookies")
-        sign_res = sign(url, self.default_headers["cookie"])
+        sign_res = await zhihu_signer.sign(url, self.default_headers["cookie"])
         headers = self.default_headers.copy()
         headers['x-zst-81'] = sign_res["x-zst-81"]
         headers['x-zse-96'] = sign_res["x-zse-96"]
         return headers
 
-    @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
+    @zhihu_resilience_policy.retry
+    @track_proxy_outcome
     async def request(self, method, url, **kwargs) -> Union[str, Any]:
         """
         Wrapper for httpx common request method with response handling
@@ -88,6 +92,7 @@ class ZhiHuClient(AbstractApiClient, ProxyRefreshMixin):
             method: Request method
             url: Request URL
             **kwargs: Other request parameters such as headers, body, etc.
+                      sign_uri signs the headers for this uri on every attempt
 
         Returns:
 
@@ -95,10 +100,15 @@ class ZhiHuClient(AbstractApiClient, ProxyRefreshMixin):
         # Check if proxy is expired before each request
         await self._refresh_proxy_if_expired()
 
+        # signed per attempt, a retry after re-login sends the refreshed cookie and its signature
+        sign_uri = kwargs.pop("sign_uri", None)
+        if sign_uri is not None:
+            kwargs["headers"] = await self._pre_headers(sign_uri)
+
         # return response.text
         return_response = kwargs.pop('return_response', False)
 
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
+        async with self._proxy_http_client() as client:
             response = await client.request(method, url, timeout=self.timeout, **kwargs)
 
         if response.status_code != 200:
@@ -113,7 +123,7 @@ class ZhiHuClient(AbstractApiClient, ProxyRefreshMixin):
         if return_response:
             return response.text
         try:
-            data: Dict = response.json()
+            data: Dict = json_codec.loads(response.content)
             if data.get("error"):
                 utils.logger.error(f"[ZhiHuClient.request] Request error: {data}")
                 raise DataFetchError(data.get("error", {}).get("message"))
@@ -135,9 +145,8 @@ class ZhiHuClient(AbstractApiClient, ProxyRefreshMixin):
         final_uri = uri
         if isinstance(params, dict):
             final_uri += '?' + urlencode(params)
-        headers = await self._pre_headers(final_uri)
         base_url = (zhihu_constant.ZHIHU_URL if "/p/" not in uri else zhihu_constant.ZHIHU_ZHUANLAN_URL)
-        return await self.request(method="GET", url=base_url + final_uri, headers=headers, **kwargs)
+        return await self.request(method="GET", url=base_url + final_uri, sign_uri=final_uri, **kwargs)
 
     async def pong(self) -> bool:
         """
@@ -41,11 +41,12 @@ from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import zhihu as zhihu_store
 from tools import utils
 from tools.cdp_browser import CDPBrowserManager
+from tools.pipeline import run_keyword_workers, search_fatal_errors
 from var import crawler_type_var, source_keyword_var
 
 from .client import ZhiHuClient
-from .exception import DataFetchError
-from .help import ZhihuExtractor, judge_zhihu_url
+from .exception import DataFetchError, ForbiddenError, IPBlockError
+from .help import ZhihuExtractor, judge_zhihu_url, zhihu_signer
 from .login import ZhiHuLogin
 
 
@@ -69,129 +70,141 @@ class ZhihuCrawler(AbstractCrawler):
         Returns:
 
         """
-        playwright_proxy_format, httpx_proxy_format = None, None
-        if config.ENABLE_IP_PROXY:
-            self.ip_proxy_pool = await create_ip_pool(
-                config.IP_PROXY_POOL_COUNT, enable_validate_ip=True
-            )
-            ip_proxy_info: IpInfoModel = await self.ip_proxy_pool.get_proxy()
-            playwright_proxy_format, httpx_proxy_format = utils.format_proxy_info(
-                ip_proxy_info
-            )
-
-        async with async_playwright() as playwright:
-            # Choose launch mode based on configuration
-            if config.ENABLE_CDP_MODE:
-                utils.logger.info("[ZhihuCrawler] Launching browser in CDP mode")
-                self.browser_context = await self.launch_browser_with_cdp(
-                    playwright,
-                    playwright_proxy_format,
-                    self.user_agent,
-                    headless=config.CDP_HEADLESS,
+        # start the sign workers while the browser launches
+        sign_warmup_task = asyncio.create_task(zhihu_signer.warmup())
+        try:
+            playwright_proxy_format, httpx_proxy_format = None, None
+            if config.ENABLE_IP_PROXY:
+                self.ip_proxy_pool = await create_ip_pool(
+                    config.IP_PROXY_POOL_COUNT, enable_validate_ip=True
                 )
-            else:
-                utils.logger.info("[ZhihuCrawler] Launching browser in standard mode")
-                # Launch a browser context.
-                chromium = playwright.chromium
-                self.browser_context = await self.launch_browser(
-                    chromium, None, self.user_agent, headless=config.HEADLESS
+                ip_proxy_info: IpInfoModel = await self.ip_proxy_pool.get_proxy()
+                playwright_proxy_format, httpx_proxy_format = utils.format_proxy_info(
+                    ip_proxy_info
                 )
-                # stealth.min.js is a js script to prevent the website from detecting the crawler.
-                await self.browser_context.add_init_script(path="libs/stealth.min.js")
-
-            self.context_page = await self.browser_context.new_page()
-            await self.context_page.goto(self.index_url, wait_until="domcontentloaded")
-
-            # Create a client to interact with the zhihu website.
-            self.zhihu_client = await self.create_zhihu_client(httpx_proxy_format)
-            if not await self.zhihu_client.pong():
-                login_obj = ZhiHuLogin(
-                    login_type=config.LOGIN_TYPE,
-                    login_phone="",  # input your phone number
-                    browser_context=self.browser_context,
-                    context_page=self.context_page,
-                    cookie_str=config.COOKIES,
+
+            async with async_playwright() as playwright:
+                # Choose launch mode based on configuration
+                if config.ENABLE_CDP_MODE:
+                    utils.logger.info("[ZhihuCrawler] Launching browser in CDP mode")
+                    self.browser_context = await self.launch_browser_with_cdp(
+                        playwright,
+                        playwright_proxy_format,
+                        self.user_agent,
+                        headless=config.CDP_HEADLESS,
+                    )
+                else:
+                    utils.logger.info("[ZhihuCrawler] Launching browser in standard mode")
+                    # Launch a browser context.
+                    chromium = playwright.chromium
+                    self.browser_context = await self.launch_browser(
+                        chromium, None, self.user_agent, headless=config.HEADLESS
+                    )
+                    # stealth.min.js is a js script to prevent the website from detecting the crawler.
+                    await self.browser_context.add_init_script(path="libs/stealth.min.js")
+
+                self.context_page = await self.browser_context.new_page()
+                await self.context_page.goto(self.index_url, wait_until="domcontentloaded")
+
+                # Create a client to interact with the zhihu website.
+                await sign_warmup_task
+                self.zhihu_client = await self.create_zhihu_client(httpx_proxy_format)
+                if not await self.zhihu_client.pong():
+                    login_obj = ZhiHuLogin(
+                        login_type=config.LOGIN_TYPE,
+                        login_phone="",  # input your phone number
+                        browser_context=self.browser_context,
+                        context_page=self.context_page,
+                        cookie_str=config.COOKIES,
+                    )
+                    await login_obj.begin()
+                    await self.zhihu_client.update_cookies(
+                        browser_context=self.browser_context
+                    )
+
+                # Zhihu's search API requires opening the search page first to access cookies, homepage alone won't work
+                utils.logger.info(
+                    "[ZhihuCrawler.start] Zhihu navigating to search page to get search page cookies, this process takes about 5 seconds"
                 )
-                await login_obj.begin()
-                await self.zhihu_client.update_cookies(
-                    browser_context=self.browser_context
+                await self.context_page.goto(
+                    f"{self.index_url}/search?q=python&search_source=Guess&utm_content=search_hot&type=content"
                 )
-
-            # Zhihu's search API requires opening the search page first to access cookies, homepage alone won't work
-            utils.logger.info(
-                "[ZhihuCrawler.start] Zhihu navigating to search page to get search page cookies, this process takes about 5 seconds"
-            )
-            await self.context_page.goto(
-                f"{self.index_url}/search?q=python&search_source=Guess&utm_content=search_hot&type=content"
-            )
-            await asyncio.sleep(5)
-            await self.zhihu_client.update_cookies(browser_context=self.browser_context)
-
-            crawler_type_var.set(config.CRAWLER_TYPE)
-            if config.CRAWLER_TYPE == "search":
-                # Search for notes and retrieve their comment information.
-                await self.search()
-            elif config.CRAWLER_TYPE == "detail":
-                # Get the information and comments of the specified post
-                await self.get_specified_notes()
-            elif config.CRAWLER_TYPE == "creator":
-                # Get creator's information and their notes and comments
-                await self.get_creators_and_notes()
-            else:
-                pass
-
-            utils.logger.info("[ZhihuCrawler.start] Zhihu Crawler finished ...")
+                await asyncio.sleep(5)
+                await self.zhihu_client.update_cookies(browser_context=self.browser_context)
+
+                crawler_type_var.set(config.CRAWLER_TYPE)
+                if config.CRAWLER_TYPE == "search":
+                    # Search for notes and retrieve their comment information.
+                    await self.search()
+                elif config.CRAWLER_TYPE == "detail":
+                    # Get the information and comments of the specified post
+                    await self.get_specified_notes()
+                elif config.CRAWLER_TYPE == "creator":
+                    # Get creator's information and their notes and comments
+                    await self.get_creators_and_notes()
+                else:
+                    pass
+
+                utils.logger.info("[ZhihuCrawler.start] Zhihu Crawler finished ...")
+        finally:
+            # not awaited yet when the browser launch or the proxy pool failed
+            if not sign_warmup_task.done():
+                sign_warmup_task.cancel()
+            await asyncio.gather(sign_warmup_task, return_exceptions=True)
 
     async def search(self) -> None:
         """Search for notes and retrieve their comment information."""
         utils.logger.info("[ZhihuCrawler.search] Begin search zhihu keywords")
+        await run_keyword_workers("zhihu_search", config.KEYWORDS.split(","), self.search_keyword, fatal_errors=search_fatal_errors(ForbiddenError, IPBlockError))
+
+    async def search_keyword(self, keyword: str) -> None:
+        """Search one keyword page by page and retrieve the comments of its contents."""
         zhihu_limit_count = 20  # zhihu limit page fixed value
-        if config.CRAWLER_MAX_NOTES_COUNT < zhihu_limit_count:
-            config.CRAWLER_MAX_NOTES_COUNT = zhihu_limit_count
+        # the limit is raised to one page for this crawler only, config stays as it is
+        max_notes_count = max(config.CRAWLER_MAX_NOTES_COUNT, zhihu_limit_count)
         start_page = config.START_PAGE
-        for keyword in config.KEYWORDS.split(","):
-            source_keyword_var.set(keyword)
-            utils.logger.info(
-                f"[ZhihuCrawler.search] Current search keyword: {keyword}"
-            )
-            page = 1
-            while (
-                page - start_page + 1
-            ) * zhihu_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
-                if page < start_page:
-                    utils.logger.info(f"[ZhihuCrawler.search] Skip page {page}")
-                    page += 1
-                    continue
-
-                try:
-                    utils.logger.info(
-                        f"[ZhihuCrawler.search] search zhihu keyword: {keyword}, page: {page}"
-                    )
-                    content_list: List[ZhihuContent] = (
-                        await self.zhihu_client.get_note_by_keyword(
-                            keyword=keyword,
-                            page=page,
-                        )
-                    )
-                    utils.logger.info(
-                        f"[ZhihuCrawler.search] Search contents :{content_list}"
+        source_keyword_var.set(keyword)
+        utils.logger.info(
+            f"[ZhihuCrawler.search] Current search keyword: {keyword}"
+        )
+        page = 1
+        while (
+            page - start_page + 1
+        ) * zhihu_limit_count <= max_notes_count:
+            if page < start_page:
+                utils.logger.info(f"[ZhihuCrawler.search] Skip page {page}")
+                page += 1
+                continue
+
+            try:
+                utils.logger.info(
+                    f"[ZhihuCrawler.search] search zhihu keyword: {keyword}, page: {page}"
+                )
+                content_list: List[ZhihuContent] = (
+                    await self.zhihu_client.get_note_by_keyword(
+                        keyword=keyword,
+                        page=page,
                     )
-                    if not content_list:
-                        utils.logger.info("No more content!")
-                        break
+                )
+                utils.logger.info(
+                    f"[ZhihuCrawler.search] Search contents :{content_list}"
+                )
+                if not content_list:
+                    utils.logger.info("No more content!")
+                    break
 
-                    # Sleep after page navigation
-                    await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                    utils.logger.info(f"[ZhihuCrawler.search] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
+                # Sleep after page navigation
+                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
+                utils.logger.info(f"[ZhihuCrawler.search] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
 
-                    page += 1
-                    for content in content_list:
-                        await zhihu_store.update_zhihu_content(content)
+                page += 1
+                for content in content_list:
+                    await zhihu_store.update_zhihu_content(content)
 
-                    await self.batch_get_content_comments(content_list)
-                except DataFetchError:
-                    utils.logger.error("[ZhihuCrawler.search] Search content error")
-                    return
+                await self.batch_get_content_comments(content_list)
+            except DataFetchError:
+                utils.logger.error("[ZhihuCrawler.search] Search content error")
+                return
 
     async def batch_get_content_comments(self, content_list: List[ZhihuContent]):
         """
@@ -485,10 +498,16 @@ class ZhihuCrawler(AbstractCrawler):
 
     async def close(self):
         """Close browser context"""
+        if getattr(self, "zhihu_client", None):
+            await self.zhihu_client.close_proxy_shards()
         # Special handling if using CDP mode
         if self.cdp_manager:
             await self.cdp_manager.cleanup()
             self.cdp_manager = None
         else:
             await self.browser_context.close()
+        utils.logger.info(f"[ZhihuCrawler.close] x-zse-96 signing stats: {zhihu_signer.stats()}")
+        await zhihu_signer.close()
+        if self.ip_proxy_pool:
+            await self.ip_proxy_pool.close()
         utils.logger.info("[ZhihuCrawler.close] Browser context closed ...")
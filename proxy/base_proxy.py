@@ -23,14 +23,14 @@
 # @Time    : 2023/12/2 11:18
 # @Desc    : Crawler IP acquisition implementation
 # @Url     : KuaiDaili HTTP implementation, official documentation: https://www.kuaidaili.com/?ref=ldwkjqipvz6c
-import json
+import asyncio
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Dict, List, Optional
 
-import config
-from cache.abs_cache import AbstractCache
-from cache.cache_factory import CacheFactory
-from tools.utils import utils
+from redis.asyncio import Redis
+
+from cache.async_redis_cache import get_connection_pool
+from tools import utils
 
 from .types import IpInfoModel
 
@@ -52,33 +52,80 @@ class ProxyProvider(ABC):
 
 
 class IpCache:
+    """
+    IPs of each provider are kept in one Redis sorted set of ip:port members scored by expiration timestamp,
+    their details in a companion hash keyed by ip:port, so adding an IP again replaces it instead of duplicating it.
+    Loads and adds are each a single pipelined round trip, both keys expire with the last IP
+    this cache loaded or added.
+    """
+
     def __init__(self):
-        self.cache_client: AbstractCache = CacheFactory.create_cache(cache_type=config.CACHE_TYPE_REDIS)
+        self._redis_client: Optional[Redis] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # latest expiration timestamp seen per provider, an add must not shorten the life of IPs stored earlier
+        self._expire_at: Dict[str, int] = {}
+
+    @staticmethod
+    def cache_key(proxy_brand_name: str) -> str:
+        return f"{proxy_brand_name}_ips"
+
+    @staticmethod
+    def info_key(proxy_brand_name: str) -> str:
+        return f"{proxy_brand_name}_ips:info"
 
-    def set_ip(self, ip_key: str, ip_value_info: str, ex: int):
+    def _get_client(self) -> Redis:
+        loop = asyncio.get_running_loop()
+        if self._redis_client is None or self._loop is not loop:
+            # connections belong to the loop they were opened on, the pool of the loop is shared with the async cache
+            self._redis_client = Redis(connection_pool=get_connection_pool())
+            self._loop = loop
+        return self._redis_client
+
+    async def add_ips(self, proxy_brand_name: str, ip_infos: List[IpInfoModel]) -> None:
         """
-        Set IP with expiration time, Redis is responsible for deletion after expiration
-        :param ip_key:
-        :param ip_value_info:
-        :param ex:
+        Store IPs until their expiration time, Redis is responsible for deletion after expiration
+        :param proxy_brand_name: Proxy provider name
+        :param ip_infos:
         :return:
         """
-        self.cache_client.set(key=ip_key, value=ip_value_info, expire_time=ex)
+        ip_infos = [ip_info for ip_info in ip_infos if ip_info.expired_time_ts]
+        if not ip_infos:
+            return
+        key, info_key = self.cache_key(proxy_brand_name), self.info_key(proxy_brand_name)
+        expire_at = max(self._expire_at.get(proxy_brand_name, 0), *(ip_info.expired_time_ts for ip_info in ip_infos))
+        self._expire_at[proxy_brand_name] = expire_at
+        try:
+            async with self._get_client().pipeline(transaction=False) as pipe:
+                pipe.zadd(key, {f"{ip_info.ip}:{ip_info.port}": ip_info.expired_time_ts for ip_info in ip_infos})
+                pipe.hset(info_key, mapping={f"{ip_info.ip}:{ip_info.port}": ip_info.model_dump_json() for ip_info in ip_infos})
+                pipe.expireat(key, expire_at + 1)
+                pipe.expireat(info_key, expire_at + 1)
+                await pipe.execute()
+        except Exception as e:
+            utils.logger.error(f"[IpCache.add_ips] save ip to redis err: {e!r}")
 
-    def load_all_ip(self, proxy_brand_name: str) -> List[IpInfoModel]:
+    async def load_all_ip(self, proxy_brand_name: str) -> List[IpInfoModel]:
         """
         Load all unexpired IP information from Redis
         :param proxy_brand_name: Proxy provider name
         :return:
         """
-        all_ip_list: List[IpInfoModel] = []
-        all_ip_keys: List[str] = self.cache_client.keys(pattern=f"{proxy_brand_name}_*")
+        key, info_key = self.cache_key(proxy_brand_name), self.info_key(proxy_brand_name)
+        now = utils.get_unix_timestamp()
         try:
-            for ip_key in all_ip_keys:
-                ip_value = self.cache_client.get(ip_key)
-                if not ip_value:
-                    continue
-                all_ip_list.append(IpInfoModel(**json.loads(ip_value)))
+            async with self._get_client().pipeline(transaction=False) as pipe:
+                pipe.zremrangebyscore(key, "-inf", now)
+                pipe.zrangebyscore(key, f"({now}", "+inf", withscores=True)
+                pipe.hgetall(info_key)
+                _, scored_members, infos = await pipe.execute()
+            members = [member for member, _ in scored_members]
+            if scored_members:
+                self._expire_at[proxy_brand_name] = max(self._expire_at.get(proxy_brand_name, 0), int(scored_members[-1][1]))
+            # details of expired IPs are dropped here, the sorted set already forgot them
+            stale = set(infos) - set(members)
+            if stale:
+                await self._get_client().hdel(info_key, *stale)
         except Exception as e:
-            utils.logger.error("[IpCache.load_all_ip] get ip err from redis db", e)
-        return all_ip_list
+            utils.logger.error(f"[IpCache.load_all_ip] get ip err from redis db: {e!r}")
+            return []
+        return [IpInfoModel.model_validate_json(infos[member]) for member in members if member in infos]
@@ -60,7 +60,7 @@ class JiSuHttpProxy(ProxyProvider):
         """
 
         # Prioritize getting IP from cache
-        ip_cache_list = self.ip_cache.load_all_ip(proxy_brand_name=self.proxy_brand_name)
+        ip_cache_list = await self.ip_cache.load_all_ip(proxy_brand_name=self.proxy_brand_name)
         if len(ip_cache_list) >= num:
             return ip_cache_list[:num]
 
@@ -77,7 +77,6 @@ class JiSuHttpProxy(ProxyProvider):
             res_dict: Dict = response.json()
             if res_dict.get("code") == 0:
                 data: List[Dict] = res_dict.get("data")
-                current_ts = utils.get_unix_timestamp()
                 for ip_item in data:
                     ip_info_model = IpInfoModel(
                         ip=ip_item.get("ip"),
@@ -86,10 +85,8 @@ class JiSuHttpProxy(ProxyProvider):
                         password=ip_item.get("pass"),
                         expired_time_ts=utils.get_unix_time_from_time_str(ip_item.get("expire")),
                     )
-                    ip_key = f"JISUHTTP_{ip_info_model.ip}_{ip_info_model.port}_{ip_info_model.user}_{ip_info_model.password}"
-                    ip_value = ip_info_model.json()
                     ip_infos.append(ip_info_model)
-                    self.ip_cache.set_ip(ip_key, ip_value, ex=ip_info_model.expired_time_ts - current_ts)
+                await self.ip_cache.add_ips(self.proxy_brand_name, ip_infos)
             else:
                 raise IpGetError(res_dict.get("msg", "unkown err"))
         return ip_cache_list + ip_infos
@@ -55,7 +55,7 @@ class WanDouHttpProxy(ProxyProvider):
         """
 
         # Prioritize getting IP from cache
-        ip_cache_list = self.ip_cache.load_all_ip(
+        ip_cache_list = await self.ip_cache.load_all_ip(
             proxy_brand_name=self.proxy_brand_name
         )
         if len(ip_cache_list) >= num:
@@ -77,7 +77,6 @@ class WanDouHttpProxy(ProxyProvider):
             res_dict: Dict = response.json()
             if res_dict.get("code") == 200:
                 data: List[Dict] = res_dict.get("data", [])
-                current_ts = utils.get_unix_timestamp()
                 for ip_item in data:
                     ip_info_model = IpInfoModel(
                         ip=ip_item.get("ip"),
@@ -88,12 +87,8 @@ class WanDouHttpProxy(ProxyProvider):
                             ip_item.get("expire_time")
                         ),
                     )
-                    ip_key = f"WANDOUHTTP_{ip_info_model.ip}_{ip_info_model.port}"
-                    ip_value = ip_info_model.model_dump_json()
                     ip_infos.append(ip_info_model)
-                    self.ip_cache.set_ip(
-                        ip_key, ip_value, ex=ip_info_model.expired_time_ts - current_ts
-                    )
+                await self.ip_cache.add_ips(self.proxy_brand_name, ip_infos)
             else:
                 error_msg = res_dict.get("msg", "unknown error")
                 # Handle specific error codes
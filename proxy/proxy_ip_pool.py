@@ -21,9 +21,13 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2023/12/2 13:45
 # @Desc    : IP proxy pool implementation
-import random
-from typing import Dict, List
+import asyncio
+import ssl
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set
 
+import certifi
 import httpx
 from tenacity import retry, stop_after_attempt, wait_fixed
 
@@ -35,13 +39,76 @@ from proxy.providers import (
 from tools import utils
 
 from .base_proxy import ProxyProvider
+from .proxy_reputation import ProxyReputationStore
 from .types import IpInfoModel, ProviderNameEnum
 
 
+def proxy_key(proxy: IpInfoModel) -> str:
+    return f"{proxy.ip}:{proxy.port}"
+
+
+def format_proxy_url(proxy: IpInfoModel) -> str:
+    # httpx 0.28.1 requires passing proxy URL string directly, not a dictionary
+    if proxy.user and proxy.password:
+        return f"http://{proxy.user}:{proxy.password}@{proxy.ip}:{proxy.port}"
+    return f"http://{proxy.ip}:{proxy.port}"
+
+
+class ProxyHealth:
+    """Validation results of one proxy"""
+
+    # weight of the newest latency sample in the moving average
+    LATENCY_ALPHA = 0.3
+
+    def __init__(self):
+        self.checks = 0
+        self.successes = 0
+        self.consecutive_failures = 0
+        self.latency_ms: Optional[float] = None
+        self.last_checked_at = 0.0
+
+    @property
+    def success_rate(self) -> float:
+        # an unchecked proxy is assumed to work
+        return self.successes / self.checks if self.checks else 1.0
+
+    @property
+    def healthy(self) -> bool:
+        return self.consecutive_failures == 0
+
+    @property
+    def score(self) -> float:
+        """Higher is better: success rate, discounted by one per second of latency"""
+        latency_sec = (self.latency_ms or 0.0) / 1000
+        return self.success_rate / (1 + latency_sec)
+
+    def record(self, ok: bool, latency_ms: float) -> None:
+        self.checks += 1
+        self.last_checked_at = time.time()
+        if not ok:
+            self.consecutive_failures += 1
+            return
+        self.successes += 1
+        self.consecutive_failures = 0
+        if self.latency_ms is None:
+            self.latency_ms = latency_ms
+        else:
+            self.latency_ms += self.LATENCY_ALPHA * (latency_ms - self.latency_ms)
+
+
 class ProxyIpPool:
 
     def __init__(
-        self, ip_pool_count: int, enable_validate_ip: bool, ip_provider: ProxyProvider
+        self,
+        ip_pool_count: int,
+        enable_validate_ip: bool,
+        ip_provider: ProxyProvider,
+        valid_ip_url: Optional[str] = None,
+        validate_timeout: Optional[float] = None,
+        validate_concurrency: int = 16,
+        low_watermark: Optional[int] = None,
+        refill_ttl_sec: Optional[int] = None,
+        reputation: Optional[ProxyReputationStore] = None,
     ) -> None:
         """
 
@@ -49,69 +116,179 @@ class ProxyIpPool:
             ip_pool_count:
             enable_validate_ip:
             ip_provider:
+            valid_ip_url: URL requested through each proxy to validate it, defaults to config.IP_PROXY_VALIDATE_URL
+            validate_timeout: Seconds before a validation request fails, defaults to config.IP_PROXY_VALIDATE_TIMEOUT_SEC
+            validate_concurrency: Proxies validated at the same time
+            low_watermark: A background refill starts when fewer usable proxies are left, defaults to config.IP_PROXY_LOW_WATERMARK
+            refill_ttl_sec: Proxies expiring within this many seconds do not count as usable for the watermark,
+                defaults to config.IP_PROXY_REFILL_TTL_SEC
+            reputation: Request outcomes of the provider's proxies recorded by the clients, used to rank proxies
         """
-        self.valid_ip_url = "https://echo.apifox.cn/"  # URL to validate if IP is valid
+        self.valid_ip_url = valid_ip_url or config.IP_PROXY_VALIDATE_URL  # URL to validate if IP is valid
+        self.validate_timeout = validate_timeout or config.IP_PROXY_VALIDATE_TIMEOUT_SEC
         self.ip_pool_count = ip_pool_count
         self.enable_validate_ip = enable_validate_ip
         self.proxy_list: List[IpInfoModel] = []
         self.ip_provider: ProxyProvider = ip_provider
         self.current_proxy: IpInfoModel | None = None  # Currently used proxy
+        self.health: Dict[str, ProxyHealth] = {}
+        self._validate_semaphore = asyncio.Semaphore(max(validate_concurrency, 1))
+        # loading the CA bundle takes ~100ms of event loop time, every validation client shares one context
+        self._ssl_context: Optional[ssl.SSLContext] = None
+        self._health_check_task: Optional[asyncio.Task] = None
+        self.low_watermark = config.IP_PROXY_LOW_WATERMARK if low_watermark is None else low_watermark
+        self.refill_ttl_sec = config.IP_PROXY_REFILL_TTL_SEC if refill_ttl_sec is None else refill_ttl_sec
+        # every proxy obtained from the provider, listed or handed out, to skip duplicates on refill
+        self._known: Dict[str, IpInfoModel] = {}
+        # proxies added by a background refill and not handed out yet
+        self._refilled_keys: Set[str] = set()
+        self._refill_task: Optional[asyncio.Task] = None
+        self.refill_latencies_ms: Deque[float] = deque(maxlen=100)
+        self.refill_failures = 0
+        # get_proxy calls that found no usable proxy and waited for the provider
+        self.stalls = 0
+        # get_proxy calls served by a proxy a background refill added
+        self.stalls_avoided = 0
+        self.reputation = reputation or ProxyReputationStore(
+            getattr(ip_provider, "proxy_brand_name", ip_provider.__class__.__name__)
+        )
 
     async def load_proxies(self) -> None:
         """
-        Load IP proxies
+        Load IP proxies, and validate them all concurrently when validation is enabled
         Returns:
 
         """
         self.proxy_list = await self.ip_provider.get_proxy(self.ip_pool_count)
+        self._remember(self.proxy_list)
+        if self.enable_validate_ip:
+            await self.validate_all()
+
+    async def validate_all(self, proxies: Optional[List[IpInfoModel]] = None) -> None:
+        """
+        Validate proxies concurrently and update their health
+        :param proxies: defaults to every proxy in the pool
+        :return:
+        """
+        proxies = self.proxy_list if proxies is None else proxies
+        await asyncio.gather(*[self._is_valid_proxy(proxy) for proxy in list(proxies)])
 
     async def _is_valid_proxy(self, proxy: IpInfoModel) -> bool:
         """
-        Validate if proxy IP is valid
+        Validate if proxy IP is valid, the result and latency are recorded in self.health
         :param proxy:
         :return:
         """
+        health = self.health.setdefault(proxy_key(proxy), ProxyHealth())
+        async with self._validate_semaphore:
+            start = time.perf_counter()
+            try:
+                if self._ssl_context is None:
+                    self._ssl_context = ssl.create_default_context(cafile=certifi.where())
+                async with httpx.AsyncClient(
+                    proxy=format_proxy_url(proxy), timeout=self.validate_timeout, verify=self._ssl_context
+                ) as client:
+                    response = await client.get(self.valid_ip_url)
+                ok = response.status_code == 200
+            except Exception as e:
+                utils.logger.info(f"[ProxyIpPool._is_valid_proxy] testing {proxy.ip} err: {e!r}")
+                ok = False
+        latency_ms = (time.perf_counter() - start) * 1000
+        health.record(ok, latency_ms)
         utils.logger.info(
-            f"[ProxyIpPool._is_valid_proxy] testing {proxy.ip} is it valid "
+            f"[ProxyIpPool._is_valid_proxy] {proxy.ip}:{proxy.port} valid: {ok}, latency: {latency_ms:.0f}ms"
         )
-        try:
-            # httpx 0.28.1 requires passing proxy URL string directly, not a dictionary
-            if proxy.user and proxy.password:
-                proxy_url = f"http://{proxy.user}:{proxy.password}@{proxy.ip}:{proxy.port}"
-            else:
-                proxy_url = f"http://{proxy.ip}:{proxy.port}"
-
-            async with httpx.AsyncClient(proxy=proxy_url) as client:
-                response = await client.get(self.valid_ip_url)
-            if response.status_code == 200:
-                return True
-            else:
-                return False
-        except Exception as e:
-            utils.logger.info(
-                f"[ProxyIpPool._is_valid_proxy] testing {proxy.ip} err: {e}"
-            )
-            raise e
+        return ok
+
+    def get_health(self, proxy: IpInfoModel) -> ProxyHealth:
+        return self.health.get(proxy_key(proxy)) or ProxyHealth()
+
+    def get_score(self, proxy: IpInfoModel) -> float:
+        """Validation score of the proxy weighted by the reputation of the proxy, its IP range or provider"""
+        return self.get_health(proxy).score * self.reputation.score(proxy_key(proxy))
+
+    def _usable_proxies(self) -> List[IpInfoModel]:
+        return [proxy for proxy in self.proxy_list if self.get_health(proxy).healthy and not proxy.is_expired()]
 
     @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
     async def get_proxy(self) -> IpInfoModel:
         """
-        Randomly extract a proxy IP from the proxy pool
+        Extract the healthy proxy IP with the best validation and reputation score from the proxy pool
         :return:
         """
-        if len(self.proxy_list) == 0:
-            await self._reload_proxies()
+        if not self._usable_proxies():
+            self.stalls += 1
+            if self._refill_task is not None:
+                await asyncio.shield(self._refill_task)
+            if not self._usable_proxies():
+                await self._reload_proxies()
 
-        proxy = random.choice(self.proxy_list)
+        usable_proxies = self._usable_proxies()
+        if not usable_proxies:
+            raise Exception("[ProxyIpPool.get_proxy] no valid ip in the pool and again get it")
+        proxy = max(usable_proxies, key=self.get_score)
         self.proxy_list.remove(proxy)  # Remove an IP once extracted
-        if self.enable_validate_ip:
-            if not await self._is_valid_proxy(proxy):
-                raise Exception(
-                    "[ProxyIpPool.get_proxy] current ip invalid and again get it"
-                )
         self.current_proxy = proxy  # Save currently used proxy
+        if proxy_key(proxy) in self._refilled_keys:
+            self._refilled_keys.discard(proxy_key(proxy))
+            self.stalls_avoided += 1
+        self._schedule_refill_if_low()
         return proxy
 
+    def needs_refill(self) -> bool:
+        """
+        Fewer than low_watermark usable proxies are left that stay valid for refill_ttl_sec
+        """
+        lasting = [proxy for proxy in self._usable_proxies() if not proxy.is_expired(self.refill_ttl_sec)]
+        return len(lasting) < self.low_watermark
+
+    def _schedule_refill_if_low(self) -> None:
+        if self._refill_task is None and self.low_watermark > 0 and self.needs_refill():
+            self._refill_task = asyncio.create_task(self._refill())
+
+    async def _refill(self) -> None:
+        """
+        Fetch ip_pool_count more proxies from the provider in the background and add the new ones to the pool
+        """
+        start = time.perf_counter()
+        try:
+            self._known = {key: proxy for key, proxy in self._known.items() if not proxy.is_expired()}
+            # providers return their cached IPs first, ask for more than are known so new ones are fetched
+            fetched = await self.ip_provider.get_proxy(len(self._known) + self.ip_pool_count)
+            new_proxies = [proxy for proxy in fetched if proxy_key(proxy) not in self._known]
+            self._remember(new_proxies)
+            if self.enable_validate_ip:
+                await self.validate_all(new_proxies)
+            self.proxy_list.extend(new_proxies)
+            self._refilled_keys.update(proxy_key(proxy) for proxy in new_proxies)
+            latency_ms = (time.perf_counter() - start) * 1000
+            self.refill_latencies_ms.append(latency_ms)
+            utils.logger.info(
+                f"[ProxyIpPool._refill] added {len(new_proxies)} proxies in {latency_ms:.0f}ms, "
+                f"usable: {len(self._usable_proxies())}"
+            )
+        except Exception as e:
+            self.refill_failures += 1
+            utils.logger.error(f"[ProxyIpPool._refill] refill proxies err: {e!r}")
+        finally:
+            self._refill_task = None
+
+    def _remember(self, proxies: List[IpInfoModel]) -> None:
+        for proxy in proxies:
+            self._known[proxy_key(proxy)] = proxy
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = self.refill_latencies_ms
+        return {
+            "usable": len(self._usable_proxies()),
+            "refills": len(latencies),
+            "refill_failures": self.refill_failures,
+            "refill_avg_ms": round(sum(latencies) / len(latencies), 1) if latencies else 0.0,
+            "refill_max_ms": round(max(latencies), 1) if latencies else 0.0,
+            "stalls": self.stalls,
+            "stalls_avoided": self.stalls_avoided,
+        }
+
     def is_current_proxy_expired(self, buffer_seconds: int = 30) -> bool:
         """
         Check if current proxy has expired
@@ -140,6 +317,38 @@ class ProxyIpPool:
             return await self.get_proxy()
         return self.current_proxy
 
+    def start_health_check(self, interval: float) -> None:
+        """
+        Re-validate the idle proxies every interval seconds in the background
+        :param interval:
+        :return:
+        """
+        if self.enable_validate_ip and interval > 0 and self._health_check_task is None:
+            self._health_check_task = asyncio.create_task(self._health_check_loop(interval))
+
+    async def _health_check_loop(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            # expired proxies can never be used again
+            self.proxy_list = [proxy for proxy in self.proxy_list if not proxy.is_expired()]
+            try:
+                await self.validate_all()
+            except Exception as e:
+                utils.logger.error(f"[ProxyIpPool._health_check_loop] validate proxies err: {e!r}")
+            # proxies that failed the check or are about to expire may have taken the pool under the watermark
+            self._schedule_refill_if_low()
+            await self.reputation.save()
+
+    async def close(self) -> None:
+        """Stop the health check and the refill, and save the reputation, closing twice is harmless"""
+        tasks = [task for task in (self._health_check_task, self._refill_task) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._health_check_task = None
+        self._refill_task = None
+        await self.reputation.save()
+
     async def _reload_proxies(self):
         """
         Reload proxy pool
@@ -167,7 +376,9 @@ async def create_ip_pool(ip_pool_count: int, enable_validate_ip: bool) -> ProxyI
         enable_validate_ip=enable_validate_ip,
         ip_provider=IpProxyProvider.get(config.IP_PROXY_PROVIDER_NAME),
     )
+    await pool.reputation.load()
     await pool.load_proxies()
+    pool.start_health_check(config.IP_PROXY_HEALTH_CHECK_INTERVAL_SEC)
     return pool
 
 
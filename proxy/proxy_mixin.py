@@ -23,13 +23,52 @@
 # @Time    : 2025/11/25
 # @Desc    : Auto-refresh proxy Mixin class for use by various platform clients
 
-from typing import TYPE_CHECKING, Optional
+import functools
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, AsyncIterator, List, Optional
 
+import httpx
+
+import config
 from tools import utils
+from tools.http_replay import create_async_client
+
+from .proxy_reputation import proxy_key_of_url
+from .proxy_shards import ProxyShardSet, last_lease
 
 if TYPE_CHECKING:
     from proxy.proxy_ip_pool import ProxyIpPool
 
+# proxies the current track_proxy_outcome call sent its requests through
+_tracked_proxy_keys: ContextVar[Optional[List[str]]] = ContextVar("tracked_proxy_keys", default=None)
+
+
+def track_proxy_outcome(func):
+    """
+    Decorator of a client's request method: the proxy it went through is credited with a success only
+    when the method returns, i.e. after the status and business checks of the response passed.
+    Put it under the resilience retry decorator so that every attempt counts
+    """
+
+    @functools.wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        keys: List[str] = []
+        token = _tracked_proxy_keys.set(keys)
+        start = time.perf_counter()
+        ok = False
+        try:
+            result = await func(self, *args, **kwargs)
+            ok = True
+            return result
+        finally:
+            _tracked_proxy_keys.reset(token)
+            if keys and self._proxy_ip_pool is not None:
+                self._proxy_ip_pool.reputation.record_request(keys[-1], ok, (time.perf_counter() - start) * 1000)
+
+    return wrapper
+
 
 class ProxyRefreshMixin:
     """
@@ -39,12 +78,17 @@ class ProxyRefreshMixin:
     1. Let client class inherit this Mixin
     2. Call init_proxy_pool(proxy_ip_pool) in client's __init__
     3. Call await _refresh_proxy_if_expired() before each request method call
+    4. Send requests with `async with self._proxy_http_client() as client`, with IP_PROXY_SHARD_NUM > 1
+       they are spread over several leased proxies. Decorate the request method with track_proxy_outcome
+       so that its outcome and latency count towards the proxy's reputation, call _record_proxy_captcha()
+       when a response is a captcha
 
     Requirements:
     - client class must have self.proxy attribute to store current proxy URL
     """
 
     _proxy_ip_pool: Optional["ProxyIpPool"] = None
+    _proxy_shards: Optional[ProxyShardSet] = None
 
     def init_proxy_pool(self, proxy_ip_pool: Optional["ProxyIpPool"]) -> None:
         """
@@ -53,13 +97,59 @@ class ProxyRefreshMixin:
             proxy_ip_pool: Proxy IP pool instance
         """
         self._proxy_ip_pool = proxy_ip_pool
+        if proxy_ip_pool is not None and config.IP_PROXY_SHARD_NUM > 1:
+            self._proxy_shards = ProxyShardSet(
+                proxy_ip_pool,
+                size=config.IP_PROXY_SHARD_NUM,
+                strategy=config.IP_PROXY_SHARD_STRATEGY,
+                min_interval=config.IP_PROXY_SHARD_MIN_INTERVAL_SEC,
+            )
+
+    @asynccontextmanager
+    async def _proxy_http_client(self) -> AsyncIterator[httpx.AsyncClient]:
+        """
+        httpx client for one request: the pooled client of a leased proxy when sharding is enabled,
+        otherwise a new client on self.proxy
+        """
+        if self._proxy_shards is None:
+            async with create_async_client(proxy=self.proxy) as client:
+                self._note_tracked_proxy(proxy_key_of_url(self.proxy) if self.proxy else None)
+                yield client
+            return
+        async with self._proxy_shards.lease() as lease:
+            self._note_tracked_proxy(lease.key)
+            yield lease.client
+
+    @staticmethod
+    def _note_tracked_proxy(key: Optional[str]) -> None:
+        keys = _tracked_proxy_keys.get()
+        if keys is not None and key is not None:
+            keys.append(key)
+
+    def _last_proxy_key(self) -> Optional[str]:
+        """ip:port of the proxy the current task sent its last request through"""
+        if self._proxy_shards is not None:
+            lease = last_lease()
+            return lease.key if lease is not None else None
+        return proxy_key_of_url(self.proxy) if self.proxy else None
+
+    def _record_proxy_captcha(self) -> None:
+        key = self._last_proxy_key()
+        if self._proxy_ip_pool is not None and key is not None:
+            self._proxy_ip_pool.reputation.record_captcha(key)
+
+    async def close_proxy_shards(self) -> None:
+        if self._proxy_shards is not None:
+            utils.logger.info(f"[{self.__class__.__name__}.close_proxy_shards] proxy shards stats: {self._proxy_shards.stats()}")
+            await self._proxy_shards.close()
 
     async def _refresh_proxy_if_expired(self) -> None:
         """
         Check if proxy has expired, automatically refresh if so
         Call this method before each request to ensure proxy is valid
         """
-        if self._proxy_ip_pool is None:
+        # with shards every lease renews its own proxy, the single client proxy is not used
+        if self._proxy_ip_pool is None or self._proxy_shards is not None:
             return
 
         if self._proxy_ip_pool.is_current_proxy_expired():
@@ -75,3 +165,27 @@ class ProxyRefreshMixin:
             utils.logger.info(
                 f"[{self.__class__.__name__}._refresh_proxy_if_expired] New proxy: {new_proxy.ip}:{new_proxy.port}"
             )
+
+    async def rotate_proxy(self) -> None:
+        """
+        Switch to another proxy from the pool, called by the retry policy when the current IP is blocked
+        """
+        if self._proxy_ip_pool is None:
+            return
+        blocked_key = self._last_proxy_key()
+        if blocked_key is not None:
+            self._proxy_ip_pool.reputation.record_ip_block(blocked_key)
+        # only the proxy that sent the blocked request is replaced, the other leases keep working.
+        # With no lease to ban (e.g. the proxy was already replaced) a new single proxy would never be used
+        if self._proxy_shards is not None:
+            await self._proxy_shards.ban_last_lease()
+            return
+
+        new_proxy = await self._proxy_ip_pool.get_proxy()
+        if new_proxy.user and new_proxy.password:
+            self.proxy = f"http://{new_proxy.user}:{new_proxy.password}@{new_proxy.ip}:{new_proxy.port}"
+        else:
+            self.proxy = f"http://{new_proxy.ip}:{new_proxy.port}"
+        utils.logger.info(
+            f"[{self.__class__.__name__}.rotate_proxy] Switched to proxy: {new_proxy.ip}:{new_proxy.port}"
+        )
@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/proxy/proxy_shards.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# @Desc    : Spread the requests of one client over several leased proxies
+#
+# Each lease owns one keep-alive httpx client, so connections to the platform are reused per proxy.
+# A request picks its lease by strategy:
+#   round_robin  - take the leases in turn
+#   least_loaded - take the lease with the fewest requests in flight
+#   sticky       - the same shard key (e.g. a note id) always goes through the same lease,
+#                  requests without a key fall back to round robin
+# A banned or expired lease is replaced in place by a new proxy from the pool, the other leases keep
+# their connections, rate limit slots and sticky keys.
+
+import asyncio
+import contextvars
+import time
+import zlib
+from contextlib import asynccontextmanager, contextmanager
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, Iterator, List, Optional
+
+import httpx
+
+from tools import utils
+from tools.http_replay import create_async_client
+
+from .proxy_ip_pool import format_proxy_url, proxy_key
+from .types import IpInfoModel
+
+if TYPE_CHECKING:
+    from .proxy_ip_pool import ProxyIpPool
+
+SHARD_STRATEGIES = ("round_robin", "least_loaded", "sticky")
+
+# shard key of the requests sent by the current task, see proxy_shard_key
+_shard_key_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("proxy_shard_key", default=None)
+# lease of the last request sent by the current task, the retry policy bans this one when the request was blocked
+_last_lease_var: contextvars.ContextVar[Optional["ProxyLease"]] = contextvars.ContextVar("last_proxy_lease", default=None)
+
+
+@contextmanager
+def proxy_shard_key(key: Optional[str]) -> Iterator[None]:
+    """
+    Send the requests made inside this block through the lease of key when the strategy is sticky
+    :param key: Content id, such as a note id
+    :return:
+    """
+    token = _shard_key_var.set(key)
+    try:
+        yield
+    finally:
+        _shard_key_var.reset(token)
+
+
+def last_lease() -> Optional["ProxyLease"]:
+    """Lease of the last request sent by the current task"""
+    return _last_lease_var.get()
+
+
+class ProxyLease:
+    """One proxy taken from the pool, with its own pooled connections and rate limit"""
+
+    def __init__(self, proxy: IpInfoModel, min_interval: float = 0.0):
+        self.proxy = proxy
+        self.key = proxy_key(proxy)
+        self.url = format_proxy_url(proxy)
+        self.min_interval = min_interval
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.banned = False
+        self._next_slot = 0.0
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = create_async_client(proxy=self.url)
+        return self._client
+
+    def is_expired(self, buffer_seconds: int = 30) -> bool:
+        return self.proxy.is_expired(buffer_seconds)
+
+    async def wait_turn(self) -> None:
+        """Space the requests of this proxy at least min_interval seconds apart"""
+        if self.min_interval <= 0:
+            return
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.min_interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def close(self) -> None:
+        if self._client is not None:
+            client, self._client = self._client, None
+            await client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "proxy": self.key,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "failures": self.failures,
+        }
+
+
+class ProxyShardSet:
+    """Set of proxies leased from a ProxyIpPool by one client"""
+
+    def __init__(
+        self,
+        pool: "ProxyIpPool",
+        size: int,
+        strategy: str = "round_robin",
+        min_interval: float = 0.0,
+    ):
+        """
+        :param pool: Pool the proxies are leased from
+        :param size: Number of proxies used at the same time
+        :param strategy: round_robin | least_loaded | sticky
+        :param min_interval: Minimum seconds between two requests through the same proxy, 0 means no limit
+        """
+        if strategy not in SHARD_STRATEGIES:
+            raise ValueError(f"[ProxyShardSet] unknown strategy {strategy}, expected one of {SHARD_STRATEGIES}")
+        self.pool = pool
+        self.size = max(size, 1)
+        self.strategy = strategy
+        self.min_interval = min_interval
+        self.leases: List[ProxyLease] = []
+        self.bans = 0
+        self.replacements = 0
+        self._round_robin = 0
+        self._lock = asyncio.Lock()
+        self._retired: List[ProxyLease] = []
+
+    async def start(self) -> None:
+        """Lease the missing proxies, a shortage of the pool leaves the set smaller"""
+        async with self._lock:
+            while len(self.leases) < self.size:
+                proxy = await self._lease_proxy()
+                if proxy is None:
+                    break
+                self.leases.append(ProxyLease(proxy, self.min_interval))
+            if not self.leases:
+                raise Exception("[ProxyShardSet.start] no proxy could be leased from the pool")
+
+    async def pick(self, shard_key: Optional[str] = None) -> ProxyLease:
+        """
+        Choose the lease of the next request, expired leases are replaced first
+        :param shard_key: Sticky key, defaults to the key set with proxy_shard_key
+        :return:
+        """
+        if not self.leases:
+            await self.start()
+        for lease in [lease for lease in self.leases if lease.is_expired()]:
+            await self.replace(lease, reason="expired")
+
+        if not self.leases:
+            raise Exception("[ProxyShardSet.pick] every leased proxy expired and the pool has no more")
+        shard_key = shard_key if shard_key is not None else _shard_key_var.get()
+        if self.strategy == "sticky" and shard_key is not None:
+            return self.leases[zlib.crc32(shard_key.encode("utf-8")) % len(self.leases)]
+        if self.strategy == "least_loaded":
+            return min(self.leases, key=lambda lease: (lease.in_flight, lease.requests))
+        lease = self.leases[self._round_robin % len(self.leases)]
+        self._round_robin += 1
+        return lease
+
+    @asynccontextmanager
+    async def lease(self, shard_key: Optional[str] = None) -> AsyncIterator[ProxyLease]:
+        """
+        Hold a lease for one request
+        :param shard_key: Sticky key, defaults to the key set with proxy_shard_key
+        :return:
+        """
+        lease = await self.pick(shard_key)
+        await lease.wait_turn()
+        lease.in_flight += 1
+        lease.requests += 1
+        _last_lease_var.set(lease)
+        try:
+            yield lease
+        except Exception:
+            lease.failures += 1
+            raise
+        finally:
+            lease.in_flight -= 1
+            if lease.banned and lease.in_flight == 0:
+                await self._close_retired(lease)
+
+    async def ban_last_lease(self) -> bool:
+        """
+        Replace the lease of the last request sent by the current task, the other leases are untouched
+        :return: False when the current task has not sent a request yet
+        """
+        lease = _last_lease_var.get()
+        if lease is None:
+            return False
+        _last_lease_var.set(None)
+        if not lease.banned:
+            self.bans += 1
+            await self.replace(lease, reason="banned")
+        return True
+
+    async def replace(self, lease: ProxyLease, reason: str) -> None:
+        """
+        Swap lease for a new proxy at the same position, so the sticky keys of the other leases keep their proxy
+        :param lease:
+        :param reason: Logged reason
+        :return:
+        """
+        async with self._lock:
+            if lease.banned or lease not in self.leases:
+                return
+            lease.banned = True
+            index = self.leases.index(lease)
+            proxy = await self._lease_proxy()
+            if proxy is None:
+                del self.leases[index]
+            else:
+                self.leases[index] = ProxyLease(proxy, self.min_interval)
+                self.replacements += 1
+            utils.logger.info(
+                f"[ProxyShardSet.replace] {reason} proxy {lease.key} replaced by "
+                f"{proxy_key(proxy) if proxy else 'nothing'}, leases: {len(self.leases)}"
+            )
+        if lease.in_flight == 0:
+            await self._close_retired(lease)
+        else:
+            self._retired.append(lease)
+
+    async def _lease_proxy(self) -> Optional[IpInfoModel]:
+        try:
+            return await self.pool.get_proxy()
+        except Exception as e:
+            utils.logger.error(f"[ProxyShardSet._lease_proxy] get proxy from pool err: {e!r}")
+            return None
+
+    async def _close_retired(self, lease: ProxyLease) -> None:
+        if lease in self._retired:
+            self._retired.remove(lease)
+        await lease.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "strategy": self.strategy,
+            "bans": self.bans,
+            "replacements": self.replacements,
+            "leases": [lease.stats() for lease in self.leases],
+        }
+
+    async def close(self) -> None:
+        for lease in self.leases + self._retired:
+            await lease.close()
+        self.leases = []
+        self._retired = []
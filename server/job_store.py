@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+"""SQLite store of the crawl task queue of the API server
+
+Every submitted task is a row of crawl_jobs, so the queue, the status and the
+history of the tasks survive restarts of the server. Tasks that were running
+when the server stopped are queued again when it starts.
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+import aiosqlite
+
+from config import db_config
+from server.models import CrawlRequest
+from tools import json_codec, utils
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS crawl_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id TEXT NOT NULL UNIQUE,
+    task_name TEXT,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    platforms TEXT NOT NULL,
+    request TEXT NOT NULL,
+    detail TEXT,
+    error_message TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    submitted_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_crawl_jobs_queue ON crawl_jobs (status, priority DESC, id);
+"""
+
+# recent jobs the queue wait and run time percentiles are computed over
+METRICS_SAMPLE_SIZE = 100
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return round(ordered[min(int(q * len(ordered)), len(ordered) - 1)], 3)
+
+
+def _summary(values: List[float]) -> Dict[str, float]:
+    return {
+        "avg": round(sum(values) / len(values), 3) if values else 0.0,
+        "p50": _percentile(values, 0.5),
+        "p95": _percentile(values, 0.95),
+        "max": round(max(values), 3) if values else 0.0,
+    }
+
+
+class JobStore:
+    """Persistent crawl task queue, ordered by priority (higher first) and then by submission"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        Args:
+            db_path: SQLite file, defaults to db_config.SERVER_JOB_DB_PATH
+        """
+        self.db_path = db_path or db_config.SERVER_JOB_DB_PATH
+        self._db: Optional[aiosqlite.Connection] = None
+        # select and update of a claim must not interleave with another claim
+        self._claim_lock = asyncio.Lock()
+
+    async def open(self):
+        """Create the table and queue again the tasks a stopped server left running"""
+        if self.db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._db = await aiosqlite.connect(self.db_path)
+        self._db.row_factory = aiosqlite.Row
+        await self._db.executescript(_SCHEMA)
+        cursor = await self._db.execute(
+            "UPDATE crawl_jobs SET status = ?, started_at = NULL WHERE status = ?", (JOB_QUEUED, JOB_RUNNING)
+        )
+        await self._db.commit()
+        if cursor.rowcount:
+            utils.logger.info(f"[JobStore.open] {cursor.rowcount} interrupted tasks queued again")
+
+    async def close(self):
+        if self._db is not None:
+            db, self._db = self._db, None
+            await db.close()
+
+    async def add(self, task_id: str, request: CrawlRequest, priority: int = 0) -> Dict[str, Any]:
+        """Queue a task
+
+        Raises:
+            ValueError: If a task with this ID already exists
+        """
+        try:
+            await self._db.execute(
+                "INSERT INTO crawl_jobs (task_id, task_name, priority, status, platforms, request, submitted_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    task_id,
+                    request.task_name,
+                    priority,
+                    JOB_QUEUED,
+                    json_codec.dumps(request.platforms),
+                    json_codec.dumps(request.model_dump()),
+                    time.time(),
+                ),
+            )
+            await self._db.commit()
+        except aiosqlite.IntegrityError:
+            raise ValueError(f"Task {task_id} already exists") from None
+        return await self.get(task_id)
+
+    async def claim_next(self, busy_platforms: Iterable[str] = ()) -> Optional[Dict[str, Any]]:
+        """Mark the first queued task none of whose platforms is busy as running
+
+        Args:
+            busy_platforms: Platforms crawled by running tasks, they share browser profiles and accounts
+
+        Returns:
+            The claimed task, None when no task can start now
+        """
+        busy = set(busy_platforms)
+        async with self._claim_lock:
+            async with self._db.execute(
+                "SELECT id, platforms FROM crawl_jobs WHERE status = ? ORDER BY priority DESC, id",
+                (JOB_QUEUED,),
+            ) as cursor:
+                rows = await cursor.fetchall()
+            job_id = next((row["id"] for row in rows if busy.isdisjoint(json_codec.loads(row["platforms"]))), None)
+            if job_id is None:
+                return None
+            await self._db.execute(
+                "UPDATE crawl_jobs SET status = ?, started_at = ?, attempts = attempts + 1 WHERE id = ?",
+                (JOB_RUNNING, time.time(), job_id),
+            )
+            await self._db.commit()
+        return await self._get_where("id = ?", job_id)
+
+    async def save_detail(self, task_id: str, detail: Dict[str, Any]):
+        """Persist the progress of a running task"""
+        await self._db.execute(
+            "UPDATE crawl_jobs SET detail = ? WHERE task_id = ?", (json_codec.dumps(detail), task_id)
+        )
+        await self._db.commit()
+
+    async def finish(self, task_id: str, status: str, detail: Dict[str, Any], error_message: Optional[str] = None):
+        await self._db.execute(
+            "UPDATE crawl_jobs SET status = ?, detail = ?, error_message = ?, finished_at = ? WHERE task_id = ?",
+            (status, json_codec.dumps(detail), error_message, time.time(), task_id),
+        )
+        await self._db.commit()
+
+    async def requeue(self, task_id: str):
+        """Put a task interrupted by a shutdown back into the queue"""
+        await self._db.execute(
+            "UPDATE crawl_jobs SET status = ?, started_at = NULL WHERE task_id = ? AND status = ?",
+            (JOB_QUEUED, task_id, JOB_RUNNING),
+        )
+        await self._db.commit()
+
+    async def cancel(self, task_id: str) -> bool:
+        """Cancel a task that has not started yet
+
+        Returns:
+            False if the task does not exist or already started
+        """
+        cursor = await self._db.execute(
+            "UPDATE crawl_jobs SET status = ?, finished_at = ? WHERE task_id = ? AND status = ?",
+            (JOB_CANCELLED, time.time(), task_id, JOB_QUEUED),
+        )
+        await self._db.commit()
+        return cursor.rowcount > 0
+
+    async def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        return await self._get_where("task_id = ?", task_id)
+
+    async def list_jobs(self, status: Optional[str] = None, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
+        """Tasks newest first, optionally of one status"""
+        where, params = ("WHERE status = ?", (status,)) if status else ("", ())
+        async with self._db.execute(
+            f"SELECT * FROM crawl_jobs {where} ORDER BY id DESC LIMIT ? OFFSET ?", (*params, limit, offset)
+        ) as cursor:
+            return [self._row_to_job(row) for row in await cursor.fetchall()]
+
+    async def queue_position(self, task_id: str) -> Optional[int]:
+        """1 for the task that is picked next, None if the task is not queued"""
+        job = await self.get(task_id)
+        if job is None or job["status"] != JOB_QUEUED:
+            return None
+        async with self._db.execute(
+            "SELECT COUNT(*) FROM crawl_jobs WHERE status = ? AND (priority > ? OR (priority = ? AND id < ?))",
+            (JOB_QUEUED, job["priority"], job["priority"], job["id"]),
+        ) as cursor:
+            (ahead,) = await cursor.fetchone()
+        return ahead + 1
+
+    async def metrics(self, window_sec: int = 3600) -> Dict[str, Any]:
+        """Queue depth, throughput over the last window_sec and queue wait / run time of recent tasks"""
+        now = time.time()
+        async with self._db.execute("SELECT status, COUNT(*) FROM crawl_jobs GROUP BY status") as cursor:
+            counts = {status: count for status, count in await cursor.fetchall()}
+        async with self._db.execute(
+            "SELECT COUNT(*) FROM crawl_jobs WHERE status IN (?, ?) AND finished_at >= ?",
+            (JOB_COMPLETED, JOB_FAILED, now - window_sec),
+        ) as cursor:
+            (finished,) = await cursor.fetchone()
+        async with self._db.execute(
+            "SELECT started_at - submitted_at FROM crawl_jobs WHERE started_at IS NOT NULL "
+            "ORDER BY started_at DESC LIMIT ?",
+            (METRICS_SAMPLE_SIZE,),
+        ) as cursor:
+            waits = [row[0] for row in await cursor.fetchall()]
+        async with self._db.execute(
+            "SELECT finished_at - started_at FROM crawl_jobs WHERE status IN (?, ?) AND started_at IS NOT NULL "
+            "ORDER BY finished_at DESC LIMIT ?",
+            (JOB_COMPLETED, JOB_FAILED, METRICS_SAMPLE_SIZE),
+        ) as cursor:
+            run_times = [row[0] for row in await cursor.fetchall()]
+        async with self._db.execute(
+            "SELECT MIN(submitted_at) FROM crawl_jobs WHERE status = ?", (JOB_QUEUED,)
+        ) as cursor:
+            (oldest,) = await cursor.fetchone()
+        return {
+            "counts": {status: counts.get(status, 0) for status in (JOB_QUEUED, JOB_RUNNING, JOB_COMPLETED, JOB_FAILED, JOB_CANCELLED)},
+            "window_sec": window_sec,
+            "finished_in_window": finished,
+            "throughput_per_hour": round(finished * 3600 / window_sec, 3),
+            "queue_wait_sec": _summary(waits),
+            "run_sec": _summary(run_times),
+            "oldest_queued_wait_sec": round(now - oldest, 3) if oldest else 0.0,
+        }
+
+    async def _get_where(self, where: str, value: Any) -> Optional[Dict[str, Any]]:
+        async with self._db.execute(f"SELECT * FROM crawl_jobs WHERE {where}", (value,)) as cursor:
+            row = await cursor.fetchone()
+        return self._row_to_job(row) if row else None
+
+    @staticmethod
+    def _row_to_job(row: aiosqlite.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["platforms"] = json_codec.loads(job["platforms"])
+        job["request"] = json_codec.loads(job["request"])
+        job["detail"] = json_codec.loads(job["detail"]) if job["detail"] else {}
+        return job
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 """Pydantic models for MediaCrawler API requests"""
 
+from datetime import datetime
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel, Field
 
@@ -59,6 +60,7 @@ class CrawlRequest(BaseModel):
     # Optional task metadata
     task_id: Optional[str] = Field(None, description="Custom task ID (auto-generated if not provided)")
     task_name: Optional[str] = Field(None, description="Task name for identification")
+    priority: int = Field(0, description="Queued tasks with a higher priority run first")
 
 
 class CrawlResponse(BaseModel):
@@ -68,14 +70,23 @@ class CrawlResponse(BaseModel):
     message: str
     platforms: List[str]
     total_rounds: int
+    queue_position: Optional[int] = None
 
 
 class TaskStatusResponse(BaseModel):
     """Response model for task status query"""
     task_id: str
+    task_name: Optional[str] = None
     status: str
+    priority: int = 0
+    queue_position: Optional[int] = None
     current_round: Optional[int] = None
     current_platform: Optional[str] = None
     total_rounds: int
     progress: float = 0.0
     error_message: Optional[str] = None
+    submitted_at: Optional[datetime] = None
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+    platforms: Dict[str, Any] = Field(default_factory=dict, description="Round and state of every platform")
+    results: List[Dict[str, Any]] = Field(default_factory=list, description="Outcome of every crawled platform round")
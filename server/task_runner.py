@@ -2,25 +2,41 @@
 """Dynamic task runner for MediaCrawler with multi-round scheduling"""
 
 import asyncio
-import copy
 import random
 import uuid
 from datetime import datetime
-from typing import List, Dict, Any, Optional
-from contextvars import Token
+from typing import List, Dict, Any, Optional, Tuple
 
 import config
-from var import crawler_type_var, source_keyword_var
+from config.settings import CrawlerSettings, use_settings
+from var import crawler_type_var
 from main import CrawlerFactory
 from server.models import CrawlRequest, CrawlerConfig
 from server.db_handler import MediaCrawlerDBHandler
+from server.job_store import JOB_FAILED, JOB_QUEUED, JobStore
 from tools import utils
+from tools.resilience import log_resilience_summary, resilience_run
+
+
+# seconds a platform rests between two rounds of a task, each platform rests on its own timer
+ROUND_COOLDOWN_SEC = (300, 600)
 
 
 class TaskStatus:
     """Task status tracker"""
-    def __init__(self, task_id: str, total_rounds: int):
+    def __init__(
+        self,
+        task_id: str,
+        total_rounds: int,
+        platforms: Optional[List[str]] = None,
+        task_name: Optional[str] = None,
+        priority: int = 0,
+        submitted_at: Optional[datetime] = None,
+    ):
         self.task_id = task_id
+        self.task_name = task_name
+        self.priority = priority
+        self.submitted_at = submitted_at
         self.total_rounds = total_rounds
         self.current_round = 0
         self.current_platform = None
@@ -29,114 +45,83 @@ class TaskStatus:
         self.error_message = None
         self.start_time = None
         self.end_time = None
+        # platform -> {"round": round being crawled or rested after, "state": crawling/cooling_down/done}
+        self.platforms: Dict[str, Dict[str, Any]] = {
+            platform: {"round": 0, "state": "pending"} for platform in platforms or []
+        }
+        # one entry per crawled (platform, round): keywords, success, saved posts, error
+        self.results: List[Dict[str, Any]] = []
+
+    def set_platform_state(self, platform: str, round_idx: int, state: str):
+        """Update one platform, the task-level round and progress are derived from all of them"""
+        self.platforms[platform] = {"round": round_idx, "state": state}
+        crawling = [name for name, item in self.platforms.items() if item["state"] == "crawling"]
+        self.current_platform = ",".join(crawling) or None
+        self.current_round = min(item["round"] for item in self.platforms.values())
+        finished = sum(
+            item["round"] if item["state"] in ("cooling_down", "done") else item["round"] - 1
+            for item in self.platforms.values()
+            if item["round"] > 0
+        )
+        self.progress = finished / (self.total_rounds * len(self.platforms)) * 100
 
     def to_dict(self) -> Dict[str, Any]:
         return {
             "task_id": self.task_id,
+            "task_name": self.task_name,
             "status": self.status,
+            "priority": self.priority,
             "current_round": self.current_round,
             "current_platform": self.current_platform,
             "total_rounds": self.total_rounds,
             "progress": self.progress,
             "error_message": self.error_message,
+            "submitted_at": self.submitted_at,
             "start_time": self.start_time,
-            "end_time": self.end_time
+            "end_time": self.end_time,
+            "platforms": self.platforms,
+            "results": self.results,
         }
 
+    def snapshot(self) -> Dict[str, Any]:
+        """Progress fields persisted in the job store"""
+        return {
+            "current_round": self.current_round,
+            "current_platform": self.current_platform,
+            "progress": self.progress,
+            "platforms": self.platforms,
+            "results": self.results,
+        }
 
-class ConfigInjector:
-    """Dynamic configuration injector for MediaCrawler"""
 
-    @staticmethod
-    def inject_config(platform: str, keywords: List[str], crawler_config: CrawlerConfig) -> Dict[str, Token]:
-        """Inject configuration into global config module
-        Returns a dict of tokens for restoring original values
-        """
-        tokens = {}
-
-        # Store original values and set new ones using contextvars
-        # Note: We modify the config module directly
-        original_platform = config.PLATFORM
-        original_keywords = config.KEYWORDS
-        original_login_type = config.LOGIN_TYPE
-        original_crawler_type = config.CRAWLER_TYPE
-        original_headless = config.HEADLESS
-        original_enable_cdp = config.ENABLE_CDP_MODE
-        original_enable_proxy = config.ENABLE_IP_PROXY
-        original_max_notes = config.CRAWLER_MAX_NOTES_COUNT
-        original_max_comments = config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES
-        original_enable_comments = config.ENABLE_GET_COMMENTS
-        original_enable_sub_comments = config.ENABLE_GET_SUB_COMMENTS
-        original_sleep = config.CRAWLER_MAX_SLEEP_SEC
-
-        # Set new values
-        config.PLATFORM = platform
-        config.KEYWORDS = ",".join(keywords)
-        config.LOGIN_TYPE = crawler_config.login_type
-        config.CRAWLER_TYPE = crawler_config.crawler_type
-        config.HEADLESS = crawler_config.headless
-        config.ENABLE_CDP_MODE = crawler_config.enable_cdp_mode
-        config.ENABLE_IP_PROXY = crawler_config.enable_proxy
-        config.IP_PROXY_POOL_COUNT = crawler_config.ip_proxy_pool_count
-        config.CRAWLER_MAX_NOTES_COUNT = crawler_config.max_notes_count
-        config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES = crawler_config.max_comments_per_note
-        config.ENABLE_GET_COMMENTS = crawler_config.enable_get_comments
-        config.ENABLE_GET_SUB_COMMENTS = crawler_config.enable_get_sub_comments
-        config.CRAWLER_MAX_SLEEP_SEC = crawler_config.max_sleep_sec
-
-        # Store for restoration
-        tokens["original_platform"] = original_platform
-        tokens["original_keywords"] = original_keywords
-        tokens["original_login_type"] = original_login_type
-        tokens["original_crawler_type"] = original_crawler_type
-        tokens["original_headless"] = original_headless
-        tokens["original_enable_cdp"] = original_enable_cdp
-        tokens["original_enable_proxy"] = original_enable_proxy
-        tokens["original_max_notes"] = original_max_notes
-        tokens["original_max_comments"] = original_max_comments
-        tokens["original_enable_comments"] = original_enable_comments
-        tokens["original_enable_sub_comments"] = original_enable_sub_comments
-        tokens["original_sleep"] = original_sleep
-
-        # Set contextvars
-        tokens["crawler_type_token"] = crawler_type_var.set(crawler_config.crawler_type)
-
-        # Handle sort_type for different platforms
-        if hasattr(config, 'SORT_TYPE'):
-            tokens["original_sort_type"] = config.SORT_TYPE
-            config.SORT_TYPE = crawler_config.sort_type
-
-        utils.logger.info(f"[ConfigInjector] Config injected for {platform}: keywords={keywords}")
-
-        return tokens
+class ConfigInjector:
+    """Builds the crawler settings of one platform run of a task"""
 
     @staticmethod
-    def restore_config(tokens: Dict[str, Token]):
-        """Restore original configuration values"""
-        if not tokens:
-            return
-
-        config.PLATFORM = tokens.get("original_platform", "xhs")
-        config.KEYWORDS = tokens.get("original_keywords", "")
-        config.LOGIN_TYPE = tokens.get("original_login_type", "qrcode")
-        config.CRAWLER_TYPE = tokens.get("original_crawler_type", "search")
-        config.HEADLESS = tokens.get("original_headless", False)
-        config.ENABLE_CDP_MODE = tokens.get("original_enable_cdp", True)
-        config.ENABLE_IP_PROXY = tokens.get("original_enable_proxy", False)
-        config.CRAWLER_MAX_NOTES_COUNT = tokens.get("original_max_notes", 15)
-        config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES = tokens.get("original_max_comments", 10)
-        config.ENABLE_GET_COMMENTS = tokens.get("original_enable_comments", True)
-        config.ENABLE_GET_SUB_COMMENTS = tokens.get("original_enable_sub_comments", False)
-        config.CRAWLER_MAX_SLEEP_SEC = tokens.get("original_sleep", 2)
+    def build_settings(platform: str, keywords: List[str], crawler_config: CrawlerConfig) -> CrawlerSettings:
+        """Snapshot of config with the request values applied
 
-        if "original_sort_type" in tokens:
-            config.SORT_TYPE = tokens["original_sort_type"]
-
-        # Reset contextvar
-        if "crawler_type_token" in tokens:
-            crawler_type_var.reset(tokens["crawler_type_token"])
-
-        utils.logger.info("[ConfigInjector] Config restored to original values")
+        The config module itself is left untouched, so several runs can crawl
+        with different settings in one process
+        """
+        settings = CrawlerSettings.from_config(
+            PLATFORM=platform,
+            KEYWORDS=",".join(keywords),
+            LOGIN_TYPE=crawler_config.login_type,
+            CRAWLER_TYPE=crawler_config.crawler_type,
+            HEADLESS=crawler_config.headless,
+            ENABLE_CDP_MODE=crawler_config.enable_cdp_mode,
+            ENABLE_IP_PROXY=crawler_config.enable_proxy,
+            IP_PROXY_POOL_COUNT=crawler_config.ip_proxy_pool_count,
+            CRAWLER_MAX_NOTES_COUNT=crawler_config.max_notes_count,
+            CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES=crawler_config.max_comments_per_note,
+            ENABLE_GET_COMMENTS=crawler_config.enable_get_comments,
+            ENABLE_GET_SUB_COMMENTS=crawler_config.enable_get_sub_comments,
+            CRAWLER_MAX_SLEEP_SEC=crawler_config.max_sleep_sec,
+            SORT_TYPE=crawler_config.sort_type,
+        )
+        utils.logger.info(f"[ConfigInjector] Settings built for {platform}: keywords={keywords}")
+        return settings
 
 
 class CrawlerWrapper:
@@ -171,8 +156,12 @@ class CrawlerWrapper:
             # This is a bit hacky but allows us to capture data without modifying original code
             self._setup_data_capture()
 
-            # Run the crawler
-            await crawler.start()
+            # Run the crawler, its proxy pool keeps checking and buying proxies until it is closed
+            try:
+                await crawler.start()
+            finally:
+                if getattr(crawler, "ip_proxy_pool", None):
+                    await crawler.ip_proxy_pool.close()
 
             # Cleanup
             if hasattr(crawler, "browser_context"):
@@ -250,39 +239,152 @@ class CrawlerWrapper:
 
 
 class TaskExecutor:
-    """Main task executor for multi-round crawling"""
+    """Job queue executing multi-round crawl tasks
 
-    # Global task lock
-    _lock = asyncio.Lock()
-    _current_task: Optional[TaskStatus] = None
+    Submitted tasks are persisted in a JobStore and picked by priority by
+    config.SERVER_JOB_WORKERS worker slots. A task waits while another running
+    task crawls one of its platforms, as they would share browser profiles and
+    accounts.
+    """
+
+    # seconds an idle worker slot waits before looking at the queue again without being woken up
+    IDLE_POLL_SEC = 5
+
+    _store: Optional[JobStore] = None
+    _workers: List[asyncio.Task] = []
+    _running: Dict[str, TaskStatus] = {}
+    _wakeup: Optional[asyncio.Event] = None
+    # claiming a task and registering it as running must not interleave between worker slots
+    _claim_lock: Optional[asyncio.Lock] = None
 
     @classmethod
-    async def execute_crawl_task(cls, request: CrawlRequest) -> str:
-        """Execute crawl task with multi-round scheduling
+    async def start(cls, workers: Optional[int] = None, store: Optional[JobStore] = None):
+        """Open the job store and start the worker slots
 
-        Returns:
-            task_id: The ID of the started task
+        Args:
+            workers: Tasks run at the same time, defaults to config.SERVER_JOB_WORKERS
+            store: Job store, defaults to the SQLite file of db_config.SERVER_JOB_DB_PATH
         """
-        async with cls._lock:
-            if cls._current_task and cls._current_task.status == "running":
-                raise RuntimeError("Task queue is full. Another task is currently running.")
+        if cls._workers:
+            return
+        cls._store = store or JobStore()
+        await cls._store.open()
+        cls._running = {}
+        cls._wakeup = asyncio.Event()
+        cls._claim_lock = asyncio.Lock()
+        slots = max(workers or config.SERVER_JOB_WORKERS, 1)
+        cls._workers = [asyncio.create_task(cls._worker(slot)) for slot in range(slots)]
+        utils.logger.info(f"[TaskExecutor.start] Job queue started with {slots} worker slots")
 
-            # Generate task ID
-            task_id = request.task_id or str(uuid.uuid4())
-            total_rounds = len(request.keyword_groups)
+    @classmethod
+    async def stop(cls):
+        """Stop the worker slots, running tasks go back to the queue and run again after a restart"""
+        workers, cls._workers = cls._workers, []
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        if cls._store is not None:
+            store, cls._store = cls._store, None
+            await store.close()
 
-            # Create task status
-            task_status = TaskStatus(task_id, total_rounds)
-            cls._current_task = task_status
+    @classmethod
+    async def execute_crawl_task(cls, request: CrawlRequest) -> str:
+        """Queue a multi-round crawl task
 
-        # Start task in background
-        asyncio.create_task(cls._run_task_background(request, task_status))
+        Returns:
+            task_id: The ID of the queued task
 
+        Raises:
+            ValueError: If a task with the requested ID already exists
+        """
+        if cls._store is None:
+            raise RuntimeError("Task queue is not started")
+        task_id = request.task_id or str(uuid.uuid4())
+        await cls._store.add(task_id, request, request.priority)
+        utils.logger.info(f"[TaskExecutor.execute_crawl_task] Task {task_id} queued with priority {request.priority}")
+        cls._wakeup.set()
         return task_id
 
+    @classmethod
+    async def _worker(cls, slot: int):
+        """Run queued tasks one after another, a failing task or store call never stops the slot"""
+        while True:
+            cls._wakeup.clear()
+            try:
+                claimed = await cls._claim_next()
+            except Exception as e:
+                # the store may be unavailable, the slot tries again after the idle wait
+                utils.logger.error(f"[TaskExecutor._worker] Slot {slot} failed to claim a task: {e!r}")
+                claimed = None
+            if claimed is None:
+                try:
+                    await asyncio.wait_for(cls._wakeup.wait(), cls.IDLE_POLL_SEC)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            request, task_status = claimed
+            utils.logger.info(f"[TaskExecutor._worker] Slot {slot} runs task {task_status.task_id}")
+            try:
+                await cls._run_task_background(request, task_status)
+            except asyncio.CancelledError:
+                await cls._store.requeue(task_status.task_id)
+                raise
+            except Exception as e:
+                # _run_task_background records the errors of the crawl, this catches what escapes it
+                utils.logger.error(f"[TaskExecutor._worker] Slot {slot} task {task_status.task_id} failed: {e!r}")
+                task_status.status = JOB_FAILED
+                task_status.error_message = str(e)
+                task_status.end_time = datetime.now()
+            finally:
+                cls._running.pop(task_status.task_id, None)
+            try:
+                await cls._store.finish(
+                    task_status.task_id, task_status.status, task_status.snapshot(), task_status.error_message
+                )
+            except Exception as e:
+                # the task stays running in the store and is queued again when the server restarts
+                utils.logger.error(f"[TaskExecutor._worker] Slot {slot} failed to save task {task_status.task_id}: {e!r}")
+            # the platforms of the task are free again, tasks waiting on them may start
+            cls._wakeup.set()
+
+    @classmethod
+    async def _claim_next(cls) -> Optional[Tuple[CrawlRequest, TaskStatus]]:
+        """Claim the next task that can start now, a claimed task that cannot be loaded is marked failed
+
+        Returns:
+            The request and status of the claimed task, None when no task can start now
+        """
+        async with cls._claim_lock:
+            while True:
+                busy_platforms = {platform for status in cls._running.values() for platform in status.platforms}
+                job = await cls._store.claim_next(busy_platforms)
+                if job is None:
+                    return None
+                try:
+                    request = CrawlRequest(**job["request"])
+                    task_status = TaskStatus(
+                        job["task_id"],
+                        len(request.keyword_groups),
+                        request.platforms,
+                        task_name=job["task_name"],
+                        priority=job["priority"],
+                        submitted_at=datetime.fromtimestamp(job["submitted_at"]),
+                    )
+                except Exception as e:
+                    utils.logger.error(f"[TaskExecutor._claim_next] Task {job['task_id']} cannot be loaded: {e!r}")
+                    await cls._store.finish(job["task_id"], JOB_FAILED, job["detail"], f"Invalid task: {e}")
+                    continue
+                cls._running[task_status.task_id] = task_status
+                return request, task_status
+
     @classmethod
     async def _run_task_background(cls, request: CrawlRequest, task_status: TaskStatus):
-        """Run task in background"""
+        """Run task in background
+
+        Platforms share no rate limits, so each one runs through the rounds on
+        its own and rests on its own timer, while the others keep crawling
+        """
         try:
             task_status.status = "running"
             task_status.start_time = datetime.now()
@@ -293,72 +395,9 @@ class TaskExecutor:
 
             db_handler = MediaCrawlerDBHandler()
 
-            # Multi-round execution
-            for round_idx, keyword_group in enumerate(request.keyword_groups, 1):
-                task_status.current_round = round_idx
-                utils.logger.info(f"=== Round {round_idx}/{task_status.total_rounds} Start ===")
-                utils.logger.info(f"Keywords: {keyword_group}")
-
+            async with asyncio.TaskGroup() as group:
                 for platform in request.platforms:
-                    task_status.current_platform = platform
-                    utils.logger.info(f"--- Processing Platform: {platform} ---")
-
-                    try:
-                        # Inject config
-                        tokens = ConfigInjector.inject_config(
-                            platform=platform,
-                            keywords=keyword_group,
-                            crawler_config=request.config
-                        )
-
-                        # Run crawler
-                        wrapper = CrawlerWrapper(platform)
-                        result = await wrapper.run_with_capture(keyword_group)
-
-                        # Restore config
-                        ConfigInjector.restore_config(tokens)
-
-                        if result["success"]:
-                            # Save to MongoDB
-                            metadata = {
-                                "task_id": task_status.task_id,
-                                "round": round_idx,
-                                "keywords": keyword_group,
-                                "crawl_time": datetime.now()
-                            }
-
-                            saved_count = await db_handler.save_batch(
-                                platform=platform,
-                                posts_data=result["posts"],
-                                comments_dict=result["comments"],
-                                metadata=metadata
-                            )
-
-                            utils.logger.info(f"[Task] Saved {saved_count} posts for {platform}")
-                        else:
-                            utils.logger.error(f"[Task] Platform {platform} failed: {result['error']}")
-
-                        # Create indexes if needed
-                        await db_handler.create_indexes(platform)
-
-                        # Sleep between platforms
-                        if platform != request.platforms[-1]:
-                            sleep_time = random.uniform(60, 120)
-                            utils.logger.info(f"[Task] Sleeping {sleep_time:.1f}s before next platform...")
-                            await asyncio.sleep(sleep_time)
-
-                    except Exception as e:
-                        utils.logger.error(f"[Task] Error processing {platform}: {e}")
-                        ConfigInjector.restore_config({})
-
-                # Update progress
-                task_status.progress = (round_idx / task_status.total_rounds) * 100
-
-                # Sleep between rounds
-                if round_idx < task_status.total_rounds:
-                    sleep_time = random.uniform(300, 600)
-                    utils.logger.info(f"=== Round {round_idx} Completed. Sleeping {sleep_time:.1f}s before next round ===")
-                    await asyncio.sleep(sleep_time)
+                    group.create_task(cls._run_platform_rounds(request, task_status, platform, db_handler))
 
             # Task completed successfully
             task_status.status = "completed"
@@ -372,19 +411,167 @@ class TaskExecutor:
             task_status.end_time = datetime.now()
             utils.logger.error(f"=== Task {task_status.task_id} Failed: {e} ===")
 
-        finally:
-            async with cls._lock:
-                if cls._current_task and cls._current_task.task_id == task_status.task_id:
-                    cls._current_task = None
+    @classmethod
+    async def _run_platform_rounds(
+        cls, request: CrawlRequest, task_status: TaskStatus, platform: str, db_handler: MediaCrawlerDBHandler
+    ):
+        """Crawl every keyword group on one platform, resting between the rounds"""
+        for round_idx, keyword_group in enumerate(request.keyword_groups, 1):
+            task_status.set_platform_state(platform, round_idx, "crawling")
+            await cls._save_progress(task_status)
+            utils.logger.info(f"=== Round {round_idx}/{task_status.total_rounds} Start on {platform} ===")
+            utils.logger.info(f"Keywords: {keyword_group}")
+
+            result = {"platform": platform, "round": round_idx, "keywords": keyword_group}
+            try:
+                saved_count = await cls._crawl_platform_round(
+                    request, task_status, platform, round_idx, keyword_group, db_handler
+                )
+                result.update(success=True, saved=saved_count, error=None)
+            except Exception as e:
+                utils.logger.error(f"[Task] Error processing {platform}: {e}")
+                result.update(success=False, saved=0, error=str(e))
+            task_status.results.append(result)
+
+            if round_idx < task_status.total_rounds:
+                task_status.set_platform_state(platform, round_idx, "cooling_down")
+                await cls._save_progress(task_status)
+                sleep_time = random.uniform(*ROUND_COOLDOWN_SEC)
+                utils.logger.info(f"=== Round {round_idx} Completed on {platform}. Sleeping {sleep_time:.1f}s before next round ===")
+                await asyncio.sleep(sleep_time)
+        task_status.set_platform_state(platform, task_status.total_rounds, "done")
+        await cls._save_progress(task_status)
+
+    @classmethod
+    async def _save_progress(cls, task_status: TaskStatus):
+        """Persist the progress of a task, a store failure does not stop the crawl"""
+        if cls._store is None or task_status.task_id not in cls._running:
+            return
+        try:
+            await cls._store.save_detail(task_status.task_id, task_status.snapshot())
+        except Exception as e:
+            utils.logger.warning(f"[TaskExecutor._save_progress] Save progress of {task_status.task_id} err: {e}")
+
+    @classmethod
+    async def _crawl_platform_round(
+        cls,
+        request: CrawlRequest,
+        task_status: TaskStatus,
+        platform: str,
+        round_idx: int,
+        keyword_group: List[str],
+        db_handler: MediaCrawlerDBHandler,
+    ) -> int:
+        """Crawl one keyword group on one platform with its own browser and save the results
+
+        Returns:
+            Number of saved posts
+
+        Raises:
+            RuntimeError: If the crawler failed
+        """
+        settings = ConfigInjector.build_settings(
+            platform=platform,
+            keywords=keyword_group,
+            crawler_config=request.config
+        )
+
+        # Run crawler, config reads inside return the settings of this run
+        wrapper = CrawlerWrapper(platform)
+        with use_settings(settings), resilience_run():
+            crawler_type_var.set(settings.CRAWLER_TYPE)
+            result = await wrapper.run_with_capture(keyword_group)
+            log_resilience_summary()
+
+        if result["success"]:
+            # Save to MongoDB
+            metadata = {
+                "task_id": task_status.task_id,
+                "round": round_idx,
+                "keywords": keyword_group,
+                "crawl_time": datetime.now()
+            }
+
+            saved_count = await db_handler.save_batch(
+                platform=platform,
+                posts_data=result["posts"],
+                comments_dict=result["comments"],
+                metadata=metadata
+            )
+
+            utils.logger.info(f"[Task] Saved {saved_count} posts for {platform}")
+        else:
+            utils.logger.error(f"[Task] Platform {platform} failed: {result['error']}")
+
+        # Create indexes if needed
+        await db_handler.create_indexes(platform)
+        if not result["success"]:
+            raise RuntimeError(result["error"])
+        return saved_count
+
+    @classmethod
+    async def get_task_status(cls, task_id: str) -> Optional[Dict[str, Any]]:
+        """Status of a running, queued or finished task, None if it does not exist"""
+        if task_id in cls._running:
+            return {**cls._running[task_id].to_dict(), "queue_position": None}
+        if cls._store is None:
+            return None
+        job = await cls._store.get(task_id)
+        if job is None:
+            return None
+        status = cls._job_to_status(job)
+        if job["status"] == JOB_QUEUED:
+            status["queue_position"] = await cls._store.queue_position(task_id)
+        return status
+
+    @classmethod
+    async def list_tasks(cls, status: Optional[str] = None, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
+        """Task history, newest first"""
+        jobs = await cls._store.list_jobs(status, limit, offset)
+        return [
+            cls._running[job["task_id"]].to_dict() if job["task_id"] in cls._running else cls._job_to_status(job)
+            for job in jobs
+        ]
 
     @classmethod
-    def get_task_status(cls, task_id: str) -> Optional[Dict[str, Any]]:
-        """Get current task status"""
-        if cls._current_task and cls._current_task.task_id == task_id:
-            return cls._current_task.to_dict()
-        return None
+    async def cancel_task(cls, task_id: str) -> bool:
+        """Cancel a queued task, running tasks can not be cancelled"""
+        return await cls._store.cancel(task_id)
+
+    @classmethod
+    async def get_metrics(cls) -> Dict[str, Any]:
+        """Queue depth, throughput and queue wait of the job queue"""
+        metrics = await cls._store.metrics()
+        metrics["workers"] = len(cls._workers)
+        metrics["running_tasks"] = list(cls._running)
+        return metrics
+
+    @classmethod
+    def running_tasks(cls) -> List[Dict[str, Any]]:
+        return [task_status.to_dict() for task_status in cls._running.values()]
 
     @classmethod
     def is_running(cls) -> bool:
         """Check if any task is currently running"""
-        return cls._current_task is not None and cls._current_task.status == "running"
+        return bool(cls._running)
+
+    @staticmethod
+    def _job_to_status(job: Dict[str, Any]) -> Dict[str, Any]:
+        detail = job["detail"]
+        return {
+            "task_id": job["task_id"],
+            "task_name": job["task_name"],
+            "status": job["status"],
+            "priority": job["priority"],
+            "current_round": detail.get("current_round", 0),
+            "current_platform": detail.get("current_platform"),
+            "total_rounds": len(job["request"]["keyword_groups"]),
+            "progress": detail.get("progress", 0.0),
+            "error_message": job["error_message"],
+            "submitted_at": datetime.fromtimestamp(job["submitted_at"]),
+            "start_time": datetime.fromtimestamp(job["started_at"]) if job["started_at"] else None,
+            "end_time": datetime.fromtimestamp(job["finished_at"]) if job["finished_at"] else None,
+            "platforms": detail.get("platforms", {}),
+            "results": detail.get("results", []),
+            "queue_position": None,
+        }
@@ -10,7 +10,6 @@ from typing import Optional
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, HTTPException, BackgroundTasks, status
-from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import ValidationError
 
@@ -30,12 +29,14 @@ async def lifespan(app: FastAPI):
     """Lifespan context manager for startup and shutdown events"""
     # Startup
     utils.logger.info("MediaCrawler API Server starting up...")
+    await TaskExecutor.start()
     yield
     # Shutdown
     utils.logger.info("MediaCrawler API Server shutting down...")
-    # Clean up any remaining tasks
+    # Running tasks are queued again and resume after the next start
     if TaskExecutor.is_running():
-        utils.logger.warning("A task is still running. Forcing cleanup...")
+        utils.logger.warning("Tasks are still running, they will run again after a restart")
+    await TaskExecutor.stop()
 
 
 # Create FastAPI app
@@ -66,6 +67,9 @@ async def root():
         "endpoints": {
             "start_crawl": "POST /start_crawl",
             "task_status": "GET /task_status/{task_id}",
+            "tasks": "GET /tasks",
+            "cancel_task": "POST /tasks/{task_id}/cancel",
+            "queue_metrics": "GET /queue/metrics",
             "is_running": "GET /is_running",
             "platforms": "GET /platforms"
         }
@@ -90,18 +94,16 @@ async def get_platforms():
 
 @app.get("/is_running", tags=["Info"])
 async def check_if_running():
-    """Check if a crawl task is currently running"""
-    is_running = TaskExecutor.is_running()
-    task_status = None
+    """Check if crawl tasks are currently running
 
-    if is_running:
-        from server.task_runner import TaskExecutor as TE
-        if TE._current_task:
-            task_status = TE._current_task.to_dict()
+    Tasks can be submitted at any time, they wait in the queue for a free worker slot
+    """
+    running_tasks = TaskExecutor.running_tasks()
 
     return {
-        "is_running": is_running,
-        "current_task": task_status
+        "is_running": bool(running_tasks),
+        "current_task": running_tasks[0] if running_tasks else None,
+        "running_tasks": running_tasks
     }
 
 
@@ -110,51 +112,40 @@ async def check_if_running():
     response_model=CrawlResponse,
     tags=["Crawl"],
     responses={
-        200: {"description": "Task started successfully"},
-        423: {"description": "Task queue is full (another task is running)"},
-        400: {"description": "Invalid request parameters"}
+        200: {"description": "Task queued successfully"},
+        400: {"description": "Invalid request parameters or duplicate task ID"}
     }
 )
 async def start_crawl(
     request: CrawlRequest,
     background_tasks: BackgroundTasks
 ):
-    """Start a multi-round crawl task
+    """Queue a multi-round crawl task
 
     This endpoint accepts a crawl request with multiple platforms and keyword groups.
-    The task will be executed in the background with the following logic:
-
-    1. For each round (keyword group):
-       - For each platform:
-         - Inject platform-specific configuration
-         - Start crawler with current keywords
-         - Collect posts and comments
-         - Save to MongoDB (collection: {platform}_media_crawler)
-         - Sleep 60-120 seconds between platforms
-       - Sleep 300-600 seconds between rounds
+    The task is persisted and waits for a free worker slot, tasks with a higher
+    priority first. A task does not start while another running task crawls one of
+    its platforms. It will be executed in the background with the following logic:
+
+    1. All platforms run at the same time, each with its own browser
+    2. For each round (keyword group), every platform:
+       - Builds its own crawler settings
+       - Starts crawler with current keywords
+       - Collects posts and comments
+       - Saves to MongoDB (collection: {platform}_media_crawler)
+       - Sleeps 300-600 seconds before its next round, while the other platforms keep crawling
 
     Args:
         request: Crawl request with platforms, keyword groups, and config
         background_tasks: FastAPI background tasks handler
 
     Returns:
-        CrawlResponse with task_id and status
+        CrawlResponse with task_id, status and position in the queue
 
     Raises:
-        HTTPException 423: If another task is currently running
-        HTTPException 400: If request validation fails
+        HTTPException 400: If request validation fails or the task ID already exists
     """
     try:
-        # Check if another task is running
-        if TaskExecutor.is_running():
-            return JSONResponse(
-                status_code=status.HTTP_423_LOCKED,
-                content={
-                    "detail": "Task queue is full. Another task is currently running.",
-                    "current_task": TaskExecutor._current_task.to_dict() if TaskExecutor._current_task else None
-                }
-            )
-
         # Validate platforms
         valid_platforms = {"xhs", "dy", "ks", "bili", "wb", "tieba", "zhihu"}
         invalid_platforms = set(request.platforms) - valid_platforms
@@ -182,14 +173,16 @@ async def start_crawl(
         # Execute task
         task_id = await TaskExecutor.execute_crawl_task(request)
 
-        utils.logger.info(f"[API] Task {task_id} started successfully")
+        utils.logger.info(f"[API] Task {task_id} queued successfully")
+        task_status = await TaskExecutor.get_task_status(task_id)
 
         return CrawlResponse(
             task_id=task_id,
-            status="started",
-            message="Crawl task started successfully",
+            status=task_status["status"] if task_status else "queued",
+            message="Crawl task queued successfully",
             platforms=request.platforms,
-            total_rounds=len(request.keyword_groups)
+            total_rounds=len(request.keyword_groups),
+            queue_position=task_status["queue_position"] if task_status else None
         )
 
     except ValidationError as e:
@@ -228,12 +221,12 @@ async def get_task_status(task_id: str):
         HTTPException 404: If task is not found
     """
     try:
-        task_status = TaskExecutor.get_task_status(task_id)
+        task_status = await TaskExecutor.get_task_status(task_id)
 
         if not task_status:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Task {task_id} not found or has expired"
+                detail=f"Task {task_id} not found"
             )
 
         return TaskStatusResponse(**task_status)
@@ -248,6 +241,74 @@ async def get_task_status(task_id: str):
         )
 
 
+@app.get("/tasks", tags=["Task"])
+async def list_tasks(
+    task_status: Optional[str] = None,
+    limit: int = 50,
+    skip: int = 0
+):
+    """List the submitted tasks, newest first
+
+    Args:
+        task_status: Only tasks of this status (queued, running, completed, failed, cancelled)
+        limit: Maximum number of tasks to return (default: 50)
+        skip: Number of tasks to skip (default: 0)
+
+    Returns:
+        List of task status
+    """
+    try:
+        tasks = await TaskExecutor.list_tasks(task_status, limit, skip)
+        return {
+            "count": len(tasks),
+            "tasks": [TaskStatusResponse(**task) for task in tasks]
+        }
+
+    except Exception as e:
+        utils.logger.error(f"[API] Error listing tasks: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+
+@app.post("/tasks/{task_id}/cancel", tags=["Task"])
+async def cancel_task(task_id: str):
+    """Cancel a queued task
+
+    Args:
+        task_id: The task ID returned by /start_crawl
+
+    Raises:
+        HTTPException 409: If the task does not exist or already started
+    """
+    if not await TaskExecutor.cancel_task(task_id):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Task {task_id} is not queued"
+        )
+    return {"task_id": task_id, "status": "cancelled"}
+
+
+@app.get("/queue/metrics", tags=["Task"])
+async def get_queue_metrics():
+    """Queue depth, throughput and queue wait of the task queue
+
+    Returns:
+        Task counts per status, tasks finished per hour, queue wait and run time
+        percentiles of the recent tasks, worker slots and running task IDs
+    """
+    try:
+        return await TaskExecutor.get_metrics()
+
+    except Exception as e:
+        utils.logger.error(f"[API] Error getting queue metrics: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(e)}"
+        )
+
+
 @app.get("/data/{platform}", tags=["Data"])
 async def get_platform_data(
     platform: str,
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/sign_server_main.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+Local signing service shared by the crawler processes of one machine
+
+It owns one headless Chromium with the Xiaohongshu signing pages, the Douyin a_bogus node workers and the
+Bilibili WBI keys. Crawlers use it when SIGN_SERVICE_URL or SIGN_SERVICE_UDS is set (tools/sign_service.py)
+and sign in-process while it is not running.
+
+Start command:
+    python sign_server_main.py --port 8765
+    python sign_server_main.py --uds /tmp/mediacrawler_sign.sock
+"""
+import argparse
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional, Tuple, Union
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+from playwright.async_api import async_playwright
+from pydantic import BaseModel
+
+import config
+from media_platform.douyin.help import douyin_sign_pool, get_sign_js_name
+from media_platform.xhs.sign_pool import XhsSignerPool
+from tools import utils
+
+XHS_INDEX_URL = "https://www.xiaohongshu.com"
+XHS_USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36"
+BILIBILI_NAV_URL = "https://api.bilibili.com/x/web-interface/nav"
+
+# WBI keys change about once a day, they are fetched again after this many seconds
+WBI_KEYS_TTL_SEC = 3600
+
+
+class XhsSignRequest(BaseModel):
+    uri: str
+    data: Optional[Union[Dict[str, Any], str]] = None
+    a1: str = ""
+    method: str = "POST"
+    # b1 of the crawler's browser, None for older clients that do not send it
+    b1: Optional[str] = None
+
+
+class DouyinSignRequest(BaseModel):
+    url: str
+    params: str
+    user_agent: str
+
+
+class SignBackend:
+    """
+    Signing resources of the service, each one is created on its first request,
+    so a service used only for Douyin never starts a browser
+    """
+
+    def __init__(self, xhs_page_num: int = 2, headless: bool = True):
+        self.xhs_page_num = xhs_page_num
+        self.headless = headless
+        self.started_at = time.time()
+        self._playwright = None
+        self._browser = None
+        self._xhs_pool: Optional[XhsSignerPool] = None
+        self._xhs_lock = asyncio.Lock()
+        self._wbi_keys: Optional[Tuple[str, str]] = None
+        self._wbi_keys_expire_at = 0.0
+        self._wbi_lock = asyncio.Lock()
+
+    async def sign_xhs(self, request: XhsSignRequest) -> Dict[str, Any]:
+        """
+        Only x3 comes from the service's own page (window.mnsv2), x-s-common is built from the crawler's a1 and b1,
+        the service's browser has a different device fingerprint
+        """
+        pool = await self._get_xhs_pool()
+        return await pool.sign(request.uri, request.data, request.a1, request.method, request.b1)
+
+    async def sign_douyin(self, request: DouyinSignRequest) -> str:
+        return await douyin_sign_pool.call(get_sign_js_name(request.url), request.params, request.user_agent)
+
+    async def get_bilibili_wbi_keys(self) -> Tuple[str, str]:
+        async with self._wbi_lock:
+            if self._wbi_keys is None or time.monotonic() >= self._wbi_keys_expire_at:
+                async with httpx.AsyncClient(timeout=10) as client:
+                    response = await client.get(BILIBILI_NAV_URL, headers={"User-Agent": XHS_USER_AGENT})
+                # code is -101 without login, wbi_img is returned anyway
+                wbi_img = response.json()["data"]["wbi_img"]
+                self._wbi_keys = (
+                    wbi_img["img_url"].rsplit("/", 1)[1].split(".")[0],
+                    wbi_img["sub_url"].rsplit("/", 1)[1].split(".")[0],
+                )
+                self._wbi_keys_expire_at = time.monotonic() + WBI_KEYS_TTL_SEC
+            return self._wbi_keys
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "uptime_sec": round(time.time() - self.started_at),
+            "xhs": self._xhs_pool.stats() if self._xhs_pool is not None else None,
+            "douyin": douyin_sign_pool.stats.snapshot(),
+            "bilibili_wbi_keys_cached": self._wbi_keys is not None,
+        }
+
+    async def close(self) -> None:
+        await douyin_sign_pool.close()
+        if self._xhs_pool is not None:
+            await self._xhs_pool.close()
+        if self._browser is not None:
+            await self._browser.close()
+        if self._playwright is not None:
+            await self._playwright.stop()
+
+    async def _get_xhs_pool(self) -> XhsSignerPool:
+        if self._xhs_pool is not None:
+            return self._xhs_pool
+        async with self._xhs_lock:
+            if self._xhs_pool is None:
+                self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(headless=self.headless)
+                browser_context = await self._browser.new_context(user_agent=XHS_USER_AGENT)
+                # stealth.min.js is a js script to prevent the website from detecting the crawler.
+                await browser_context.add_init_script(path="libs/stealth.min.js")
+                pool = XhsSignerPool(browser_context, size=self.xhs_page_num, index_url=XHS_INDEX_URL)
+                await pool.start()
+                self._xhs_pool = pool
+        return self._xhs_pool
+
+
+def create_app(backend: SignBackend) -> FastAPI:
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        utils.logger.info("[SignServer] signing service starting up...")
+        yield
+        utils.logger.info(f"[SignServer] signing service shutting down, stats: {backend.stats()}")
+        await backend.close()
+
+    app = FastAPI(title="MediaCrawler Sign Service", version="1.0.0", lifespan=lifespan)
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok", "stats": backend.stats()}
+
+    @app.post("/sign/xhs")
+    async def sign_xhs(request: XhsSignRequest):
+        return await backend.sign_xhs(request)
+
+    @app.post("/sign/douyin")
+    async def sign_douyin(request: DouyinSignRequest):
+        return {"a_bogus": await backend.sign_douyin(request)}
+
+    @app.get("/sign/bilibili/wbi_keys")
+    async def bilibili_wbi_keys():
+        img_key, sub_key = await backend.get_bilibili_wbi_keys()
+        return {"img_key": img_key, "sub_key": sub_key}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MediaCrawler local signing service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--uds", default="", help="Listen on this Unix socket instead of host:port")
+    parser.add_argument("--xhs-pages", type=int, default=config.XHS_SIGN_PAGE_NUM, help="Number of Xiaohongshu signing pages")
+    parser.add_argument("--headed", action="store_true", help="Show the signing browser")
+    args = parser.parse_args()
+
+    app = create_app(SignBackend(xhs_page_num=args.xhs_pages, headless=not args.headed))
+    if args.uds:
+        uvicorn.run(app, uds=args.uds)
+    else:
+        uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/test/test_async_redis_cache.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+import unittest
+
+from cache.async_redis_cache import AsyncRedisCache, get_connection_pool
+from cache.cache_factory import CacheFactory
+from cache.redis_cache import RedisCache, encode_value
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+
+@unittest.skipUnless(fakeredis, "fakeredis is not installed")
+class TestAsyncRedisCache(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.server = fakeredis.FakeServer()
+        self.cache = AsyncRedisCache(client=fakeredis.aioredis.FakeRedis(server=self.server))
+
+    async def asyncTearDown(self):
+        await self.cache.close()
+
+    async def test_set_and_get(self):
+        await self.cache.set("json", {"name": "MediaCrawler", "tags": [1, 2]}, 10)
+        await self.cache.set("pickled", {1, 2}, 10)
+        self.assertEqual(await self.cache.get("json"), {"name": "MediaCrawler", "tags": [1, 2]})
+        self.assertEqual(await self.cache.get("pickled"), {1, 2})
+        self.assertIsNone(await self.cache.get("missing"))
+
+    async def test_mset_and_mget(self):
+        await self.cache.mset({"a": 1, "b": [2], "c": "3"}, expire_time=60)
+        self.assertEqual(await self.cache.mget(["a", "b", "missing", "c"]), [1, [2], None, "3"])
+        ttl = await self.cache._get_client().ttl("b")
+        self.assertTrue(0 < ttl <= 60)
+        self.assertEqual(await self.cache.mget([]), [])
+
+    async def test_keys_are_scanned(self):
+        await self.cache.mset({f"xhs:{i}": i for i in range(2500)}, expire_time=60)
+        await self.cache.set("dy:1", 1, 60)
+        keys = await self.cache.keys("xhs:*")
+        self.assertEqual(len(keys), 2500)
+        self.assertEqual([key async for key in self.cache.iter_keys("dy:*", count=10)], ["dy:1"])
+
+    async def test_pipeline_and_delete(self):
+        async with self.cache.pipeline() as pipe:
+            pipe.set("a", encode_value(1), ex=10)
+            pipe.incr("counter")
+            await pipe.execute()
+        self.assertEqual(await self.cache.get("a"), 1)
+        await self.cache.delete("a", "counter")
+        self.assertEqual(await self.cache.keys("*"), [])
+
+    async def test_readable_by_sync_cache(self):
+        sync_cache = RedisCache.__new__(RedisCache)
+        sync_cache._redis_client = fakeredis.FakeRedis(server=self.server)
+        await self.cache.set("shared", [1, "a"], 10)
+        self.assertEqual(sync_cache.get("shared"), [1, "a"])
+        self.assertEqual(sync_cache.keys("sha*"), ["shared"])
+
+
+class TestConnectionPool(unittest.IsolatedAsyncioTestCase):
+
+    async def test_one_pool_per_loop(self):
+        first, second = CacheFactory.create_cache("redis_async"), AsyncRedisCache()
+        self.assertIs(first._get_client().connection_pool, get_connection_pool())
+        self.assertIs(second._get_client().connection_pool, first._get_client().connection_pool)
+        await first.close()
+        await second.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
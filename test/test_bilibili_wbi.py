@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/test/test_bilibili_wbi.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+import asyncio
+import unittest
+from unittest import mock
+
+from media_platform.bilibili.help import BilibiliSign, WbiKeyManager
+
+IMG_KEY = "7cd084941338484aae1ad9425b84077c"
+SUB_KEY = "4932caff0ff746eab6f01bf08b70ac45"
+
+
+class TestBilibiliSign(unittest.TestCase):
+
+    def test_documented_example(self):
+        # example of the WBI document in bilibili-API-collect
+        self.assertEqual(BilibiliSign(IMG_KEY, SUB_KEY).get_salt(), "ea1db124af3c7062474693fa704f4ff8")
+        with mock.patch("media_platform.bilibili.help.utils.get_unix_timestamp", return_value=1702204169):
+            signed = BilibiliSign(IMG_KEY, SUB_KEY).sign({"foo": "114", "bar": "514", "zab": 1919810})
+        self.assertEqual(signed["w_rid"], "8f6f2b5b3d485fe1886cec6a0be8c5d4")
+        self.assertEqual(list(signed), ["bar", "foo", "wts", "zab", "w_rid"])
+
+    def test_filtered_characters(self):
+        with mock.patch("media_platform.bilibili.help.utils.get_unix_timestamp", return_value=1):
+            signed = BilibiliSign(IMG_KEY, SUB_KEY).sign({"keyword": "a!b'c(d)e*f"})
+        self.assertEqual(signed["keyword"], "abcdef")
+
+
+class TestWbiKeyManager(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.fetches = 0
+        self.fetch_fails = False
+
+    async def fetch_keys(self):
+        self.fetches += 1
+        await asyncio.sleep(0)
+        if self.fetch_fails:
+            raise RuntimeError("nav api failed")
+        return IMG_KEY, SUB_KEY
+
+    async def test_keys_fetched_once(self):
+        manager = WbiKeyManager(self.fetch_keys, ttl=100)
+        await asyncio.gather(*[manager.sign({"page": i}) for i in range(10)])
+        self.assertEqual(self.fetches, 1)
+
+    async def test_background_refresh_keeps_serving(self):
+        manager = WbiKeyManager(self.fetch_keys, ttl=100, refresh_ahead=10)
+        signer = await manager.get_signer()
+        manager._fetched_at -= 95
+        # stale but not expired: served from cache, refresh runs in the background
+        self.assertIs(await manager.get_signer(), signer)
+        self.assertEqual(self.fetches, 1)
+        await manager._refresh_task
+        self.assertEqual(self.fetches, 2)
+        self.assertIsNot(await manager.get_signer(), signer)
+
+    async def test_failed_background_refresh_keeps_old_keys(self):
+        manager = WbiKeyManager(self.fetch_keys, ttl=100, refresh_ahead=10)
+        signer = await manager.get_signer()
+        manager._fetched_at -= 95
+        self.fetch_fails = True
+        self.assertIs(await manager.get_signer(), signer)
+        await manager._refresh_task
+        self.assertIsNone(manager._refresh_task)
+        # the next request retries the refresh, still signing with the old keys
+        self.assertIs(await manager.get_signer(), signer)
+        await manager._refresh_task
+        self.assertEqual(self.fetches, 3)
+
+    async def test_expired_and_invalidated_keys_are_awaited(self):
+        manager = WbiKeyManager(self.fetch_keys, ttl=100)
+        await manager.get_signer()
+        manager._fetched_at -= 100
+        await manager.get_signer()
+        manager.invalidate()
+        await manager.get_signer()
+        self.assertEqual(self.fetches, 3)
+
+    async def test_invalidate_refetches_with_default_ttl(self):
+        # the default ttl is longer than the monotonic clock of a freshly booted host
+        manager = WbiKeyManager(self.fetch_keys)
+        with mock.patch("media_platform.bilibili.help.time.monotonic", return_value=60.0):
+            await manager.get_signer()
+            manager.invalidate()
+            await manager.get_signer()
+            await manager.get_signer()
+        self.assertEqual(self.fetches, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
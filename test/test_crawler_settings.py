@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/test/test_crawler_settings.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+import asyncio
+import unittest
+
+import config
+from config.settings import CrawlerSettings, current_settings, use_settings
+from server.models import CrawlerConfig
+from server.task_runner import ConfigInjector
+
+
+class TestCrawlerSettings(unittest.TestCase):
+
+    def test_immutable_snapshot(self):
+        settings = CrawlerSettings.from_config(KEYWORDS="a,b")
+        self.assertEqual(settings.KEYWORDS, "a,b")
+        self.assertEqual(settings.PLATFORM, config.PLATFORM)
+        with self.assertRaises(AttributeError):
+            settings.KEYWORDS = "c"
+        changed = settings.replace(KEYWORDS="c")
+        self.assertEqual((settings.KEYWORDS, changed.KEYWORDS), ("a,b", "c"))
+        with self.assertRaises(ValueError):
+            settings.replace(NOT_A_SETTING=1)
+
+    def test_values_are_copied(self):
+        settings = CrawlerSettings.from_config()
+        settings.XHS_SPECIFIED_NOTE_URL_LIST.append("https://example.com")
+        self.assertNotIn("https://example.com", config.XHS_SPECIFIED_NOTE_URL_LIST)
+
+    def test_config_reads_and_writes(self):
+        original = config.KEYWORDS
+        with use_settings(CrawlerSettings.from_config(KEYWORDS="inside")):
+            self.assertEqual(config.KEYWORDS, "inside")
+            self.assertEqual(current_settings().KEYWORDS, "inside")
+            with self.assertRaises(AttributeError):
+                config.CRAWLER_MAX_NOTES_COUNT = 1
+        self.assertEqual(config.KEYWORDS, original)
+
+    def test_build_settings_of_request(self):
+        original = config.PLATFORM
+        settings = ConfigInjector.build_settings("dy", ["a", "b"], CrawlerConfig(max_notes_count=3))
+        self.assertEqual((settings.PLATFORM, settings.KEYWORDS, settings.CRAWLER_MAX_NOTES_COUNT), ("dy", "a,b", 3))
+        self.assertEqual(config.PLATFORM, original)
+
+
+class TestConcurrentJobs(unittest.IsolatedAsyncioTestCase):
+
+    async def test_jobs_read_their_own_settings(self):
+        seen = {}
+
+        async def job(platform: str, keywords: str):
+            with use_settings(CrawlerSettings.from_config(PLATFORM=platform, KEYWORDS=keywords)):
+                reads = []
+                for _ in range(3):
+                    # tasks created by the job inherit its settings
+                    reads.append(await asyncio.create_task(self._read_keywords()))
+                    await asyncio.sleep(0)
+                seen[platform] = (config.PLATFORM, reads)
+
+        await asyncio.gather(job("xhs", "x1,x2"), job("dy", "d1"))
+        self.assertEqual(seen["xhs"], ("xhs", ["x1,x2"] * 3))
+        self.assertEqual(seen["dy"], ("dy", ["d1"] * 3))
+
+    @staticmethod
+    async def _read_keywords() -> str:
+        await asyncio.sleep(0)
+        return config.KEYWORDS
+
+
+if __name__ == "__main__":
+    unittest.main()
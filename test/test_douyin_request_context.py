@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/test/test_douyin_request_context.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+import asyncio
+import unittest
+
+from media_platform.douyin.help import DOUYIN_COMMON_PARAMS, GET_MS_TOKEN_JS, DouyinRequestContext
+
+
+class FakeDouyinPage:
+
+    def __init__(self):
+        self.ms_token = "token-1"
+        self.evaluate_calls = []
+
+    async def evaluate(self, expression):
+        self.evaluate_calls.append(expression)
+        await asyncio.sleep(0.01)
+        return self.ms_token
+
+
+class TestDouyinRequestContext(unittest.IsolatedAsyncioTestCase):
+
+    async def test_common_params_are_cached(self):
+        page = FakeDouyinPage()
+        context = DouyinRequestContext(page, ms_token_ttl=600)
+        results = await asyncio.gather(*[context.get_common_params() for _ in range(5)])
+        self.assertEqual(page.evaluate_calls, [GET_MS_TOKEN_JS])
+        params = results[0]
+        self.assertEqual(params["msToken"], "token-1")
+        self.assertEqual(len(params["webid"]), 19)
+        self.assertLessEqual(DOUYIN_COMMON_PARAMS.items(), params.items())
+        # webid stays the same for the whole client
+        self.assertEqual((await context.get_common_params())["webid"], params["webid"])
+
+    async def test_ms_token_refreshed_after_ttl_and_invalidation(self):
+        page = FakeDouyinPage()
+        context = DouyinRequestContext(page, ms_token_ttl=600)
+        await context.get_common_params()
+        page.ms_token = "token-2"
+        context._ms_token_read_at -= 600
+        self.assertEqual((await context.get_common_params())["msToken"], "token-2")
+        page.ms_token = "token-3"
+        context.invalidate_ms_token()
+        self.assertEqual((await context.get_common_params())["msToken"], "token-3")
+        self.assertEqual(context.ms_token_reads, 3)
+
+    async def test_without_page(self):
+        context = DouyinRequestContext(None)
+        self.assertIsNone((await context.get_common_params())["msToken"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -51,6 +51,58 @@ class TestExpiringLocalCache(unittest.TestCase):
         time.sleep(12)
         self.assertIsNone(self.cache.get('key'))
 
+    def test_overwrite_keeps_latest_expiry(self):
+        self.cache.set('key', 'old', 1)
+        self.cache.set('key', 'new', 100)
+        time.sleep(1.1)
+        self.assertEqual(self.cache.get('key'), 'new')
+        self.assertEqual(len(self.cache), 1)
+
+    def test_purge_only_touches_expired_keys(self):
+        for i in range(100):
+            self.cache.set(f'short:{i}', i, 1)
+            self.cache.set(f'long:{i}', i, 100)
+        time.sleep(1.1)
+        self.cache._clear()
+        self.assertEqual(len(self.cache), 100)
+        self.assertEqual(self.cache.stats()['expirations'], 100)
+
+    def test_lru_eviction_by_entries(self):
+        cache = ExpiringLocalCache(max_entries=3, max_bytes=0)
+        for key in 'abc':
+            cache.set(key, key, 10)
+        cache.get('a')
+        cache.set('d', 'd', 10)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(sorted(cache.keys('*')), ['a', 'c', 'd'])
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_lru_eviction_by_bytes(self):
+        cache = ExpiringLocalCache(max_entries=0, max_bytes=100, sizeof=lambda key, value: len(value))
+        cache.set('a', 'x' * 60, 10)
+        cache.set('b', 'x' * 30, 10)
+        cache.set('c', 'x' * 30, 10)
+        self.assertEqual(cache.keys('*'), ['b', 'c'])
+        self.assertEqual(cache.stats()['bytes'], 60)
+
+    def test_glob_keys(self):
+        for key in ('xhs_login_phone:13800000000', 'xhs_login_phone:13900000000', 'dy_login_phone:13800000000', 'a1', 'ab'):
+            self.cache.set(key, 1, 10)
+        self.assertEqual(sorted(self.cache.keys('xhs_login_phone:*')), ['xhs_login_phone:13800000000', 'xhs_login_phone:13900000000'])
+        self.assertEqual(sorted(self.cache.keys('*_login_phone:138*')), ['dy_login_phone:13800000000', 'xhs_login_phone:13800000000'])
+        self.assertEqual(sorted(self.cache.keys('a?')), ['a1', 'ab'])
+        self.assertEqual(self.cache.keys('a[0-9]'), ['a1'])
+        # substrings do not match a glob without wildcards
+        self.assertEqual(self.cache.keys('login'), [])
+        self.assertEqual(self.cache.keys('ab'), ['ab'])
+
+    def test_stats(self):
+        self.cache.set('key', 'value', 10)
+        self.cache.get('key')
+        self.cache.get('missing')
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['hit_ratio']), (1, 1, 0.5))
+
     def tearDown(self):
         del self.cache
 
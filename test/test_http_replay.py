@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/test/test_http_replay.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+import os
+import tempfile
+import unittest
+
+import httpx
+
+from tools.http_replay import Cassette, CassetteMissError, RecordingTransport, ReplayTransport
+
+
+class TestHttpReplay(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "xhs.jsonl.gz")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    @staticmethod
+    def _upstream(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"success": True, "data": {"path": request.url.path, "keyword": "编程"}})
+
+    async def test_record_then_replay(self):
+        recorder = RecordingTransport(Cassette(self.path), async_transport=httpx.MockTransport(self._upstream))
+        async with httpx.AsyncClient(transport=recorder) as client:
+            recorded = await client.post(
+                "https://edith.xiaohongshu.com/api/sns/web/v1/search/notes",
+                content='{"keyword":"编程","search_id":"aaa"}',
+            )
+
+        replayer = ReplayTransport(Cassette(self.path).load())
+        async with httpx.AsyncClient(transport=replayer) as client:
+            # search_id is volatile and must not affect matching
+            replayed = await client.post(
+                "https://edith.xiaohongshu.com/api/sns/web/v1/search/notes",
+                content='{"keyword":"编程","search_id":"bbb"}',
+            )
+        self.assertEqual(replayed.status_code, 200)
+        self.assertEqual(replayed.json(), recorded.json())
+
+    async def test_volatile_query_params_ignored(self):
+        cassette = Cassette(self.path)
+        self.assertEqual(
+            cassette.request_key("GET", "https://www.douyin.com/aweme/v1/web/aweme/detail/?aweme_id=1&a_bogus=x&msToken=y"),
+            cassette.request_key("GET", "https://www.douyin.com/aweme/v1/web/aweme/detail/?msToken=z&aweme_id=1"),
+        )
+
+    async def test_miss_and_error_injection(self):
+        replayer = ReplayTransport(Cassette(self.path).load())
+        async with httpx.AsyncClient(transport=replayer) as client:
+            with self.assertRaises(CassetteMissError):
+                await client.get("https://www.zhihu.com/api/v4/me")
+
+        replayer = ReplayTransport(Cassette(self.path).load(), error_rate=1.0, error_status_code=503)
+        async with httpx.AsyncClient(transport=replayer) as client:
+            response = await client.get("https://www.zhihu.com/api/v4/me")
+        self.assertEqual(response.status_code, 503)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/test/test_ip_cache.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+import socket
+import time
+import unittest
+
+from config import db_config
+from proxy.base_proxy import IpCache
+from proxy.types import IpInfoModel
+
+BRAND = "TEST_IP_CACHE"
+
+
+def redis_reachable() -> bool:
+    try:
+        socket.create_connection((db_config.REDIS_DB_HOST, int(db_config.REDIS_DB_PORT)), timeout=0.5).close()
+        return True
+    except OSError:
+        return False
+
+
+def ip_info(port: int, expire_in: int) -> IpInfoModel:
+    return IpInfoModel(ip="10.0.0.1", port=port, user="u", password="p", expired_time_ts=int(time.time()) + expire_in)
+
+
+@unittest.skipUnless(redis_reachable(), "redis is not running")
+class TestIpCache(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.ip_cache = IpCache()
+        await self.ip_cache._get_client().delete(IpCache.cache_key(BRAND), IpCache.info_key(BRAND))
+
+    async def asyncTearDown(self):
+        client = self.ip_cache._get_client()
+        await client.delete(IpCache.cache_key(BRAND), IpCache.info_key(BRAND))
+        await client.close()
+
+    async def test_add_and_load(self):
+        await self.ip_cache.add_ips(BRAND, [ip_info(1, 60), ip_info(2, 120)])
+        loaded = await self.ip_cache.load_all_ip(BRAND)
+        self.assertEqual([ip.port for ip in loaded], [1, 2])
+        # the key lives as long as its last IP
+        ttl = await self.ip_cache._get_client().ttl(IpCache.cache_key(BRAND))
+        self.assertTrue(100 < ttl <= 121)
+
+    async def test_expired_ips_are_dropped(self):
+        await self.ip_cache.add_ips(BRAND, [ip_info(1, -5), ip_info(2, 60)])
+        self.assertEqual([ip.port for ip in await self.ip_cache.load_all_ip(BRAND)], [2])
+        self.assertEqual(await self.ip_cache._get_client().zcard(IpCache.cache_key(BRAND)), 1)
+        self.assertEqual(await self.ip_cache._get_client().hlen(IpCache.info_key(BRAND)), 1)
+
+    async def test_readded_ip_replaces_the_old_entry(self):
+        await self.ip_cache.add_ips(BRAND, [ip_info(1, 60), ip_info(2, 120)])
+        await self.ip_cache.add_ips(BRAND, [ip_info(1, 90)])
+        loaded = await self.ip_cache.load_all_ip(BRAND)
+        self.assertEqual([ip.port for ip in loaded], [1, 2])
+        # a batch that expires earlier does not shorten the life of the IPs stored before it
+        ttl = await self.ip_cache._get_client().ttl(IpCache.cache_key(BRAND))
+        self.assertTrue(100 < ttl <= 121)
+
+
+class TestIpCacheWithoutRedis(unittest.IsolatedAsyncioTestCase):
+
+    async def test_unreachable_redis_loads_nothing(self):
+        ip_cache = IpCache()
+        db_port = db_config.REDIS_DB_PORT
+        db_config.REDIS_DB_PORT = 1
+        try:
+            self.assertEqual(await ip_cache.load_all_ip(BRAND), [])
+            await ip_cache.add_ips(BRAND, [ip_info(1, 60)])
+        finally:
+            db_config.REDIS_DB_PORT = db_port
+
+
+if __name__ == "__main__":
+    unittest.main()
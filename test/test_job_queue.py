@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/test/test_job_queue.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from server.job_store import JOB_COMPLETED, JOB_FAILED, JOB_QUEUED, JOB_RUNNING, JobStore
+from server.models import CrawlRequest
+from server.task_runner import TaskExecutor
+
+
+def crawl_request(task_id: str, platforms=("xhs",), priority: int = 0) -> CrawlRequest:
+    return CrawlRequest(task_id=task_id, platforms=list(platforms), keyword_groups=[["a"]], priority=priority)
+
+
+class TestJobStore(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.db_path = os.path.join(self.tmp_dir.name, "jobs.db")
+        self.store = JobStore(self.db_path)
+        await self.store.open()
+
+    async def asyncTearDown(self):
+        await self.store.close()
+
+    async def test_priority_order(self):
+        await self.store.add("low", crawl_request("low"), priority=0)
+        await self.store.add("high", crawl_request("high"), priority=5)
+        await self.store.add("low2", crawl_request("low2"), priority=0)
+        self.assertEqual(await self.store.queue_position("high"), 1)
+        self.assertEqual(await self.store.queue_position("low2"), 3)
+        claimed = [(await self.store.claim_next())["task_id"] for _ in range(3)]
+        self.assertEqual(claimed, ["high", "low", "low2"])
+        self.assertIsNone(await self.store.claim_next())
+
+    async def test_busy_platforms_are_skipped(self):
+        await self.store.add("xhs", crawl_request("xhs", ["xhs", "dy"]))
+        await self.store.add("bili", crawl_request("bili", ["bili"]))
+        job = await self.store.claim_next(busy_platforms={"dy"})
+        self.assertEqual(job["task_id"], "bili")
+        self.assertEqual(job["request"]["platforms"], ["bili"])
+
+    async def test_duplicate_and_cancel(self):
+        await self.store.add("t1", crawl_request("t1"))
+        with self.assertRaises(ValueError):
+            await self.store.add("t1", crawl_request("t1"))
+        self.assertTrue(await self.store.cancel("t1"))
+        self.assertFalse(await self.store.cancel("t1"))
+        self.assertIsNone(await self.store.claim_next())
+
+    async def test_survives_restart(self):
+        await self.store.add("done", crawl_request("done"))
+        await self.store.add("interrupted", crawl_request("interrupted"))
+        await self.store.claim_next()
+        await self.store.finish("done", JOB_COMPLETED, {"progress": 100.0})
+        await self.store.claim_next()
+        await self.store.close()
+
+        self.store = JobStore(self.db_path)
+        await self.store.open()
+        done = await self.store.get("done")
+        self.assertEqual((done["status"], done["detail"]), (JOB_COMPLETED, {"progress": 100.0}))
+        interrupted = await self.store.get("interrupted")
+        self.assertEqual((interrupted["status"], interrupted["attempts"]), (JOB_QUEUED, 1))
+
+    async def test_metrics(self):
+        await self.store.add("t1", crawl_request("t1"))
+        await self.store.add("t2", crawl_request("t2"))
+        await self.store.claim_next()
+        await self.store.finish("t1", JOB_COMPLETED, {})
+        metrics = await self.store.metrics()
+        self.assertEqual(metrics["counts"][JOB_COMPLETED], 1)
+        self.assertEqual(metrics["counts"][JOB_QUEUED], 1)
+        self.assertEqual(metrics["finished_in_window"], 1)
+        self.assertGreaterEqual(metrics["queue_wait_sec"]["max"], 0)
+        self.assertGreaterEqual(metrics["oldest_queued_wait_sec"], 0)
+
+
+class TestTaskExecutorQueue(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.db_path = os.path.join(self.tmp_dir.name, "jobs.db")
+        self.started = []
+        self.release = asyncio.Event()
+
+        async def run_task(request, task_status):
+            self.started.append(task_status.task_id)
+            task_status.status = JOB_RUNNING
+            await self.release.wait()
+            task_status.status = JOB_COMPLETED
+
+        patch = mock.patch.object(TaskExecutor, "_run_task_background", run_task)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    async def asyncTearDown(self):
+        await TaskExecutor.stop()
+
+    async def wait_started(self, count: int):
+        while len(self.started) < count:
+            await asyncio.sleep(0.01)
+
+    async def test_worker_slots_and_platform_conflicts(self):
+        # queued before the server starts
+        store = JobStore(self.db_path)
+        await store.open()
+        for request in (crawl_request("xhs1", ["xhs"]), crawl_request("xhs2", ["xhs"], priority=9), crawl_request("dy", ["dy"])):
+            await store.add(request.task_id, request, request.priority)
+        await store.close()
+
+        await TaskExecutor.start(workers=2, store=JobStore(self.db_path))
+        await self.wait_started(2)
+        await asyncio.sleep(0.05)
+        # the second xhs task waits for the first one although a slot is free for it
+        self.assertEqual(sorted(self.started), ["dy", "xhs2"])
+        self.assertEqual((await TaskExecutor.get_task_status("xhs1"))["queue_position"], 1)
+
+        self.release.set()
+        await self.wait_started(3)
+        while (await TaskExecutor.get_task_status("xhs1"))["status"] != JOB_COMPLETED:
+            await asyncio.sleep(0.01)
+        metrics = await TaskExecutor.get_metrics()
+        self.assertEqual(metrics["counts"][JOB_COMPLETED], 3)
+        self.assertEqual(metrics["workers"], 2)
+
+    async def test_running_task_resumes_after_restart(self):
+        await TaskExecutor.start(workers=1, store=JobStore(self.db_path))
+        await TaskExecutor.execute_crawl_task(crawl_request("t1"))
+        await self.wait_started(1)
+        await TaskExecutor.stop()
+        self.assertEqual((await self._job("t1"))["status"], JOB_QUEUED)
+
+        self.release.set()
+        await TaskExecutor.start(workers=1, store=JobStore(self.db_path))
+        await self.wait_started(2)
+        while (await TaskExecutor.get_task_status("t1"))["status"] != JOB_COMPLETED:
+            await asyncio.sleep(0.01)
+        history = await TaskExecutor.list_tasks()
+        self.assertEqual([task["task_id"] for task in history], ["t1"])
+
+    async def test_slot_survives_failures(self):
+        store = JobStore(self.db_path)
+        await store.open()
+        await store.add("broken", crawl_request("broken"), priority=9)
+        await store._db.execute("UPDATE crawl_jobs SET request = ? WHERE task_id = ?", ('{"platforms": 5}', "broken"))
+        await store._db.commit()
+        await store.add("t1", crawl_request("t1"))
+        await store.close()
+
+        store = JobStore(self.db_path)
+        claim_next = store.claim_next
+
+        async def flaky_claim(busy_platforms=()):
+            if not flaky_claim.failed:
+                flaky_claim.failed = True
+                raise RuntimeError("database is locked")
+            return await claim_next(busy_platforms)
+
+        flaky_claim.failed = False
+        store.claim_next = flaky_claim
+        self.release.set()
+        with mock.patch.object(TaskExecutor, "IDLE_POLL_SEC", 0.01):
+            await TaskExecutor.start(workers=1, store=store)
+            await self.wait_started(1)
+            while (await TaskExecutor.get_task_status("t1"))["status"] != JOB_COMPLETED:
+                await asyncio.sleep(0.01)
+        # the task that could not be loaded failed, the slot went on with the next one
+        self.assertEqual(self.started, ["t1"])
+        broken = await self._job("broken")
+        self.assertEqual(broken["status"], JOB_FAILED)
+        self.assertIn("Invalid task", broken["error_message"])
+
+    async def _job(self, task_id: str):
+        store = JobStore(self.db_path)
+        await store.open()
+        try:
+            return await store.get(task_id)
+        finally:
+            await store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/test/test_js_worker_pool.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+import asyncio
+import unittest
+
+from media_platform.douyin.help import DOUYIN_SIGN_JS, get_a_bogus_from_js
+from tools.js_worker_pool import JsWorkerError, JsWorkerPool, find_node_binary
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36"
+QUERY = "device_platform=webapp&aid=6383&keyword=test&offset=0&count=10"
+
+
+@unittest.skipIf(find_node_binary() is None, "node is not installed")
+class TestJsWorkerPool(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.pool = JsWorkerPool(DOUYIN_SIGN_JS, size=2, timeout=10, name="test")
+
+    async def asyncTearDown(self):
+        await self.pool.close()
+
+    async def test_call(self):
+        a_bogus = await self.pool.call("sign_datail", QUERY, USER_AGENT)
+        self.assertIsInstance(a_bogus, str)
+        self.assertTrue(len(a_bogus) > 100)
+        self.assertEqual(self.pool.stats.calls, 1)
+
+    async def test_sign_many_keeps_order(self):
+        queries = [f"{QUERY}&i={i}" for i in range(8)]
+        results = await self.pool.sign_many([("sign_datail", (q, USER_AGENT)) for q in queries])
+        self.assertEqual(len(results), 8)
+        self.assertEqual(len(set(results)), 8)
+        self.assertTrue(all(len(self.pool._workers[i].pending) == 0 for i in range(2)))
+
+    async def test_unknown_function(self):
+        with self.assertRaises(JsWorkerError):
+            await self.pool.call("not_a_function")
+        self.assertEqual(self.pool.stats.errors, 1)
+
+    async def test_worker_crash_is_recovered(self):
+        await self.pool.call("sign_datail", QUERY, USER_AGENT)
+        for worker in self.pool._workers:
+            worker.kill()
+        results = await self.pool.sign_many([("sign_reply", (QUERY, USER_AGENT))] * 4)
+        self.assertEqual(len(results), 4)
+        self.assertEqual(self.pool.stats.worker_restarts, 2)
+        self.assertTrue(all(worker.alive for worker in self.pool._workers))
+
+    async def test_matches_execjs(self):
+        # a_bogus embeds a timestamp and random bytes, compare the shape only
+        expected = await asyncio.to_thread(get_a_bogus_from_js, "/aweme/v1/web/comment/list/reply/", QUERY, USER_AGENT)
+        actual = await self.pool.call("sign_reply", QUERY, USER_AGENT)
+        self.assertEqual(len(actual), len(expected))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/test/test_json_codec.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+import json
+import unittest
+
+from tools import json_codec
+
+PAYLOADS = [
+    {"keyword": "编程副业", "page": 1, "page_size": 20, "search_id": "2c7hu5b3kzoivkh848hp0", "sort": "general", "note_type": 0},
+    {"note_id": "5f7e8a0000000000010057a1", "cursor": "", "top_comment_id": "", "image_formats": ["jpg", "webp", "avif"]},
+    {"float": 1e16, "small": 1e-7, "nan": float("nan"), "none": None, "nested": {"emoji": "😀", "ctrl": "\x01 "}},
+    {1: "int key", "big": 2 ** 70},
+    [],
+    "plain",
+]
+
+
+class TestJsonCodec(unittest.TestCase):
+
+    def test_dumps_compact_matches_signing_form(self):
+        for payload in PAYLOADS:
+            self.assertEqual(json_codec.dumps_compact(payload), json.dumps(payload, separators=(",", ":"), ensure_ascii=False))
+
+    def test_dumps_keeps_non_ascii_and_round_trips(self):
+        payload = PAYLOADS[0]
+        self.assertIn("编程副业", json_codec.dumps(payload))
+        self.assertEqual(json_codec.loads(json_codec.dumps(payload)), payload)
+        self.assertEqual(json_codec.loads(json_codec.dumps_bytes(payload)), payload)
+
+    def test_dumps_indent_matches_stdlib_layout(self):
+        items = [{"content": "评论", "pictures": [], "user": {"nickname": "阿江", "tags": [{"id": 1}]}}, {}]
+        for indent in (2, 4):
+            self.assertEqual(json_codec.dumps(items, indent=indent), json.dumps(items, ensure_ascii=False, indent=indent))
+
+    def test_loads_falls_back_to_stdlib(self):
+        self.assertEqual(json_codec.loads('{"a": "\x01"}', strict=False), {"a": "\x01"})
+        self.assertEqual(json_codec.loads('{"big": 1180591620717411303424}'), {"big": 2 ** 70})
+        with self.assertRaises(json.JSONDecodeError):
+            json_codec.loads("not json")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/test/test_pipeline.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+
+import asyncio
+import time
+import unittest
+from unittest import mock
+
+import config
+from tenacity import RetryError
+
+from media_platform.tieba.client import BaiduTieBaClient
+from media_platform.tieba.core import TieBaCrawler
+from media_platform.xhs.core import XiaoHongShuCrawler
+from media_platform.xhs.exception import IPBlockError
+from tools.pipeline import CrawlPipeline, run_keyword_workers, search_fatal_errors, stage_workers
+from tools.resilience import ResiliencePolicy
+from var import source_keyword_var
+
+
+class TestCrawlPipeline(unittest.IsolatedAsyncioTestCase):
+
+    async def test_items_flow_through_every_stage(self):
+        stored = []
+
+        async def search(keyword, emit):
+            source_keyword_var.set(keyword)
+            for page in range(3):
+                await emit(f"{keyword}-{page}")
+
+        async def detail(note_id, emit):
+            await asyncio.sleep(0.01)
+            await emit({"note_id": note_id})
+
+        async def store(note, emit):
+            stored.append((source_keyword_var.get(), note["note_id"]))
+
+        pipeline = CrawlPipeline("test", queue_size=2)
+        pipeline.add_stage("search", search).add_stage("detail", detail, workers=3).add_stage("store", store)
+        stats = await pipeline.run(["a", "b"])
+        # the keyword set by the search stage follows its items into the other stages
+        self.assertEqual(sorted(stored), [("a", "a-0"), ("a", "a-1"), ("a", "a-2"), ("b", "b-0"), ("b", "b-1"), ("b", "b-2")])
+        self.assertEqual(stats["stages"]["detail"]["processed"], 6)
+        self.assertEqual(stats["stages"]["search"]["emitted"], 6)
+        self.assertEqual(source_keyword_var.get(), "")
+
+    async def test_back_pressure(self):
+        produced, consumed = [], []
+        lead = []
+
+        async def produce(_, emit):
+            for index in range(20):
+                await emit(index)
+                produced.append(index)
+                lead.append(len(produced) - len(consumed))
+
+        async def consume(index, emit):
+            await asyncio.sleep(0.005)
+            consumed.append(index)
+
+        pipeline = CrawlPipeline("test", queue_size=3)
+        pipeline.add_stage("produce", produce).add_stage("consume", consume)
+        await pipeline.run([None])
+        self.assertEqual(consumed, list(range(20)))
+        # the producer never runs ahead by more than the queue plus the item in hand
+        self.assertLessEqual(max(lead), 3 + 1)
+
+    async def test_failed_item_is_dropped(self):
+        done = []
+
+        async def handle(item, emit):
+            if item == 2:
+                raise ValueError("broken item")
+            done.append(item)
+
+        pipeline = CrawlPipeline("test").add_stage("handle", handle, workers=2)
+        stats = await pipeline.run(range(5))
+        self.assertEqual(sorted(done), [0, 1, 3, 4])
+        self.assertEqual(stats["stages"]["handle"]["errors"], 1)
+
+    async def test_fatal_error_stops_every_stage(self):
+        stored = []
+
+        async def search(keyword, emit):
+            for page in range(100):
+                if keyword == "blocked" and page == 2:
+                    raise IPBlockError("ip blocked")
+                await emit(page)
+                await asyncio.sleep(0.01)
+
+        async def store(page, emit):
+            if page == 1:
+                # retries gave up on a single item, only that item is dropped
+                await ResiliencePolicy("test", max_attempts=1, base_delay=0).call(self._fail)
+            stored.append(page)
+
+        pipeline = CrawlPipeline("test", fatal_errors=search_fatal_errors(IPBlockError))
+        pipeline.add_stage("search", search, workers=2).add_stage("store", store)
+        with self.assertRaises(IPBlockError):
+            await pipeline.run(["a", "blocked"])
+        # the other keyword was cancelled long before its 100 pages
+        self.assertLess(len(stored), 10)
+        self.assertNotIn(1, stored)
+
+    async def test_fatal_error_after_retries(self):
+        async def crawl_keyword(keyword):
+            policy = ResiliencePolicy("test", max_attempts=2, base_delay=0, jitter=0)
+            await policy.call(self._block)
+
+        with self.assertRaises(RetryError):
+            await run_keyword_workers("test", ["a"], crawl_keyword, fatal_errors=(IPBlockError,))
+
+    @staticmethod
+    async def _fail():
+        raise ValueError("broken item")
+
+    @staticmethod
+    async def _block():
+        raise IPBlockError("ip blocked")
+
+    async def test_stages_overlap(self):
+        async def search(keyword, emit):
+            for page in range(4):
+                await asyncio.sleep(0.05)
+                await emit(page)
+
+        async def comments(page, emit):
+            await asyncio.sleep(0.05)
+
+        pipeline = CrawlPipeline("test").add_stage("search", search).add_stage("comments", comments)
+        start = time.perf_counter()
+        await pipeline.run(["a"])
+        # in lockstep the comments of every page would wait for its search: 8 x 0.05s
+        self.assertLess(time.perf_counter() - start, 0.35)
+
+    def test_stage_workers(self):
+        with mock.patch("config.MAX_CONCURRENCY_NUM", 4):
+            self.assertEqual((stage_workers(0), stage_workers(2)), (4, 2))
+
+
+class TestKeywordWorkers(unittest.IsolatedAsyncioTestCase):
+
+    async def test_keywords_run_concurrently_and_keep_their_keyword(self):
+        running, peak, seen = [0], [0], []
+
+        async def crawl_keyword(keyword):
+            source_keyword_var.set(keyword)
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+            await asyncio.sleep(0.02)
+            seen.append((keyword, source_keyword_var.get()))
+            running[0] -= 1
+
+        with mock.patch("config.KEYWORD_WORKERS", 2):
+            await run_keyword_workers("test", ["a", "b", "c", "d"], crawl_keyword)
+        self.assertEqual(peak[0], 2)
+        self.assertEqual(sorted(seen), [("a", "a"), ("b", "b"), ("c", "c"), ("d", "d")])
+
+
+class FakeXhsClient:
+
+    def __init__(self):
+        self.comment_notes = []
+        self.search_pages = []
+        self.searching = 0
+        self.peak_searching = 0
+
+    async def get_note_by_keyword(self, keyword, search_id, page, sort):
+        self.search_pages.append((keyword, search_id, page))
+        self.searching += 1
+        self.peak_searching = max(self.peak_searching, self.searching)
+        await asyncio.sleep(0.01)
+        self.searching -= 1
+        items = [{"id": f"{keyword}-{page}-{index}", "xsec_source": "pc_search", "xsec_token": "token"} for index in range(2)]
+        items.append({"id": "query", "model_type": "rec_query"})
+        return {"has_more": True, "items": items}
+
+    async def get_note_by_id(self, note_id, xsec_source, xsec_token):
+        return {"note_id": note_id}
+
+    async def get_note_all_comments(self, note_id, xsec_token, crawl_interval, callback, max_count):
+        self.comment_notes.append((source_keyword_var.get(), note_id, xsec_token))
+
+
+class TestXhsSearchPipeline(unittest.IsolatedAsyncioTestCase):
+
+    async def test_search_stores_notes_and_comments(self):
+        crawler = XiaoHongShuCrawler()
+        crawler.xhs_client = FakeXhsClient()
+        stored = []
+
+        async def update_xhs_note(note_detail):
+            stored.append((source_keyword_var.get(), note_detail["note_id"]))
+
+        with mock.patch.multiple(config, KEYWORDS="a,b", CRAWLER_MAX_NOTES_COUNT=40, START_PAGE=1, CRAWLER_MAX_SLEEP_SEC=0,
+                                 ENABLE_GET_COMMENTS=True, ENABLE_GET_MEIDAS=False, MAX_CONCURRENCY_NUM=2), \
+                mock.patch("media_platform.xhs.core.xhs_store.update_xhs_note", update_xhs_note):
+            await crawler.search()
+        expected = sorted((keyword, f"{keyword}-{page}-{index}") for keyword in "ab" for page in (1, 2) for index in range(2))
+        self.assertEqual(sorted(stored), expected)
+        self.assertEqual(sorted(note[:2] for note in crawler.xhs_client.comment_notes), expected)
+
+    async def test_parallel_keywords_keep_their_own_pagination(self):
+        crawler = XiaoHongShuCrawler()
+        crawler.xhs_client = FakeXhsClient()
+        stored = []
+
+        async def update_xhs_note(note_detail):
+            stored.append((source_keyword_var.get(), note_detail["note_id"]))
+
+        with mock.patch.multiple(config, KEYWORDS="a,b,c", KEYWORD_WORKERS=3, CRAWLER_MAX_NOTES_COUNT=40, START_PAGE=1,
+                                 CRAWLER_MAX_SLEEP_SEC=0, ENABLE_GET_COMMENTS=False, ENABLE_GET_MEIDAS=False), \
+                mock.patch("media_platform.xhs.core.xhs_store.update_xhs_note", update_xhs_note):
+            await crawler.search()
+        client = crawler.xhs_client
+        self.assertEqual(client.peak_searching, 3)
+        pages = {}
+        for keyword, search_id, page in client.search_pages:
+            pages.setdefault(keyword, []).append((search_id, page))
+        for keyword, keyword_pages in pages.items():
+            self.assertEqual([page for _, page in keyword_pages], [1, 2])
+            self.assertEqual(len({search_id for search_id, _ in keyword_pages}), 1)
+        self.assertEqual(len({keyword_pages[0][0] for keyword_pages in pages.values()}), 3)
+        # every stored note carries the keyword it was found with
+        self.assertTrue(stored and all(note_id.startswith(keyword + "-") for keyword, note_id in stored))
+        self.assertEqual(len(stored), 12)
+
+
+class TestTiebaKeywordPages(unittest.IsolatedAsyncioTestCase):
+
+    async def test_each_keyword_worker_navigates_its_own_page(self):
+        crawler = TieBaCrawler()
+        main_page = mock.AsyncMock(name="main_page")
+        crawler.browser_context = mock.Mock(new_page=mock.AsyncMock(side_effect=lambda: mock.AsyncMock()))
+        crawler.tieba_client = BaiduTieBaClient(playwright_page=main_page)
+        pages = {}
+
+        async def get_notes_by_keyword(keyword, **kwargs):
+            await asyncio.sleep(0.01)
+            pages.setdefault(keyword, set()).add(crawler.tieba_client.playwright_page)
+            return []
+
+        crawler.tieba_client.get_notes_by_keyword = get_notes_by_keyword
+        with mock.patch.multiple(config, KEYWORDS="a,b,c", KEYWORD_WORKERS=3, START_PAGE=1):
+            await crawler.search()
+        self.assertEqual(sorted(pages), ["a", "b", "c"])
+        worker_pages = [next(iter(keyword_pages)) for keyword_pages in pages.values()]
+        self.assertTrue(all(len(keyword_pages) == 1 for keyword_pages in pages.values()))
+        self.assertEqual(len(set(worker_pages)), 3)
+        self.assertNotIn(main_page, worker_pages)
+        for page in worker_pages:
+            page.close.assert_awaited_once()
+        self.assertIs(crawler.tieba_client.playwright_page, main_page)
+
+
+if __name__ == "__main__":
+    unittest.main()
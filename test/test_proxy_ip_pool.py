@@ -22,6 +22,7 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2023/12/2 14:42
 # @Desc    :
+import asyncio
 import time
 from unittest import IsolatedAsyncioTestCase
 from unittest.mock import AsyncMock, MagicMock
@@ -30,6 +31,27 @@ from proxy.proxy_ip_pool import create_ip_pool, ProxyIpPool
 from proxy.types import IpInfoModel
 
 
+async def start_stand_in_proxy(status: int = 200, delay: float = 0.0) -> asyncio.AbstractServer:
+    """
+    Local HTTP proxy that answers every request itself, after delay seconds
+    """
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        await reader.readuntil(b"\r\n\r\n")
+        await asyncio.sleep(delay)
+        writer.write(f"HTTP/1.1 {status} X\r\nContent-Length: 2\r\nConnection: close\r\n\r\nok".encode())
+        await writer.drain()
+        writer.close()
+
+    return await asyncio.start_server(handle, "127.0.0.1", 0)
+
+
+def stand_in_ip(server: asyncio.AbstractServer, expired_time_ts=None) -> IpInfoModel:
+    return IpInfoModel(
+        ip="127.0.0.1", port=server.sockets[0].getsockname()[1], user="", password="", expired_time_ts=expired_time_ts
+    )
+
+
 class TestIpPool(IsolatedAsyncioTestCase):
     async def test_ip_pool(self):
         pool = await create_ip_pool(ip_pool_count=1, enable_validate_ip=True)
@@ -269,3 +291,134 @@ class TestIpPool(IsolatedAsyncioTestCase):
         self.assertTrue(is_expired, msg="Expired proxy should return True")
 
         print("\n=== Standalone IP proxy expiration detection test completed ===\n")
+
+
+class TestIpPoolValidation(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.fast = await start_stand_in_proxy(delay=0.0)
+        self.slow = await start_stand_in_proxy(delay=0.3)
+        self.broken = await start_stand_in_proxy(status=502)
+        self.servers = [self.fast, self.slow, self.broken]
+        self.provider = MagicMock()
+        self.provider.get_proxy = AsyncMock(
+            side_effect=lambda num: [stand_in_ip(self.slow), stand_in_ip(self.broken), stand_in_ip(self.fast)]
+        )
+        self.pool = ProxyIpPool(
+            ip_pool_count=3,
+            enable_validate_ip=True,
+            ip_provider=self.provider,
+            valid_ip_url="http://validate.local/",
+            validate_timeout=2,
+            low_watermark=0,
+        )
+
+    async def asyncTearDown(self):
+        await self.pool.close()
+        for server in self.servers:
+            server.close()
+            await server.wait_closed()
+
+    async def test_load_validates_concurrently(self):
+        await self.pool.load_proxies()
+        self.assertTrue(self.pool.get_health(stand_in_ip(self.fast)).healthy)
+        self.assertFalse(self.pool.get_health(stand_in_ip(self.broken)).healthy)
+        self.provider.get_proxy = AsyncMock(return_value=[stand_in_ip(self.slow)] * 4)
+        start = time.perf_counter()
+        await self.pool.load_proxies()
+        # four checks of 0.3s each, run side by side
+        self.assertLess(time.perf_counter() - start, 0.9)
+
+    async def test_best_scoring_healthy_proxy_first(self):
+        await self.pool.load_proxies()
+        self.assertEqual((await self.pool.get_proxy()).port, stand_in_ip(self.fast).port)
+        self.assertEqual((await self.pool.get_proxy()).port, stand_in_ip(self.slow).port)
+        # only the broken proxy is left, the pool reloads and validates again
+        self.assertEqual((await self.pool.get_proxy()).port, stand_in_ip(self.fast).port)
+        self.assertEqual(self.provider.get_proxy.await_count, 2)
+
+    async def test_health_check_revalidates_and_drops_expired(self):
+        self.provider.get_proxy = AsyncMock(
+            return_value=[stand_in_ip(self.fast), stand_in_ip(self.slow, expired_time_ts=int(time.time()) - 1)]
+        )
+        await self.pool.load_proxies()
+        self.pool.start_health_check(0.05)
+        # wait for a second check round, a loaded machine may need more than a few intervals
+        for _ in range(40):
+            await asyncio.sleep(0.05)
+            if self.pool.get_health(stand_in_ip(self.fast)).checks > 1:
+                break
+        self.assertEqual([proxy.port for proxy in self.pool.proxy_list], [stand_in_ip(self.fast).port])
+        self.assertGreater(self.pool.get_health(stand_in_ip(self.fast)).checks, 1)
+
+
+class FakeProvider:
+    """Hands out new ip:port pairs on every call"""
+
+    def __init__(self, expire_in: int = 600, delay: float = 0.0):
+        self.expire_in = expire_in
+        self.delay = delay
+        self.calls = 0
+        self._next_port = 10000
+
+    async def get_proxy(self, num: int):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        proxies = []
+        for _ in range(num):
+            self._next_port += 1
+            proxies.append(IpInfoModel(
+                ip="10.0.0.1", port=self._next_port, user="", password="",
+                expired_time_ts=int(time.time()) + self.expire_in,
+            ))
+        return proxies
+
+
+class TestIpPoolRefill(IsolatedAsyncioTestCase):
+
+    def create_pool(self, provider: FakeProvider, low_watermark: int = 1) -> ProxyIpPool:
+        return ProxyIpPool(
+            ip_pool_count=2, enable_validate_ip=False, ip_provider=provider, low_watermark=low_watermark, refill_ttl_sec=60
+        )
+
+    async def test_refill_below_watermark(self):
+        provider = FakeProvider()
+        pool = self.create_pool(provider)
+        await pool.load_proxies()
+        await pool.get_proxy()
+        self.assertIsNone(pool._refill_task)
+        await pool.get_proxy()
+        self.assertIsNotNone(pool._refill_task)
+        await pool._refill_task
+        # asked for the 2 known proxies plus ip_pool_count, the fake provider has no cache so all 4 are new
+        self.assertEqual(len(pool.proxy_list), 4)
+        await pool.get_proxy()
+        stats = pool.stats()
+        self.assertEqual((stats["refills"], stats["stalls"], stats["stalls_avoided"]), (1, 0, 1))
+        self.assertEqual(provider.calls, 2)
+
+    async def test_refill_before_proxies_expire(self):
+        provider = FakeProvider(expire_in=45)
+        pool = self.create_pool(provider)
+        await pool.load_proxies()
+        # one proxy is left, but it expires within refill_ttl_sec
+        await pool.get_proxy()
+        self.assertIsNotNone(pool._refill_task)
+        await pool.close()
+
+    async def test_stall_waits_for_running_refill(self):
+        provider = FakeProvider(delay=0.05)
+        pool = self.create_pool(provider)
+        await pool.load_proxies()
+        await pool.get_proxy()
+        await pool.get_proxy()
+        # the pool is empty and a refill is in flight: get_proxy waits for it instead of calling the provider again
+        await pool.get_proxy()
+        self.assertEqual((pool.stalls, provider.calls), (1, 2))
+
+    async def test_watermark_zero_disables_refill(self):
+        pool = self.create_pool(FakeProvider(), low_watermark=0)
+        await pool.load_proxies()
+        await pool.get_proxy()
+        await pool.get_proxy()
+        self.assertIsNone(pool._refill_task)
@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/test/test_proxy_reputation.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+import asyncio
+import unittest
+from unittest import mock
+
+import httpx
+
+from api.main import app
+from cache.local_cache import ExpiringLocalCache
+from proxy.proxy_ip_pool import ProxyIpPool
+from proxy.proxy_mixin import ProxyRefreshMixin, track_proxy_outcome
+from proxy.proxy_reputation import ProxyReputationStore, ReputationCounters, ip_range_of, proxy_key_of_url
+from proxy.types import IpInfoModel
+
+
+def ip(host: str, port: int = 8000) -> IpInfoModel:
+    return IpInfoModel(ip=host, port=port, user="", password="")
+
+
+class StaticProvider:
+    proxy_brand_name = "static"
+
+    def __init__(self, proxies):
+        self.proxies = proxies
+
+    async def get_proxy(self, num: int):
+        return list(self.proxies)
+
+
+class TestReputationCounters(unittest.TestCase):
+
+    def test_score_and_latency(self):
+        counters = ReputationCounters()
+        self.assertEqual(counters.score, 0.5)
+        for latency_ms in (80, 120, 300, 20000):
+            counters.record_request(True, latency_ms)
+        counters.record_request(False, 5000)
+        counters.captchas += 1
+        self.assertEqual((counters.requests, counters.successes), (5, 4))
+        self.assertAlmostEqual(counters.score, (3 + 1) / (5 + 2))
+        self.assertEqual(counters.latency_histogram[:3], [1, 1, 1])
+        self.assertEqual(counters.latency_percentile(0.5), 250)
+        self.assertEqual(counters.latency_percentile(1), -1)
+        self.assertEqual(ReputationCounters.from_dict(counters.to_dict()).to_dict(), counters.to_dict())
+
+    def test_keys(self):
+        self.assertEqual(proxy_key_of_url("http://u:p@1.2.3.4:8000"), "1.2.3.4:8000")
+        self.assertEqual(ip_range_of("1.2.3.4:8000"), "1.2.3.0/24")
+        self.assertEqual(ip_range_of("proxy.example.com:80"), "proxy.example.com")
+
+
+class TestProxyReputationStore(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.cache = ExpiringLocalCache(cron_interval=60)
+
+    async def test_score_falls_back_to_range(self):
+        store = ProxyReputationStore("static", cache=self.cache)
+        for _ in range(10):
+            store.record_request("1.1.1.1:80", True, 100)
+            store.record_request("2.2.2.2:80", True, 100)
+            store.record_ip_block("2.2.2.2:80")
+        # a new IP of a blocked range inherits its reputation
+        self.assertGreater(store.score("1.1.1.9:80"), 0.9)
+        self.assertLess(store.score("2.2.2.9:80"), 0.1)
+        self.assertEqual(store.score("3.3.3.3:80"), 0.5)
+
+    async def test_saves_add_up_across_runs(self):
+        first = ProxyReputationStore("static", cache=self.cache)
+        first.record_request("1.1.1.1:80", True, 100)
+        await first.save()
+        second = ProxyReputationStore("static", cache=self.cache)
+        await second.load()
+        second.record_request("1.1.1.1:80", False, 100)
+        # another process saved in the meantime
+        first.record_captcha("1.1.1.1:80")
+        await first.save()
+        await second.save()
+        third = ProxyReputationStore("static", cache=self.cache)
+        await third.load()
+        summary = third.summary()
+        self.assertEqual((summary["requests"], summary["captchas"]), (2, 1))
+        self.assertEqual(summary["proxies"][0]["key"], "1.1.1.1:80")
+
+    async def test_unreachable_cache(self):
+        cache = mock.Mock(get=mock.Mock(side_effect=ConnectionError("down")))
+        store = ProxyReputationStore("static", cache=cache)
+        await store.load()
+        store.record_request("1.1.1.1:80", True, 100)
+        await store.save()
+        self.assertEqual(store.session.total.requests, 1)
+
+    async def test_requests_recorded_during_save(self):
+        cache = ExpiringLocalCache(cron_interval=60)
+        store = ProxyReputationStore("static", cache=cache)
+        store.record_request("1.1.1.1:80", True, 100)
+        written = asyncio.Event()
+
+        def slow_set(key, value, expire_time):
+            asyncio.run_coroutine_threadsafe(written.wait(), loop).result()
+            ExpiringLocalCache.set(cache, key, value, expire_time)
+
+        loop = asyncio.get_running_loop()
+        with mock.patch.object(cache, "set", slow_set):
+            save = asyncio.create_task(store.save())
+            await asyncio.sleep(0.05)
+            store.record_request("1.1.1.1:80", False, 100)
+            # the counters being written still count
+            self.assertEqual(store.summary()["requests"], 2)
+            written.set()
+            await save
+        self.assertEqual((store.history.total.requests, store.session.total.requests), (1, 1))
+
+
+class FakeClient(ProxyRefreshMixin):
+
+    def __init__(self, pool: ProxyIpPool, proxy: str):
+        self.proxy = proxy
+        self.init_proxy_pool(pool)
+
+    @track_proxy_outcome
+    async def request(self, url: str):
+        async with self._proxy_http_client() as client:
+            response = await client.get(url)
+        if response.status_code == 461:
+            self._record_proxy_captcha()
+            raise Exception("captcha")
+        data = response.json()
+        if not data["success"]:
+            raise ValueError(data["msg"])
+        return data
+
+
+class TestReputationInUse(unittest.IsolatedAsyncioTestCase):
+
+    async def test_clients_record_and_pool_ranks(self):
+        good, blocked = ip("1.1.1.1"), ip("2.2.2.2")
+        pool = ProxyIpPool(2, False, StaticProvider([blocked, good]), low_watermark=0,
+                           reputation=ProxyReputationStore("static", cache=ExpiringLocalCache()))
+        client = FakeClient(pool, "http://2.2.2.2:8000")
+        transport = httpx.MockTransport(lambda request: httpx.Response(461))
+        with mock.patch("proxy.proxy_mixin.create_async_client", lambda proxy: httpx.AsyncClient(transport=transport)):
+            for _ in range(5):
+                with self.assertRaises(Exception):
+                    await client.request("https://example.com")
+        await pool.load_proxies()
+        counters = pool.reputation.session.proxies["2.2.2.2:8000"]
+        self.assertEqual((counters.requests, counters.successes, counters.captchas), (5, 0, 5))
+        # the proxy that kept getting captchas is handed out last
+        self.assertEqual(await pool.get_proxy(), good)
+
+    async def test_business_error_is_a_failure(self):
+        pool = ProxyIpPool(1, False, StaticProvider([]), low_watermark=0,
+                           reputation=ProxyReputationStore("static", cache=ExpiringLocalCache()))
+        client = FakeClient(pool, "http://1.1.1.1:8000")
+        responses = iter([{"success": True}, {"success": False, "msg": "blocked"}])
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, json=next(responses)))
+        with mock.patch("proxy.proxy_mixin.create_async_client", lambda proxy: httpx.AsyncClient(transport=transport)):
+            await client.request("https://example.com")
+            with self.assertRaises(ValueError):
+                await client.request("https://example.com")
+        counters = pool.reputation.session.proxies["1.1.1.1:8000"]
+        self.assertEqual((counters.requests, counters.successes), (2, 1))
+
+    async def test_rotate_records_ip_block(self):
+        pool = ProxyIpPool(1, False, StaticProvider([ip("1.1.1.1")]), low_watermark=0,
+                           reputation=ProxyReputationStore("static", cache=ExpiringLocalCache()))
+        await pool.load_proxies()
+        client = FakeClient(pool, "http://2.2.2.2:8000")
+        await client.rotate_proxy()
+        self.assertEqual(pool.reputation.session.proxies["2.2.2.2:8000"].ip_blocks, 1)
+        self.assertEqual(client.proxy, "http://1.1.1.1:8000")
+
+
+class TestReputationApi(unittest.IsolatedAsyncioTestCase):
+
+    async def test_reputation_endpoint(self):
+        cache = ExpiringLocalCache()
+        store = ProxyReputationStore("static", cache=cache)
+        store.record_request("1.1.1.1:80", True, 100)
+        await store.save()
+        with mock.patch("api.routers.proxy.CacheFactory.create_cache", return_value=cache):
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+                response = await client.get("/api/proxy/reputation")
+        providers = response.json()["providers"]
+        self.assertEqual([p["provider"] for p in providers], ["static"])
+        self.assertEqual(providers[0]["ranges"][0]["key"], "1.1.1.0/24")
+
+
+if __name__ == "__main__":
+    unittest.main()
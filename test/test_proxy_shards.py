@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/test/test_proxy_shards.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+import asyncio
+import time
+import unittest
+from unittest import mock
+
+from proxy.proxy_mixin import ProxyRefreshMixin
+from proxy.proxy_reputation import ProxyReputationStore
+from proxy.proxy_shards import ProxyShardSet, proxy_shard_key
+from proxy.types import IpInfoModel
+
+
+class FakePool:
+    """Hands out 10.0.0.1:1, 10.0.0.1:2, ... until limit proxies were given"""
+
+    def __init__(self, limit: int = 100, expired_time_ts=None):
+        self.limit = limit
+        self.expired_time_ts = expired_time_ts
+        self.handed_out = 0
+        self.reputation = ProxyReputationStore("fake", cache=mock.Mock())
+
+    async def get_proxy(self) -> IpInfoModel:
+        if self.handed_out >= self.limit:
+            raise Exception("pool is empty")
+        self.handed_out += 1
+        return IpInfoModel(
+            ip="10.0.0.1", port=self.handed_out, user="", password="", expired_time_ts=self.expired_time_ts
+        )
+
+
+class FakeClient(ProxyRefreshMixin):
+
+    def __init__(self, pool: FakePool):
+        self.proxy = None
+        self.init_proxy_pool(pool)
+
+    async def send(self) -> str:
+        async with self._proxy_shards.lease() as lease:
+            return lease.key
+
+
+class TestProxyShardSet(unittest.IsolatedAsyncioTestCase):
+
+    async def test_round_robin(self):
+        shards = ProxyShardSet(FakePool(), size=3)
+        keys = []
+        for _ in range(6):
+            async with shards.lease() as lease:
+                keys.append(lease.key)
+        self.assertEqual(keys, ["10.0.0.1:1", "10.0.0.1:2", "10.0.0.1:3"] * 2)
+        # every proxy keeps one pooled client
+        self.assertIs(shards.leases[0].client, shards.leases[0].client)
+        self.assertIsNot(shards.leases[0].client, shards.leases[1].client)
+        await shards.close()
+
+    async def test_least_loaded(self):
+        shards = ProxyShardSet(FakePool(), size=2, strategy="least_loaded")
+        async with shards.lease() as first:
+            async with shards.lease() as second:
+                self.assertNotEqual(first.key, second.key)
+                self.assertEqual((first.in_flight, second.in_flight), (1, 1))
+        self.assertEqual(shards.leases[0].in_flight, 0)
+
+    async def test_sticky_keys_survive_other_bans(self):
+        shards = ProxyShardSet(FakePool(), size=4, strategy="sticky")
+        with proxy_shard_key("note-a"):
+            note_a = (await shards.pick()).key
+            self.assertEqual((await shards.pick()).key, note_a)
+        other = next(lease for lease in shards.leases if lease.key != note_a)
+        await shards.replace(other, reason="banned")
+        self.assertEqual((await shards.pick("note-a")).key, note_a)
+        self.assertEqual(len(shards.leases), 4)
+
+    async def test_per_proxy_rate_limit(self):
+        shards = ProxyShardSet(FakePool(), size=2, min_interval=0.2)
+        start = time.monotonic()
+
+        async def send():
+            async with shards.lease():
+                pass
+
+        # two requests per proxy: only the second one of each proxy waits
+        await asyncio.gather(*[send() for _ in range(4)])
+        self.assertTrue(0.2 <= time.monotonic() - start < 0.4)
+
+    async def test_expired_lease_replaced(self):
+        shards = ProxyShardSet(FakePool(expired_time_ts=int(time.time()) + 600), size=1)
+        lease = await shards.pick()
+        lease.proxy.expired_time_ts = int(time.time()) + 10
+        self.assertIsNot(await shards.pick(), lease)
+        self.assertEqual(shards.replacements, 1)
+
+    async def test_shortage_of_pool(self):
+        shards = ProxyShardSet(FakePool(limit=2), size=3)
+        await shards.start()
+        self.assertEqual(len(shards.leases), 2)
+        await shards.replace(shards.leases[0], reason="banned")
+        self.assertEqual([lease.key for lease in shards.leases], ["10.0.0.1:2"])
+
+
+class TestShardedClient(unittest.IsolatedAsyncioTestCase):
+
+    async def test_rotate_bans_only_the_blocked_proxy(self):
+        with mock.patch("config.IP_PROXY_SHARD_NUM", 3):
+            client = FakeClient(FakePool())
+
+        async def blocked_request():
+            await client.send()
+            await client.rotate_proxy()
+
+        sent = [await client.send() for _ in range(3)]
+        await asyncio.create_task(blocked_request())
+        keys = [lease.key for lease in client._proxy_shards.leases]
+        # the first proxy sent the blocked request and was replaced in place
+        self.assertEqual(keys, ["10.0.0.1:4"] + sent[1:])
+        self.assertEqual(client._proxy_shards.bans, 1)
+        self.assertEqual(client._proxy_ip_pool.reputation.session.proxies["10.0.0.1:1"].ip_blocks, 1)
+        self.assertIsNone(client.proxy)
+        await client.close_proxy_shards()
+
+    async def test_sharded_client_never_takes_a_single_proxy(self):
+        with mock.patch("config.IP_PROXY_SHARD_NUM", 3):
+            client = FakeClient(FakePool())
+        # no request went through a lease yet, so there is nothing to ban
+        await client.rotate_proxy()
+        await client._refresh_proxy_if_expired()
+        self.assertIsNone(client.proxy)
+        self.assertEqual(client._proxy_ip_pool.handed_out, 0)
+
+    async def test_single_proxy_mode(self):
+        client = FakeClient(FakePool())
+        self.assertIsNone(client._proxy_shards)
+        await client.rotate_proxy()
+        self.assertEqual(client.proxy, "http://10.0.0.1:1")
+
+
+if __name__ == "__main__":
+    unittest.main()
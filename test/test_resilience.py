@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/test/test_resilience.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+import asyncio
+import unittest
+from unittest import mock
+
+from tenacity import RetryError
+
+from tools.resilience import CircuitBreaker, CircuitOpenError, ErrorAction, ResiliencePolicy, get_resilience_stats, resilience_run
+
+
+class BlockedError(Exception):
+    pass
+
+
+class FakeClient:
+
+    def __init__(self, failures, exc_type=ValueError):
+        self.failures = failures
+        self.exc_type = exc_type
+        self.calls = 0
+        self.rotations = 0
+
+    async def rotate_proxy(self):
+        self.rotations += 1
+
+    async def request(self, method, url):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.exc_type("boom")
+        return {"url": url}
+
+
+class TestResiliencePolicy(unittest.IsolatedAsyncioTestCase):
+
+    def _policy(self, **kwargs):
+        kwargs.setdefault("base_delay", 0)
+        kwargs.setdefault("jitter", 0)
+        return ResiliencePolicy("test", rotate_proxy_errors=(BlockedError,), retry_budget=0, **kwargs)
+
+    async def test_retry_then_success(self):
+        policy = self._policy()
+        client = FakeClient(failures=2)
+        res = await policy.retry(FakeClient.request)(client, "GET", "https://example.com/api/note/123456")
+        self.assertEqual(res, {"url": "https://example.com/api/note/123456"})
+        self.assertEqual(client.calls, 3)
+        self.assertEqual(policy.stats.retries, 2)
+        self.assertIn("/api/note/{id}", policy.breakers)
+
+    async def test_exhausted_raises_retry_error(self):
+        policy = self._policy()
+        client = FakeClient(failures=10)
+        with self.assertRaises(RetryError):
+            await policy.call(client.request, "GET", "u")
+        self.assertEqual(client.calls, 3)
+        self.assertEqual(policy.stats.exhausted_calls, 1)
+
+    async def test_rotate_proxy_before_retry(self):
+        policy = self._policy()
+        client = FakeClient(failures=1, exc_type=BlockedError)
+        await policy.call(client.request, "GET", "u", owner=client)
+        self.assertEqual(client.rotations, 1)
+        self.assertEqual(policy.classify(BlockedError()), ErrorAction.ROTATE_PROXY)
+
+    async def test_fatal_error_not_retried(self):
+        policy = self._policy(retryable_errors=(BlockedError,))
+        client = FakeClient(failures=10, exc_type=KeyError)
+        with self.assertRaises(KeyError):
+            await policy.call(client.request, "GET", "u")
+        self.assertEqual(client.calls, 1)
+
+    async def test_retry_budget(self):
+        policy = self._policy()
+        policy.retry_budget = 1
+        client = FakeClient(failures=10)
+        with self.assertRaises(RetryError):
+            await policy.call(client.request, "GET", "u")
+        self.assertEqual(client.calls, 2)
+
+    async def test_circuit_breaker_rejects_requests(self):
+        policy = self._policy(max_attempts=1)
+        policy.breakers["ep"] = CircuitBreaker(failure_threshold=2, recovery_timeout=60)
+        client = FakeClient(failures=10)
+        for _ in range(2):
+            with self.assertRaises(RetryError):
+                await policy.call(client.request, "GET", "u", endpoint="ep")
+        with self.assertRaises(CircuitOpenError):
+            await policy.call(client.request, "GET", "u", endpoint="ep")
+        self.assertEqual(client.calls, 2)
+        self.assertEqual(policy.breakers["ep"].trips, 1)
+
+    async def test_half_open_breaker_lets_one_trial_through(self):
+        policy = self._policy(max_attempts=1, retryable_errors=(ValueError,))
+        breaker = policy.breakers["ep"] = CircuitBreaker(failure_threshold=1, recovery_timeout=0)
+        breaker.record_failure()
+        trial_started = asyncio.Event()
+        finish_trial = asyncio.Event()
+
+        async def slow_fatal():
+            trial_started.set()
+            await finish_trial.wait()
+            raise KeyError("fatal")
+
+        trial = asyncio.create_task(policy.call(slow_fatal, endpoint="ep"))
+        await trial_started.wait()
+        with self.assertRaises(CircuitOpenError):
+            await policy.call(FakeClient(failures=0).request, "GET", "u", endpoint="ep")
+        finish_trial.set()
+        with self.assertRaises(KeyError):
+            await trial
+        # a fatal error of the trial re-opens the breaker as well
+        self.assertEqual((breaker.state, breaker.trial_in_flight), (CircuitBreaker.OPEN, False))
+
+    async def test_runs_do_not_share_state(self):
+        policy = self._policy(max_attempts=1)
+        policy.retry_budget = None
+
+        async def crawl(failures: int):
+            with resilience_run():
+                client = FakeClient(failures=failures)
+                for _ in range(2):
+                    try:
+                        await policy.call(client.request, "GET", "u", endpoint="ep")
+                    except RetryError:
+                        pass
+                return get_resilience_stats()["test"]
+
+        with mock.patch("config.CIRCUIT_BREAKER_FAILURE_THRESHOLD", 2), mock.patch("config.RETRY_BUDGET_PER_RUN", 7):
+            failing, healthy = await asyncio.gather(crawl(10), crawl(0))
+            # a new run starts with a closed breaker although the last one left it open
+            fresh = await crawl(0)
+        self.assertEqual(failing["open_breakers"], ["ep"])
+        self.assertEqual((healthy["open_breakers"], healthy["calls"]), ([], 2))
+        self.assertEqual((fresh["open_breakers"], fresh["retry_budget"]), ([], 7))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/test/test_sign_service.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+import os
+import tempfile
+import unittest
+
+import httpx
+
+from sign_server_main import DouyinSignRequest, SignBackend, XhsSignRequest, create_app
+from tools.sign_service import SignServiceClient
+
+
+class FakeSignBackend(SignBackend):
+    """Answers without a browser, node or network"""
+
+    def __init__(self):
+        super().__init__()
+        self.xhs_requests = []
+        self.fail = False
+
+    async def sign_xhs(self, request: XhsSignRequest):
+        if self.fail:
+            raise RuntimeError("page crashed")
+        self.xhs_requests.append(request)
+        return {"x-s": f"XYS_{request.uri}", "x-t": "1", "x-s-common": request.a1, "x-b3-traceid": "t"}
+
+    async def sign_douyin(self, request: DouyinSignRequest):
+        return f"{request.params}|{request.user_agent}"
+
+    async def get_bilibili_wbi_keys(self):
+        return "img", "sub"
+
+
+class TestSignService(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.backend = FakeSignBackend()
+        transport = httpx.ASGITransport(app=create_app(self.backend), raise_app_exceptions=False)
+        self.client = SignServiceClient(transport=transport)
+
+    async def asyncTearDown(self):
+        await self.client.close()
+
+    async def test_round_trip(self):
+        self.assertTrue(await self.client.ping())
+        signs = await self.client.sign_xhs(
+            "/api/sns/web/v1/search/notes", {"keyword": "编程", "page": 1}, "a1v", "POST", "b1v"
+        )
+        self.assertEqual(signs["x-s"], "XYS_/api/sns/web/v1/search/notes")
+        self.assertEqual(signs["x-s-common"], "a1v")
+        self.assertEqual(self.backend.xhs_requests[0].b1, "b1v")
+        # key order matters for the signed string, it survives the round trip
+        self.assertEqual(list(self.backend.xhs_requests[0].data), ["keyword", "page"])
+        self.assertEqual(await self.client.sign_douyin("/aweme/v1/web/comment/list/reply/", "a=1", "ua"), "a=1|ua")
+        self.assertEqual(await self.client.get_bilibili_wbi_keys(), ("img", "sub"))
+        self.assertEqual(self.client.fallbacks, 0)
+
+    async def test_server_error_falls_back_without_disabling(self):
+        self.backend.fail = True
+        self.assertIsNone(await self.client.sign_xhs("/api/sns/web/v1/feed", {}, "", "POST"))
+        self.assertEqual(self.client.fallbacks, 1)
+        self.assertTrue(self.client.available)
+
+
+class RecordingXhsPool:
+
+    def __init__(self):
+        self.calls = []
+
+    async def sign(self, uri, data=None, a1="", method="POST", b1=None):
+        self.calls.append((uri, a1, b1))
+        return {}
+
+
+class TestSignBackendXhs(unittest.IsolatedAsyncioTestCase):
+
+    async def test_crawler_b1_reaches_signing_pages(self):
+        backend = SignBackend()
+        backend._xhs_pool = RecordingXhsPool()
+        await backend.sign_xhs(XhsSignRequest(uri="/api/a", a1="a1v", b1="b1v"))
+        # older clients send no b1, the page then uses its own
+        await backend.sign_xhs(XhsSignRequest(uri="/api/b", a1="a1v"))
+        self.assertEqual(backend._xhs_pool.calls, [("/api/a", "a1v", "b1v"), ("/api/b", "a1v", None)])
+
+
+class TestSignServiceAbsent(unittest.IsolatedAsyncioTestCase):
+
+    async def test_disabled(self):
+        client = SignServiceClient()
+        self.assertFalse(client.enabled)
+        self.assertIsNone(await client.sign_douyin("/aweme/v1/web/aweme/detail/", "a=1", "ua"))
+        self.assertEqual(client.calls, 0)
+
+    async def test_unreachable_is_skipped_for_retry_interval(self):
+        uds = os.path.join(tempfile.mkdtemp(), "missing.sock")
+        client = SignServiceClient(uds=uds, retry_interval=60)
+        self.assertIsNone(await client.get_bilibili_wbi_keys())
+        self.assertFalse(client.available)
+        self.assertIsNone(await client.get_bilibili_wbi_keys())
+        self.assertEqual((client.calls, client.fallbacks), (1, 1))
+        await client.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/test/test_task_runner.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+import asyncio
+import time
+import unittest
+from unittest import mock
+
+import config
+from server.models import CrawlRequest
+from server.task_runner import TaskExecutor, TaskStatus
+
+# seconds one fake crawl takes on each platform
+CRAWL_SEC = {"xhs": 0.1, "dy": 0.2, "bili": 0.3}
+
+
+class TestPlatformRounds(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.crawled = []
+
+        async def run_with_capture(wrapper, keywords):
+            self.crawled.append((config.PLATFORM, config.KEYWORDS))
+            await asyncio.sleep(CRAWL_SEC[wrapper.platform])
+            return {"posts": [], "comments": {}, "success": True, "error": None}
+
+        db_handler = mock.Mock(save_batch=mock.AsyncMock(return_value=0), create_indexes=mock.AsyncMock())
+        patches = [
+            mock.patch("server.task_runner.CrawlerWrapper.run_with_capture", run_with_capture),
+            mock.patch("server.task_runner.MediaCrawlerDBHandler", return_value=db_handler),
+            mock.patch("server.task_runner.ROUND_COOLDOWN_SEC", (0.2, 0.2)),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    async def test_platforms_run_concurrently(self):
+        request = CrawlRequest(platforms=list(CRAWL_SEC), keyword_groups=[["a"], ["b"]])
+        task_status = TaskStatus("t1", 2, request.platforms)
+        start = time.monotonic()
+        await TaskExecutor._run_task_background(request, task_status)
+        elapsed = time.monotonic() - start
+        # as long as the slowest platform: 0.3 + 0.2 cooldown + 0.3, not the sum of all of them
+        self.assertLess(elapsed, 1.2)
+        self.assertEqual(task_status.status, "completed")
+        self.assertEqual(sorted(self.crawled), [("bili", "a"), ("bili", "b"), ("dy", "a"), ("dy", "b"), ("xhs", "a"), ("xhs", "b")])
+        self.assertEqual({item["state"] for item in task_status.platforms.values()}, {"done"})
+
+    async def test_status_while_running(self):
+        request = CrawlRequest(platforms=list(CRAWL_SEC), keyword_groups=[["a"], ["b"]])
+        task_status = TaskStatus("t2", 2, request.platforms)
+        task = asyncio.create_task(TaskExecutor._run_task_background(request, task_status))
+        await asyncio.sleep(0.15)
+        # xhs rests after its first round while the others are still crawling it
+        self.assertEqual(task_status.platforms["xhs"], {"round": 1, "state": "cooling_down"})
+        self.assertEqual(task_status.current_platform, "dy,bili")
+        self.assertEqual(task_status.current_round, 1)
+        self.assertAlmostEqual(task_status.progress, 100 / 6)
+        await task
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/test/test_tieba_extractor.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+import os
+import unittest
+
+import config
+from media_platform.tieba import help as tieba_help
+from media_platform.tieba.help import TieBaExtractor
+
+TEST_DATA_DIR = os.path.join(os.path.dirname(tieba_help.__file__), "test_data")
+
+
+def read_page(name: str) -> str:
+    with open(os.path.join(TEST_DATA_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+class TestTieBaExtractor(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.extractor = TieBaExtractor()
+
+    def test_extract_note_detail(self):
+        note = self.extractor.extract_note_detail(read_page("note_detail.html"))
+        self.assertEqual(note.note_id, "9117905169")
+        self.assertEqual(note.tieba_name, "以太比特吧")
+        self.assertEqual(note.ip_location, "广东")
+        self.assertEqual(note.publish_time, "2024-08-05 16:56")
+        self.assertEqual((note.total_replay_num, note.total_replay_page), (786, 13))
+
+    def test_extract_comments_share_page_fields(self):
+        comments = self.extractor.extract_tieba_note_parment_comments(read_page("note_comments.html"), "123456")
+        self.assertEqual(len(comments), 30)
+        self.assertEqual({c.tieba_name for c in comments}, {"网球风云吧"})
+        self.assertEqual(comments[0].comment_id, "150726491368")
+        self.assertEqual(comments[0].ip_location, "福建")
+
+    def test_extract_note_lists(self):
+        self.assertEqual(len(self.extractor.extract_search_note_list(read_page("search_keyword_notes.html"))), 10)
+        self.assertEqual(len(self.extractor.extract_tieba_note_list(read_page("tieba_note_list.html"))), 48)
+
+    async def test_extract_in_process_pool(self):
+        pool_size, min_chars = config.TIEBA_EXTRACT_PROCESS_POOL_SIZE, config.TIEBA_EXTRACT_PROCESS_MIN_CHARS
+        config.TIEBA_EXTRACT_PROCESS_POOL_SIZE, config.TIEBA_EXTRACT_PROCESS_MIN_CHARS = 1, 0
+        try:
+            page = read_page("note_comments.html")
+            comments = await tieba_help.extract_in_process_pool(
+                self.extractor.extract_tieba_note_parment_comments, page, note_id="123456"
+            )
+            self.assertEqual(comments, self.extractor.extract_tieba_note_parment_comments(page, "123456"))
+        finally:
+            tieba_help.shutdown_process_pool()
+            config.TIEBA_EXTRACT_PROCESS_POOL_SIZE, config.TIEBA_EXTRACT_PROCESS_MIN_CHARS = pool_size, min_chars
+
+
+if __name__ == "__main__":
+    unittest.main()
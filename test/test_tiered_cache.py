@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/test/test_tiered_cache.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+
+import asyncio
+import unittest
+from unittest import mock
+
+from cache.async_redis_cache import AsyncRedisCache
+from cache.cache_factory import CacheFactory
+from cache.local_cache import ExpiringLocalCache
+from cache.tiered_cache import TieredCache
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+
+class TestLocalCacheClear(unittest.IsolatedAsyncioTestCase):
+
+    async def test_clear(self):
+        cache = ExpiringLocalCache(cron_interval=60)
+        cache.set("a:1", 1, 10)
+        cache.set("a:2", 2, 10)
+        self.assertEqual(cache.keys("a:*"), ["a:1", "a:2"])
+        cache.clear()
+        self.assertEqual((len(cache), cache.keys("a:*"), cache.stats()["bytes"]), (0, [], 0))
+        cache.set("a:3", 3, 10)
+        self.assertEqual(cache.keys("a:*"), ["a:3"])
+
+    async def test_close(self):
+        cache = ExpiringLocalCache(cron_interval=60)
+        cron_task = cache._cron_task
+        cache.set("a", 1, 10)
+        cache.close()
+        cache.close()
+        await asyncio.sleep(0)
+        self.assertTrue(cron_task.cancelled())
+        self.assertEqual(cache.get("a"), 1)
+
+
+@unittest.skipUnless(fakeredis, "fakeredis is not installed")
+class TestTieredCache(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.server = fakeredis.FakeServer()
+        self.caches = []
+
+    async def asyncTearDown(self):
+        for cache in self.caches:
+            await cache.close()
+
+    def new_cache(self, **kwargs) -> TieredCache:
+        l2 = AsyncRedisCache(client=fakeredis.aioredis.FakeRedis(server=self.server))
+        kwargs.setdefault("invalidation", False)
+        cache = CacheFactory.create_cache("tiered", l2=l2, l1_ttl=5, **kwargs)
+        self.caches.append(cache)
+        return cache
+
+    async def wait_for(self, condition) -> None:
+        for _ in range(100):
+            if condition():
+                return
+            await asyncio.sleep(0.01)
+        self.fail("condition not met in time")
+
+    async def test_write_through_and_tier_stats(self):
+        cache = self.new_cache()
+        await cache.set("proxy:1", {"ip": "1.1.1.1"}, 60)
+        self.assertEqual(await cache.l2.get("proxy:1"), {"ip": "1.1.1.1"})
+        self.assertEqual(await cache.get("proxy:1"), {"ip": "1.1.1.1"})
+        # written by another process straight into redis
+        await cache.l2.set("proxy:2", {"ip": "2.2.2.2"}, 60)
+        self.assertEqual(await cache.mget(["proxy:1", "proxy:2", "proxy:3"]), [{"ip": "1.1.1.1"}, {"ip": "2.2.2.2"}, None])
+        self.assertEqual(await cache.get("proxy:2"), {"ip": "2.2.2.2"})
+        stats = cache.stats()
+        self.assertEqual((stats["l1_hits"], stats["l2_hits"], stats["misses"]), (3, 1, 1))
+        self.assertEqual((stats["l1_hit_ratio"], stats["l2_hit_ratio"]), (0.6, 0.5))
+        self.assertEqual(sorted(await cache.keys("proxy:*")), ["proxy:1", "proxy:2"])
+
+    async def test_l1_is_bounded(self):
+        cache = self.new_cache(l1_max_entries=2)
+        await cache.mset({"a": 1, "b": 2, "c": 3}, 60)
+        self.assertEqual(len(cache.l1), 2)
+        self.assertEqual(await cache.mget(["a", "b", "c"]), [1, 2, 3])
+        self.assertEqual(cache.stats()["l2_hits"], 1)
+
+    async def test_l1_ttl_bounds_staleness(self):
+        cache = self.new_cache()
+        await cache.set("a", 1, 60)
+        await cache.l2.set("a", 2, 60)
+        self.assertEqual(await cache.get("a"), 1)
+        cache.l1._purge_expired(float("inf"))
+        self.assertEqual(await cache.get("a"), 2)
+
+    async def test_invalidated_read_does_not_fill_l1(self):
+        cache = self.new_cache()
+        await cache.l2.mset({"a": "old", "b": "old"}, 60)
+        read_done, release = asyncio.Event(), asyncio.Event()
+        l2_mget = cache.l2.mget
+
+        async def slow_mget(keys):
+            values = await l2_mget(keys)
+            read_done.set()
+            await release.wait()
+            return values
+
+        with mock.patch.object(cache.l2, "mget", slow_mget):
+            read = asyncio.create_task(cache.mget(["a", "b"]))
+            await read_done.wait()
+            await cache.set("a", "new", 60)
+            release.set()
+            self.assertEqual(await read, ["old", "old"])
+        # the value redis returned before the write does not replace the written one
+        self.assertEqual(cache.l1.get("a"), "new")
+        self.assertEqual(cache.l1.get("b"), "old")
+        self.assertEqual(cache._invalidated_at, {})
+
+    async def test_invalidation_between_processes(self):
+        writer, reader = self.new_cache(invalidation=True), self.new_cache(invalidation=True)
+        await writer.wait_subscribed()
+        await reader.wait_subscribed()
+        await writer.set("proxy:1", "old", 60)
+        await self.wait_for(lambda: reader.invalidations_received == 1)
+        self.assertEqual(await reader.get("proxy:1"), "old")
+        await writer.set("proxy:1", "new", 60)
+        await self.wait_for(lambda: reader.invalidations_received == 2)
+        self.assertEqual(await reader.get("proxy:1"), "new")
+        await writer.delete("proxy:1")
+        await self.wait_for(lambda: reader.invalidations_received == 3)
+        self.assertIsNone(await reader.get("proxy:1"))
+        # a cache ignores its own messages
+        self.assertEqual(writer.invalidations_received, 0)
+        self.assertEqual(await writer.get("proxy:1"), None)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/test/test_xhs_extractor.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+import unittest
+
+from media_platform.xhs.extractor import XiaoHongShuExtractor
+
+NOTE_ID = "64b95d01000000000c034587"
+
+NOTE_PAGE = (
+    '<html><body><script>window.__INITIAL_STATE__={"global":{"fullscreen":undefined},'
+    '"feed":{"feeds":[{"id":"1","noteCard":{"displayTitle":"feed"}}]},'
+    '"note":{"currentNoteId":"' + NOTE_ID + '","noteDetailMap":{"' + NOTE_ID + '":{"comments":{"list":[]},'
+    '"note":{"noteId":"' + NOTE_ID + '","desc":"undefined is just a word","video":undefined,'
+    '"interactInfo":{"likedCount":"10"},"imageList":[undefined,{"urlDefault":"http://a"}]}}}},'
+    '"nioStore":{"isLoading":false}}</script><script src="index.js"></script></body></html>'
+)
+
+CREATOR_PAGE = (
+    '<html><body><script>window.__INITIAL_STATE__={"user":{"userPageData":{"basicInfo":{"nickname":"阿江",'
+    '"desc":undefined}},"notes":[]}}</script></body></html>'
+)
+
+
+class TestXiaoHongShuExtractor(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.extractor = XiaoHongShuExtractor()
+
+    def test_extract_note_detail(self):
+        note = self.extractor.extract_note_detail_from_html(NOTE_ID, NOTE_PAGE)
+        self.assertEqual(note["note_id"], NOTE_ID)
+        self.assertEqual(note["interact_info"]["liked_count"], "10")
+        self.assertEqual(note["video"], "")
+        self.assertEqual(note["image_list"], ["", {"url_default": "http://a"}])
+        self.assertEqual(note["desc"], "undefined is just a word")
+
+    def test_extract_note_detail_missing(self):
+        self.assertIsNone(self.extractor.extract_note_detail_from_html("unknown", NOTE_PAGE))
+        self.assertIsNone(self.extractor.extract_note_detail_from_html(NOTE_ID, "<html>captcha</html>"))
+
+    async def test_extract_note_detail_in_thread(self):
+        self.extractor.THREAD_OFFLOAD_MIN_CHARS = 0
+        note = await self.extractor.extract_note_detail_from_html_async(NOTE_ID, NOTE_PAGE)
+        self.assertEqual(note["note_id"], NOTE_ID)
+
+    def test_extract_creator_info(self):
+        info = self.extractor.extract_creator_info_from_html(CREATOR_PAGE)
+        self.assertEqual(info, {"basicInfo": {"nickname": "阿江", "desc": None}})
+
+
+if __name__ == "__main__":
+    unittest.main()
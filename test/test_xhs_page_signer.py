@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/test/test_xhs_page_signer.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+import asyncio
+import unittest
+
+from media_platform.xhs.playwright_sign import (
+    GET_B1_JS,
+    SIGN_BATCH_JS,
+    XhsPageSigner,
+    _build_xs_common,
+    sign_with_playwright,
+)
+
+
+class FakeXhsPage:
+    """Answers the evaluate calls the signer makes, mnsv2 is replaced by a readable marker"""
+
+    def __init__(self, b1: str = "b1-value"):
+        self.b1 = b1
+        self.evaluate_calls = []
+
+    async def evaluate(self, expression, arg=None):
+        self.evaluate_calls.append(expression)
+        await asyncio.sleep(0.01)
+        if expression == GET_B1_JS:
+            return self.b1
+        if expression == SIGN_BATCH_JS:
+            items, need_b1 = arg
+            return {"b1": self.b1 if need_b1 else None, "signs": [f"mns:{md5}" for _, md5 in items]}
+        sign_str, md5_str = arg
+        return f"mns:{md5_str}"
+
+
+class TestXhsPageSigner(unittest.IsolatedAsyncioTestCase):
+
+    async def test_concurrent_requests_share_one_evaluate(self):
+        page = FakeXhsPage()
+        signer = XhsPageSigner(page)
+        requests = [("/api/sns/web/v2/comment/page", {"note_id": "n1", "cursor": str(i)}, "GET") for i in range(10)]
+        results = await signer.sign_many(requests, a1="a1-value")
+        self.assertEqual(len(results), 10)
+        self.assertEqual(page.evaluate_calls, [SIGN_BATCH_JS])
+        self.assertEqual(signer.signed, 10)
+
+    async def test_batched_signature_matches_single_path(self):
+        page = FakeXhsPage()
+        signer = XhsPageSigner(page)
+        payload = {"keyword": "咖啡", "page": 1, "page_size": 20}
+        batched = await signer.sign("/api/sns/web/v1/search/notes", payload, "a1-value", "POST")
+        single = await sign_with_playwright(page, "/api/sns/web/v1/search/notes", payload, "a1-value", "POST")
+        self.assertEqual(batched["x-s"], single["x-s"])
+
+    async def test_b1_cached_until_invalidated(self):
+        page = FakeXhsPage()
+        signer = XhsPageSigner(page)
+        await signer.sign("/api/a", {"a": 1}, method="GET")
+        await signer.sign("/api/b", {"b": 1}, method="GET")
+        self.assertEqual(await signer.get_b1(), "b1-value")
+        self.assertEqual(page.evaluate_calls, [SIGN_BATCH_JS, SIGN_BATCH_JS])
+
+        page.b1 = "new-b1"
+        signer.invalidate_b1()
+        self.assertEqual(await signer.get_b1(), "new-b1")
+
+    async def test_given_b1_replaces_page_b1(self):
+        page = FakeXhsPage(b1="service-b1")
+        signer = XhsPageSigner(page)
+        signs = await signer.sign("/api/a", {"a": 1}, "a1-value", "GET", b1="crawler-b1")
+        expected = _build_xs_common("a1-value", "crawler-b1", signs["x-s"], signs["x-t"])
+        self.assertEqual(signs["x-s-common"], expected)
+        self.assertEqual(page.evaluate_calls, [SIGN_BATCH_JS])
+
+    async def test_failed_evaluate_returns_empty_signature(self):
+        page = FakeXhsPage()
+
+        async def broken_evaluate(expression, arg=None):
+            raise RuntimeError("Target page, context or browser has been closed")
+
+        page.evaluate = broken_evaluate
+        signer = XhsPageSigner(page)
+        results = await signer.sign_many([("/api/a", {"a": 1}, "GET")] * 3)
+        self.assertEqual(len(results), 3)
+        self.assertEqual(signer.queue_depth, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
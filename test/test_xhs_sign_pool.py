@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/test/test_xhs_sign_pool.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+import asyncio
+import unittest
+
+from media_platform.xhs.playwright_sign import SIGN_BATCH_JS
+from media_platform.xhs.sign_pool import XhsSignerPool
+
+
+class FakeSignPage:
+    def __init__(self, delay: float = 0.01, hang: bool = False):
+        self.delay = delay
+        self.hang = hang
+        self.closed = False
+        self.signed = 0
+
+    def on(self, event, handler):
+        self.crash_handler = handler
+
+    async def goto(self, url):
+        pass
+
+    async def close(self):
+        self.closed = True
+
+    async def evaluate(self, expression, arg=None):
+        assert expression == SIGN_BATCH_JS
+        if self.hang:
+            await asyncio.sleep(3600)
+        await asyncio.sleep(self.delay)
+        items, need_b1 = arg
+        self.signed += len(items)
+        return {"b1": "b1" if need_b1 else None, "signs": ["mns" for _ in items]}
+
+
+class FakeContext:
+    def __init__(self):
+        self.pages = []
+
+    async def new_page(self):
+        page = FakeSignPage()
+        self.pages.append(page)
+        return page
+
+
+class TestXhsSignerPool(unittest.IsolatedAsyncioTestCase):
+
+    async def test_requests_spread_over_pages(self):
+        context = FakeContext()
+        pool = XhsSignerPool(context, size=4)
+        await pool.start()
+        await asyncio.gather(*[pool.sign("/api/a", {"i": i}, "a1", "GET") for i in range(40)])
+        self.assertEqual(len(context.pages), 4)
+        self.assertTrue(all(page.signed > 0 for page in context.pages))
+        self.assertEqual(pool.queue_depth, 0)
+
+    async def test_crawler_page_is_reused_and_not_closed(self):
+        context = FakeContext()
+        crawler_page = FakeSignPage()
+        pool = XhsSignerPool(context, size=2)
+        await pool.start(crawler_page)
+        self.assertIs(pool.signers[0].page, crawler_page)
+        self.assertEqual(len(context.pages), 1)
+        await pool.close()
+        self.assertFalse(crawler_page.closed)
+        self.assertTrue(context.pages[0].closed)
+
+    async def test_hung_page_is_recycled(self):
+        context = FakeContext()
+        pool = XhsSignerPool(context, size=1, sign_timeout=0.05)
+        await pool.start()
+        hung_page = context.pages[0]
+        hung_page.hang = True
+        signs = await pool.sign("/api/a", {"a": 1}, "a1", "GET")
+        self.assertTrue(signs["x-s"].startswith("XYS_"))
+        await asyncio.sleep(0.01)
+        self.assertEqual(pool.recycled_pages, 1)
+        self.assertTrue(hung_page.closed)
+        self.assertIsNot(pool.signers[0].page, hung_page)
+        await pool.sign("/api/a", {"a": 1}, "a1", "GET")
+        self.assertEqual(pool.signers[0].page.signed, 1)
+
+    async def test_crashed_page_is_skipped_and_replaced(self):
+        context = FakeContext()
+        pool = XhsSignerPool(context, size=2)
+        await pool.start()
+        crashed_page = context.pages[0]
+        crashed_page.crash_handler(crashed_page)
+        await pool.sign("/api/a", {"a": 1}, "a1", "GET")
+        self.assertEqual(crashed_page.signed, 0)
+        await asyncio.sleep(0.01)
+        self.assertEqual(pool.recycled_pages, 1)
+        self.assertTrue(crashed_page.closed)
+        self.assertEqual(len(pool.signers), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/test/test_zhihu_signer.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+import unittest
+
+from media_platform.zhihu.help import ZhihuSigner, extract_d_c0, sign
+from tools.js_worker_pool import find_node_binary
+
+COOKIES = "_xsrf=abc; d_c0=AGBTq5ZzgxqPTh0a1Nq2-cwVuJ6aR5jHj4Q=|1700000000; z_c0=token"
+URL = "/api/v4/search_v3?gk_version=gz-gaokao&t=general&q=python&correction=1&offset=0&limit=20"
+
+
+class TestExtractDC0(unittest.TestCase):
+
+    def test_extract(self):
+        self.assertEqual(extract_d_c0(COOKIES), "AGBTq5ZzgxqPTh0a1Nq2-cwVuJ6aR5jHj4Q=|1700000000")
+        self.assertEqual(extract_d_c0("z_c0=token"), "")
+
+
+@unittest.skipIf(find_node_binary() is None, "node is not installed")
+class TestZhihuSigner(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.signer = ZhihuSigner(cache_size=2)
+
+    async def asyncTearDown(self):
+        await self.signer.close()
+
+    async def test_sign_matches_execjs_shape(self):
+        sign_res = await self.signer.sign(URL, COOKIES)
+        expected = sign(URL, COOKIES)
+        self.assertEqual(sign_res["x-zst-81"], expected["x-zst-81"])
+        self.assertTrue(sign_res["x-zse-96"].startswith("2.0_"))
+        self.assertEqual(len(sign_res["x-zse-96"]), len(expected["x-zse-96"]))
+
+    async def test_memoized_on_url_and_d_c0(self):
+        first = await self.signer.sign(URL, COOKIES)
+        # other cookies changing does not matter, only d_c0 is signed
+        second = await self.signer.sign(URL, COOKIES.replace("z_c0=token", "z_c0=other"))
+        self.assertIs(first, second)
+        await self.signer.sign(URL, "d_c0=another")
+        self.assertEqual((self.signer.cache_hits, self.signer.cache_misses), (1, 2))
+        self.assertEqual(self.signer.stats()["calls"], 2)
+
+    async def test_cache_is_bounded(self):
+        for offset in range(5):
+            await self.signer.sign(f"{URL}&page={offset}", COOKIES)
+        self.assertEqual(len(self.signer._cache), 2)
+        await self.signer.sign(f"{URL}&page=0", COOKIES)
+        self.assertEqual(self.signer.cache_misses, 6)
+
+    async def test_warmup_starts_workers(self):
+        await self.signer.warmup()
+        self.assertTrue(all(worker.alive for worker in self.signer.pool._workers))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -24,6 +24,7 @@ import pathlib
 from typing import Dict, List
 import aiofiles
 import config
+from tools import json_codec
 from tools.utils import utils
 from tools.words import AsyncWordCloudGenerator
 
@@ -59,7 +60,7 @@ class AsyncFileWriter:
                     try:
                         content = await f.read()
                         if content:
-                            existing_data = json.loads(content)
+                            existing_data = json_codec.loads(content)
                         if not isinstance(existing_data, list):
                             existing_data = [existing_data]
                     except json.JSONDecodeError:
@@ -68,7 +69,7 @@ class AsyncFileWriter:
             existing_data.append(item)
 
             async with aiofiles.open(file_path, 'w', encoding='utf-8') as f:
-                await f.write(json.dumps(existing_data, ensure_ascii=False, indent=4))
+                await f.write(json_codec.dumps(existing_data, indent=4))
 
     async def generate_wordcloud_from_comments(self):
         """
@@ -94,7 +95,7 @@ class AsyncFileWriter:
                     utils.logger.info(f"[AsyncFileWriter.generate_wordcloud_from_comments] Comments file is empty")
                     return
 
-                comments_data = json.loads(content)
+                comments_data = json_codec.loads(content)
                 if not isinstance(comments_data, list):
                     comments_data = [comments_data]
 
@@ -0,0 +1,361 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/http_replay.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# @Desc    : Record-and-replay HTTP harness for offline crawler benchmarks
+#
+# HTTP_REPLAY_MODE = "record": every request made by a platform client goes out
+#   as usual and the request/response pair is appended to a gzip JSON-lines cassette.
+# HTTP_REPLAY_MODE = "replay": responses are served from the cassette, with optional
+#   latency and error injection, so full crawler runs can be profiled offline.
+
+import asyncio
+import base64
+import gzip
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import httpx
+
+import config
+from tools import utils
+
+# Query/body parameters that change on every run (signatures, timestamps, random ids)
+# and must not take part in request matching
+DEFAULT_VOLATILE_PARAMS = frozenset({
+    "a_bogus",
+    "msToken",
+    "webid",
+    "w_rid",
+    "wts",
+    "search_id",
+    "verifyFp",
+    "fp",
+    "_signature",
+})
+
+# Response headers that no longer apply once the body is stored decoded
+_DROP_RESPONSE_HEADERS = frozenset({"content-encoding", "content-length", "transfer-encoding"})
+
+
+class CassetteMissError(httpx.TransportError):
+    """request has no recorded response in the cassette"""
+
+
+class Cassette:
+    """
+    On-disk store of request/response pairs.
+    Every interaction is appended as its own gzip member, so a crashed recording keeps
+    everything written before the crash and the file can be read as one gzip stream.
+    """
+
+    def __init__(self, path: str, volatile_params: Iterable[str] = DEFAULT_VOLATILE_PARAMS):
+        self.path = path
+        self.volatile_params = frozenset(volatile_params)
+        self._interactions: Dict[str, List[Dict]] = {}
+        self._cursors: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return sum(len(items) for items in self._interactions.values())
+
+    def __iter__(self) -> Iterator[Dict]:
+        for items in self._interactions.values():
+            yield from items
+
+    def load(self) -> "Cassette":
+        """
+        Load all recorded interactions from disk
+        :return:
+        """
+        self._interactions.clear()
+        self._cursors.clear()
+        if not os.path.exists(self.path):
+            return self
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                interaction = json.loads(line)
+                self._interactions.setdefault(interaction["key"], []).append(interaction)
+        return self
+
+    def request_key(self, method: str, url: str, body: bytes = b"") -> str:
+        """
+        Build the matching key of a request, volatile parameters are ignored
+        :param method: Request method
+        :param url: Full request url
+        :param body: Request body
+        :return:
+        """
+        parts = urlsplit(url)
+        query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in self.volatile_params)
+        key = f"{method.upper()} {parts.scheme}://{parts.netloc}{parts.path}"
+        if query:
+            key += "?" + urlencode(query)
+        if body:
+            key += "#" + hashlib.sha1(self._normalize_body(body)).hexdigest()
+        return key
+
+    def _normalize_body(self, body: bytes) -> bytes:
+        try:
+            data = json.loads(body)
+        except (ValueError, UnicodeDecodeError):
+            return body
+        if isinstance(data, dict):
+            data = {k: v for k, v in data.items() if k not in self.volatile_params}
+        return json.dumps(data, sort_keys=True, ensure_ascii=False).encode("utf-8")
+
+    def record(self, request: httpx.Request, status_code: int, headers: httpx.Headers, content: bytes, elapsed_ms: float) -> None:
+        """
+        Append one interaction to the cassette file
+        :param request: Sent request, its body must already be read
+        :param status_code: Response status code
+        :param headers: Response headers
+        :param content: Decoded response body
+        :param elapsed_ms: Time spent waiting for the response
+        :return:
+        """
+        key = self.request_key(request.method, str(request.url), request.content)
+        interaction = {
+            "key": key,
+            "method": request.method,
+            "url": str(request.url),
+            "status_code": status_code,
+            "headers": [(k, v) for k, v in headers.multi_items() if k.lower() not in _DROP_RESPONSE_HEADERS],
+            "elapsed_ms": round(elapsed_ms, 2),
+        }
+        try:
+            interaction["text"] = content.decode("utf-8")
+        except UnicodeDecodeError:
+            interaction["b64"] = base64.b64encode(content).decode("ascii")
+
+        line = json.dumps(interaction, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._interactions.setdefault(key, []).append(interaction)
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with gzip.open(self.path, "at", encoding="utf-8") as f:
+                f.write(line)
+
+    def next_interaction(self, request: httpx.Request) -> Optional[Dict]:
+        """
+        Get the next recorded interaction of a request.
+        Identical requests are answered in recorded order, the last answer is repeated once exhausted
+        :param request: Request to answer, its body must already be read
+        :return:
+        """
+        key = self.request_key(request.method, str(request.url), request.content)
+        with self._lock:
+            interactions = self._interactions.get(key)
+            if not interactions:
+                return None
+            cursor = self._cursors.get(key, 0)
+            self._cursors[key] = cursor + 1
+            return interactions[min(cursor, len(interactions) - 1)]
+
+    @staticmethod
+    def build_response(interaction: Dict) -> httpx.Response:
+        if "b64" in interaction:
+            content = base64.b64decode(interaction["b64"])
+        else:
+            content = interaction.get("text", "").encode("utf-8")
+        return httpx.Response(
+            status_code=interaction["status_code"],
+            headers=interaction.get("headers", []),
+            content=content,
+        )
+
+
+class RecordingTransport(httpx.AsyncBaseTransport, httpx.BaseTransport):
+    """Forward requests to the real transport and write every exchange to the cassette"""
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        proxy: Optional[str] = None,
+        async_transport: Optional[httpx.AsyncBaseTransport] = None,
+        sync_transport: Optional[httpx.BaseTransport] = None,
+    ):
+        """
+        :param cassette: Cassette to append to
+        :param proxy: httpx proxy url of the real transport
+        :param async_transport: Real async transport, created lazily when not given
+        :param sync_transport: Real sync transport, created lazily when not given
+        """
+        self.cassette = cassette
+        self._proxy = proxy
+        self._async_transport = async_transport
+        self._sync_transport = sync_transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if self._async_transport is None:
+            self._async_transport = httpx.AsyncHTTPTransport(proxy=self._proxy)
+        await request.aread()
+        start = time.perf_counter()
+        response = await self._async_transport.handle_async_request(request)
+        try:
+            content = await response.aread()
+        finally:
+            await response.aclose()
+        return self._record(request, response, content, start)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if self._sync_transport is None:
+            self._sync_transport = httpx.HTTPTransport(proxy=self._proxy)
+        request.read()
+        start = time.perf_counter()
+        response = self._sync_transport.handle_request(request)
+        try:
+            content = response.read()
+        finally:
+            response.close()
+        return self._record(request, response, content, start)
+
+    def _record(self, request: httpx.Request, response: httpx.Response, content: bytes, start: float) -> httpx.Response:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.cassette.record(request, response.status_code, response.headers, content, elapsed_ms)
+        headers = [(k, v) for k, v in response.headers.multi_items() if k.lower() not in _DROP_RESPONSE_HEADERS]
+        return httpx.Response(response.status_code, headers=headers, content=content)
+
+    async def aclose(self) -> None:
+        if self._async_transport is not None:
+            await self._async_transport.aclose()
+
+    def close(self) -> None:
+        if self._sync_transport is not None:
+            self._sync_transport.close()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport, httpx.BaseTransport):
+    """Serve recorded responses, optionally with injected latency and errors"""
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        latency_ms: float = 0.0,
+        latency_jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        error_status_code: Optional[int] = None,
+        seed: Optional[int] = None,
+    ):
+        """
+        :param cassette: Loaded cassette
+        :param latency_ms: Fixed latency added to every response
+        :param latency_jitter_ms: Random extra latency in [0, latency_jitter_ms]
+        :param error_rate: Probability of failing a request instead of answering it
+        :param error_status_code: Status code of injected failures, None raises httpx.ConnectError instead
+        :param seed: Random seed so that injected latency/errors are reproducible
+        """
+        self.cassette = cassette
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.error_rate = error_rate
+        self.error_status_code = error_status_code
+        self._random = random.Random(seed)
+
+    def _next_delay(self) -> float:
+        return (self.latency_ms + self._random.uniform(0, self.latency_jitter_ms)) / 1000
+
+    def _respond(self, request: httpx.Request) -> httpx.Response:
+        if self.error_rate and self._random.random() < self.error_rate:
+            if self.error_status_code is None:
+                raise httpx.ConnectError("injected replay error", request=request)
+            return httpx.Response(self.error_status_code, content=b"")
+        interaction = self.cassette.next_interaction(request)
+        if interaction is None:
+            raise CassetteMissError(f"no recorded response for {request.method} {request.url}", request=request)
+        return self.cassette.build_response(interaction)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        delay = self._next_delay()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return self._respond(request)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.read()
+        delay = self._next_delay()
+        if delay > 0:
+            time.sleep(delay)
+        return self._respond(request)
+
+
+_cassettes: Dict[str, Cassette] = {}
+
+
+def get_cassette(platform: Optional[str] = None) -> Cassette:
+    """
+    Get the shared cassette of a platform, loading it from disk on first use
+    :param platform: Platform name, defaults to config.PLATFORM
+    :return:
+    """
+    path = os.path.join(config.HTTP_CASSETTE_DIR, f"{platform or config.PLATFORM}.jsonl.gz")
+    cassette = _cassettes.get(path)
+    if cassette is None:
+        cassette = Cassette(path).load()
+        _cassettes[path] = cassette
+        utils.logger.info(f"[http_replay.get_cassette] {config.HTTP_REPLAY_MODE} cassette {path}, {len(cassette)} interactions")
+    return cassette
+
+
+def _build_transport(proxy: Optional[str]):
+    if config.HTTP_REPLAY_MODE == "record":
+        return RecordingTransport(get_cassette(), proxy=proxy)
+    return ReplayTransport(
+        get_cassette(),
+        latency_ms=config.HTTP_REPLAY_LATENCY_MS,
+        latency_jitter_ms=config.HTTP_REPLAY_LATENCY_JITTER_MS,
+        error_rate=config.HTTP_REPLAY_ERROR_RATE,
+        seed=config.HTTP_REPLAY_SEED,
+    )
+
+
+def is_enabled() -> bool:
+    return config.HTTP_REPLAY_MODE in ("record", "replay")
+
+
+def create_async_client(proxy: Optional[str] = None, **kwargs) -> httpx.AsyncClient:
+    """
+    Create the httpx.AsyncClient used by platform clients.
+    Without HTTP_REPLAY_MODE this is a plain httpx.AsyncClient(proxy=proxy)
+    :param proxy: httpx proxy url
+    :param kwargs: Other httpx.AsyncClient arguments, such as follow_redirects
+    :return:
+    """
+    if not is_enabled():
+        return httpx.AsyncClient(proxy=proxy, **kwargs)
+    return httpx.AsyncClient(transport=_build_transport(proxy), **kwargs)
+
+
+def create_client(proxy: Optional[str] = None, **kwargs) -> httpx.Client:
+    """
+    Synchronous version of create_async_client
+    :param proxy: httpx proxy url
+    :param kwargs: Other httpx.Client arguments
+    :return:
+    """
+    if not is_enabled():
+        return httpx.Client(proxy=proxy, **kwargs)
+    return httpx.Client(transport=_build_transport(proxy), **kwargs)
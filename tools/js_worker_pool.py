@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/js_worker_pool.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# @Desc    : Pool of long-lived Node.js workers that run the signing scripts in libs/
+#
+# PyExecJS with the Node runtime starts a new node process for every call (tens of milliseconds, blocking the event loop).
+# Here each worker loads the sign script once (libs/js_sign_worker.js) and answers newline-delimited JSON requests
+# over stdio, so a signature costs one pipe round trip. Workers that crash or hang are restarted and their
+# in-flight requests are re-sent once. Without a Node binary the pool falls back to PyExecJS in a worker thread.
+
+import asyncio
+import itertools
+import json
+import os
+import shutil
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+import execjs
+
+from tools import utils
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "libs", "js_sign_worker.js")
+
+# a request is re-sent at most this many times when its worker dies
+MAX_REQUEST_ATTEMPTS = 2
+
+
+class JsWorkerError(Exception):
+    """js function failed, or the worker died or hung while running it"""
+
+
+def find_node_binary() -> Optional[str]:
+    return shutil.which("node") or shutil.which("nodejs")
+
+
+class JsCallStats:
+    """Per-call latency of one pool, measured from submit to result, including queueing"""
+
+    def __init__(self, window: int = 2000):
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.worker_restarts = 0
+        self._latencies_ms: Deque[float] = deque(maxlen=window)
+
+    def record(self, latency_ms: float, ok: bool = True) -> None:
+        self.calls += 1
+        if not ok:
+            self.errors += 1
+        self._latencies_ms.append(latency_ms)
+
+    def percentile(self, pct: float) -> float:
+        if not self._latencies_ms:
+            return 0.0
+        ordered = sorted(self._latencies_ms)
+        return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+    def snapshot(self) -> Dict[str, Any]:
+        latencies = self._latencies_ms
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "worker_restarts": self.worker_restarts,
+            "avg_ms": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+            "p50_ms": round(self.percentile(50), 3),
+            "p95_ms": round(self.percentile(95), 3),
+            "p99_ms": round(self.percentile(99), 3),
+            "max_ms": round(max(latencies), 3) if latencies else 0.0,
+        }
+
+
+class _JsWorker:
+    """One node process, requests are pipelined and answered in order"""
+
+    def __init__(self, pool: "JsWorkerPool", index: int):
+        self.pool = pool
+        self.index = index
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.reader_task: Optional[asyncio.Task] = None
+        # request id -> (future, request, attempts)
+        self.pending: Dict[int, Tuple[asyncio.Future, Dict, int]] = {}
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    async def start(self) -> None:
+        self.process = await asyncio.create_subprocess_exec(
+            self.pool.node_binary, WORKER_SCRIPT, self.pool.script_path,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            limit=1024 * 1024,
+        )
+        self.reader_task = asyncio.create_task(self._read_responses(self.process))
+
+    def submit(self, request: Dict, future: asyncio.Future, attempts: int) -> None:
+        self.pending[request["id"]] = (future, request, attempts)
+        self.process.stdin.write(json.dumps(request, ensure_ascii=False).encode("utf-8") + b"\n")
+
+    async def _read_responses(self, process: asyncio.subprocess.Process) -> None:
+        while True:
+            try:
+                line = await process.stdout.readline()
+            except (ValueError, asyncio.LimitOverrunError):
+                line = b""
+            if not line:
+                break
+            response = json.loads(line)
+            entry = self.pending.pop(response.get("id"), None)
+            if entry is None or entry[0].done():
+                continue
+            if "error" in response:
+                entry[0].set_exception(JsWorkerError(response["error"]))
+            else:
+                entry[0].set_result(response.get("result"))
+        if process is self.process:
+            await self.pool._on_worker_exit(self)
+
+    def kill(self) -> None:
+        if self.alive:
+            self.process.kill()
+
+    async def close(self) -> None:
+        if self.reader_task is not None:
+            self.reader_task.cancel()
+        if self.alive:
+            self.process.stdin.close()
+            self.process.kill()
+            await self.process.wait()
+        for future, _, _ in self.pending.values():
+            if not future.done():
+                future.set_exception(JsWorkerError("js worker pool closed"))
+        self.pending.clear()
+
+
+class JsWorkerPool:
+    """
+    Usage:
+        pool = JsWorkerPool("libs/douyin.js", size=2)
+        a_bogus = await pool.call("sign_datail", query_string, user_agent)
+        signatures = await pool.sign_many([("sign_datail", (q1, ua)), ("sign_reply", (q2, ua))])
+    """
+
+    def __init__(self, script_path: str, size: int = 2, timeout: float = 5.0, name: str = ""):
+        """
+        :param script_path: Sign script, its top-level functions can be called
+        :param size: Number of node processes
+        :param timeout: Seconds before a call is considered hung, the worker is then restarted
+        :param name: Pool name used in logs
+        """
+        self.script_path = os.path.abspath(script_path)
+        self.size = max(size, 1)
+        self.timeout = timeout
+        self.name = name or os.path.basename(script_path)
+        self.node_binary = find_node_binary()
+        self.stats = JsCallStats()
+        self._workers: List[_JsWorker] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._request_ids = itertools.count(1)
+        self._execjs_ctx = None
+
+    @property
+    def uses_node_workers(self) -> bool:
+        return self.node_binary is not None
+
+    async def start(self) -> None:
+        """
+        Start the workers, called lazily by the first call. Workers belong to the running event loop
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._workers:
+            return
+        if self._loop is not loop:
+            # previous loop is gone (e.g. another asyncio.run), its processes cannot be awaited anymore
+            for worker in self._workers:
+                worker.kill()
+            self._workers = []
+            self._loop = loop
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._workers:
+                return
+            workers = [_JsWorker(self, i) for i in range(self.size)]
+            await asyncio.gather(*[w.start() for w in workers])
+            self._workers = workers
+            utils.logger.info(f"[JsWorkerPool.start] {self.name}: started {self.size} node workers")
+
+    async def close(self) -> None:
+        workers, self._workers = self._workers, []
+        if self._loop is asyncio.get_running_loop():
+            await asyncio.gather(*[w.close() for w in workers], return_exceptions=True)
+        else:
+            for worker in workers:
+                worker.kill()
+
+    async def call(self, fn: str, *args: Any) -> Any:
+        """
+        Call a top-level function of the sign script
+        :param fn: Function name
+        :param args: JSON serializable arguments
+        :return: Function result
+        """
+        start = time.perf_counter()
+        try:
+            if self.uses_node_workers:
+                result = await self._call_worker(fn, args)
+            else:
+                result = await asyncio.to_thread(self._call_execjs, fn, args)
+        except Exception:
+            self.stats.record((time.perf_counter() - start) * 1000, ok=False)
+            raise
+        self.stats.record((time.perf_counter() - start) * 1000)
+        return result
+
+    async def sign_many(self, calls: Sequence[Tuple[str, Sequence[Any]]]) -> List[Any]:
+        """
+        Run many calls concurrently, spread over all workers
+        :param calls: (function name, arguments) pairs
+        :return: Results in the same order
+        """
+        return list(await asyncio.gather(*[self.call(fn, *args) for fn, args in calls]))
+
+    async def _call_worker(self, fn: str, args: Sequence[Any]) -> Any:
+        await self.start()
+        request = {"id": next(self._request_ids), "fn": fn, "args": list(args)}
+        future = asyncio.get_running_loop().create_future()
+        worker = self._pick_worker()
+        worker.submit(request, future, 1)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            self.stats.timeouts += 1
+            if not future.done():
+                future.cancel()
+            utils.logger.warning(f"[JsWorkerPool.call] {self.name}: {fn} timed out after {self.timeout}s, restarting worker {worker.index}")
+            worker.kill()
+            raise JsWorkerError(f"{self.name}: {fn} timed out after {self.timeout}s")
+
+    def _pick_worker(self) -> _JsWorker:
+        alive = [w for w in self._workers if w.alive] or self._workers
+        return min(alive, key=lambda w: len(w.pending))
+
+    async def _on_worker_exit(self, worker: _JsWorker) -> None:
+        """
+        Restart a crashed or killed worker and re-send its in-flight requests
+        """
+        if worker not in self._workers:
+            return
+        pending, worker.pending = worker.pending, {}
+        returncode = await worker.process.wait()
+        self.stats.worker_restarts += 1
+        utils.logger.warning(f"[JsWorkerPool] {self.name}: worker {worker.index} exited with {returncode}, restarting")
+        try:
+            await worker.start()
+        except Exception as e:
+            for future, _, _ in pending.values():
+                if not future.done():
+                    future.set_exception(JsWorkerError(f"{self.name}: worker restart failed: {e}"))
+            return
+        for future, request, attempts in pending.values():
+            if future.done():
+                continue
+            if attempts >= MAX_REQUEST_ATTEMPTS:
+                future.set_exception(JsWorkerError(f"{self.name}: worker died while running {request['fn']}"))
+            else:
+                worker.submit(request, future, attempts + 1)
+
+    def _call_execjs(self, fn: str, args: Sequence[Any]) -> Any:
+        if self._execjs_ctx is None:
+            with open(self.script_path, encoding="utf-8-sig") as f:
+                self._execjs_ctx = execjs.compile(f.read())
+        return self._execjs_ctx.call(fn, *args)
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/json_codec.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# @Desc    : Pluggable JSON codec, uses orjson or msgspec when installed and falls back to the standard library
+#
+# All helpers keep the ensure_ascii=False semantics of the json.dumps calls they replaced. Stored values that
+# were written with the json.dumps defaults (ASCII escapes, ", " separators), such as the image_list, tag_list
+# and pictures columns of the XHS store, stay on json.dumps so the stored bytes do not change.
+# The fast encoders spell exponent floats ("1e16" vs "1e+16") and non-finite floats ("null" vs "Infinity")
+# differently from the standard library, which is fine for parsing but not for signatures:
+# anything that is signed must go through dumps_compact(), which is always byte-for-byte identical to
+#     json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+import json
+from typing import Any, Callable, Optional, Tuple, Type, Union
+
+import config
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - optional speedup
+    msgspec = None
+
+BACKEND_ORJSON = "orjson"
+BACKEND_MSGSPEC = "msgspec"
+BACKEND_STDLIB = "stdlib"
+
+# placeholder for one indentation level, raw control characters never appear in encoded JSON
+_INDENT_MARKER = b"\x01"
+
+
+def _select_backend(name: str) -> str:
+    if name in ("auto", BACKEND_ORJSON) and orjson is not None:
+        return BACKEND_ORJSON
+    if name in ("auto", BACKEND_MSGSPEC) and msgspec is not None:
+        return BACKEND_MSGSPEC
+    return BACKEND_STDLIB
+
+
+BACKEND = _select_backend(getattr(config, "JSON_CODEC_BACKEND", "auto"))
+
+_fast_loads: Optional[Callable[[Union[str, bytes]], Any]] = None
+_fast_dumps: Optional[Callable[[Any], bytes]] = None
+_fast_dumps_indent: Optional[Callable[[Any], bytes]] = None
+# errors of the fast backend that the standard library gets another chance to handle
+_fast_errors: Tuple[Type[Exception], ...] = (TypeError, ValueError, OverflowError)
+
+if BACKEND == BACKEND_ORJSON:
+    _fast_loads = orjson.loads
+    _fast_dumps = orjson.dumps
+
+    def _fast_dumps_indent(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+
+elif BACKEND == BACKEND_MSGSPEC:
+    _fast_errors = _fast_errors + (msgspec.MsgspecError,)
+    _msgspec_encoder = msgspec.json.Encoder()
+    _msgspec_decoder = msgspec.json.Decoder()
+    _fast_loads = _msgspec_decoder.decode
+    _fast_dumps = _msgspec_encoder.encode
+
+    def _fast_dumps_indent(obj: Any) -> bytes:
+        return msgspec.json.format(_msgspec_encoder.encode(obj), indent=2)
+
+
+def _widen_indent(data: bytes, indent: int) -> bytes:
+    """
+    Re-indent 2-space encoder output, every line of indented JSON starts with its indentation
+    :param data: JSON encoded with 2-space indentation
+    :param indent: Target spaces per level
+    :return:
+    """
+    depth = 0
+    while b"\n" + b"  " * (depth + 1) in data:
+        depth += 1
+    # deepest level first, so that shallower patterns never match a prefix of deeper lines
+    for level in range(depth, 0, -1):
+        data = data.replace(b"\n" + b"  " * level, b"\n" + _INDENT_MARKER * level)
+    return data.replace(_INDENT_MARKER, b" " * indent)
+
+
+def loads(data: Union[str, bytes, bytearray], strict: bool = True) -> Any:
+    """
+    Decode JSON text or utf-8 bytes
+    :param data: JSON document
+    :param strict: Same as json.loads, False allows control characters inside strings
+    :return:
+    """
+    if _fast_loads is not None:
+        try:
+            return _fast_loads(data)
+        except _fast_errors:
+            # NaN literals, integers beyond 64 bits, control characters, non utf-8 bytes...
+            # let the standard library decide, it also raises the familiar JSONDecodeError
+            pass
+    return json.loads(data, strict=strict)
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """
+    Encode to compact utf-8 bytes, non-ascii characters are kept as is
+    :param obj:
+    :return:
+    """
+    if _fast_dumps is not None:
+        try:
+            return _fast_dumps(obj)
+        except _fast_errors:
+            pass
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def dumps_compact(obj: Any) -> str:
+    """
+    Same output as json.dumps(obj, separators=(",", ":"), ensure_ascii=False), byte for byte, used for signed payloads.
+    Always the standard library: signing takes milliseconds in the browser, the microseconds a fast encoder saves on
+    a few hundred bytes (see benchmarks/bench_json_codec.py) are not worth a differently spelled float
+    :param obj:
+    :return:
+    """
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+def dumps(obj: Any, indent: Optional[int] = None) -> str:
+    """
+    Encode to str with ensure_ascii=False, same layout as json.dumps(obj, ensure_ascii=False, indent=indent)
+    when indent is given, compact otherwise. Not for signed payloads, see dumps_compact()
+    :param obj:
+    :param indent: Spaces per indentation level
+    :return:
+    """
+    if indent is None:
+        return dumps_bytes(obj).decode("utf-8")
+    if _fast_dumps_indent is not None:
+        try:
+            res = _fast_dumps_indent(obj)
+        except _fast_errors:
+            pass
+        else:
+            if indent != 2:
+                res = _widen_indent(res, indent)
+            return res.decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, indent=indent)
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/pipeline.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# @Desc    : Streaming producer/consumer pipeline for the search -> detail -> store -> comments flow
+#
+# Stages are connected by bounded queues and each stage runs its own number of workers, so search
+# pagination, detail fetching, storage and comment pagination overlap instead of running page by page.
+# A handler passes its results on with `await emit(item)`; when the next queue is full emit waits, which
+# slows the upstream stage down to the pace of the slowest one (back-pressure).
+# Every item is handled with the contextvars of the handler that emitted it, so values such as
+# source_keyword_var set while searching a keyword reach the store calls of the later stages.
+# A failing item is logged and dropped, the other items keep flowing. A fatal error, such as an open
+# circuit or an IP block that rotating the proxy did not fix, cancels every stage and is raised by run().
+# The search stage runs config.KEYWORD_WORKERS keywords at once, each with its own pagination state,
+# while the detail and comment stages keep one worker count for all keywords.
+
+import asyncio
+import contextvars
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, Type
+
+from tenacity import RetryError
+
+import config
+from tools import utils
+from tools.resilience import CircuitOpenError
+
+Emit = Callable[[Any], Awaitable[None]]
+StageHandler = Callable[[Any, Emit], Awaitable[None]]
+
+ExceptionTypes = Tuple[Type[BaseException], ...]
+
+# put into a queue once per worker of the stage when its upstream is finished
+_DONE = object()
+
+# errors that stop the pipeline instead of dropping the item, search crawls add theirs with search_fatal_errors()
+PIPELINE_FATAL_ERRORS: ExceptionTypes = (CircuitOpenError,)
+
+
+def search_fatal_errors(*platform_errors: Type[BaseException]) -> ExceptionTypes:
+    """
+    Fatal errors of a search crawl, a blocked IP or a refused login stops the whole search instead of dropping one item
+    :param platform_errors: IP block and auth errors of the platform
+    :return:
+    """
+    return (*PIPELINE_FATAL_ERRORS, *platform_errors)
+
+
+def stage_workers(configured: int) -> int:
+    """
+    Worker count of a stage, 0 falls back to config.MAX_CONCURRENCY_NUM
+    :param configured:
+    :return:
+    """
+    return configured if configured > 0 else max(config.MAX_CONCURRENCY_NUM, 1)
+
+
+def keyword_workers() -> int:
+    """Keywords crawled at the same time, see config.KEYWORD_WORKERS"""
+    return max(config.KEYWORD_WORKERS, 1)
+
+
+async def run_keyword_workers(
+    name: str,
+    keywords: Iterable[str],
+    crawl_keyword: Callable[[str], Awaitable[None]],
+    fatal_errors: ExceptionTypes = PIPELINE_FATAL_ERRORS,
+) -> Dict[str, Any]:
+    """
+    Crawl keywords config.KEYWORD_WORKERS at a time, for crawlers whose search does not run as a pipeline.
+    Every keyword runs in its own task, so the source_keyword_var it sets stays with its results.
+    :param name: Name used in logs
+    :param keywords:
+    :param crawl_keyword: async crawl_keyword(keyword), pages through the results of one keyword
+    :param fatal_errors: Errors that stop the other keywords too, see CrawlPipeline
+    :return: stats
+    """
+
+    async def search(keyword: str, emit: Emit) -> None:
+        await crawl_keyword(keyword)
+
+    pipeline = CrawlPipeline(name, fatal_errors=fatal_errors)
+    return await pipeline.add_stage("search", search, workers=keyword_workers()).run(keywords)
+
+
+def is_fatal(exc: BaseException, fatal_errors: ExceptionTypes) -> bool:
+    """
+    Whether an error raised by a stage handler stops the pipeline, a RetryError counts as its last error
+    :param exc:
+    :param fatal_errors:
+    :return:
+    """
+    if isinstance(exc, RetryError):
+        exc = exc.last_attempt.exception()
+    return isinstance(exc, fatal_errors)
+
+
+class PipelineStage:
+
+    def __init__(self, name: str, handler: StageHandler, workers: int = 1):
+        """
+        :param name: Stage name used in logs and stats
+        :param handler: async handler(item, emit), emit passes an item on to the next stage
+        :param workers: Items handled at the same time
+        """
+        self.name = name
+        self.handler = handler
+        self.workers = max(workers, 1)
+        self.processed = 0
+        self.emitted = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.max_queue_depth = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "processed": self.processed,
+            "emitted": self.emitted,
+            "errors": self.errors,
+            "busy_sec": round(self.busy_seconds, 3),
+            "max_queue_depth": self.max_queue_depth,
+        }
+
+
+class CrawlPipeline:
+    """
+    Usage:
+        pipeline = CrawlPipeline("xhs_search")
+        pipeline.add_stage("search", search_keyword)             # emits the post items of every page
+        pipeline.add_stage("detail", fetch_detail, workers=4)    # emits the note details
+        pipeline.add_stage("store", store_note)
+        await pipeline.run(["keyword1", "keyword2"])
+    """
+
+    def __init__(self, name: str, queue_size: Optional[int] = None, fatal_errors: ExceptionTypes = PIPELINE_FATAL_ERRORS):
+        """
+        :param name: Pipeline name used in logs
+        :param queue_size: Capacity of the queue in front of each stage, defaults to config.PIPELINE_QUEUE_SIZE
+        :param fatal_errors: Errors that cancel every stage and are raised by run(), also when they are the
+                             last error of a RetryError. Other errors only drop the item
+        """
+        self.name = name
+        self.queue_size = config.PIPELINE_QUEUE_SIZE if queue_size is None else queue_size
+        self.fatal_errors = fatal_errors
+        self.stages: List[PipelineStage] = []
+        self.elapsed_seconds = 0.0
+
+    def add_stage(self, name: str, handler: StageHandler, workers: int = 1) -> "CrawlPipeline":
+        self.stages.append(PipelineStage(name, handler, workers))
+        return self
+
+    async def run(self, items: Iterable[Any]) -> Dict[str, Any]:
+        """
+        Feed items into the first stage and wait until every stage has drained
+        :param items: Input of the first stage, such as the keywords
+        :return: stats
+        """
+        if not self.stages:
+            raise ValueError(f"[CrawlPipeline.run] pipeline {self.name} has no stage")
+        # the feeder of the first stage may wait on back-pressure too, so it gets the same queue bound
+        queues: List[asyncio.Queue] = [asyncio.Queue(maxsize=self.queue_size) for _ in self.stages]
+        start = time.perf_counter()
+        try:
+            async with asyncio.TaskGroup() as group:
+                group.create_task(self._feed(items, queues[0], self.stages[0].workers))
+                for index, stage in enumerate(self.stages):
+                    downstream = self._downstream(index, queues)
+                    remaining = [stage.workers]
+                    for _ in range(stage.workers):
+                        group.create_task(self._work(stage, queues[index], downstream, remaining))
+        except ExceptionGroup as group_error:
+            # the first fatal error, raised the way the crawler raised it before it ran as a pipeline
+            self.elapsed_seconds = time.perf_counter() - start
+            utils.logger.error(f"[CrawlPipeline.run] {self.name} stopped: {self.stats()}")
+            raise group_error.exceptions[0]
+        self.elapsed_seconds = time.perf_counter() - start
+        stats = self.stats()
+        utils.logger.info(f"[CrawlPipeline.run] {self.name} finished: {stats}")
+        return stats
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "elapsed_sec": round(self.elapsed_seconds, 3),
+            "stages": {stage.name: stage.stats() for stage in self.stages},
+        }
+
+    def _downstream(self, index: int, queues: List[asyncio.Queue]) -> Optional[Tuple[asyncio.Queue, int]]:
+        if index + 1 >= len(self.stages):
+            return None
+        return queues[index + 1], self.stages[index + 1].workers
+
+    @staticmethod
+    async def _feed(items: Iterable[Any], queue: asyncio.Queue, workers: int) -> None:
+        for item in items:
+            await queue.put((contextvars.copy_context(), item))
+        for _ in range(workers):
+            await queue.put(_DONE)
+
+    async def _work(
+        self,
+        stage: PipelineStage,
+        queue: asyncio.Queue,
+        downstream: Optional[Tuple[asyncio.Queue, int]],
+        remaining: List[int],
+    ) -> None:
+        """
+        Handle the items of one stage until its upstream is done, the last worker to stop closes the next stage
+        :param stage:
+        :param queue: Input queue of the stage
+        :param downstream: Input queue and worker count of the next stage, None for the last stage
+        :param remaining: Running workers of the stage, shared by them
+        :return:
+        """
+
+        async def emit(item: Any) -> None:
+            stage.emitted += 1
+            if downstream is not None:
+                await downstream[0].put((contextvars.copy_context(), item))
+
+        try:
+            while True:
+                entry = await queue.get()
+                if entry is _DONE:
+                    break
+                stage.max_queue_depth = max(stage.max_queue_depth, queue.qsize() + 1)
+                context, item = entry
+                started = time.perf_counter()
+                try:
+                    # run in the context of the emitter, so its contextvars follow the item
+                    await asyncio.create_task(stage.handler(item, emit), context=context)
+                except Exception as e:
+                    stage.errors += 1
+                    if is_fatal(e, self.fatal_errors):
+                        utils.logger.error(f"[CrawlPipeline.{stage.name}] {self.name} stopped by fatal error: {e!r}")
+                        raise
+                    utils.logger.error(f"[CrawlPipeline.{stage.name}] {self.name} item failed and was dropped, err: {e!r}")
+                finally:
+                    stage.processed += 1
+                    stage.busy_seconds += time.perf_counter() - started
+        finally:
+            remaining[0] -= 1
+        # not reached when the pipeline is cancelled, nobody would drain a full queue then
+        if remaining[0] == 0 and downstream is not None:
+            next_queue, next_workers = downstream
+            for _ in range(next_workers):
+                await next_queue.put(_DONE)
@@ -0,0 +1,409 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/resilience.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# @Desc    : Shared retry, backoff and circuit-breaker policy for platform clients
+#
+# Every failed attempt is classified into one of four actions:
+#   RETRY        - back off with jitter and try again
+#   ROTATE_PROXY - switch the client to a fresh proxy before the next attempt (e.g. IPBlockError)
+#   RELOGIN      - refresh login cookies from the browser before the next attempt
+#   FATAL        - raise immediately, retrying cannot help
+# When attempts run out tenacity.RetryError is raised, same as the former @retry decorators.
+# A call to an endpoint whose breaker is open raises CircuitOpenError without being sent, fallbacks
+# that catch RetryError must catch it too.
+# Stats, breakers and retry budgets belong to a run: `with resilience_run():` around one crawl gives it
+# fresh ones, so concurrent crawl jobs of one process do not share them and a long running server does
+# not keep an exhausted budget or an open breaker from an earlier job.
+
+import contextvars
+import functools
+import re
+import time
+from contextlib import contextmanager
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Tuple, Type
+
+from tenacity import AsyncRetrying, RetryError, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+from tenacity.stop import stop_base
+
+import config
+from tools import utils
+
+ExceptionTypes = Tuple[Type[BaseException], ...]
+
+# path segments that identify a single resource, collapsed so that one breaker covers one endpoint
+_ID_SEGMENT_PATTERN = re.compile(r"/(?:\d+|[0-9A-Za-z_-]{16,})(?=/|$)")
+
+
+class ErrorAction(Enum):
+    RETRY = "retry"
+    ROTATE_PROXY = "rotate_proxy"
+    RELOGIN = "relogin"
+    FATAL = "fatal"
+
+
+class CircuitOpenError(Exception):
+    """endpoint circuit breaker is open, request is rejected without being sent"""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker of one endpoint.
+    closed -> open after failure_threshold consecutive failures,
+    open -> half_open after recovery_timeout seconds, where a single trial request decides
+    whether to close again or re-open, other requests are rejected while it runs
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, recovery_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self.trial_in_flight = False
+
+    def allow_request(self) -> bool:
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.recovery_timeout:
+                return False
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN:
+            if self.trial_in_flight:
+                return False
+            self.trial_in_flight = True
+        return True
+
+    def release_trial(self) -> None:
+        """
+        The trial request ended without an outcome (e.g. cancelled), let the next request try
+        """
+        self.trial_in_flight = False
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.trial_in_flight = False
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or (
+            self.failure_threshold > 0 and self.consecutive_failures >= self.failure_threshold
+        ):
+            if self.state != self.OPEN:
+                self.trips += 1
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+class ResilienceStats:
+    """Counters of one policy for the current run"""
+
+    def __init__(self):
+        self.calls = 0
+        self.attempts = 0
+        self.retries = 0
+        self.proxy_rotations = 0
+        self.relogins = 0
+        self.fatal_errors = 0
+        self.exhausted_calls = 0
+        self.rejected_by_breaker = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        return dict(self.__dict__)
+
+
+class _PolicyState:
+    """Stats and breakers of one policy in one run"""
+
+    def __init__(self):
+        self.stats = ResilienceStats()
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+
+class ResilienceRun:
+    """State of every policy used during one crawl run"""
+
+    def __init__(self):
+        self.states: Dict["ResiliencePolicy", _PolicyState] = {}
+
+    def state_of(self, policy: "ResiliencePolicy") -> _PolicyState:
+        state = self.states.get(policy)
+        if state is None:
+            state = self.states[policy] = _PolicyState()
+        return state
+
+
+# run of the current task, tasks created by a crawler inherit it
+resilience_run_var: contextvars.ContextVar[Optional[ResilienceRun]] = contextvars.ContextVar(
+    "resilience_run", default=None
+)
+# used by calls made outside of a run
+_process_run = ResilienceRun()
+
+
+def current_resilience_run() -> ResilienceRun:
+    return resilience_run_var.get() or _process_run
+
+
+@contextmanager
+def resilience_run() -> Iterator[ResilienceRun]:
+    """
+    Give the policy calls of the current task, and of the tasks it creates, fresh stats, breakers and budgets
+    :return:
+    """
+    run = ResilienceRun()
+    token = resilience_run_var.set(run)
+    try:
+        yield run
+    finally:
+        resilience_run_var.reset(token)
+
+
+class _stop_when_budget_exhausted(stop_base):
+    def __init__(self, policy: "ResiliencePolicy"):
+        self.policy = policy
+
+    def __call__(self, retry_state) -> bool:
+        return self.policy.budget_exhausted()
+
+
+class ResiliencePolicy:
+    """
+    Retry policy shared by the request methods of one platform client
+
+    Usage:
+        xhs_resilience_policy = ResiliencePolicy("xhs", rotate_proxy_errors=(IPBlockError,))
+
+        @xhs_resilience_policy.retry
+        async def request(self, method, url, **kwargs): ...
+    """
+
+    # Retrying cannot fix a rejected call of an open breaker or a programming error
+    NON_RETRYABLE_ERRORS: ExceptionTypes = (CircuitOpenError, NotImplementedError, TypeError, AttributeError)
+
+    def __init__(
+        self,
+        name: str,
+        max_attempts: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 10.0,
+        jitter: float = 1.0,
+        retryable_errors: Optional[ExceptionTypes] = None,
+        rotate_proxy_errors: ExceptionTypes = (),
+        relogin_errors: ExceptionTypes = (),
+        fatal_errors: ExceptionTypes = NON_RETRYABLE_ERRORS,
+        retry_budget: Optional[int] = None,
+    ):
+        """
+        :param name: Policy name, used in logs and stats
+        :param max_attempts: Maximum attempts of one call, including the first one
+        :param base_delay: First backoff delay in seconds, doubled on every retry
+        :param max_delay: Upper bound of one backoff delay in seconds
+        :param jitter: Random extra delay in [0, jitter] seconds added to each backoff
+        :param retryable_errors: Only these errors are retried, None means every non-fatal error
+        :param rotate_proxy_errors: Errors that need a fresh proxy before the next attempt
+        :param relogin_errors: Errors that need refreshed login cookies before the next attempt
+        :param fatal_errors: Errors raised immediately
+        :param retry_budget: Maximum retries of this policy during one run, defaults to config.RETRY_BUDGET_PER_RUN
+                             read when the run retries, so the settings of the crawl job apply
+        """
+        self.name = name
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.retryable_errors = retryable_errors
+        self.rotate_proxy_errors = rotate_proxy_errors
+        self.relogin_errors = relogin_errors
+        self.fatal_errors = fatal_errors
+        self._retry_budget = retry_budget
+
+    @property
+    def retry_budget(self) -> int:
+        return config.RETRY_BUDGET_PER_RUN if self._retry_budget is None else self._retry_budget
+
+    @retry_budget.setter
+    def retry_budget(self, value: Optional[int]) -> None:
+        self._retry_budget = value
+
+    @property
+    def stats(self) -> ResilienceStats:
+        """Stats of the current run"""
+        return current_resilience_run().state_of(self).stats
+
+    @property
+    def breakers(self) -> Dict[str, CircuitBreaker]:
+        """Endpoint breakers of the current run"""
+        return current_resilience_run().state_of(self).breakers
+
+    def classify(self, exc: BaseException) -> ErrorAction:
+        """
+        Decide how to react to a failed attempt
+        :param exc: Raised exception
+        :return:
+        """
+        if isinstance(exc, self.fatal_errors):
+            return ErrorAction.FATAL
+        if isinstance(exc, self.rotate_proxy_errors):
+            return ErrorAction.ROTATE_PROXY
+        if isinstance(exc, self.relogin_errors):
+            return ErrorAction.RELOGIN
+        if self.retryable_errors is not None and not isinstance(exc, self.retryable_errors):
+            return ErrorAction.FATAL
+        return ErrorAction.RETRY
+
+    def budget_exhausted(self) -> bool:
+        return 0 < self.retry_budget <= self.stats.retries
+
+    def get_breaker(self, endpoint: str) -> CircuitBreaker:
+        breaker = self.breakers.get(endpoint)
+        if breaker is None:
+            breaker = CircuitBreaker(config.CIRCUIT_BREAKER_FAILURE_THRESHOLD, config.CIRCUIT_BREAKER_RECOVERY_SEC)
+            self.breakers[endpoint] = breaker
+        return breaker
+
+    @staticmethod
+    def endpoint_of(url: str) -> str:
+        """
+        Endpoint name of a url: its path with resource ids collapsed
+        :param url: Request url
+        :return:
+        """
+        path = url.split("?", 1)[0]
+        if "://" in path:
+            path = "/" + path.split("://", 1)[1].partition("/")[2]
+        return _ID_SEGMENT_PATTERN.sub("/{id}", path)
+
+    async def call(
+        self,
+        func: Callable[..., Awaitable[Any]],
+        *args,
+        endpoint: str = "",
+        owner: Any = None,
+        **kwargs,
+    ) -> Any:
+        """
+        Run func under this policy
+        :param func: Coroutine function to run
+        :param endpoint: Endpoint name for the circuit breaker, defaults to func name
+        :param owner: Client instance, used to rotate proxy or refresh login state
+        :return:
+        """
+        endpoint = endpoint or func.__name__
+        breaker = self.get_breaker(endpoint)
+        self.stats.calls += 1
+        last_exc: Optional[BaseException] = None
+
+        retrying = AsyncRetrying(
+            stop=stop_after_attempt(self.max_attempts) | _stop_when_budget_exhausted(self),
+            wait=wait_exponential_jitter(initial=self.base_delay, max=self.max_delay, jitter=self.jitter),
+            retry=retry_if_exception(lambda e: self.classify(e) != ErrorAction.FATAL),
+        )
+        try:
+            async for attempt in retrying:
+                with attempt:
+                    if last_exc is not None:
+                        self.stats.retries += 1
+                        await self._recover(last_exc, owner)
+                    if not breaker.allow_request():
+                        self.stats.rejected_by_breaker += 1
+                        raise CircuitOpenError(f"[{self.name}] circuit open for {endpoint}")
+                    # the half-open trial re-opens the breaker on any error, not only on retryable ones
+                    is_trial = breaker.state == CircuitBreaker.HALF_OPEN
+                    self.stats.attempts += 1
+                    try:
+                        result = await func(*args, **kwargs)
+                    except Exception as e:
+                        last_exc = e
+                        if is_trial or self.classify(e) == ErrorAction.RETRY:
+                            breaker.record_failure()
+                        raise
+                    except BaseException:
+                        if is_trial:
+                            breaker.release_trial()
+                        raise
+                    breaker.record_success()
+                    return result
+        except RetryError:
+            self.stats.exhausted_calls += 1
+            utils.logger.warning(
+                f"[ResiliencePolicy.call] {self.name} {endpoint} gave up after {self.max_attempts} attempts, last error: {last_exc!r}"
+            )
+            raise
+        except Exception:
+            self.stats.fatal_errors += 1
+            raise
+
+    async def _recover(self, exc: BaseException, owner: Any) -> None:
+        action = self.classify(exc)
+        utils.logger.info(f"[ResiliencePolicy] {self.name} retrying after {exc.__class__.__name__}: {exc}, action: {action.value}")
+        if owner is None:
+            return
+        if action == ErrorAction.ROTATE_PROXY and hasattr(owner, "rotate_proxy"):
+            self.stats.proxy_rotations += 1
+            await owner.rotate_proxy()
+        elif action == ErrorAction.RELOGIN and getattr(owner, "playwright_page", None) is not None:
+            self.stats.relogins += 1
+            await owner.update_cookies(browser_context=owner.playwright_page.context)
+
+    def retry(self, func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        """
+        Decorator for client methods, the endpoint is taken from the `url` argument when present
+        :param func: Client coroutine method, first argument is the client instance
+        :return:
+        """
+
+        @functools.wraps(func)
+        async def wrapper(owner, *args, **kwargs):
+            url = kwargs.get("url")
+            if url is None:
+                url = next((a for a in args if isinstance(a, str) and a.startswith("http")), None)
+            endpoint = self.endpoint_of(url) if url else func.__name__
+            return await self.call(func, owner, *args, endpoint=endpoint, owner=owner, **kwargs)
+
+        return wrapper
+
+
+def get_resilience_stats() -> Dict[str, Dict]:
+    """
+    Stats of every policy used in the current run, including retry budget and open breakers
+    :return:
+    """
+    res = {}
+    for policy, state in current_resilience_run().states.items():
+        res[policy.name] = {
+            **state.stats.to_dict(),
+            "retry_budget": policy.retry_budget,
+            "retry_budget_left": max(policy.retry_budget - state.stats.retries, 0) if policy.retry_budget > 0 else None,
+            "open_breakers": [ep for ep, b in state.breakers.items() if b.state != CircuitBreaker.CLOSED],
+            "breaker_trips": sum(b.trips for b in state.breakers.values()),
+        }
+    return res
+
+
+def log_resilience_summary() -> None:
+    for name, stats in get_resilience_stats().items():
+        if stats["calls"]:
+            utils.logger.info(f"[resilience] {name}: {stats}")
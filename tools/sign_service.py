@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2025 relakkes@gmail.com
+#
+# This file is part of MediaCrawler project.
+# Repository: https://github.com/NanmiCoder/MediaCrawler/blob/main/tools/sign_service.py
+# GitHub: https://github.com/NanmiCoder
+# Licensed under NON-COMMERCIAL LEARNING LICENSE 1.1
+#
+
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# @Desc    : Client of the local signing service (sign_server_main.py)
+#
+# The service owns the Xiaohongshu signing pages, the Douyin node workers and the Bilibili WBI keys, so several
+# crawler processes on one machine share them. Every method returns None when the service is not configured,
+# unreachable or fails, the caller then signs in-process. After a connection error the service is skipped for
+# SIGN_SERVICE_RETRY_INTERVAL_SEC seconds, so an absent daemon costs one failed connect per interval.
+
+import asyncio
+import time
+from typing import Any, Dict, Optional, Tuple, Union
+
+import httpx
+
+import config
+from tools import json_codec, utils
+
+
+class SignServiceClient:
+    """
+    Usage:
+        signs = await sign_service.sign_xhs(uri, data, a1, method, b1)
+        if signs is None:
+            signs = await local_signer.sign(uri, data, a1, method)
+    """
+
+    def __init__(
+        self,
+        base_url: str = "",
+        uds: str = "",
+        timeout: float = 5.0,
+        retry_interval: float = 30.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        """
+        :param base_url: Service address, e.g. http://127.0.0.1:8765
+        :param uds: Unix socket path of the service, takes precedence over the host of base_url
+        :param timeout: Seconds to wait for one signature
+        :param retry_interval: Seconds the service is skipped after a connection error
+        :param transport: Custom httpx transport, used by tests
+        """
+        self.base_url = base_url.rstrip("/") or ("http://sign-service" if uds or transport else "")
+        self.uds = uds
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self.transport = transport
+        self.calls = 0
+        self.fallbacks = 0
+        self._unavailable_until = 0.0
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.base_url)
+
+    @property
+    def available(self) -> bool:
+        """False when the service is disabled or failed within the last retry_interval seconds"""
+        return self.enabled and time.monotonic() >= self._unavailable_until
+
+    async def ping(self) -> bool:
+        return await self._request("GET", "/health") is not None
+
+    async def sign_xhs(
+        self,
+        uri: str,
+        data: Optional[Union[Dict, str]] = None,
+        a1: str = "",
+        method: str = "POST",
+        b1: str = "",
+    ) -> Optional[Dict[str, Any]]:
+        """
+        :param b1: b1 from the localStorage of the crawler's browser, the service only computes x3 on its own page
+                   and builds x-s-common from this b1 and a1, so both fingerprints belong to the crawler
+        :return: x-s, x-t, x-s-common and x-b3-traceid, same as XhsPageSigner.sign
+        """
+        return await self._request(
+            "POST", "/sign/xhs", {"uri": uri, "data": data, "a1": a1, "method": method, "b1": b1}
+        )
+
+    async def sign_douyin(self, url: str, params: str, user_agent: str) -> Optional[str]:
+        result = await self._request("POST", "/sign/douyin", {"url": url, "params": params, "user_agent": user_agent})
+        return result["a_bogus"] if result is not None else None
+
+    async def get_bilibili_wbi_keys(self) -> Optional[Tuple[str, str]]:
+        result = await self._request("GET", "/sign/bilibili/wbi_keys")
+        return (result["img_key"], result["sub_key"]) if result is not None else None
+
+    async def close(self) -> None:
+        client, self._client = self._client, None
+        if client is not None and self._loop is asyncio.get_running_loop():
+            await client.aclose()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            # a client belongs to the loop it was created on, e.g. every asyncio.run needs a new one
+            transport = self.transport or (httpx.AsyncHTTPTransport(uds=self.uds) if self.uds else None)
+            self._client = httpx.AsyncClient(base_url=self.base_url, transport=transport, timeout=self.timeout)
+            self._loop = loop
+        return self._client
+
+    async def _request(self, method: str, path: str, payload: Optional[Dict] = None) -> Optional[Any]:
+        if not self.available:
+            return None
+        self.calls += 1
+        try:
+            content = json_codec.dumps_bytes(payload) if payload is not None else None
+            response = await self._get_client().request(
+                method, path, content=content, headers={"content-type": "application/json"}
+            )
+            response.raise_for_status()
+            return json_codec.loads(response.content)
+        except httpx.TransportError as e:
+            self._unavailable_until = time.monotonic() + self.retry_interval
+            utils.logger.warning(
+                f"[SignServiceClient] {self.base_url} unreachable ({e!r}), signing in-process for {self.retry_interval}s"
+            )
+        except Exception as e:
+            utils.logger.warning(f"[SignServiceClient] {method} {path} failed: {e!r}, signing in-process")
+        self.fallbacks += 1
+        return None
+
+
+sign_service = SignServiceClient(
+    base_url=config.SIGN_SERVICE_URL,
+    uds=config.SIGN_SERVICE_UDS,
+    timeout=config.SIGN_SERVICE_TIMEOUT_SEC,
+    retry_interval=config.SIGN_SERVICE_RETRY_INTERVAL_SEC,
+)